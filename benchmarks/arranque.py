@@ -0,0 +1,87 @@
+"""Tiempo de arranque con data.json y con el snapshot binario (data.bin).
+
+Genera un data.json con N tareas, lo migra a data.bin con el propio almacenamiento
+(TAREAS_FORMATO_SNAPSHOT=binario) y mide cuanto tarda DataHandler en cargar cada
+archivo, con y sin carga diferida. Informa la mediana de --repeticiones cargas, el
+tamano de cada archivo y, para las cargas diferidas, lo que tarda despues hidratar
+todas las tareas. Uso:
+
+    python benchmarks/arranque.py --tareas 200000
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datos import generar_datos
+from data_handler import DataHandler
+from storage.json_storage import AlmacenamientoJSON
+
+CASOS = [
+    ('json', 'json', False),
+    ('json diferida', 'json', True),
+    ('binario', 'binario', False),
+    ('binario diferida', 'binario', True),
+]
+
+
+def cargar(ruta, formato, carga_diferida):
+    gc.collect()
+    inicio = time.perf_counter()
+    handler = DataHandler(ruta, almacenamiento=AlmacenamientoJSON(ruta, carga_diferida=carga_diferida,
+                                                                  formato_snapshot=formato))
+    return handler, time.perf_counter() - inicio
+
+
+def medir(ruta, formato, carga_diferida, repeticiones, tareas):
+    duraciones = []
+    for _ in range(repeticiones):
+        handler, duracion = cargar(ruta, formato, carga_diferida)
+        assert len(handler.tareas) == tareas
+        duraciones.append(duracion)
+    resultado = {"segundos_carga": round(statistics.median(duraciones), 3)}
+    if carga_diferida:
+        inicio = time.perf_counter()
+        for tarea in handler.tareas:
+            tarea.usuariosAsignados
+        resultado["segundos_hidratar_todas"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tareas', type=int, default=200000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--asignaciones', type=int, default=2, help="usuarios asignados por tarea")
+    parser.add_argument('--dependencias', type=int, default=20000, help="aristas del grafo de dependencias")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(directorio, 'data.json')
+        generar_datos(ruta, args.tareas, args.usuarios, args.asignaciones, args.dependencias)
+        # Sin data.bin el almacenamiento binario lee data.json; guardar escribe data.bin
+        handler, _ = cargar(ruta, 'binario', True)
+        handler.save_data()
+        del handler
+        tamanos = {'json': os.path.getsize(ruta), 'binario': os.path.getsize(os.path.join(directorio, 'data.bin'))}
+
+        resultados = {"tareas": args.tareas, "bytes": tamanos, "casos": {}}
+        for nombre, formato, carga_diferida in CASOS:
+            resultados["casos"][nombre] = medir(ruta, formato, carga_diferida, args.repeticiones, args.tareas)
+        print(json.dumps(resultados, indent=2))
+    finally:
+        shutil.rmtree(directorio)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Generador de conjuntos de datos sinteticos para los benchmarks.
+
+Escribe un data.json con el mismo formato que AlmacenamientoJSON. Con la misma
+semilla el archivo es identico byte a byte, asi los resultados se pueden comparar.
+"""
+import datetime
+import json
+import os
+import random
+import sys
+import uuid
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_handler import FORMATO_FECHA
+from models.asignacion import ROLES_VALIDOS
+from models.tarea import ESTADOS_VALIDOS
+
+
+def generar_datos(ruta, tareas, usuarios, asignaciones=1, dependencias=0, semilla=1):
+    """Escribe un snapshot y devuelve (aliases, ids de tareas).
+
+    Cada tarea tiene `asignaciones` usuarios distintos y en total hay `dependencias`
+    aristas, siempre de una tarea hacia otra creada antes (el grafo no tiene ciclos).
+    """
+    aleatorio = random.Random(semilla)
+    inicio = datetime.datetime(2025, 1, 1)
+    aliases = [f"usuario{i}" for i in range(usuarios)]
+    ids = [str(uuid.UUID(int=aleatorio.getrandbits(128), version=4)) for _ in range(tareas)]
+
+    aristas = {}
+    if tareas > 1:
+        for _ in range(dependencias):
+            tarea = aleatorio.randrange(1, tareas)
+            aristas.setdefault(tarea, set()).add(aleatorio.randrange(tarea))
+
+    with open(ruta, 'w') as f:
+        f.write('{"seq": 0, "usuarios": ')
+        json.dump([{"alias": alias, "nombre": alias.title()} for alias in aliases], f)
+        f.write(', "tareas": [')
+        for i, task_id in enumerate(ids):
+            fecha = (inicio + datetime.timedelta(seconds=aleatorio.randrange(365 * 24 * 3600))).strftime(FORMATO_FECHA)
+            tarea = {
+                "id": task_id,
+                "nombre": f"Tarea {i}",
+                "descripcion": "Descripción de la tarea",
+                "estado": aleatorio.choice(ESTADOS_VALIDOS),
+                "fecha_esperada_fin": fecha,
+                "usuarios_asignados": [
+                    {"usuario": alias, "rol": aleatorio.choice(ROLES_VALIDOS), "fecha_asignacion": fecha}
+                    for alias in aleatorio.sample(aliases, min(asignaciones, usuarios))
+                ],
+                "dependencias": [ids[j] for j in sorted(aristas.get(i, ()))]
+            }
+            if i:
+                f.write(', ')
+            json.dump(tarea, f)
+        f.write(']}')
+    return aliases, ids
@@ -0,0 +1,76 @@
+"""Memoria por tarea del modelo en memoria.
+
+Genera un data.json con N tareas (una asignacion cada una), lo carga con
+DataHandler sin carga diferida y mide los bytes que quedan asignados por tarea:
+por defecto como aumento del RSS del proceso; con --tracemalloc, contando las
+asignaciones de Python (mas preciso, pero la carga es unas 10 veces mas lenta). Uso:
+
+    python benchmarks/memoria_modelos.py --tareas 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datos import generar_datos
+from data_handler import DataHandler
+from storage.json_storage import AlmacenamientoJSON
+
+
+def rss():
+    """Memoria residente del proceso en bytes (solo Linux)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def medir(ruta, tareas, usar_tracemalloc=False):
+    gc.collect()
+    if usar_tracemalloc:
+        tracemalloc.start()
+        memoria = lambda: tracemalloc.get_traced_memory()[0]
+    else:
+        memoria = rss
+    antes = memoria()
+    inicio = time.perf_counter()
+    handler = DataHandler(ruta, almacenamiento=AlmacenamientoJSON(ruta, carga_diferida=False))
+    duracion = time.perf_counter() - inicio
+    gc.collect()
+    despues = memoria()
+    if usar_tracemalloc:
+        tracemalloc.stop()
+    assert len(handler.tareas) == tareas
+    return {
+        "metodo": "tracemalloc" if usar_tracemalloc else "rss",
+        "tareas": tareas,
+        "bytes_totales": despues - antes,
+        "bytes_por_tarea": round((despues - antes) / tareas, 1),
+        "segundos_carga": round(duracion, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tareas', type=int, default=1000000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--tracemalloc', action='store_true', help="medir con tracemalloc en lugar del RSS")
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(directorio, 'data.json')
+        generar_datos(ruta, args.tareas, args.usuarios)
+        print(json.dumps(medir(ruta, args.tareas, args.tracemalloc), indent=2))
+    finally:
+        shutil.rmtree(directorio)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+"""Benchmarks de la capa de datos y de los endpoints.
+
+Genera un conjunto de datos sintetico (el mismo para la misma semilla) y mide:
+carga y guardado de DataHandler, cada consulta, cada operacion de cambio, cada
+endpoint con el cliente de pruebas de Flask y una carga concurrente de varios hilos
+contra un servidor local. Cada caso informa p50, p95 y p99 en microsegundos.
+
+Los resultados se escriben como JSON; con --baseline se comparan contra uno guardado
+y el proceso termina con codigo 1 si algun caso empeoro mas que --umbral. Antes de
+comparar, los tiempos se normalizan con una carga de CPU fija que se mide en cada
+corrida, para que una maquina mas lenta (o mas cargada) no parezca una regresion. Uso:
+
+    python benchmarks/suite.py --salida baseline.json
+    python benchmarks/suite.py --baseline baseline.json --umbral 0.25
+"""
+import argparse
+import datetime
+import gc
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datos import generar_datos
+from data_handler import DataHandler
+from storage.json_storage import AlmacenamientoJSON
+
+SECCIONES = ['datos', 'consultas', 'cambios', 'endpoints', 'carga']
+
+
+def resumir(muestras):
+    """Estadisticas en microsegundos de una lista de duraciones en nanosegundos"""
+    ordenadas = sorted(muestras)
+
+    def percentil(fraccion):
+        return round(ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))] / 1000, 2)
+
+    return {
+        "n": len(ordenadas),
+        "media_us": round(sum(ordenadas) / len(ordenadas) / 1000, 2),
+        "p50_us": percentil(0.50),
+        "p95_us": percentil(0.95),
+        "p99_us": percentil(0.99)
+    }
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """Ejecuta funcion(*preparar(i)) `repeticiones` veces; solo se mide la llamada a funcion.
+
+    El recolector de ciclos se apaga mientras tanto: sus pausas dependen de lo que haya
+    quedado de casos anteriores y agregan ruido a la comparacion con el baseline.
+    """
+    muestras = []
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(repeticiones):
+            argumentos = preparar(i) if preparar else ()
+            inicio = time.perf_counter_ns()
+            funcion(*argumentos)
+            muestras.append(time.perf_counter_ns() - inicio)
+    finally:
+        gc.enable()
+    return resumir(muestras)
+
+
+class Suite:
+    def __init__(self, args, directorio):
+        self.args = args
+        self.directorio = directorio
+        self.aleatorio = random.Random(args.semilla)
+        self.ruta_original = os.path.join(directorio, 'original.json')
+        self.aliases, self.ids = generar_datos(
+            self.ruta_original, args.tareas, args.usuarios, args.asignaciones, args.dependencias, args.semilla
+        )
+        self.resultados = {}
+
+    def handler(self, nombre, modo='journal', carga_diferida=True):
+        """DataHandler sobre una copia nueva del conjunto de datos, para que los cambios no se acumulen"""
+        ruta = os.path.join(self.directorio, nombre + '.json')
+        shutil.copy(self.ruta_original, ruta)
+        return DataHandler(ruta, almacenamiento=AlmacenamientoJSON(ruta, modo, carga_diferida=carga_diferida))
+
+    def registrar(self, seccion, caso, resultado):
+        self.resultados[f"{seccion}.{caso}"] = resultado
+        print(f"{seccion}.{caso:<32} p50 {resultado['p50_us']:>12.2f} us   p99 {resultado['p99_us']:>12.2f} us",
+              file=sys.stderr)
+
+    def alias(self, _=None):
+        return (self.aleatorio.choice(self.aliases),)
+
+    def task_id(self, _=None):
+        return (self.aleatorio.choice(self.ids),)
+
+    # --- Secciones ---
+
+    def datos(self):
+        repeticiones = self.args.repeticiones_carga
+        for nombre, carga_diferida in (('cargar', True), ('cargar_sin_diferida', False)):
+            handler = self.handler(nombre, 'snapshot', carga_diferida)
+            self.registrar('datos', nombre, medir(handler.load_data, repeticiones))
+            handler.cerrar()
+        handler = self.handler('guardar', 'snapshot', carga_diferida=False)
+        self.registrar('datos', 'guardar', medir(handler.save_data, repeticiones))
+        handler.cerrar()
+
+    def consultas(self):
+        handler = self.handler('consultas')
+        repeticiones = self.args.repeticiones
+
+        def alias_sin_cache(i):
+            handler.cache.vaciar()
+            return self.alias()
+
+        def sin_cache(i):
+            handler.cache.vaciar()
+            return ()
+
+        # Con la cache caliente (y las tareas ya hidratadas y las columnas de los reportes
+        # armadas) cada caso mide solo lo suyo
+        for alias in self.aliases:
+            handler.get_usuario_json(alias)
+        handler.reporte_desglose()
+        casos = [
+            ('get_usuario_por_alias', handler.get_usuario_por_alias, self.alias),
+            ('get_tarea_por_id', handler.get_tarea_por_id, self.task_id),
+            ('get_tarea_json', handler.get_tarea_json, self.task_id),
+            ('get_usuario_json', handler.get_usuario_json, self.alias),
+            ('get_usuario_json_sin_cache', handler.get_usuario_json, alias_sin_cache),
+            ('get_tareas_de_usuario', lambda alias: handler.get_tareas_de_usuario(alias, 50), self.alias),
+            ('get_dependencias', lambda task_id: handler.get_dependencias(task_id, True), self.task_id),
+            ('get_dependientes', lambda task_id: handler.get_dependientes(task_id, True), self.task_id),
+            ('get_orden_topologico', handler.get_orden_topologico, None),
+            ('reporte_carga', lambda: handler.reporte_carga(100), None),
+            ('reporte_carga_sin_cache', lambda: handler.reporte_carga(100), sin_cache),
+            ('reporte_desglose_sin_cache', handler.reporte_desglose, sin_cache),
+            ('reporte_atrasos_sin_cache', handler.reporte_atrasos, sin_cache),
+            ('reporte_rendimiento_sin_cache', handler.reporte_rendimiento, sin_cache),
+        ]
+        for nombre, funcion, preparar in casos:
+            self.registrar('consultas', nombre, medir(funcion, repeticiones, preparar))
+        handler.cerrar()
+
+    def cambios(self):
+        handler = self.handler('cambios')
+        repeticiones = self.args.repeticiones_cambios
+        handler.crear_usuario('bench', 'Bench')
+        nuevas = []
+
+        def crear_tarea(i):
+            _, tarea = handler.crear_tarea(f"Nueva {i}", "Descripción", self.alias()[0], "programacion")
+            nuevas.append(tarea.id)
+
+        # Tareas distintas para cada repeticion; las nuevas no tienen dependientes, asi
+        # que agregarles una dependencia nunca forma un ciclo
+        tareas = self.aleatorio.sample(self.ids, min(repeticiones, len(self.ids)))
+        elegir = lambda i: (tareas[i % len(tareas)],)
+        casos = [
+            ('crear_usuario', lambda i: handler.crear_usuario(f"bench{i}", "Bench"), lambda i: (i,)),
+            ('crear_tarea', crear_tarea, lambda i: (i,)),
+            ('cambiar_estado_tarea', lambda task_id: handler.cambiar_estado_tarea(task_id, "Progreso"), elegir),
+            ('asignar_usuario', lambda task_id: handler.gestionar_usuario_en_tarea(
+                task_id, 'bench', 'infra', 'adicionar'), elegir),
+            ('remover_usuario', lambda task_id: handler.gestionar_usuario_en_tarea(
+                task_id, 'bench', 'infra', 'remover'), elegir),
+            ('agregar_dependencia', lambda task_id, dependencia: handler.gestionar_dependencia(
+                task_id, dependencia, 'adicionar'), lambda i: (nuevas[i], tareas[i % len(tareas)])),
+            ('remover_dependencia', lambda task_id, dependencia: handler.gestionar_dependencia(
+                task_id, dependencia, 'remover'), lambda i: (nuevas[i], tareas[i % len(tareas)])),
+            ('crear_tareas_lote_100', lambda items: handler.crear_tareas_lote(items), lambda i: ([
+                {"nombre": f"Lote {i}-{j}", "descripcion": "D", "usuario": self.alias()[0], "rol": "diseño"}
+                for j in range(100)
+            ],)),
+        ]
+        for nombre, funcion, preparar in casos:
+            self.registrar('cambios', nombre, medir(funcion, repeticiones, preparar))
+        errores = handler.verificar_indices()
+        handler.cerrar()
+        if errores:
+            raise RuntimeError(f"Indices inconsistentes tras los cambios: {errores[:3]}")
+
+    def _controller(self, handler):
+        # controller crea su DataHandler al importarse: se apunta a un archivo temporal y se reemplaza
+        os.environ['TAREAS_DATA_FILE'] = os.path.join(self.directorio, 'controller.json')
+        import controller
+        controller.data_handler = handler
+        return controller
+
+    def endpoints(self):
+        handler = self.handler('endpoints')
+        client = self._controller(handler).app.test_client()
+        repeticiones = self.args.repeticiones
+        handler.crear_usuario('bench', 'Bench')
+        handler.reporte_desglose()
+        tareas = self.aleatorio.sample(self.ids, min(repeticiones, len(self.ids)))
+        elegir = lambda i: (tareas[i % len(tareas)],)
+        casos = [
+            ('GET /usuarios/mialias', lambda alias: client.get(f'/usuarios/mialias={alias}'), self.alias),
+            ('GET /usuarios/mialias?limit', lambda alias: client.get(f'/usuarios/mialias={alias}?limit=50'),
+             self.alias),
+            ('GET /tasks/<id>', lambda task_id: client.get(f'/tasks/{task_id}'), self.task_id),
+            ('GET /tasks/<id>/dependencies', lambda task_id: client.get(
+                f'/tasks/{task_id}/dependencies?transitive=true'), self.task_id),
+            ('GET /tasks/<id>/dependents', lambda task_id: client.get(
+                f'/tasks/{task_id}/dependents?transitive=true'), self.task_id),
+            ('GET /tasks/topological-order', lambda: client.get('/tasks/topological-order'), None),
+            ('GET /reports/workload', lambda: client.get('/reports/workload'), None),
+            ('POST /usuarios', lambda i: client.post('/usuarios', json={"contacto": f"e{i}", "nombre": "E"}),
+             lambda i: (i,)),
+            ('POST /tasks', lambda alias: client.post('/tasks', json={
+                "nombre": "T", "descripcion": "D", "usuario": alias, "rol": "analisis"}), self.alias),
+            ('POST /tasks/<id>', lambda task_id: client.post(f'/tasks/{task_id}', json={"estado": "Progreso"}),
+             elegir),
+            ('POST /tasks/<id>/users', lambda task_id: client.post(f'/tasks/{task_id}/users', json={
+                "usuario": "bench", "rol": "infra", "accion": "adicionar"}), elegir),
+        ]
+        for nombre, funcion, preparar in casos:
+            self.registrar('endpoints', nombre, medir(funcion, repeticiones, preparar))
+        handler.cerrar()
+
+    def carga(self):
+        """Varios hilos con conexiones HTTP reales contra un servidor local durante --duracion segundos"""
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class SinLog(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        handler = self.handler('carga')
+        servidor = make_server('127.0.0.1', 0, self._controller(handler).app, threaded=True, request_handler=SinLog)
+        hilo_servidor = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo_servidor.start()
+        muestras = []
+        errores = []
+        fin = time.perf_counter() + self.args.duracion
+
+        def cliente(numero):
+            aleatorio = random.Random(self.args.semilla + numero)
+            conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_port, timeout=30)
+            propias = []
+            while time.perf_counter() < fin:
+                # 80% lecturas y 20% cambios de estado
+                sorteo = aleatorio.random()
+                if sorteo < 0.8:
+                    metodo, ruta, cuerpo = 'GET', f'/usuarios/mialias={aleatorio.choice(self.aliases)}', None
+                else:
+                    metodo, ruta = 'POST', f'/tasks/{aleatorio.choice(self.ids)}'
+                    cuerpo = json.dumps({"estado": "Progreso"})
+                inicio = time.perf_counter_ns()
+                try:
+                    conexion.request(metodo, ruta, cuerpo, {"Content-Type": "application/json"})
+                    respuesta = conexion.getresponse()
+                    respuesta.read()
+                    if respuesta.status >= 500:
+                        errores.append(respuesta.status)
+                except (OSError, http.client.HTTPException) as e:
+                    errores.append(str(e))
+                    conexion.close()
+                propias.append(time.perf_counter_ns() - inicio)
+            conexion.close()
+            muestras.extend(propias)
+
+        hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(self.args.hilos)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+        servidor.shutdown()
+        handler.cerrar()
+
+        resultado = resumir(muestras)
+        resultado.update({
+            "hilos": self.args.hilos,
+            "peticiones_por_segundo": round(len(muestras) / duracion, 1),
+            "errores": len(errores)
+        })
+        self.registrar('carga', 'mixta_80_20', resultado)
+
+
+def calibrar(repeticiones=30):
+    """Tiempo de una carga de CPU fija en Python puro, para normalizar entre corridas"""
+    return medir(lambda: sum(i * i for i in range(100000)), repeticiones)
+
+
+def comparar(actual, baseline, umbral, metrica='p50_us', normalizar=True):
+    """Casos en los que `metrica` empeoro mas que `umbral` (fraccion) respecto del baseline"""
+    escala = 1.0
+    if normalizar and 'calibracion' in actual['meta'] and 'calibracion' in baseline['meta']:
+        escala = actual['meta']['calibracion'][metrica] / baseline['meta']['calibracion'][metrica]
+    regresiones = []
+    for caso, resultado in actual['resultados'].items():
+        anterior = baseline['resultados'].get(caso)
+        if not anterior or not anterior.get(metrica):
+            continue
+        cambio = resultado[metrica] / (anterior[metrica] * escala) - 1
+        if cambio > umbral:
+            regresiones.append({"caso": caso, "baseline": anterior[metrica], "actual": resultado[metrica],
+                                "cambio": round(cambio, 3)})
+    return regresiones
+
+
+def main():
+    if os.environ.get('PYTHONHASHSEED') != '0':
+        # Con el hash de str aleatorio el orden de sets y dicts (y con el, los tiempos) cambia en cada corrida
+        os.environ['PYTHONHASHSEED'] = '0'
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--tareas', type=int, default=10000)
+    parser.add_argument('--asignaciones', type=int, default=2, help="usuarios asignados por tarea")
+    parser.add_argument('--dependencias', type=int, default=10000, help="aristas del grafo de dependencias")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--repeticiones', type=int, default=1000, help="por caso de consultas y endpoints")
+    parser.add_argument('--repeticiones-cambios', type=int, default=200)
+    parser.add_argument('--repeticiones-carga', type=int, default=5, help="cargas y guardados completos")
+    parser.add_argument('--hilos', type=int, default=8, help="clientes concurrentes de la prueba de carga")
+    parser.add_argument('--duracion', type=float, default=5.0, help="segundos de la prueba de carga")
+    parser.add_argument('--secciones', default=','.join(SECCIONES), help="subconjunto separado por comas")
+    parser.add_argument('--salida', help="archivo donde escribir los resultados (por defecto, la salida estandar)")
+    parser.add_argument('--baseline', help="resultados anteriores contra los que comparar")
+    parser.add_argument('--umbral', type=float, default=0.25, help="empeoramiento tolerado (0.25 = 25%%)")
+    parser.add_argument('--metrica', default='p50_us', choices=['media_us', 'p50_us', 'p95_us', 'p99_us'])
+    parser.add_argument('--sin-normalizar', action='store_true', help="comparar los tiempos sin la calibración")
+    args = parser.parse_args()
+
+    secciones = args.secciones.split(',')
+    desconocidas = [seccion for seccion in secciones if seccion not in SECCIONES]
+    if desconocidas:
+        parser.error(f"Secciones inválidas: {', '.join(desconocidas)}. Deben ser de: {', '.join(SECCIONES)}")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        suite = Suite(args, directorio)
+        # Al principio y al final: se usa la mas rapida de las dos
+        calibraciones = [calibrar()]
+        for seccion in secciones:
+            getattr(suite, seccion)()
+        calibraciones.append(calibrar())
+    finally:
+        shutil.rmtree(directorio)
+
+    resultado = {
+        "meta": {
+            "fecha": datetime.datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "calibracion": min(calibraciones, key=lambda calibracion: calibracion['p50_us']),
+            "parametros": {clave: valor for clave, valor in vars(args).items()
+                           if clave not in ('salida', 'baseline', 'umbral', 'metrica', 'sin_normalizar')}
+        },
+        "resultados": suite.resultados
+    }
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta']['parametros'] != resultado['meta']['parametros']:
+            print("Aviso: el baseline se midió con otros parámetros", file=sys.stderr)
+        regresiones = comparar(resultado, baseline, args.umbral, args.metrica, not args.sin_normalizar)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion['caso']}: {regresion['baseline']} -> {regresion['actual']} us "
+                  f"(+{regresion['cambio']:.0%})", file=sys.stderr)
+        if regresiones:
+            sys.exit(1)
+        print(f"Sin regresiones mayores a {args.umbral:.0%} en {args.metrica}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+
+# Directorio src al path de Python (como en app.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
+
+from data_handler import DataHandler
+from storage import binario
+from storage.json_storage import AlmacenamientoJSON
+
+
+def convertir(entrada, salida):
+    """Escribe en `salida` el snapshot binario equivalente a `entrada` (data.json)"""
+    # Carga diferida: el cuerpo de cada tarea se pasa de un formato al otro sin crear sus objetos
+    handler = DataHandler(entrada, almacenamiento=AlmacenamientoJSON(entrada, carga_diferida=True))
+    data = handler._serializar()
+    with open(salida + '.tmp', 'wb') as f:
+        binario.escribir(data, f)
+    os.replace(salida + '.tmp', salida)
+    return len(data['usuarios']), len(data['tareas'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte data.json al snapshot binario (TAREAS_FORMATO_SNAPSHOT=binario)")
+    parser.add_argument('entrada', nargs='?', default='data.json')
+    parser.add_argument('salida', nargs='?', help="Por defecto, la entrada con extension .bin")
+    args = parser.parse_args()
+    salida = args.salida or os.path.splitext(args.entrada)[0] + '.bin'
+    usuarios, tareas = convertir(args.entrada, salida)
+    print(f"{args.entrada} -> {salida}: {usuarios} usuarios, {tareas} tareas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+"""App ASGI con las mismas rutas y respuestas que la app Flask de controller.py.
+
+No depende de ningun framework: se sirve con cualquier servidor ASGI, por ejemplo
+
+    uvicorn --app-dir src asgi:app
+
+Las conexiones las atiende el event loop, asi que un proceso puede mantener miles
+abiertas. Solo las consultas que nunca toman el lock del DataHandler se resuelven en
+el loop; el resto (que puede armar un indice, una vista o un reporte la primera vez) y
+las escrituras, que esperan el lock y el disco, corren en un pool de hilos.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+from werkzeug.http import generate_etag, parse_etags, quote_etag
+import controller
+import metricas
+from config import Config
+from controller import TIPO_EVENTOS, TIPO_METRICAS, ProveedorDatos, TaskController
+from eventos import ESPERA_EVENTOS, Suscripcion
+from exportacion import TIPO_NDJSON, Exportacion
+
+logger = logging.getLogger(__name__)
+
+# (metodo, ruta con la sintaxis de Flask, llamada al controlador). Como en Flask, las
+# rutas fijas se prueban antes que las que tienen parametros
+RUTAS = [
+    ('GET', '/usuarios/mialias=<alias>', lambda c, p, alias: c.get_usuario(alias, p.args)),
+    ('POST', '/usuarios', lambda c, p: c.crear_usuario(p.json)),
+    ('POST', '/usuarios/batch', lambda c, p: c.crear_usuarios_lote(p.json)),
+    ('GET', '/tasks', lambda c, p: c.get_tareas(p.args)),
+    ('POST', '/tasks', lambda c, p: c.crear_tarea(p.json)),
+    ('POST', '/tasks/batch', lambda c, p: c.crear_tareas_lote(p.json)),
+    ('POST', '/tasks/batch/users', lambda c, p: c.gestionar_usuarios_tareas_lote(p.json)),
+    ('POST', '/tasks/batch/dependencies', lambda c, p: c.gestionar_dependencias_lote(p.json)),
+    ('GET', '/tasks/topological-order', lambda c, p: c.get_orden_topologico()),
+    ('GET', '/tasks/critical-path', lambda c, p: c.get_ruta_critica()),
+    ('GET', '/reports/workload', lambda c, p: c.get_reporte_carga(p.args)),
+    ('GET', '/reports/breakdown', lambda c, p: c.get_reporte_desglose()),
+    ('GET', '/reports/overdue', lambda c, p: c.get_reporte_atrasos(p.args)),
+    ('GET', '/reports/throughput', lambda c, p: c.get_reporte_rendimiento(p.args)),
+    ('GET', '/metrics', lambda c, p: c.get_metricas()),
+    ('GET', '/ready', lambda c, p: c.get_ready()),
+    ('GET', '/replication', lambda c, p: c.get_replicacion()),
+    ('GET', '/events', lambda c, p: c.get_eventos(p.args, p.headers.get('last-event-id'))),
+    ('GET', '/export', lambda c, p: c.exportar()),
+    ('POST', '/import', lambda c, p: c.importar(p.fragmentos)),
+    ('GET', '/tasks/<task_id>', lambda c, p, task_id: c.get_tarea(task_id)),
+    ('POST', '/tasks/<task_id>', lambda c, p, task_id: c.actualizar_estado_tarea(task_id, p.json, p.etags)),
+    ('POST', '/tasks/<task_id>/users', lambda c, p, task_id: c.gestionar_usuario_tarea(task_id, p.json, p.etags)),
+    ('POST', '/tasks/<task_id>/dependencies',
+     lambda c, p, task_id: c.gestionar_dependencia(task_id, p.json, p.etags)),
+    ('GET', '/tasks/<task_id>/dependencies', lambda c, p, task_id: c.get_dependencias(task_id, p.args)),
+    ('GET', '/tasks/<task_id>/dependents', lambda c, p, task_id: c.get_dependientes(task_id, p.args)),
+    ('POST', '/tasks/<task_id>/transition',
+     lambda c, p, task_id: c.transicionar_subarbol(task_id, p.json, p.etags)),
+    ('GET', '/tasks/<task_id>/schedule', lambda c, p, task_id: c.get_planificacion(task_id)),
+]
+
+
+def _compilar(ruta):
+    # <nombre> es un segmento cualquiera sin '/', igual que el conversor por defecto de Flask
+    return re.compile(re.sub(r'<(\w+)>', r'(?P<\1>[^/]+)', re.escape(ruta)))
+
+
+RUTAS_COMPILADAS = [(metodo, ruta, _compilar(ruta), llamada) for metodo, ruta, llamada in RUTAS]
+# Rutas cuyo cuerpo no se junta antes de llamar al controlador: lo lee de a fragmentos (Peticion.fragmentos)
+RUTAS_EN_FRAGMENTOS = {('POST', '/import')}
+# Consultas que no toman el lock del DataHandler: se atienden en el loop. Las demas pueden armar
+# un indice, la vista de un usuario o las columnas de los reportes, y se atienden en el executor.
+# /events y /export solo crean la suscripcion o la exportacion; lo que toma el lock ya corre en el executor
+RUTAS_EN_LOOP = {('GET', '/metrics'), ('GET', '/ready'), ('GET', '/replication'), ('GET', '/events'),
+                 ('GET', '/export')}
+
+
+class ErrorPeticion(Exception):
+    def __init__(self, mensaje, codigo):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+class Peticion:
+    """Lo que el controlador necesita de una peticion HTTP ASGI"""
+
+    def __init__(self, scope, cuerpo):
+        self.metodo = scope['method']
+        self.ruta = scope['path']
+        self.headers = {nombre.decode('latin-1').lower(): valor.decode('latin-1')
+                        for nombre, valor in scope.get('headers', [])}
+        # Igual que request.args.get de Flask: ante parametros repetidos vale el primero
+        self.args = {}
+        for nombre, valor in parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True):
+            self.args.setdefault(nombre, valor)
+        self.cuerpo = cuerpo
+        self.json = None
+        self.fragmentos = None
+
+    def decodificar_json(self):
+        """Cuerpo JSON, o None si la peticion no es application/json (como request.json)"""
+        tipo = self.headers.get('content-type', '').split(';')[0].strip()
+        if tipo != 'application/json' and not tipo.endswith('+json'):
+            return None
+        try:
+            return json.loads(self.cuerpo)
+        except ValueError:
+            raise ErrorPeticion("JSON inválido", 400)
+
+    @property
+    def etags(self):
+        return TaskController.etags(parse_etags(self.headers.get('if-match')))
+
+
+class AppASGI:
+    """App ASGI sobre el DataHandler de `proveedor` (un ProveedorDatos de controller.py).
+
+    Al recibir el inicio del ciclo de vida empieza a cargar los datos en segundo plano
+    y atiende de entrada: hasta que termine, GET /ready responde 503.
+    """
+
+    def __init__(self, proveedor, hilos=32, perfilador=None):
+        self.proveedor = proveedor
+        self.executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='asgi-escritura')
+        self.perfilador = perfilador or metricas.PerfiladorLento()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+        elif scope['type'] == 'http':
+            await self._atender(scope, receive, send)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                self.proveedor.iniciar()
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                # Las escrituras en curso terminan antes de que el proceso salga
+                await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _leer_cuerpo(self, receive):
+        partes = []
+        while True:
+            mensaje = await receive()
+            partes.append(mensaje.get('body', b''))
+            if not mensaje.get('more_body', False):
+                return b''.join(partes)
+
+    @staticmethod
+    def _fragmentos(receive, loop):
+        """Cuerpo de la peticion de a mensajes, para leerlo desde un hilo del pool"""
+        while True:
+            mensaje = asyncio.run_coroutine_threadsafe(receive(), loop).result()
+            yield mensaje.get('body', b'')
+            if not mensaje.get('more_body', False):
+                return
+
+    async def _en_executor(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcion, *args)
+
+    def _resolver(self, metodo, ruta):
+        """(ruta de la tabla, llamada, parametros), con llamada None y el codigo de error si no hay"""
+        metodo = 'GET' if metodo == 'HEAD' else metodo
+        ruta_existe = False
+        for metodo_ruta, plantilla, patron, llamada in RUTAS_COMPILADAS:
+            encontrada = patron.fullmatch(ruta)
+            if encontrada:
+                if metodo_ruta == metodo:
+                    return plantilla, llamada, encontrada.groupdict()
+                ruta_existe = True
+        return 'desconocida', None, 405 if ruta_existe else 404
+
+    def _llamar(self, peticion, plantilla, llamada, parametros):
+        # El perfil de las peticiones lentas cubre la llamada al controlador, en el hilo en que corra
+        perfil = self.perfilador.iniciar()
+        inicio = time.perf_counter()
+        try:
+            return llamada(TaskController(self.proveedor.data_handler), peticion, **parametros)
+        finally:
+            if perfil is not None:
+                self.perfilador.terminar(perfil, time.perf_counter() - inicio, f"{peticion.metodo} {plantilla}")
+
+    async def _atender(self, scope, receive, send):
+        inicio = time.perf_counter()
+        plantilla, llamada, parametros = self._resolver(scope['method'], scope['path'])
+        if llamada and (scope['method'], plantilla) in RUTAS_EN_FRAGMENTOS:
+            peticion = Peticion(scope, b'')
+            peticion.fragmentos = self._fragmentos(receive, asyncio.get_running_loop())
+        else:
+            peticion = Peticion(scope, await self._leer_cuerpo(receive))
+        data_handler = self.proveedor.data_handler
+        try:
+            en_precarga = llamada and TaskController(data_handler).en_precarga(peticion.metodo, plantilla)
+            rechazo = en_precarga or (llamada and await self._verificar_replica(peticion))
+            if llamada is None:
+                cuerpo, codigo = {"error": "Método no permitido" if parametros == 405 else "Ruta no encontrada"}, parametros
+            elif rechazo:
+                cuerpo, codigo = rechazo
+            elif peticion.metodo == 'POST':
+                cuerpo, codigo = await self._escribir(peticion, plantilla, llamada, parametros)
+            else:
+                # En modo multiproceso, aplica antes los cambios que hicieron otros workers
+                if data_handler.cargado.is_set() and data_handler.almacenamiento.hay_cambios():
+                    await self._en_executor(data_handler.refrescar)
+                if ('GET', plantilla) in RUTAS_EN_LOOP:
+                    cuerpo, codigo = self._llamar(peticion, plantilla, llamada, parametros)
+                else:
+                    cuerpo, codigo = await self._en_executor(self._llamar, peticion, plantilla, llamada, parametros)
+        except ErrorPeticion as e:
+            cuerpo, codigo = {"error": str(e)}, e.codigo
+        except Exception:
+            logger.exception("Error atendiendo %s %s", peticion.metodo, peticion.ruta)
+            cuerpo, codigo = {"error": "Error interno del servidor"}, 500
+        if isinstance(cuerpo, Suscripcion):
+            await self._transmitir(receive, send, cuerpo)
+        elif isinstance(cuerpo, Exportacion):
+            await self._exportar(send, peticion, cuerpo)
+        else:
+            codigo = await self._enviar(send, peticion, cuerpo, codigo)
+        metricas.PETICIONES.observar(time.perf_counter() - inicio, peticion.metodo, plantilla, str(codigo))
+
+    async def _verificar_replica(self, peticion):
+        controlador = TaskController(self.proveedor.data_handler)
+        seq_minima = peticion.headers.get('x-seq-minima')
+        if seq_minima is None:
+            return controlador.verificar_replica(peticion.metodo)
+        # Puede esperar a que la replica aplique el cambio pedido
+        return await self._en_executor(controlador.verificar_replica, peticion.metodo, seq_minima)
+
+    async def _escribir(self, peticion, plantilla, llamada, parametros):
+        # El cuerpo se decodifica en el loop; el cambio (lock, validacion y persistencia) en el pool
+        if peticion.fragmentos is None:
+            peticion.json = peticion.decodificar_json()
+
+        def ejecutar():
+            self.proveedor.data_handler.refrescar()
+            return self._llamar(peticion, plantilla, llamada, parametros)
+
+        cuerpo, codigo = await self._en_executor(ejecutar)
+        # Con escritura diferida, el cliente puede pedir que la respuesta espere a que su cambio este en disco
+        if codigo < 400 and peticion.headers.get('x-esperar-commit') == '1':
+            await self._en_executor(self.proveedor.data_handler.esperar_commit)
+        return cuerpo, codigo
+
+    async def _transmitir(self, receive, send, suscripcion):
+        """Envia el flujo de GET /events hasta que el cliente se desconecta, sin ocupar un hilo mientras espera"""
+        loop = asyncio.get_running_loop()
+        aviso = asyncio.Event()
+
+        def avisar():
+            # Lo llama el hilo que publica los eventos
+            loop.call_soon_threadsafe(aviso.set)
+
+        eventos = suscripcion.data_handler.eventos
+        eventos.agregar_oyente(avisar)
+        # El cuerpo ya se leyo: el proximo mensaje es la desconexion del cliente
+        desconexion = asyncio.ensure_future(receive())
+        try:
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'content-type', TIPO_EVENTOS.encode()), (b'cache-control', b'no-cache'),
+                                    self._header_seq()]})
+            while not desconexion.done():
+                aviso.clear()
+                texto = suscripcion.siguiente()
+                if texto:
+                    await send({'type': 'http.response.body', 'body': texto.encode(), 'more_body': True})
+                espera = asyncio.ensure_future(aviso.wait())
+                listos, _ = await asyncio.wait({espera, desconexion}, timeout=ESPERA_EVENTOS,
+                                               return_when=asyncio.FIRST_COMPLETED)
+                espera.cancel()
+                if not listos:
+                    await self._en_executor(suscripcion.refrescar)
+        finally:
+            eventos.quitar_oyente(avisar)
+            desconexion.cancel()
+
+    async def _exportar(self, send, peticion, exportacion):
+        """Envia GET /export a medida que se genera; cada bloque se arma en el pool porque toma el lock"""
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', TIPO_NDJSON.encode()), self._header_seq()]})
+        if peticion.metodo == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        bloques = exportacion.bloques()
+        try:
+            while True:
+                bloque = await self._en_executor(next, bloques, None)
+                if bloque is None:
+                    break
+                await send({'type': 'http.response.body', 'body': bloque.encode(), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            # Si el cliente se desconecto, la exportacion deja de preservar tareas
+            await self._en_executor(bloques.close)
+
+    def _header_seq(self):
+        # Ultimo cambio que ven estos datos (ver controller.agregar_seq)
+        return b'x-seq', str(self.proveedor.data_handler.seq).encode()
+
+    async def _enviar(self, send, peticion, cuerpo, codigo):
+        etag = None
+        tipo = 'application/json'
+        if isinstance(cuerpo, str):
+            datos, tipo = cuerpo.encode(), TIPO_METRICAS
+        elif isinstance(cuerpo, tuple):
+            datos, etag = cuerpo
+        else:
+            # Mismo formato que jsonify: compacto, claves ordenadas y salto de linea final
+            datos = (json.dumps(cuerpo, separators=(',', ':'), sort_keys=True) + '\n').encode()
+
+        headers = [(b'content-type', tipo.encode()), self._header_seq()]
+        if peticion.metodo in ('GET', 'HEAD') and codigo == 200:
+            # Toda respuesta GET lleva ETag; si el cliente ya tiene esa version se responde 304 sin cuerpo
+            etag = etag or generate_etag(datos)
+            if parse_etags(peticion.headers.get('if-none-match')).contains_weak(etag):
+                codigo, datos = 304, b''
+        if etag:
+            headers.append((b'etag', quote_etag(etag).encode('latin-1')))
+        headers.append((b'content-length', str(len(datos)).encode()))
+
+        await send({'type': 'http.response.start', 'status': codigo, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if peticion.metodo == 'HEAD' else datos})
+        return codigo
+
+
+# Proveedor propio: la app Flask de controller.py no se usa aca y su DataHandler nunca se crea
+app = AppASGI(ProveedorDatos(Config), hilos=Config.HILOS_ASGI, perfilador=controller.perfilador)
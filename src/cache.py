@@ -0,0 +1,68 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class CacheSerializacion:
+    """Cache LRU de representaciones JSON ya codificadas, acotada en bytes.
+
+    Cada entrada se guarda junto con la version de la entidad de la que sale; una
+    consulta con otra version cuenta como fallo, asi que basta con incrementar la
+    version de una entidad al modificarla para invalidar lo cacheado.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._entradas = OrderedDict()  # clave -> (version, datos, etag)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, version):
+        """Devuelve (datos, etag) si hay una entrada para esa version, o None"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] != version:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1], entrada[2]
+
+    def guardar(self, clave, version, datos, con_etag=True):
+        """Guarda los bytes de la entidad y devuelve su etag (None si no se pidio)"""
+        etag = hashlib.blake2b(datos, digest_size=16).hexdigest() if con_etag else None
+        if len(datos) > self.max_bytes:
+            return etag
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior[1])
+            self._entradas[clave] = (version, datos, etag)
+            self.bytes += len(datos)
+            while self.bytes > self.max_bytes:
+                _, (_, desalojado, _) = self._entradas.popitem(last=False)
+                self.bytes -= len(desalojado)
+                self.desalojos += 1
+        return etag
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos
+            }
+
+    def __len__(self):
+        return len(self._entradas)
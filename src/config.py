@@ -0,0 +1,45 @@
+import os
+
+
+class Config:
+    """Configuracion de la aplicacion, tomada de variables de entorno"""
+    # 'json' (archivo data.json), 'sqlite' o 'particionado' (varios archivos JSON en un directorio)
+    ALMACENAMIENTO = os.environ.get('TAREAS_ALMACENAMIENTO', 'json')
+    SQLITE_DB = os.environ.get('TAREAS_SQLITE_DB', 'data.db')
+    DIRECTORIO_PARTICIONES = os.environ.get('TAREAS_DIRECTORIO_PARTICIONES', 'particiones')
+    PARTICIONES = int(os.environ.get('TAREAS_PARTICIONES', 16))
+    DATA_FILE = os.environ.get('TAREAS_DATA_FILE', 'data.json')
+    # 'snapshot' reescribe data.json en cada cambio, 'journal' agrega un registro al log
+    MODO_PERSISTENCIA = os.environ.get('TAREAS_MODO_PERSISTENCIA', 'snapshot')
+    # 'binario' escribe el snapshot en data.bin (ver storage/binario.py) y lo mapea al iniciar;
+    # si todavia no existe se carga data.json
+    FORMATO_SNAPSHOT = os.environ.get('TAREAS_FORMATO_SNAPSHOT', 'json')
+    UMBRAL_COMPACTACION = int(os.environ.get('TAREAS_UMBRAL_COMPACTACION', 16 * 1024 * 1024))
+    # Varios procesos (workers) sobre el mismo data.json: journal compartido y lock de archivo
+    MULTIPROCESO = os.environ.get('TAREAS_MULTIPROCESO', '0') == '1'
+    # Carga data.json en streaming e hidrata el cuerpo de cada tarea al primer acceso
+    CARGA_DIFERIDA = os.environ.get('TAREAS_CARGA_DIFERIDA', '1') == '1'
+    # Persistencia en segundo plano agrupando cambios ('none', 'batch' o 'fsync-per-commit')
+    ESCRITURA_DIFERIDA = os.environ.get('TAREAS_ESCRITURA_DIFERIDA', '0') == '1'
+    DURABILIDAD = os.environ.get('TAREAS_DURABILIDAD', 'batch')
+    INTERVALO_ESCRITURA = float(os.environ.get('TAREAS_INTERVALO_ESCRITURA', 0.05))
+    TAMANO_LOTE_ESCRITURA = int(os.environ.get('TAREAS_TAMANO_LOTE_ESCRITURA', 1000))
+    # Hilos de la app ASGI (asgi.py) para aplicar y persistir cambios sin bloquear el event loop
+    HILOS_ASGI = int(os.environ.get('TAREAS_HILOS_ASGI', 32))
+    # Perfil con cProfile de las peticiones de mas de PERFIL_UMBRAL segundos (0 lo desactiva),
+    # tomado sobre una fraccion PERFIL_MUESTREO de las peticiones y guardado en PERFIL_DIRECTORIO
+    PERFIL_UMBRAL = float(os.environ.get('TAREAS_PERFIL_UMBRAL', 0))
+    PERFIL_MUESTREO = float(os.environ.get('TAREAS_PERFIL_MUESTREO', 0.01))
+    PERFIL_DIRECTORIO = os.environ.get('TAREAS_PERFIL_DIRECTORIO', 'perfiles')
+    # Memoria maxima (bytes) de la cache de respuestas JSON ya codificadas
+    TAMANO_CACHE = int(os.environ.get('TAREAS_TAMANO_CACHE', 64 * 1024 * 1024))
+    # Solo se puede finalizar una tarea cuando todas sus dependencias estan Finalizada
+    EXIGIR_DEPENDENCIAS = os.environ.get('TAREAS_EXIGIR_DEPENDENCIAS', '0') == '1'
+    # Cambios que se guardan en memoria para GET /events; un cliente mas atrasado tiene que releer todo
+    TAMANO_EVENTOS = int(os.environ.get('TAREAS_TAMANO_EVENTOS', 10000))
+    # data.json de un primario en modo journal: este proceso es una replica de solo lectura que lo sigue
+    REPLICA_DE = os.environ.get('TAREAS_REPLICA_DE', '')
+    # Segundos entre lecturas del journal del primario
+    INTERVALO_REPLICA = float(os.environ.get('TAREAS_INTERVALO_REPLICA', 0.05))
+    # Segundos que una lectura con X-Seq-Minima espera a que llegue ese cambio antes de responder 503
+    ESPERA_SEQ_MINIMA = float(os.environ.get('TAREAS_ESPERA_SEQ_MINIMA', 1.0))
@@ -1,100 +1,638 @@
-from flask import Flask, jsonify, request
-from data_handler import DataHandler
+import atexit
+import threading
+import time
+from flask import Blueprint, Flask, current_app, g, jsonify, request
+import metricas
+from data_handler import DataHandler, MENSAJE_CONFLICTO
+from eventos import Suscripcion
+from exportacion import TIPO_NDJSON, Exportacion, Importacion, lineas
+from config import Config
+
+perfilador = metricas.PerfiladorLento(Config.PERFIL_UMBRAL, Config.PERFIL_MUESTREO, Config.PERFIL_DIRECTORIO)
+TIPO_METRICAS = 'text/plain; version=0.0.4; charset=utf-8'
+TIPO_EVENTOS = 'text/event-stream'
+
+PARAMETROS_PAGINACION = ('limit', 'after', 'estado', 'fields')
+LIMITE_PAGINA_POR_DEFECTO = 100
+# (metodo, ruta) que se atienden mientras los datos se cargan en segundo plano; las demas responden 503
+RUTAS_EN_PRECARGA = {('GET', '/ready'), ('GET', '/metrics'), ('GET', '/replication'), ('GET', '/tasks/<task_id>')}
+MENSAJE_PRECARGA = "Los datos se están cargando. Reintente en unos segundos"
+MENSAJE_REPLICA = "Réplica de solo lectura: los cambios se envían al primario"
+# Bytes del cuerpo de POST /import que se leen por vez
+TAMANO_FRAGMENTO = 64 * 1024
+
+
+class ProveedorDatos:
+    """DataHandler de una app, creado recien cuando se lo necesita.
+
+    Importar el modulo o crear la app no lee ningun archivo: la primera peticion (o
+    iniciar()) crea el DataHandler sin cargar y lo carga en segundo plano.
+    """
+
+    def __init__(self, config=Config, data_handler=None):
+        self.config = config
+        self._data_handler = data_handler
+        self._lock = threading.Lock()
+
+    @property
+    def data_handler(self):
+        if self._data_handler is None:
+            with self._lock:
+                if self._data_handler is None:
+                    data_handler = DataHandler.desde_config(self.config, cargar=False)
+                    data_handler.precargar()
+                    # Al terminar el proceso se persisten los cambios que aun esten pendientes
+                    atexit.register(data_handler.cerrar)
+                    self._data_handler = data_handler
+        return self._data_handler
+
+    def iniciar(self):
+        """Empieza la carga sin esperar una peticion"""
+        return self.data_handler
 
-app = Flask(__name__)
-data_handler = DataHandler()
 
 class TaskController:
+    """Logica de cada ruta, sin depender del framework web.
+
+    Recibe lo ya extraido de la peticion (parametros, cuerpo JSON, etags de If-Match) y
+    devuelve (cuerpo, codigo): el cuerpo es un dict para codificar como JSON, el par
+    (bytes, etag) en las consultas cacheadas o texto plano en /metrics. La usan la app
+    Flask de este modulo y la app ASGI de asgi.py, asi que ambas responden lo mismo.
+    """
+
     def __init__(self, data_handler):
         self.data_handler = data_handler
 
-@app.route('/usuarios/mialias=<alias>', methods=['GET'])
+    @staticmethod
+    def etags(if_match):
+        """Etags de un If-Match ya parseado; None si no hay (o es *) y el cambio no se condiciona"""
+        if not if_match or if_match.star_tag:
+            return None
+        return if_match.as_set()
+
+    def get_usuario(self, alias, args):
+        if any(parametro in args for parametro in PARAMETROS_PAGINACION):
+            return self.get_usuario_paginado(alias, args)
+
+        cacheado = self.data_handler.get_usuario_json(alias)
+        if not cacheado:
+            return {"error": "Usuario no encontrado"}, 404
+        return cacheado, 200
+
+    def get_usuario_paginado(self, alias, args):
+        limite = args.get('limit', str(LIMITE_PAGINA_POR_DEFECTO))
+        if not limite.isdigit():
+            return {"error": "El límite debe ser un entero"}, 422
+        campos = args.get('fields')
+
+        resultado, respuesta = self.data_handler.get_tareas_de_usuario(
+            alias,
+            int(limite),
+            cursor=args.get('after'),
+            estado=args.get('estado'),
+            campos=campos.split(',') if campos else None
+        )
+
+        if not resultado:
+            if respuesta == "Usuario no encontrado":
+                return {"error": respuesta}, 404
+            return {"error": respuesta}, 422
+
+        return respuesta, 200
+
+    def crear_usuario(self, data):
+        if not data or 'contacto' not in data or 'nombre' not in data or not isinstance(data['contacto'], str):
+            return {"error": "Datos incompletos. Se requiere contacto y nombre"}, 422
+
+        resultado, respuesta = self.data_handler.crear_usuario(data['contacto'], data['nombre'])
+
+        if not resultado:
+            return {"error": respuesta}, 422
+
+        return {"message": "Usuario creado exitosamente", "usuario": respuesta.get_user_info()}, 201
+
+    def crear_tarea(self, data):
+        if not data or 'nombre' not in data or 'descripcion' not in data or 'usuario' not in data or 'rol' not in data:
+            return {"error": "Datos incompletos. Se requieren nombre, descripcion, usuario y rol"}, 422
+
+        resultado, respuesta = self.data_handler.crear_tarea(data['nombre'], data['descripcion'], data['usuario'], data['rol'])
+
+        if not resultado:
+            return {"error": respuesta}, 422
+
+        return {"message": "Tarea creada exitosamente", "id": respuesta.id}, 201
+
+    def get_tareas(self, args):
+        limite = args.get('limit', str(LIMITE_PAGINA_POR_DEFECTO))
+        if not limite.isdigit():
+            return {"error": "El límite debe ser un entero"}, 422
+        campos = args.get('fields')
+
+        resultado, respuesta = self.data_handler.consultar_tareas(
+            int(limite),
+            cursor=args.get('after'),
+            estado=args.get('estado'),
+            alias=args.get('usuario'),
+            rol=args.get('rol'),
+            desde=args.get('desde'),
+            hasta=args.get('hasta'),
+            orden=args.get('sort', 'fecha_esperada_fin'),
+            campos=campos.split(',') if campos else None
+        )
+
+        if not resultado:
+            return {"error": respuesta}, 422
+
+        return respuesta, 200
+
+    def en_precarga(self, metodo, ruta):
+        """(cuerpo, 503) si los datos se estan cargando y la ruta los necesita completos; si no, None"""
+        metodo = 'GET' if metodo == 'HEAD' else metodo
+        if self.data_handler.cargado.is_set() or (metodo, ruta) in RUTAS_EN_PRECARGA:
+            return None
+        return {"error": MENSAJE_PRECARGA}, 503
+
+    def verificar_replica(self, metodo, seq_minima=None):
+        """(cuerpo, codigo) si la peticion no se puede atender con estos datos; si no, None.
+
+        Una replica no acepta cambios. Con X-Seq-Minima (el X-Seq de una respuesta anterior,
+        por ejemplo la del cambio que el cliente hizo en el primario) la peticion espera a
+        que los datos incluyan ese cambio, hasta Config.ESPERA_SEQ_MINIMA segundos.
+        """
+        if metodo == 'POST' and self.data_handler.almacenamiento.solo_lectura:
+            return {"error": MENSAJE_REPLICA}, 403
+        if seq_minima is None:
+            return None
+        if not seq_minima.isdigit():
+            return {"error": "X-Seq-Minima debe ser un número de cambio"}, 422
+        if not self.data_handler.alcanzar(int(seq_minima), Config.ESPERA_SEQ_MINIMA):
+            return {"error": f"Los datos todavía no incluyen el cambio {seq_minima}"}, 503
+        return None
+
+    def get_replicacion(self):
+        almacenamiento = self.data_handler.almacenamiento
+        if not almacenamiento.solo_lectura:
+            return {"rol": "primario", "seq": self.data_handler.seq}, 200
+        segundos, pendientes = almacenamiento.atraso()
+        return {"rol": "replica", "seq": self.data_handler.seq, "atraso_segundos": round(segundos, 3),
+                "atraso_bytes": pendientes}, 200
+
+    def get_eventos(self, args, ultimo_id=None):
+        """Suscripcion a los cambios (el cuerpo de la respuesta es el flujo SSE)"""
+        # Un cliente que se reconecta manda el id del ultimo evento que recibio
+        desde = args.get('desde', ultimo_id)
+        if desde is not None:
+            if not desde.isdigit():
+                return {"error": "El parámetro desde debe ser un número de cambio"}, 422
+            desde = int(desde)
+        usuario, task_id = args.get('usuario'), args.get('task_id')
+        if usuario is not None and not self.data_handler.get_usuario_por_alias(usuario):
+            return {"error": "Usuario no encontrado"}, 404
+        if task_id is not None and not self.data_handler.get_tarea_por_id(task_id):
+            return {"error": "Tarea no encontrada"}, 404
+        return Suscripcion(self.data_handler, desde, usuario, task_id), 200
+
+    def exportar(self):
+        """Todos los datos como NDJSON (el cuerpo de la respuesta se genera mientras se envia)"""
+        return Exportacion(self.data_handler), 200
+
+    def importar(self, fragmentos):
+        """Aplica un cuerpo NDJSON que llega en fragmentos de bytes"""
+        try:
+            resumen = Importacion(self.data_handler).importar(lineas(fragmentos))
+        except UnicodeDecodeError:
+            return {"error": "El cuerpo debe estar codificado en UTF-8"}, 422
+        return resumen, 422 if resumen["cantidad_errores"] else 200
+
+    def get_ready(self):
+        cuerpo = {"usuarios": len(self.data_handler.usuarios), "tareas": len(self.data_handler.tareas)}
+        if self.data_handler.error_carga is not None:
+            return dict(cuerpo, estado="error", error=str(self.data_handler.error_carga)), 500
+        if not self.data_handler.cargado.is_set():
+            return dict(cuerpo, estado="cargando"), 503
+        return dict(cuerpo, estado="listo"), 200
+
+    def get_tarea(self, task_id):
+        # Durante la precarga solo se responden las tareas ya completas; una que falta puede no estar cargada aun
+        if not self.data_handler.cargado.is_set() and not self.data_handler.tarea_materializada(task_id):
+            return {"error": MENSAJE_PRECARGA}, 503
+        cacheado = self.data_handler.get_tarea_json(task_id)
+        if not cacheado:
+            return {"error": "Tarea no encontrada"}, 404
+        return cacheado, 200
+
+    def actualizar_estado_tarea(self, task_id, data, etags=None):
+        if not data or 'estado' not in data:
+            return {"error": "Datos incompletos. Se requiere estado"}, 422
+
+        resultado, mensaje = self.data_handler.cambiar_estado_tarea(task_id, data['estado'], etags=etags)
+
+        if not resultado:
+            if mensaje == "Tarea no encontrada":
+                return {"error": mensaje}, 404
+            if mensaje == MENSAJE_CONFLICTO:
+                return {"error": mensaje}, 409
+            return {"error": mensaje}, 422
+
+        return {"message": mensaje}, 200
+
+    def gestionar_usuario_tarea(self, task_id, data, etags=None):
+        if not data or 'usuario' not in data or 'rol' not in data or 'accion' not in data:
+            return {"error": "Datos incompletos. Se requiere usuario, rol y accion"}, 422
+
+        resultado, mensaje = self.data_handler.gestionar_usuario_en_tarea(
+            task_id, data['usuario'], data['rol'], data['accion'], etags=etags
+        )
+
+        if not resultado:
+            if mensaje in ["Tarea no encontrada", "Usuario no encontrado"]:
+                return {"error": mensaje}, 404
+            if mensaje == MENSAJE_CONFLICTO:
+                return {"error": mensaje}, 409
+            return {"error": mensaje}, 422
+
+        return {"message": mensaje}, 200
+
+    def gestionar_dependencia(self, task_id, data, etags=None):
+        if not data or 'dependencytaskid' not in data or 'accion' not in data:
+            return {"error": "Datos incompletos. Se requiere dependencytaskid y accion"}, 422
+
+        resultado, mensaje = self.data_handler.gestionar_dependencia(
+            task_id, data['dependencytaskid'], data['accion'], etags=etags
+        )
+
+        if not resultado:
+            if mensaje in ["Tarea no encontrada", "Tarea dependiente no encontrada"]:
+                return {"error": mensaje}, 404
+            if mensaje == MENSAJE_CONFLICTO:
+                return {"error": mensaje}, 409
+            return {"error": mensaje}, 422
+
+        return {"message": mensaje}, 200
+
+    def get_dependencias(self, task_id, args):
+        transitivas = args.get('transitive', 'false').lower() == 'true'
+        resultado, respuesta = self.data_handler.get_dependencias(task_id, transitivas)
+
+        if not resultado:
+            return {"error": respuesta}, 404
+
+        return {"id": task_id, "dependencias": respuesta}, 200
+
+    def get_dependientes(self, task_id, args):
+        transitivas = args.get('transitive', 'false').lower() == 'true'
+        resultado, respuesta = self.data_handler.get_dependientes(task_id, transitivas)
+
+        if not resultado:
+            return {"error": respuesta}, 404
+
+        return {"id": task_id, "dependientes": respuesta}, 200
+
+    def get_orden_topologico(self):
+        return {"orden": self.data_handler.get_orden_topologico()}, 200
+
+    def transicionar_subarbol(self, task_id, data, etags=None):
+        if not data or 'estado' not in data:
+            return {"error": "Datos incompletos. Se requiere estado"}, 422
+
+        resultado, respuesta = self.data_handler.transicionar_subarbol(
+            task_id, data['estado'], data.get('alcance', 'dependencias'), etags=etags
+        )
+
+        # Los errores de la tarea pedida llegan como mensaje; los de cada tarea del lote, como resultados
+        if isinstance(respuesta, list):
+            return self._respuesta_lote(resultado, respuesta, "Estados actualizados correctamente", 200)
+        if respuesta == "Tarea no encontrada":
+            return {"error": respuesta}, 404
+        if respuesta == MENSAJE_CONFLICTO:
+            return {"error": respuesta}, 409
+        return {"error": respuesta}, 422
+
+    def get_planificacion(self, task_id):
+        resultado, respuesta = self.data_handler.get_planificacion(task_id)
+
+        if not resultado:
+            return {"error": respuesta}, 404
+
+        return respuesta, 200
+
+    def get_ruta_critica(self):
+        return self.data_handler.get_ruta_critica(), 200
+
+    def get_reporte_carga(self, args):
+        limite = args.get('limit', str(LIMITE_PAGINA_POR_DEFECTO))
+        if not limite.isdigit():
+            return {"error": "El límite debe ser un entero"}, 422
+
+        resultado, respuesta = self.data_handler.reporte_carga(int(limite), fecha=args.get('fecha'))
+
+        if not resultado:
+            return {"error": respuesta}, 422
+
+        return respuesta, 200
+
+    def get_reporte_desglose(self):
+        return self.data_handler.reporte_desglose()[1], 200
+
+    def get_reporte_atrasos(self, args):
+        resultado, respuesta = self.data_handler.reporte_atrasos(fecha=args.get('fecha'))
+
+        if not resultado:
+            return {"error": respuesta}, 422
+
+        return respuesta, 200
+
+    def get_reporte_rendimiento(self, args):
+        resultado, respuesta = self.data_handler.reporte_rendimiento(
+            args.get('periodo', 'semana'),
+            desde=args.get('desde'),
+            hasta=args.get('hasta')
+        )
+
+        if not resultado:
+            return {"error": respuesta}, 422
+
+        return respuesta, 200
+
+    def get_metricas(self):
+        cache = self.data_handler.cache.estadisticas()
+        return metricas.exportar([
+            ('tareas_cache_aciertos_total', 'counter', 'Consultas resueltas con JSON cacheado', cache['aciertos']),
+            ('tareas_cache_fallos_total', 'counter', 'Consultas que tuvieron que codificar JSON', cache['fallos']),
+            ('tareas_cache_desalojos_total', 'counter', 'Entradas desalojadas de la cache', cache['desalojos']),
+            ('tareas_cache_bytes', 'gauge', 'Bytes ocupados por la cache de JSON', cache['bytes']),
+            ('tareas_usuarios', 'gauge', 'Usuarios en memoria', len(self.data_handler.usuarios)),
+            ('tareas_tareas', 'gauge', 'Tareas en memoria', len(self.data_handler.tareas)),
+            ('tareas_seq', 'gauge', 'Numero del ultimo cambio aplicado', self.data_handler.seq),
+        ] + self._metricas_replica()), 200
+
+    def _metricas_replica(self):
+        almacenamiento = self.data_handler.almacenamiento
+        if not almacenamiento.solo_lectura:
+            return []
+        segundos, pendientes = almacenamiento.atraso()
+        return [
+            ('tareas_replica_atraso_segundos', 'gauge', 'Segundos desde que la replica estuvo al dia', segundos),
+            ('tareas_replica_atraso_bytes', 'gauge', 'Bytes del journal del primario sin aplicar', pendientes),
+        ]
+
+    @staticmethod
+    def _respuesta_lote(resultado, resultados, mensaje, codigo_exito):
+        if not resultado:
+            return {"error": "Lote inválido. No se aplicó ningún cambio", "resultados": resultados}, 422
+        return {"message": mensaje, "resultados": resultados}, codigo_exito
+
+    def _lote(self, data, descripcion, operacion, mensaje, codigo_exito):
+        if not isinstance(data, list) or not data:
+            return {"error": f"Datos incompletos. Se requiere una lista de {descripcion}"}, 422
+
+        resultado, resultados = operacion(data)
+        return self._respuesta_lote(resultado, resultados, mensaje, codigo_exito)
+
+    def crear_usuarios_lote(self, data):
+        return self._lote(data, "usuarios", self.data_handler.crear_usuarios_lote,
+                          "Usuarios creados exitosamente", 201)
+
+    def crear_tareas_lote(self, data):
+        return self._lote(data, "tareas", self.data_handler.crear_tareas_lote,
+                          "Tareas creadas exitosamente", 201)
+
+    def gestionar_usuarios_tareas_lote(self, data):
+        return self._lote(data, "asignaciones", self.data_handler.gestionar_usuarios_en_tareas_lote,
+                          "Asignaciones procesadas correctamente", 200)
+
+    def gestionar_dependencias_lote(self, data):
+        return self._lote(data, "dependencias", self.data_handler.gestionar_dependencias_lote,
+                          "Dependencias procesadas correctamente", 200)
+
+
+rutas = Blueprint('tareas', __name__)
+
+
+def crear_app(config=Config, data_handler=None):
+    """App Flask con las rutas de la API.
+
+    Sin `data_handler`, se crea uno segun `config` en la primera peticion y se carga en
+    segundo plano; GET /ready responde 200 cuando termina. Con uno ya cargado (por
+    ejemplo en las pruebas) la app queda lista de entrada.
+    """
+    app = Flask(__name__)
+    app.extensions['tareas'] = ProveedorDatos(config, data_handler)
+    app.register_blueprint(rutas)
+    return app
+
+
+def _data_handler():
+    return current_app.extensions['tareas'].data_handler
+
+def _controlador():
+    return TaskController(_data_handler())
+
+def _responder(cuerpo, codigo):
+    if isinstance(cuerpo, Suscripcion):
+        return current_app.response_class(cuerpo.bloques(), status=codigo, mimetype=TIPO_EVENTOS,
+                                          headers={'Cache-Control': 'no-cache'})
+    if isinstance(cuerpo, Exportacion):
+        return current_app.response_class(cuerpo.bloques(), status=codigo, mimetype=TIPO_NDJSON)
+    if isinstance(cuerpo, str):
+        return current_app.response_class(cuerpo, status=codigo, content_type=TIPO_METRICAS)
+    if isinstance(cuerpo, tuple):
+        datos, etag = cuerpo
+        response = current_app.response_class(datos, status=codigo, mimetype='application/json')
+        response.set_etag(etag)
+        return response
+    return jsonify(cuerpo), codigo
+
+@rutas.before_app_request
+def iniciar_medicion():
+    g.inicio = time.perf_counter()
+    g.perfil = perfilador.iniciar()
+
+@rutas.before_app_request
+def verificar_precarga():
+    # Mientras se cargan los datos, las rutas que los necesitan completos responden 503
+    if request.url_rule is not None:
+        respuesta = _controlador().en_precarga(request.method, request.url_rule.rule)
+        if respuesta:
+            return _responder(*respuesta)
+
+@rutas.before_app_request
+def refrescar_datos():
+    # En modo multiproceso, aplica los cambios que hicieron otros workers (si la carga ya termino)
+    data_handler = _data_handler()
+    if data_handler.cargado.is_set():
+        data_handler.refrescar()
+
+@rutas.before_app_request
+def verificar_replica():
+    if request.url_rule is not None:
+        respuesta = _controlador().verificar_replica(request.method, request.headers.get('X-Seq-Minima'))
+        if respuesta:
+            return _responder(*respuesta)
+
+@rutas.after_app_request
+def registrar_medicion(response):
+    # Registrado antes que los demas after_request, se ejecuta despues de todos ellos
+    inicio = g.get('inicio')
+    if inicio is None:
+        return response
+    duracion = time.perf_counter() - inicio
+    ruta = request.url_rule.rule if request.url_rule else 'desconocida'
+    metricas.PETICIONES.observar(duracion, request.method, ruta, str(response.status_code))
+    if g.perfil is not None:
+        perfilador.terminar(g.pop('perfil'), duracion, f"{request.method} {ruta}")
+    return response
+
+@rutas.teardown_app_request
+def liberar_perfil(error):
+    # Si la peticion termino con una excepcion sin pasar por after_request, libera el perfilador
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        perfilador.terminar(perfil, 0.0, 'error')
+
+@rutas.after_app_request
+def esperar_commit(response):
+    # Con escritura diferida, el cliente puede pedir que la respuesta espere a que su cambio este en disco
+    if request.method == 'POST' and response.status_code < 400 and request.headers.get('X-Esperar-Commit') == '1':
+        _data_handler().esperar_commit()
+    return response
+
+@rutas.after_app_request
+def agregar_seq(response):
+    # Ultimo cambio que ven estos datos; enviado luego como X-Seq-Minima, una replica no responde con datos anteriores
+    response.headers['X-Seq'] = str(_data_handler().seq)
+    return response
+
+@rutas.after_app_request
+def agregar_etag(response):
+    # Toda respuesta GET lleva ETag; si el cliente ya tiene esa version se responde 304 sin cuerpo.
+    # Los flujos de /events no terminan: no se puede calcular su ETag
+    if request.method == 'GET' and response.status_code == 200 and not response.is_streamed:
+        if not response.get_etag()[0]:
+            response.add_etag()
+        response.make_conditional(request)
+    return response
+
+@rutas.route('/usuarios/mialias=<alias>', methods=['GET'])
 def get_usuario(alias):
-    usuario = data_handler.get_usuario_por_alias(alias)
-    if not usuario:
-        return jsonify({"error": "Usuario no encontrado"}), 404
-        
-    return jsonify(usuario.to_dict()), 200
+    return _responder(*_controlador().get_usuario(alias, request.args))
 
-@app.route('/usuarios', methods=['POST'])
+@rutas.route('/usuarios', methods=['POST'])
 def crear_usuario():
-    data = request.json
-    
-    if not data or 'contacto' not in data or 'nombre' not in data:
-        return jsonify({"error": "Datos incompletos. Se requiere contacto y nombre"}), 422
-        
-    resultado, respuesta = data_handler.crear_usuario(data['contacto'], data['nombre'])
-    
-    if not resultado:
-        return jsonify({"error": respuesta}), 422
-        
-    return jsonify({"message": "Usuario creado exitosamente", "usuario": respuesta.get_user_info()}), 201
-
-@app.route('/tasks', methods=['POST'])
+    return _responder(*_controlador().crear_usuario(request.json))
+
+@rutas.route('/tasks', methods=['POST'])
 def crear_tarea():
-    data = request.json
-    
-    if not data or 'nombre' not in data or 'descripcion' not in data or 'usuario' not in data or 'rol' not in data:
-        return jsonify({"error": "Datos incompletos. Se requieren nombre, descripcion, usuario y rol"}), 422
-        
-    resultado, respuesta = data_handler.crear_tarea(data['nombre'], data['descripcion'], data['usuario'], data['rol'])
-    
-    if not resultado:
-        return jsonify({"error": respuesta}), 422
-        
-    return jsonify({"message": "Tarea creada exitosamente", "id": respuesta.id}), 201
-
-@app.route('/tasks/<task_id>', methods=['POST'])
+    return _responder(*_controlador().crear_tarea(request.json))
+
+@rutas.route('/tasks', methods=['GET'])
+def get_tareas():
+    return _responder(*_controlador().get_tareas(request.args))
+
+@rutas.route('/tasks/<task_id>', methods=['GET'])
+def get_tarea(task_id):
+    return _responder(*_controlador().get_tarea(task_id))
+
+@rutas.route('/tasks/<task_id>', methods=['POST'])
 def actualizar_estado_tarea(task_id):
-    data = request.json
-    
-    if not data or 'estado' not in data:
-        return jsonify({"error": "Datos incompletos. Se requiere estado"}), 422
-        
-    resultado, mensaje = data_handler.cambiar_estado_tarea(task_id, data['estado'])
-    
-    if not resultado:
-        if mensaje == "Tarea no encontrada":
-            return jsonify({"error": mensaje}), 404
-        return jsonify({"error": mensaje}), 422
-        
-    return jsonify({"message": mensaje}), 200
-
-@app.route('/tasks/<task_id>/users', methods=['POST'])
+    return _responder(*_controlador().actualizar_estado_tarea(
+        task_id, request.json, TaskController.etags(request.if_match)))
+
+@rutas.route('/tasks/<task_id>/users', methods=['POST'])
 def gestionar_usuario_tarea(task_id):
-    data = request.json
-    
-    if not data or 'usuario' not in data or 'rol' not in data or 'accion' not in data:
-        return jsonify({"error": "Datos incompletos. Se requiere usuario, rol y accion"}), 422
-        
-    resultado, mensaje = data_handler.gestionar_usuario_en_tarea(
-        task_id, data['usuario'], data['rol'], data['accion']
-    )
-    
-    if not resultado:
-        if mensaje in ["Tarea no encontrada", "Usuario no encontrado"]:
-            return jsonify({"error": mensaje}), 404
-        return jsonify({"error": mensaje}), 422
-        
-    return jsonify({"message": mensaje}), 200
-
-@app.route('/tasks/<task_id>/dependencies', methods=['POST'])
+    return _responder(*_controlador().gestionar_usuario_tarea(
+        task_id, request.json, TaskController.etags(request.if_match)))
+
+@rutas.route('/tasks/<task_id>/dependencies', methods=['POST'])
 def gestionar_dependencia(task_id):
-    data = request.json
-    
-    if not data or 'dependencytaskid' not in data or 'accion' not in data:
-        return jsonify({"error": "Datos incompletos. Se requiere dependencytaskid y accion"}), 422
-        
-    resultado, mensaje = data_handler.gestionar_dependencia(
-        task_id, data['dependencytaskid'], data['accion']
-    )
-    
-    if not resultado:
-        if mensaje in ["Tarea no encontrada", "Tarea dependiente no encontrada"]:
-            return jsonify({"error": mensaje}), 404
-        return jsonify({"error": mensaje}), 422
-        
-    return jsonify({"message": mensaje}), 200
+    return _responder(*_controlador().gestionar_dependencia(
+        task_id, request.json, TaskController.etags(request.if_match)))
+
+@rutas.route('/tasks/<task_id>/dependencies', methods=['GET'])
+def get_dependencias(task_id):
+    return _responder(*_controlador().get_dependencias(task_id, request.args))
+
+@rutas.route('/tasks/<task_id>/dependents', methods=['GET'])
+def get_dependientes(task_id):
+    return _responder(*_controlador().get_dependientes(task_id, request.args))
+
+@rutas.route('/tasks/topological-order', methods=['GET'])
+def get_orden_topologico():
+    return _responder(*_controlador().get_orden_topologico())
+
+@rutas.route('/tasks/<task_id>/transition', methods=['POST'])
+def transicionar_subarbol(task_id):
+    return _responder(*_controlador().transicionar_subarbol(
+        task_id, request.json, TaskController.etags(request.if_match)))
+
+@rutas.route('/tasks/<task_id>/schedule', methods=['GET'])
+def get_planificacion(task_id):
+    return _responder(*_controlador().get_planificacion(task_id))
+
+@rutas.route('/tasks/critical-path', methods=['GET'])
+def get_ruta_critica():
+    return _responder(*_controlador().get_ruta_critica())
+
+@rutas.route('/usuarios/batch', methods=['POST'])
+def crear_usuarios_lote():
+    return _responder(*_controlador().crear_usuarios_lote(request.json))
+
+@rutas.route('/tasks/batch', methods=['POST'])
+def crear_tareas_lote():
+    return _responder(*_controlador().crear_tareas_lote(request.json))
+
+@rutas.route('/tasks/batch/users', methods=['POST'])
+def gestionar_usuarios_tareas_lote():
+    return _responder(*_controlador().gestionar_usuarios_tareas_lote(request.json))
+
+@rutas.route('/tasks/batch/dependencies', methods=['POST'])
+def gestionar_dependencias_lote():
+    return _responder(*_controlador().gestionar_dependencias_lote(request.json))
+
+@rutas.route('/reports/workload', methods=['GET'])
+def get_reporte_carga():
+    return _responder(*_controlador().get_reporte_carga(request.args))
+
+@rutas.route('/reports/breakdown', methods=['GET'])
+def get_reporte_desglose():
+    return _responder(*_controlador().get_reporte_desglose())
+
+@rutas.route('/reports/overdue', methods=['GET'])
+def get_reporte_atrasos():
+    return _responder(*_controlador().get_reporte_atrasos(request.args))
+
+@rutas.route('/reports/throughput', methods=['GET'])
+def get_reporte_rendimiento():
+    return _responder(*_controlador().get_reporte_rendimiento(request.args))
+
+@rutas.route('/metrics', methods=['GET'])
+def get_metricas():
+    return _responder(*_controlador().get_metricas())
+
+@rutas.route('/events', methods=['GET'])
+def get_eventos():
+    return _responder(*_controlador().get_eventos(request.args, request.headers.get('Last-Event-ID')))
+
+@rutas.route('/export', methods=['GET'])
+def exportar():
+    return _responder(*_controlador().exportar())
+
+@rutas.route('/import', methods=['POST'])
+def importar():
+    # El cuerpo se lee de a fragmentos: no se carga entero en memoria
+    return _responder(*_controlador().importar(iter(lambda: request.stream.read(TAMANO_FRAGMENTO), b'')))
+
+@rutas.route('/replication', methods=['GET'])
+def get_replicacion():
+    return _responder(*_controlador().get_replicacion())
+
+@rutas.route('/ready', methods=['GET'])
+def get_ready():
+    return _responder(*_controlador().get_ready())
+
+
+# App del proceso (app.py, gunicorn app:app); no carga datos hasta la primera peticion
+app = crear_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
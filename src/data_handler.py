@@ -1,81 +1,471 @@
-import json
+import contextlib
 import datetime
+import functools
+import json
+import logging
+import threading
+import time
+import metricas
 from models.usuario import Usuario
-from models.tarea import Tarea
-from models.asignacion import Asignacion
+from models.tarea import Tarea, ESTADOS_VALIDOS
+from models.asignacion import Asignacion, ROLES_VALIDOS
+from models.campos import EPOCA, MICROSEGUNDO
+from storage.carga_diferida import TareaDiferida
+from storage.escritura_diferida import EscrituraDiferida
+from storage.json_compartido import AlmacenamientoJSONCompartido
+from storage.json_storage import AlmacenamientoJSON
+from storage.particionado import AlmacenamientoParticionado
+from storage.replica import AlmacenamientoReplica
+from storage.sqlite_storage import AlmacenamientoSQLite
+from grafo import GrafoDependencias
+from cache import CacheSerializacion
+from indices import IndiceTareas, ListaOrdenada
+from planificacion import Planificacion
+from reportes import PERIODOS, ColumnasReporte, atrasos, carga_de_trabajo, desglose, rendimiento
+from eventos import BufferEventos
+from foto import Construccion, FotoEstado
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+ALMACENAMIENTOS = ["json", "sqlite", "particionado"]
+# Campos de tarea que se pueden pedir en la vista paginada de un usuario (mismos que Usuario.to_dict).
+# Solo se lee lo pedido: id, nombre y estado no hidratan una TareaDiferida
+VALORES_TAREA_USUARIO = {
+    "id": lambda tarea: tarea.id,
+    "nombre": lambda tarea: tarea.nombre,
+    "estado": lambda tarea: tarea.estado,
+    "descripcion": lambda tarea: tarea.descripcion,
+    "fecha_esperada_fin": lambda tarea: tarea.fechaEsperadaFin.strftime(FORMATO_FECHA) if tarea.fechaEsperadaFin else None
+}
+CAMPOS_TAREA_USUARIO = list(VALORES_TAREA_USUARIO)
+LIMITE_PAGINA_MAXIMO = 1000
+# Orden de GET /tasks: por fecha esperada de fin, ascendente o (con '-') descendente
+ORDENES_TAREAS = ["fecha_esperada_fin", "-fecha_esperada_fin"]
+# Tareas que arrastra una transicion en bloque: las dependencias o los dependientes transitivos
+ALCANCES_TRANSICION = ["dependencias", "dependientes"]
+# Respuesta de las operaciones condicionadas (If-Match) cuando la tarea ya no es la que vio el cliente
+MENSAJE_CONFLICTO = "La tarea fue modificada por otra petición"
+
+logger = logging.getLogger(__name__)
+
+
+def sincronizado(metodo):
+    """Ejecuta el metodo con el lock del handler; si el almacenamiento lo pide, espera
+    a que el cambio quede persistido (fuera del lock, para no frenar al resto).
+
+    En la llamada externa registra en las metricas la espera por el lock, la duracion
+    del metodo (con el nombre del metodo como operacion) y la espera del commit.
+    """
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        with self._lock:
+            anidamiento = getattr(self._hilo, 'anidamiento', 0)
+            externo = anidamiento == 0
+            if externo:
+                adquirido = time.perf_counter()
+                metricas.OPERACIONES.observar(adquirido - inicio, 'espera_lock')
+            # En modo multiproceso la llamada externa toma el lock entre procesos y antes
+            # de validar nada se pone al dia con los cambios de los demas
+            with self.almacenamiento.bloquear() if externo else contextlib.nullcontext():
+                if externo:
+                    self.almacenamiento.sincronizar(self)
+                self._hilo.anidamiento = anidamiento + 1
+                try:
+                    resultado = metodo(self, *args, **kwargs)
+                finally:
+                    self._hilo.anidamiento = anidamiento
+            seq = self.seq
+        if externo:
+            metricas.OPERACIONES.observar(time.perf_counter() - adquirido, metodo.__name__)
+            if self.almacenamiento.espera_commit:
+                with metricas.Cronometro('esperar_commit'):
+                    self.almacenamiento.esperar(seq)
+        return resultado
+    return envoltura
 
 
 class DataHandler:
-    def __init__(self, filename='data.json'):
+    """Estado en memoria de usuarios, tareas y dependencias.
+
+    Los cambios se hacen de a uno con el lock del handler (ver sincronizado). Las
+    consultas no lo toman: leen primero la version de la entidad y trabajan sobre las
+    listas que encuentran en ese momento. Por eso las listas compartidas nunca se
+    modifican por el medio: agregar es un append y quitar reemplaza la lista por una
+    nueva (o deja un hueco, en las Coleccion que relacionan tareas y usuarios), asi que
+    una lectura ve cada cambio entero o no lo ve.
+    """
+
+    def __init__(self, filename='data.json', modo_persistencia='snapshot', umbral_compactacion=16 * 1024 * 1024,
+                 almacenamiento=None, tamano_cache=64 * 1024 * 1024, cargar=True, exigir_dependencias=False,
+                 tamano_eventos=10000):
+        """Con cargar=False los datos no se leen aca: se cargan luego con load_data() o precargar().
+
+        Con exigir_dependencias una tarea solo pasa a Finalizada si todas sus dependencias lo estan.
+        """
         self.filename = filename
+        self.exigir_dependencias = exigir_dependencias
+        self.almacenamiento = almacenamiento or AlmacenamientoJSON(filename, modo_persistencia, umbral_compactacion)
         self.tareas = []
         self.usuarios = []
-        self.load_data()
+        # Indices primarios: alias -> Usuario, id -> Tarea
+        self._usuarios_por_alias = {}
+        self._tareas_por_id = {}
+        self.grafo = GrafoDependencias()
+        # Indices por estado, rol y fecha; se construyen en la primera consulta que los usa
+        self._indice = None
+        # Fechas mas tempranas de fin y rutas criticas; se construyen en la primera consulta
+        self._plan = None
+        # Columnas NumPy de tareas y asignaciones para GET /reports; se construyen en el primer reporte
+        self._reportes = None
+        # JSON ya codificado de usuarios y tareas, invalidado por la version de cada entidad
+        self.cache = CacheSerializacion(tamano_cache)
+        self.seq = 0  # Numero del ultimo cambio aplicado
+        self._registros_lote = None  # Cambios pendientes dentro de un bloque lote()
+        # Exportaciones (GET /export) y compactaciones en curso: guardan cada tarea antes de su primer cambio
+        self._exportaciones = []
+        self._eventos_lote = None
+        # Ultimos cambios, para GET /events; se publican una vez entregados al almacenamiento
+        self.eventos = BufferEventos(tamano_eventos)
+        self._lock = threading.RLock()
+        # Hidratacion de las tareas diferidas: separado del anterior para que una lectura no espere a las escrituras
+        self._lock_hidratacion = threading.Lock()
+        # Por hilo: mientras uno espera con el lock suelto (ver EscrituraDiferida) otro puede tomarlo
+        self._hilo = threading.local()
+        # Activo cuando termina la carga; mientras tanto las listas e indices se estan llenando
+        self.cargado = threading.Event()
+        self.error_carga = None
+        if cargar:
+            self.load_data()
+
+    @classmethod
+    def desde_config(cls, config, cargar=True):
+        if config.MULTIPROCESO:
+            # Cada cambio tiene que estar en el journal compartido antes de soltar el lock
+            if config.ALMACENAMIENTO != 'json' or config.ESCRITURA_DIFERIDA:
+                raise ValueError("El modo multiproceso requiere almacenamiento json sin escritura diferida")
+            almacenamiento = AlmacenamientoJSONCompartido(
+                config.DATA_FILE,
+                umbral_compactacion=config.UMBRAL_COMPACTACION,
+                carga_diferida=config.CARGA_DIFERIDA
+            )
+            return cls(config.DATA_FILE, almacenamiento=almacenamiento, tamano_cache=config.TAMANO_CACHE,
+                       cargar=cargar, exigir_dependencias=config.EXIGIR_DEPENDENCIAS,
+                       tamano_eventos=config.TAMANO_EVENTOS)
+
+        if config.REPLICA_DE:
+            # Los datos son los del primario: el resto de la configuracion de persistencia no aplica
+            almacenamiento = AlmacenamientoReplica(
+                config.REPLICA_DE,
+                intervalo=config.INTERVALO_REPLICA,
+                carga_diferida=config.CARGA_DIFERIDA,
+                formato_snapshot=config.FORMATO_SNAPSHOT
+            )
+            return cls(config.REPLICA_DE, almacenamiento=almacenamiento, tamano_cache=config.TAMANO_CACHE,
+                       cargar=cargar, exigir_dependencias=config.EXIGIR_DEPENDENCIAS,
+                       tamano_eventos=config.TAMANO_EVENTOS)
 
+        if config.ALMACENAMIENTO == 'sqlite':
+            almacenamiento = AlmacenamientoSQLite(config.SQLITE_DB)
+        elif config.ALMACENAMIENTO == 'particionado':
+            almacenamiento = AlmacenamientoParticionado(
+                config.DIRECTORIO_PARTICIONES,
+                particiones=config.PARTICIONES,
+                carga_diferida=config.CARGA_DIFERIDA
+            )
+        elif config.ALMACENAMIENTO == 'json':
+            almacenamiento = AlmacenamientoJSON(
+                config.DATA_FILE,
+                modo_persistencia=config.MODO_PERSISTENCIA,
+                umbral_compactacion=config.UMBRAL_COMPACTACION,
+                carga_diferida=config.CARGA_DIFERIDA,
+                formato_snapshot=config.FORMATO_SNAPSHOT
+            )
+        else:
+            raise ValueError(f"Almacenamiento inválido. Debe ser uno de: {', '.join(ALMACENAMIENTOS)}")
+
+        if config.ESCRITURA_DIFERIDA:
+            almacenamiento = EscrituraDiferida(
+                almacenamiento,
+                intervalo=config.INTERVALO_ESCRITURA,
+                tamano_lote=config.TAMANO_LOTE_ESCRITURA,
+                durabilidad=config.DURABILIDAD
+            )
+        return cls(config.DATA_FILE, almacenamiento=almacenamiento, tamano_cache=config.TAMANO_CACHE,
+                   cargar=cargar, exigir_dependencias=config.EXIGIR_DEPENDENCIAS,
+                   tamano_eventos=config.TAMANO_EVENTOS)
+
+    @sincronizado
     def save_data(self):
-        data = {
-            'tareas': [self._serialize_tarea(tarea) for tarea in self.tareas],
-            'usuarios': [self._serialize_usuario(usuario) for usuario in self.usuarios]
-        }
-        with open(self.filename, 'w') as f:
-            json.dump(data, f)
+        self.almacenamiento.guardar(self)
 
+    @sincronizado
     def load_data(self):
-        try:
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-
-                # Cargar usuarios primero
-                self.usuarios = []
-                for user_data in data.get('usuarios', []):
-                    usuario = Usuario(user_data['alias'], user_data['nombre'])
-                    self.usuarios.append(usuario)
-
-                # Cargar tareas y reconstruir referencias
-                self.tareas = []
-                for task_data in data.get('tareas', []):
-                    tarea = Tarea(
-                        task_data['nombre'],
-                        task_data['descripcion'],
-                        datetime.datetime.strptime(task_data['fecha_esperada_fin'], "%Y-%m-%d %H:%M:%S") if task_data.get('fecha_esperada_fin') else None,
-                        task_data['estado']
-                    )
-                    tarea.id = task_data['id']  # Usar el ID guardado
-                    tarea.dependencias = task_data.get('dependencias', [])
-
-                    # Reconstruir asignaciones
-                    for asignacion_data in task_data.get('usuarios_asignados', []):
-                        usuario = self.get_usuario_por_alias(asignacion_data['usuario'])
-                        if usuario:
-                            asignacion = Asignacion(usuario, asignacion_data['rol'])
-                            asignacion.fechaAsignacion = datetime.datetime.strptime(
-                                asignacion_data['fecha_asignacion'],
-                                "%Y-%m-%d %H:%M:%S"
-                            )
-                            tarea.usuariosAsignados.append(asignacion)
-                            usuario.tareasAsociadas.append(tarea)
-
-                    self.tareas.append(tarea)
-
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.tareas = []
-            self.usuarios = []
+        self.cargado.clear()
+        self.almacenamiento.cargar(self)
+        # Durante la carga las aristas se agregan sin verificar; el orden se calcula una vez al final
+        self.grafo.recalcular_orden()
+        # Los cambios cargados no se pueden pedir a GET /events: quien venga de antes tiene que releer
+        self.eventos.reiniciar(self.seq)
+        metricas.OBJETOS_CARGADOS.incrementar(len(self.usuarios), 'usuario')
+        metricas.OBJETOS_CARGADOS.incrementar(len(self.tareas), 'tarea')
+        self.cargado.set()
+
+    def _recargar_aparte(self, cargar):
+        """Vuelve a cargar los datos con cargar(handler) sin que las consultas vean la carga a medias.
+
+        Se carga sobre un DataHandler auxiliar y al terminar se pasan sus listas e indices
+        a este, cada uno de una vez: las consultas sin lock ven los datos anteriores o los
+        nuevos, siempre completos. Mientras tanto ambos estan en memoria. Se llama con el lock.
+        """
+        auxiliar = DataHandler(self.filename, almacenamiento=self.almacenamiento, cargar=False)
+        # Las tareas diferidas cargadas se hidratan con el lock de su handler: que sea el mismo
+        auxiliar._lock_hidratacion = self._lock_hidratacion
+        cargar(auxiliar)
+        auxiliar.grafo.recalcular_orden()
+        # Primero los indices primarios: una tarea de la lista nueva siempre se encuentra por id
+        self._usuarios_por_alias, self._tareas_por_id = auxiliar._usuarios_por_alias, auxiliar._tareas_por_id
+        self.usuarios, self.tareas, self.grafo = auxiliar.usuarios, auxiliar.tareas, auxiliar.grafo
+        self._indice = None
+        self._plan = None
+        self._reportes = None
+        self._exportaciones = []
+        self.cache.vaciar()
+        self.seq = auxiliar.seq
+
+    def precargar(self):
+        """Carga los datos en un hilo en segundo plano y devuelve el hilo.
+
+        La carga tiene el lock del handler hasta terminar: los cambios esperan, pero las
+        consultas sin lock ven lo que ya se cargo (ver tarea_materializada). Si falla, el
+        error queda en error_carga y `cargado` no se activa.
+        """
+        def cargar():
+            try:
+                self.load_data()
+            except Exception as e:
+                logger.exception("Error al cargar los datos")
+                self.error_carga = e
+
+        hilo = threading.Thread(target=cargar, name='precarga', daemon=True)
+        hilo.start()
+        return hilo
+
+    def tarea_materializada(self, task_id):
+        """Indica si la tarea ya esta cargada con todo su cuerpo.
+
+        Sirve para responder consultas mientras se precargan los datos: una tarea recien
+        se agrega a los indices cuando esta completa, pero una diferida sin hidratar
+        podria hidratarse antes de que esten cargados todos los usuarios que tiene asignados.
+        """
+        tarea = self.get_tarea_por_id(task_id)
+        return tarea is not None and not (isinstance(tarea, TareaDiferida) and not tarea.hidratada)
+
+    def refrescar(self):
+        """Aplica los cambios que otros procesos persistieron (modo multiproceso)"""
+        # Sin cambios ajenos (siempre, fuera del modo multiproceso) las lecturas no esperan al lock
+        if self.almacenamiento.hay_cambios():
+            with self._lock:
+                self.almacenamiento.refrescar(self)
+
+    def alcanzar(self, seq, timeout=None):
+        """Indica si ya se aplico el cambio `seq`; una replica espera hasta `timeout` segundos a que llegue"""
+        return self.seq >= seq or self.almacenamiento.alcanzar(self, seq, timeout)
+
+    def esperar_commit(self, timeout=None):
+        """Espera a que todos los cambios hechos hasta ahora esten persistidos"""
+        return self.almacenamiento.esperar(self.seq, timeout)
+
+    def cerrar(self):
+        """Persiste lo pendiente y libera el almacenamiento"""
+        self.almacenamiento.cerrar()
+
+    def _cargar_usuario(self, user_data):
+        self._agregar_usuario(Usuario(user_data['alias'], user_data['nombre']))
+
+    def _cargar_tarea(self, task_data):
+        tarea = Tarea(
+            task_data['nombre'],
+            task_data['descripcion'],
+            self._parse_fecha(task_data.get('fecha_esperada_fin')),
+            task_data['estado']
+        )
+        tarea.id = task_data['id']  # Usar el ID guardado
+        tarea.dependencias = task_data.get('dependencias', [])
+
+        # Reconstruir asignaciones
+        for asignacion_data in task_data.get('usuarios_asignados', []):
+            usuario = self.get_usuario_por_alias(asignacion_data['usuario'])
+            if usuario:
+                asignacion = Asignacion(usuario, asignacion_data['rol'])
+                asignacion.fechaAsignacion = self._parse_fecha(asignacion_data['fecha_asignacion'])
+                tarea.usuariosAsignados.agregar(asignacion)
+                usuario.tareasAsociadas.agregar(tarea)
+
+        self._agregar_tarea(tarea)
+
+    def _vaciar(self):
+        self.tareas = []
+        self.usuarios = []
+        self._usuarios_por_alias = {}
+        self._tareas_por_id = {}
+        self.grafo = GrafoDependencias()
+        self._indice = None
+        self._plan = None
+        self._reportes = None
+        # Las exportaciones en curso siguen leyendo las listas anteriores, que ya no cambian
+        self._exportaciones = []
+        # Las entidades recargadas vuelven a la version 0: lo cacheado ya no se puede distinguir
+        self.cache.vaciar()
+
+    def _agregar_usuario(self, usuario):
+        self.usuarios.append(usuario)
+        self._usuarios_por_alias[usuario.alias] = usuario
+        if self._reportes is not None:
+            self._reportes.agregar_usuario(usuario.alias)
+
+    def _agregar_tarea(self, tarea):
+        self.tareas.append(tarea)
+        self._tareas_por_id[tarea.id] = tarea
+        self.grafo.agregar_nodo(tarea.id)
+        for dependencia_id in tarea.dependencias:
+            self.grafo.agregar_arista(dependencia_id, tarea.id)
+        if self._indice is not None:
+            self._indice.agregar(*self._datos_indice(tarea))
+        if self._plan is not None:
+            self._plan.agregar_tarea(tarea.id, self._fecha_esperada(tarea))
+        if self._reportes is not None:
+            self._reportes.agregar_tarea(*self._datos_reporte(tarea))
+
+    def _datos_indice(self, tarea):
+        """(id, fecha, estado, roles) de la tarea para IndiceTareas, sin hidratarla si es diferida"""
+        cuerpo = tarea.leer_sin_hidratar() if isinstance(tarea, TareaDiferida) else None
+        if cuerpo is not None:
+            _, fecha, _, asignaciones = cuerpo
+            if fecha is not None:
+                roles = [rol for alias, rol, _ in asignaciones if self.get_usuario_por_alias(alias)]
+                return tarea.id, (fecha - EPOCA) // MICROSEGUNDO, tarea.estado, roles
+        roles = [asignacion.rol for asignacion in tarea.usuariosAsignados]
+        return tarea.id, self._fecha_esperada(tarea), tarea.estado, roles
+
+    def _datos_reporte(self, tarea):
+        """(id, fecha, estado, [(alias, rol, fecha de asignacion)]) para ColumnasReporte, sin hidratar la tarea"""
+        cuerpo = tarea.leer_sin_hidratar() if isinstance(tarea, TareaDiferida) else None
+        if cuerpo is not None:
+            _, fecha, _, asignaciones = cuerpo
+            if fecha is not None:
+                return tarea.id, (fecha - EPOCA) // MICROSEGUNDO, tarea.estado, [
+                    (alias, rol, (fecha_asignacion - EPOCA) // MICROSEGUNDO)
+                    for alias, rol, fecha_asignacion in asignaciones if self.get_usuario_por_alias(alias)
+                ]
+        # El slot de la fecha no se lee directo: en una diferida sin hidratar todavia no tiene valor
+        return tarea.id, self._fecha_esperada(tarea), tarea.estado, [
+            (asignacion.usuarioAsignado.alias, asignacion.rol, asignacion._fecha_asignacion)
+            for asignacion in tarea.usuariosAsignados
+        ]
+
+    @staticmethod
+    def _fecha_esperada(tarea):
+        """Fecha esperada de fin en microsegundos, sin hidratar la tarea si es diferida"""
+        cuerpo = tarea.leer_sin_hidratar() if isinstance(tarea, TareaDiferida) else None
+        fecha = tarea.fechaEsperadaFin if cuerpo is None else cuerpo[1]
+        if fecha is None:
+            # Sin fecha guardada: la hidratacion le asigna la de Tarea.__init__
+            fecha = tarea.fechaEsperadaFin
+        return (fecha - EPOCA) // MICROSEGUNDO
+
+    def _derivada(self, atributo, armar, datos):
+        """Estructura derivada guardada en `atributo` (_indice, _plan o _reportes).
+
+        La primera vez se arma sin el lock de escritura: con el lock solo se deja una
+        Construccion en su lugar, que anota los cambios que la actualizarian, y se toma
+        una FotoEstado que lee datos(tarea) de cada tarea. armar(foto) corre sin el lock;
+        despues, con el lock, se aplican los cambios anotados y se publica. Otra consulta
+        que la necesita mientras tanto espera a esa construccion. No se llama con el lock.
+        """
+        while True:
+            estructura = getattr(self, atributo)
+            if isinstance(estructura, Construccion):
+                estructura.esperar()
+                continue
+            if estructura is not None:
+                return estructura
+            with self._lock:
+                if getattr(self, atributo) is not None:
+                    continue
+                construccion = Construccion()
+                setattr(self, atributo, construccion)
+                foto = FotoEstado(self, datos)
+            armada = None
+            try:
+                armada = armar(foto)
+            finally:
+                with self._lock:
+                    foto.retirar()
+                    # Si se descarto mientras tanto (recarga, dependencias de otro proceso), se vuelve a armar
+                    if getattr(self, atributo) is construccion:
+                        setattr(self, atributo, None if armada is None else construccion.aplicar(armada))
+                    construccion.terminar()
+
+    def _indice_tareas(self):
+        return self._derivada('_indice', lambda foto: IndiceTareas(foto.tareas()), self._datos_indice)
+
+    def _planificacion(self):
+        # Las fechas no cambian; el grafo se lee sin lock, y lo que cambie mientras tanto
+        # lo corrigen las llamadas anotadas, porque actualizar() recalcula desde el grafo vigente
+        return self._derivada('_plan', lambda foto: Planificacion(self.grafo, dict(foto.tareas())),
+                              lambda tarea: (tarea.id, self._fecha_esperada(tarea)))
+
+    def _foto_reporte(self):
+        """Copia de las columnas de ColumnasReporte en el ultimo cambio"""
+        reportes = self._derivada(
+            '_reportes',
+            lambda foto: ColumnasReporte([usuario.alias for usuario in foto.usuarios()], foto.tareas()),
+            self._datos_reporte
+        )
+        with self._lock:
+            return reportes.foto(self.seq)
+
+    def verificar_indices(self):
+        """Devuelve la lista de inconsistencias entre las listas y los indices (vacia si todo cuadra)"""
+        errores = []
+        if len(self._usuarios_por_alias) != len(self.usuarios):
+            errores.append("Cantidad de usuarios distinta en lista e índice")
+        for usuario in self.usuarios:
+            if self._usuarios_por_alias.get(usuario.alias) is not usuario:
+                errores.append(f"Usuario '{usuario.alias}' no indexado correctamente")
+        if len(self._tareas_por_id) != len(self.tareas):
+            errores.append("Cantidad de tareas distinta en lista e índice")
+        for tarea in self.tareas:
+            if self._tareas_por_id.get(tarea.id) is not tarea:
+                errores.append(f"Tarea '{tarea.id}' no indexada correctamente")
+        return errores
+
+    def _serializar(self):
+        with self._lock, metricas.Cronometro('serializar'):
+            return {
+                'seq': self.seq,
+                'usuarios': [self._serialize_usuario(usuario) for usuario in self.usuarios],
+                'tareas': [self._serialize_tarea(tarea) for tarea in self.tareas]
+            }
 
     def _serialize_tarea(self, tarea):
+        datos = tarea.datos_sin_hidratar() if isinstance(tarea, TareaDiferida) else None
+        if datos is not None:
+            return datos
         return {
             'id': tarea.id,
             'nombre': tarea.nombre,
             'descripcion': tarea.descripcion,
             'estado': tarea.estado,
-            'fecha_esperada_fin': tarea.fechaEsperadaFin.strftime("%Y-%m-%d %H:%M:%S") if tarea.fechaEsperadaFin else None,
+            'fecha_esperada_fin': self._format_fecha(tarea.fechaEsperadaFin),
             'usuarios_asignados': [
                 {
                     'usuario': asignacion.usuarioAsignado.alias,
                     'rol': asignacion.rol,
-                    'fecha_asignacion': asignacion.fechaAsignacion.strftime("%Y-%m-%d %H:%M:%S")
+                    'fecha_asignacion': self._format_fecha(asignacion.fechaAsignacion)
                 } for asignacion in tarea.usuariosAsignados
             ],
-            'dependencias': tarea.dependencias
+            'dependencias': list(tarea.dependencias)
         }
 
     def _serialize_usuario(self, usuario):
@@ -84,27 +474,390 @@ class DataHandler:
             'nombre': usuario.nombre
         }
 
+    @staticmethod
+    def _format_fecha(fecha):
+        return fecha.strftime(FORMATO_FECHA) if fecha else None
+
+    @staticmethod
+    def _parse_fecha(texto):
+        # Mismo resultado que strptime con FORMATO_FECHA, bastante mas rapido al cargar
+        return datetime.datetime.fromisoformat(texto) if texto else None
+
+    # --- Registro de cambios ---
+
+    def _antes_de_cambiar(self, tarea):
+        """Se llama con el lock antes de modificar una tarea existente"""
+        for exportacion in self._exportaciones:
+            exportacion.preservar(tarea)
+
+    def _registrar_cambio(self, op, **campos):
+        self.seq += 1
+        registro = {'seq': self.seq, 'op': op}
+        registro.update(campos)
+        evento = self._evento(registro)
+        if self._registros_lote is not None:
+            self._registros_lote.append(registro)
+            self._eventos_lote.append(evento)
+        else:
+            self.almacenamiento.registrar(self, registro)
+            self.eventos.publicar([evento])
+        return registro
+
+    def _evento(self, registro):
+        """Evento de GET /events: el registro mas los alias de los usuarios cuya vista cambia"""
+        if registro['op'] == 'crear_usuario':
+            usuarios = [registro['alias']]
+        elif 'usuario' in registro:
+            usuarios = [registro['usuario']]
+        elif 'dependencia' in registro:
+            # La vista de un usuario no incluye dependencias (y asi no se hidrata una tarea diferida)
+            usuarios = []
+        else:
+            tarea = self.get_tarea_por_id(registro['id'])
+            usuarios = [asignacion.usuarioAsignado.alias for asignacion in tarea.usuariosAsignados]
+        return dict(registro, usuarios=usuarios)
+
+    @contextlib.contextmanager
+    def lote(self):
+        """Agrupa los cambios hechos dentro del bloque en una sola escritura al almacenamiento"""
+        if self._registros_lote is not None:
+            yield
+            return
+        self._registros_lote = []
+        self._eventos_lote = []
+        try:
+            yield
+        finally:
+            registros, self._registros_lote = self._registros_lote, None
+            eventos, self._eventos_lote = self._eventos_lote, None
+            if registros:
+                self.almacenamiento.registrar_lote(self, registros)
+                self.eventos.publicar(eventos)
+
+    def _aplicar_cambios(self, registros):
+        """Aplica cambios ya persistidos por otro proceso, en orden"""
+        dependencias = False
+        eventos = []
+        for registro in registros:
+            self._aplicar_cambio(registro)
+            self.seq = registro['seq']
+            eventos.append(self._evento(registro))
+            dependencias = dependencias or registro['op'] in ('agregar_dependencia', 'remover_dependencia')
+        if dependencias:
+            # _aplicar_cambio agrega aristas sin mantener el orden topologico ni las fechas planificadas
+            self.grafo.recalcular_orden()
+            self._plan = None
+        self.eventos.publicar(eventos)
+
+    def _aplicar_cambio(self, registro):
+        """Reaplica un registro del journal sobre el estado en memoria"""
+        op = registro['op']
+        if op == 'crear_usuario':
+            self._agregar_usuario(Usuario(registro['alias'], registro['nombre']))
+            return
+        if op == 'crear_tarea':
+            tarea = Tarea(
+                registro['nombre'],
+                registro['descripcion'],
+                self._parse_fecha(registro['fecha_esperada_fin']),
+                registro['estado']
+            )
+            tarea.id = registro['id']
+            self._agregar_tarea(tarea)
+            # Las tareas importadas (POST /import) se crean sin asignacion
+            if 'usuario' in registro:
+                self._aplicar_asignacion(tarea, registro)
+            return
+        tarea = self.get_tarea_por_id(registro['id'])
+        self._antes_de_cambiar(tarea)
+        if op == 'asignar_usuario':
+            self._aplicar_asignacion(tarea, registro)
+        elif op == 'remover_usuario':
+            usuario = self.get_usuario_por_alias(registro['usuario'])
+            self._quitar_asignacion(tarea, usuario)
+            tarea.version += 1
+            usuario.version += 1
+        elif op == 'cambiar_estado':
+            anterior = tarea.estado
+            tarea.estado = registro['estado']
+            tarea.version += 1
+            self._invalidar_usuarios(tarea)
+            if self._indice is not None:
+                self._indice.cambiar_estado(tarea.id, anterior, tarea.estado)
+            if self._reportes is not None:
+                self._reportes.cambiar_estado(tarea.id, tarea.estado)
+        elif op == 'agregar_dependencia':
+            tarea.agregar_dependencia(registro['dependencia'])
+            self.grafo.agregar_arista(registro['dependencia'], registro['id'])
+        elif op == 'remover_dependencia':
+            tarea.remover_dependencia(registro['dependencia'])
+            self.grafo.remover_dependencia(registro['id'], registro['dependencia'])
+
+    def _aplicar_asignacion(self, tarea, registro):
+        usuario = self.get_usuario_por_alias(registro['usuario'])
+        asignacion = Asignacion(usuario, registro['rol'])
+        asignacion.fechaAsignacion = self._parse_fecha(registro['fecha_asignacion'])
+        tarea.usuariosAsignados.agregar(asignacion)
+        usuario.tareasAsociadas.agregar(tarea)
+        tarea.version += 1
+        usuario.version += 1
+        if self._indice is not None:
+            self._indice.asignar(tarea.id, asignacion.rol)
+        if self._reportes is not None:
+            self._reportes.asignar(tarea.id, usuario.alias, asignacion.rol, asignacion._fecha_asignacion)
+
+    def _quitar_asignacion(self, tarea, usuario):
+        asignacion = tarea.usuariosAsignados.quitar(usuario.alias)
+        usuario.tareasAsociadas.quitar(tarea.id)
+        if asignacion is not None and self._indice is not None:
+            self._indice.desasignar(tarea.id, asignacion.rol)
+        if self._reportes is not None:
+            self._reportes.desasignar(tarea.id, usuario.alias)
+
+    @staticmethod
+    def _invalidar_usuarios(tarea):
+        # La vista de cada usuario incluye los datos de sus tareas
+        for asignacion in tarea.usuariosAsignados:
+            asignacion.usuarioAsignado.version += 1
+
+    # --- Consultas y operaciones ---
+
+    # Un alias o id que llega en el JSON de una peticion puede ser cualquier valor: uno que
+    # no se puede usar como clave (una lista, un objeto) simplemente no existe
+
     def get_usuario_por_alias(self, alias):
-        for usuario in self.usuarios:
-            if usuario.alias == alias:
-                return usuario
-        return None
+        try:
+            return self._usuarios_por_alias.get(alias)
+        except TypeError:
+            return None
 
     def get_tarea_por_id(self, task_id):
-        for tarea in self.tareas:
-            if tarea.id == task_id:
-                return tarea
-        return None
+        try:
+            return self._tareas_por_id.get(task_id)
+        except TypeError:
+            return None
+
+    @metricas.cronometrado('get_usuario_json')
+    def get_usuario_json(self, alias):
+        """JSON codificado de Usuario.to_dict() y su etag, o None si el usuario no existe.
+
+        Si la version del usuario no cambio se devuelven los bytes cacheados; si no, se
+        arma a partir del JSON cacheado de cada tarea y solo se codifican las que cambiaron.
+        """
+        usuario = self.get_usuario_por_alias(alias)
+        if not usuario:
+            return None
+        # La version se lee antes que los datos: si un cambio se cruza con la lectura, lo
+        # guardado queda bajo la version vieja y la proxima consulta lo vuelve a armar
+        version = usuario.version
+        cacheado = self.cache.obtener(('usuario', alias), version)
+        if cacheado:
+            return cacheado
+
+        tareas = b','.join(self._tarea_resumen_json(tarea) for tarea in usuario.tareasAsociadas)
+        datos = b''.join((
+            b'{"alias":', self._codificar(usuario.alias),
+            b',"nombre":', self._codificar(usuario.nombre),
+            b',"tareas_asignadas":[', tareas, b']}'
+        ))
+        return datos, self.cache.guardar(('usuario', alias), version, datos)
+
+    def _tarea_resumen_json(self, tarea):
+        version = tarea.version
+        cacheado = self.cache.obtener(('tarea', tarea.id), version)
+        if cacheado:
+            return cacheado[0]
+        datos = self._codificar({campo: VALORES_TAREA_USUARIO[campo](tarea) for campo in CAMPOS_TAREA_USUARIO})
+        self.cache.guardar(('tarea', tarea.id), version, datos, con_etag=False)
+        return datos
+
+    @metricas.cronometrado('get_tarea_json')
+    def get_tarea_json(self, task_id):
+        """JSON codificado de Tarea.to_dict() y su etag, o None si la tarea no existe.
+
+        El etag sale del contenido, no de la version: es el mismo en todos los procesos y
+        entre reinicios, y es el que se compara con If-Match al modificar la tarea.
+        """
+        tarea = self.get_tarea_por_id(task_id)
+        if not tarea:
+            return None
+        version = tarea.version
+        cacheado = self.cache.obtener(('tarea-detalle', task_id), version)
+        if cacheado:
+            return cacheado
+        datos = self._codificar(tarea.to_dict())
+        return datos, self.cache.guardar(('tarea-detalle', task_id), version, datos)
+
+    def _conflicto(self, task_id, etags):
+        """Indica si la tarea cambio respecto de alguno de los etags que envio el cliente"""
+        return etags is not None and self.get_tarea_json(task_id)[1] not in etags
+
+    @staticmethod
+    def _codificar(valor):
+        return json.dumps(valor, separators=(',', ':')).encode()
+
+    @metricas.cronometrado('get_tareas_de_usuario')
+    def get_tareas_de_usuario(self, alias, limite, cursor=None, estado=None, campos=None):
+        """Pagina de las tareas asociadas a un usuario.
+
+        Solo se recorren y serializan las tareas de la pagina pedida. El cursor es
+        opaco ("<posicion>:<id>") y se devuelve en 'siguiente' mientras queden tareas.
+        """
+        if not isinstance(limite, int) or not 1 <= limite <= LIMITE_PAGINA_MAXIMO:
+            return False, f"El límite debe ser un entero entre 1 y {LIMITE_PAGINA_MAXIMO}"
+        if estado is not None and estado not in ESTADOS_VALIDOS:
+            return False, f"Estado inválido. Debe ser uno de: {', '.join(ESTADOS_VALIDOS)}"
+        campos = campos or CAMPOS_TAREA_USUARIO
+        invalidos = [campo for campo in campos if campo not in CAMPOS_TAREA_USUARIO]
+        if invalidos:
+            return False, f"Campos inválidos: {', '.join(invalidos)}. Deben ser de: {', '.join(CAMPOS_TAREA_USUARIO)}"
+
+        usuario = self.get_usuario_por_alias(alias)
+        if not usuario:
+            return False, "Usuario no encontrado"
+        # Sin lock: Coleccion.recorrer sigue la lista tal como esta ahora, cortada en su
+        # largo actual para no mezclar tareas agregadas a mitad del recorrido
+        if cursor is None:
+            recorrido = usuario.tareasAsociadas.recorrer()
+        else:
+            task_id = self._tarea_cursor(cursor)
+            recorrido = usuario.tareasAsociadas.recorrer(task_id) if task_id else None
+            if recorrido is None:
+                return False, "Cursor inválido"
+
+        pagina = []
+        anterior = siguiente = None
+        for posicion, tarea in recorrido:
+            if len(pagina) == limite:
+                siguiente = anterior
+                break
+            if estado is None or tarea.estado == estado:
+                pagina.append({campo: VALORES_TAREA_USUARIO[campo](tarea) for campo in campos})
+            anterior = f"{posicion}:{tarea.id}"
+
+        return True, {
+            "alias": usuario.alias,
+            "nombre": usuario.nombre,
+            "tareas_asignadas": pagina,
+            "siguiente": siguiente
+        }
+
+    @staticmethod
+    def _tarea_cursor(cursor):
+        """Id de la tarea del cursor, o None si el cursor no es valido"""
+        # La tarea se busca por id: su posicion cambia si se compacta la coleccion
+        posicion, _, task_id = cursor.partition(':')
+        if not posicion.isdigit() or not task_id:
+            return None
+        return task_id
+
+    @metricas.cronometrado('consultar_tareas')
+    def consultar_tareas(self, limite, cursor=None, estado=None, alias=None, rol=None, desde=None, hasta=None,
+                         orden="fecha_esperada_fin", campos=None):
+        """Pagina de tareas filtradas, ordenadas por fecha esperada de fin.
+
+        Los filtros de estado y rol se resuelven con IndiceTareas y el de usuario con sus
+        tareas asociadas: se recorre el candidato mas chico a partir del cursor o del
+        extremo del rango de fechas, y se termina al completar la pagina. El cursor es
+        opaco ("<fecha>:<id>", la clave de la ultima tarea devuelta).
+        """
+        if not isinstance(limite, int) or not 1 <= limite <= LIMITE_PAGINA_MAXIMO:
+            return False, f"El límite debe ser un entero entre 1 y {LIMITE_PAGINA_MAXIMO}"
+        if estado is not None and estado not in ESTADOS_VALIDOS:
+            return False, f"Estado inválido. Debe ser uno de: {', '.join(ESTADOS_VALIDOS)}"
+        if rol is not None and rol not in ROLES_VALIDOS:
+            return False, f"Rol inválido. Debe ser uno de: {', '.join(ROLES_VALIDOS)}"
+        if orden not in ORDENES_TAREAS:
+            return False, f"Orden inválido. Debe ser uno de: {', '.join(ORDENES_TAREAS)}"
+        campos = campos or CAMPOS_TAREA_USUARIO
+        invalidos = [campo for campo in campos if campo not in CAMPOS_TAREA_USUARIO]
+        if invalidos:
+            return False, f"Campos inválidos: {', '.join(invalidos)}. Deben ser de: {', '.join(CAMPOS_TAREA_USUARIO)}"
+        try:
+            # Fechas ISO: "2025-01-31" o "2025-01-31 18:00:00"; el rango incluye ambos extremos
+            desde = None if desde is None else (datetime.datetime.fromisoformat(desde) - EPOCA) // MICROSEGUNDO
+            hasta = None if hasta is None else (datetime.datetime.fromisoformat(hasta) - EPOCA) // MICROSEGUNDO
+        except ValueError:
+            return False, "Fecha inválida. Debe tener el formato AAAA-MM-DD o AAAA-MM-DD HH:MM:SS"
+        if cursor is not None:
+            fecha, _, task_id = cursor.partition(':')
+            if not fecha.lstrip('-').isdigit() or not task_id:
+                return False, "Cursor inválido"
+            cursor = (int(fecha), task_id)
+
+        descendente = orden.startswith('-')
+        # Las claves son (fecha, id) y se recorren las posteriores a `inicio` (anteriores si
+        # es descendente): (fecha,) queda antes que todas las claves de esa fecha
+        if descendente:
+            inicio = None if hasta is None else (hasta + 1,)
+            if cursor is not None:
+                inicio = cursor if inicio is None else min(inicio, cursor)
+        else:
+            inicio = None if desde is None else (desde,)
+            if cursor is not None:
+                inicio = cursor if inicio is None else max(inicio, cursor)
 
+        # Candidatos: (cantidad, claves o tareas, filtros que ya cumplen todos)
+        indice = self._indice_tareas()
+        candidatos = [(len(indice.todas), indice.todas, ())]
+        if estado is not None:
+            candidatos.append((len(indice.por_estado(estado)), indice.por_estado(estado), ('estado',)))
+        if rol is not None:
+            candidatos.append((len(indice.por_rol(rol)), indice.por_rol(rol), ('rol',) if alias is None else ()))
+        if alias is not None:
+            usuario = self.get_usuario_por_alias(alias)
+            tareas = usuario.tareasAsociadas if usuario else []
+            candidatos.append((len(tareas), tareas, ('usuario',) if rol is None else ()))
+        _, lista, cubiertos = min(candidatos, key=lambda candidato: candidato[0])
+        if not isinstance(lista, ListaOrdenada):
+            # Las tareas de un usuario estan en orden de asignacion: se ordenan sus claves (sin
+            # las de tareas que se estan creando y todavia no llegaron al indice)
+            claves = (indice.clave(tarea.id) for tarea in lista)
+            lista = ListaOrdenada(sorted(clave for clave in claves if clave is not None))
+        estado = None if 'estado' in cubiertos else estado
+        if 'rol' in cubiertos or 'usuario' in cubiertos:
+            alias = rol = None
+
+        pagina = []
+        ultima = siguiente = None
+        for clave in lista.recorrer(inicio, descendente):
+            fecha, task_id = clave
+            if (desde is not None and fecha < desde) if descendente else (hasta is not None and fecha > hasta):
+                break
+            tarea = self.get_tarea_por_id(task_id)
+            if tarea is None or not self._cumple_filtros(tarea, estado, alias, rol):
+                continue
+            if len(pagina) == limite:
+                siguiente = f"{ultima[0]}:{ultima[1]}"
+                break
+            pagina.append({campo: VALORES_TAREA_USUARIO[campo](tarea) for campo in campos})
+            ultima = clave
+
+        return True, {"tareas": pagina, "siguiente": siguiente}
+
+    @staticmethod
+    def _cumple_filtros(tarea, estado, alias, rol):
+        if estado is not None and tarea.estado != estado:
+            return False
+        if alias is None and rol is None:
+            return True
+        # Con usuario y rol, el usuario tiene que tener ese rol en la tarea
+        return any(
+            (alias is None or asignacion.usuarioAsignado.alias == alias) and (rol is None or asignacion.rol == rol)
+            for asignacion in tarea.usuariosAsignados
+        )
+
+    @sincronizado
     def crear_usuario(self, alias, nombre):
         if self.get_usuario_por_alias(alias):
             return False, "El alias ya está en uso"
 
         nuevo_usuario = Usuario(alias, nombre)
-        self.usuarios.append(nuevo_usuario)
-        self.save_data()
+        self._agregar_usuario(nuevo_usuario)
+        self._registrar_cambio('crear_usuario', alias=alias, nombre=nombre)
         return True, nuevo_usuario
 
+    @sincronizado
     def crear_tarea(self, nombre, descripcion, alias_usuario, rol):
         usuario = self.get_usuario_por_alias(alias_usuario)
         if not usuario:
@@ -114,77 +867,467 @@ class DataHandler:
 
         try:
             asignacion = Asignacion(usuario, rol)
-            nueva_tarea.usuariosAsignados.append(asignacion)
-            usuario.tareasAsociadas.append(nueva_tarea)
+            nueva_tarea.usuariosAsignados.agregar(asignacion)
+            usuario.tareasAsociadas.agregar(nueva_tarea)
+            usuario.version += 1
 
-            self.tareas.append(nueva_tarea)
-            self.save_data()
+            self._agregar_tarea(nueva_tarea)
+            self._registrar_cambio(
+                'crear_tarea',
+                id=nueva_tarea.id,
+                nombre=nombre,
+                descripcion=descripcion,
+                estado=nueva_tarea.estado,
+                fecha_esperada_fin=self._format_fecha(nueva_tarea.fechaEsperadaFin),
+                usuario=alias_usuario,
+                rol=rol,
+                fecha_asignacion=self._format_fecha(asignacion.fechaAsignacion)
+            )
             return True, nueva_tarea
         except ValueError as e:
             return False, str(e)
 
-    def cambiar_estado_tarea(self, task_id, nuevo_estado):
+    @sincronizado
+    def cambiar_estado_tarea(self, task_id, nuevo_estado, etags=None):
         tarea = self.get_tarea_por_id(task_id)
         if not tarea:
             return False, "Tarea no encontrada"
+        if self._conflicto(task_id, etags):
+            return False, MENSAJE_CONFLICTO
+
+        if self.exigir_dependencias and nuevo_estado in ESTADOS_VALIDOS:
+            error = self._error_dependencias(task_id, nuevo_estado)
+            if error:
+                return False, error
 
+        self._antes_de_cambiar(tarea)
+        anterior = tarea.estado
         resultado, mensaje = tarea.cambiar_estado(nuevo_estado)
         if resultado:
-            self.save_data()
+            self._invalidar_usuarios(tarea)
+            if self._indice is not None:
+                self._indice.cambiar_estado(task_id, anterior, tarea.estado)
+            if self._reportes is not None:
+                self._reportes.cambiar_estado(task_id, tarea.estado)
+            self._registrar_cambio('cambiar_estado', id=task_id, estado=nuevo_estado)
         return resultado, mensaje
 
-    def gestionar_usuario_en_tarea(self, task_id, alias_usuario, rol, accion):
+    @sincronizado
+    def gestionar_usuario_en_tarea(self, task_id, alias_usuario, rol, accion, etags=None):
         tarea = self.get_tarea_por_id(task_id)
         if not tarea:
             return False, "Tarea no encontrada"
+        if self._conflicto(task_id, etags):
+            return False, MENSAJE_CONFLICTO
 
         usuario = self.get_usuario_por_alias(alias_usuario)
         if not usuario:
             return False, "Usuario no encontrado"
 
+        self._antes_de_cambiar(tarea)
         if accion == "adicionar":
-            # Verificar si el usuario ya está asignado
-            for asignacion in tarea.usuariosAsignados:
-                if asignacion.usuarioAsignado.alias == alias_usuario:
-                    return False, "El usuario ya está asignado a esta tarea"
+            if self._esta_asignado(tarea, alias_usuario):
+                return False, "El usuario ya está asignado a esta tarea"
 
             try:
                 nueva_asignacion = Asignacion(usuario, rol)
-                tarea.usuariosAsignados.append(nueva_asignacion)
-                usuario.tareasAsociadas.append(tarea)
-                self.save_data()
+                tarea.usuariosAsignados.agregar(nueva_asignacion)
+                usuario.tareasAsociadas.agregar(tarea)
+                tarea.version += 1
+                usuario.version += 1
+                if self._indice is not None:
+                    self._indice.asignar(task_id, nueva_asignacion.rol)
+                if self._reportes is not None:
+                    self._reportes.asignar(task_id, alias_usuario, nueva_asignacion.rol,
+                                           nueva_asignacion._fecha_asignacion)
+                self._registrar_cambio(
+                    'asignar_usuario',
+                    id=task_id,
+                    usuario=alias_usuario,
+                    rol=rol,
+                    fecha_asignacion=self._format_fecha(nueva_asignacion.fechaAsignacion)
+                )
                 return True, "Usuario asignado correctamente"
             except ValueError as e:
                 return False, str(e)
 
         elif accion == "remover":
-            for i, asignacion in enumerate(tarea.usuariosAsignados):
-                if asignacion.usuarioAsignado.alias == alias_usuario:
-                    tarea.usuariosAsignados.pop(i)
-                    if tarea in usuario.tareasAsociadas:
-                        usuario.tareasAsociadas.remove(tarea)
-                    self.save_data()
-                    return True, "Usuario removido correctamente"
-            return False, "El usuario no está asignado a esta tarea"
-        
+            if not self._esta_asignado(tarea, alias_usuario):
+                return False, "El usuario no está asignado a esta tarea"
+            self._quitar_asignacion(tarea, usuario)
+            tarea.version += 1
+            usuario.version += 1
+            self._registrar_cambio('remover_usuario', id=task_id, usuario=alias_usuario)
+            return True, "Usuario removido correctamente"
+
         return False, "Acción no válida. Debe ser 'adicionar' o 'remover'"
 
-    def gestionar_dependencia(self, task_id, dependency_id, accion):
+    @sincronizado
+    def gestionar_dependencia(self, task_id, dependency_id, accion, etags=None):
         tarea = self.get_tarea_por_id(task_id)
         if not tarea:
             return False, "Tarea no encontrada"
+        if self._conflicto(task_id, etags):
+            return False, MENSAJE_CONFLICTO
 
         dependency_tarea = self.get_tarea_por_id(dependency_id)
         if not dependency_tarea:
             return False, "Tarea dependiente no encontrada"
 
+        self._antes_de_cambiar(tarea)
+        # El grafo valida en O(1) la existencia y, de forma incremental, que no se formen ciclos
         if accion == "adicionar":
-            resultado, mensaje = tarea.agregar_dependencia(dependency_id)
+            resultado, mensaje = self.grafo.agregar_dependencia(task_id, dependency_id)
+            if resultado:
+                tarea.agregar_dependencia(dependency_id)
+            op = 'agregar_dependencia'
         elif accion == "remover":
-            resultado, mensaje = tarea.remover_dependencia(dependency_id)
+            resultado, mensaje = self.grafo.remover_dependencia(task_id, dependency_id)
+            if resultado:
+                tarea.remover_dependencia(dependency_id)
+            op = 'remover_dependencia'
         else:
             return False, "Acción no válida. Debe ser 'adicionar' o 'remover'"
 
         if resultado:
-            self.save_data()
-        return resultado, mensaje
\ No newline at end of file
+            if self._plan is not None:
+                self._plan.actualizar(task_id)
+            self._registrar_cambio(op, id=task_id, dependencia=dependency_id)
+        return resultado, mensaje
+
+    def _error_dependencias(self, task_id, estado, estados=None):
+        """Mensaje de error si el cambio deja una tarea Finalizada con dependencias sin finalizar.
+
+        `estados` son los estados simulados de las tareas que cambia un lote.
+        """
+        estados = estados or {}
+
+        def estado_de(tarea_id):
+            return estados.get(tarea_id) or self.get_tarea_por_id(tarea_id).estado
+
+        if estado == "Finalizada":
+            pendientes = [d for d in self.grafo.dependencias(task_id) if estado_de(d) != "Finalizada"]
+            if pendientes:
+                return f"Dependencias sin finalizar: {', '.join(sorted(pendientes))}"
+        elif estado_de(task_id) == "Finalizada":
+            finalizados = [d for d in self.grafo.dependientes(task_id) if estado_de(d) == "Finalizada"]
+            if finalizados:
+                return f"Tareas dependientes finalizadas: {', '.join(sorted(finalizados))}"
+        return None
+
+    @sincronizado
+    def transicionar_subarbol(self, task_id, estado, alcance="dependencias", etags=None):
+        """Lleva a `estado` la tarea y sus dependencias (o dependientes) transitivas en un solo lote.
+
+        Las tareas se cambian en orden topologico, o en el inverso si el estado no es
+        Finalizada, asi cada una cumple exigir_dependencias al momento de cambiarla. Las que
+        ya estan en el estado se omiten. Como los demas lotes, se aplica todo o nada.
+        """
+        tarea = self.get_tarea_por_id(task_id)
+        if not tarea:
+            return False, "Tarea no encontrada"
+        if self._conflicto(task_id, etags):
+            return False, MENSAJE_CONFLICTO
+        if estado not in ESTADOS_VALIDOS:
+            return False, f"Estado inválido. Debe ser uno de: {', '.join(ESTADOS_VALIDOS)}"
+        if alcance not in ALCANCES_TRANSICION:
+            return False, f"Alcance inválido. Debe ser uno de: {', '.join(ALCANCES_TRANSICION)}"
+
+        if alcance == "dependencias":
+            ids = self.grafo.dependencias(task_id, transitivas=True)
+        else:
+            ids = self.grafo.dependientes(task_id, transitivas=True)
+        ids = [tarea_id for tarea_id in [task_id] + ids if self.get_tarea_por_id(tarea_id).estado != estado]
+        ids.sort(key=self.grafo.posicion, reverse=estado != "Finalizada")
+        estados = {}
+
+        def validar(tarea_id):
+            if estados.get(tarea_id, self.get_tarea_por_id(tarea_id).estado) == "Finalizada" and estado == "Nueva":
+                return "No se puede cambiar una tarea Finalizada a estado Nueva"
+            if self.exigir_dependencias:
+                error = self._error_dependencias(tarea_id, estado, estados)
+                if error:
+                    return error
+            estados[tarea_id] = estado
+
+        def aplicar(tarea_id):
+            _, mensaje = self.cambiar_estado_tarea(tarea_id, estado)
+            return {"message": mensaje}
+
+        return self._ejecutar_lote(ids, validar, aplicar, identificar=lambda tarea_id: {"id": tarea_id})
+
+    # --- Operaciones en lote ---
+
+    @sincronizado
+    def _ejecutar_lote(self, items, validar, aplicar, despues_de_validar=None, identificar=None):
+        """Valida todos los elementos y, solo si todos son validos, los aplica con una unica escritura.
+
+        Devuelve (True, resultados) o (False, resultados) con un resultado por elemento;
+        `identificar(item)` agrega campos a cada resultado.
+        """
+        identificar = identificar or (lambda item: {})
+        errores = [validar(item) for item in items]
+        if despues_de_validar:
+            despues_de_validar()
+        if any(errores):
+            return False, [
+                dict({"indice": i, "ok": False, "error": error} if error else {"indice": i, "ok": True},
+                     **identificar(item))
+                for i, (item, error) in enumerate(zip(items, errores))
+            ]
+
+        with self.lote():
+            resultados = [dict({"indice": i, "ok": True}, **identificar(item), **aplicar(item))
+                          for i, item in enumerate(items)]
+        return True, resultados
+
+    @sincronizado
+    def _aplicar_en_lote(self, aplicar):
+        """Ejecuta aplicar() con el lock y persiste todos sus cambios con una unica escritura.
+
+        Como cualquier cambio: en modo multiproceso, con el lock del journal compartido y
+        despues de ponerse al dia con los demas workers.
+        """
+        with self.lote():
+            return aplicar()
+
+    @staticmethod
+    def _error_rol(usuario, rol):
+        try:
+            Asignacion(usuario, rol)
+        except ValueError as e:
+            return str(e)
+        return None
+
+    @staticmethod
+    def _faltan_campos(item, campos):
+        return not isinstance(item, dict) or any(campo not in item for campo in campos)
+
+    def _esta_asignado(self, tarea, alias_usuario):
+        return tarea.usuariosAsignados.obtener(alias_usuario) is not None
+
+    def crear_usuarios_lote(self, items):
+        aliases = set()
+
+        def validar(item):
+            if self._faltan_campos(item, ('contacto', 'nombre')) or not isinstance(item['contacto'], str):
+                return "Datos incompletos. Se requiere contacto y nombre"
+            if self.get_usuario_por_alias(item['contacto']) or item['contacto'] in aliases:
+                return "El alias ya está en uso"
+            aliases.add(item['contacto'])
+
+        def aplicar(item):
+            _, usuario = self.crear_usuario(item['contacto'], item['nombre'])
+            return {"usuario": usuario.get_user_info()}
+
+        return self._ejecutar_lote(items, validar, aplicar)
+
+    def crear_tareas_lote(self, items):
+        def validar(item):
+            if self._faltan_campos(item, ('nombre', 'descripcion', 'usuario', 'rol')):
+                return "Datos incompletos. Se requieren nombre, descripcion, usuario y rol"
+            usuario = self.get_usuario_por_alias(item['usuario'])
+            if not usuario:
+                return "Usuario no encontrado"
+            return self._error_rol(usuario, item['rol'])
+
+        def aplicar(item):
+            _, tarea = self.crear_tarea(item['nombre'], item['descripcion'], item['usuario'], item['rol'])
+            return {"id": tarea.id}
+
+        return self._ejecutar_lote(items, validar, aplicar)
+
+    def gestionar_usuarios_en_tareas_lote(self, items):
+        # Estado simulado de las asignaciones tocadas por el lote: (task_id, alias) -> asignado
+        asignados = {}
+
+        def validar(item):
+            if self._faltan_campos(item, ('task_id', 'usuario', 'rol', 'accion')):
+                return "Datos incompletos. Se requiere task_id, usuario, rol y accion"
+            tarea = self.get_tarea_por_id(item['task_id'])
+            if not tarea:
+                return "Tarea no encontrada"
+            usuario = self.get_usuario_por_alias(item['usuario'])
+            if not usuario:
+                return "Usuario no encontrado"
+            clave = (item['task_id'], item['usuario'])
+            asignado = asignados[clave] if clave in asignados else self._esta_asignado(tarea, item['usuario'])
+            if item['accion'] == "adicionar":
+                if asignado:
+                    return "El usuario ya está asignado a esta tarea"
+                error = self._error_rol(usuario, item['rol'])
+                if error:
+                    return error
+                asignados[clave] = True
+            elif item['accion'] == "remover":
+                if not asignado:
+                    return "El usuario no está asignado a esta tarea"
+                asignados[clave] = False
+            else:
+                return "Acción no válida. Debe ser 'adicionar' o 'remover'"
+
+        def aplicar(item):
+            _, mensaje = self.gestionar_usuario_en_tarea(item['task_id'], item['usuario'], item['rol'], item['accion'])
+            return {"message": mensaje}
+
+        return self._ejecutar_lote(items, validar, aplicar)
+
+    def gestionar_dependencias_lote(self, items):
+        # Cada elemento se prueba sobre el grafo (asi se detectan tambien ciclos formados
+        # entre elementos del mismo lote) y los cambios de prueba se deshacen antes de aplicar
+        cambios_de_prueba = []
+
+        def validar(item):
+            if self._faltan_campos(item, ('task_id', 'dependencytaskid', 'accion')):
+                return "Datos incompletos. Se requiere task_id, dependencytaskid y accion"
+            if not self.get_tarea_por_id(item['task_id']):
+                return "Tarea no encontrada"
+            if not self.get_tarea_por_id(item['dependencytaskid']):
+                return "Tarea dependiente no encontrada"
+            if item['accion'] == "adicionar":
+                resultado, mensaje = self.grafo.agregar_dependencia(item['task_id'], item['dependencytaskid'])
+            elif item['accion'] == "remover":
+                resultado, mensaje = self.grafo.remover_dependencia(item['task_id'], item['dependencytaskid'])
+            else:
+                return "Acción no válida. Debe ser 'adicionar' o 'remover'"
+            if not resultado:
+                return mensaje
+            cambios_de_prueba.append(item)
+
+        def deshacer():
+            for item in reversed(cambios_de_prueba):
+                if item['accion'] == "adicionar":
+                    self.grafo.remover_dependencia(item['task_id'], item['dependencytaskid'])
+                else:
+                    self.grafo.agregar_dependencia(item['task_id'], item['dependencytaskid'])
+
+        def aplicar(item):
+            _, mensaje = self.gestionar_dependencia(item['task_id'], item['dependencytaskid'], item['accion'])
+            return {"message": mensaje}
+
+        return self._ejecutar_lote(items, validar, aplicar, despues_de_validar=deshacer)
+
+    # --- Consultas sobre el grafo de dependencias ---
+
+    @metricas.cronometrado('get_dependencias')
+    def get_dependencias(self, task_id, transitivas=False):
+        tarea = self.get_tarea_por_id(task_id)
+        if not tarea:
+            return False, "Tarea no encontrada"
+        if not transitivas:
+            return True, list(tarea.dependencias)
+        return True, self.grafo.dependencias(task_id, transitivas=True)
+
+    @metricas.cronometrado('get_dependientes')
+    def get_dependientes(self, task_id, transitivas=False):
+        if not self.get_tarea_por_id(task_id):
+            return False, "Tarea no encontrada"
+        return True, self.grafo.dependientes(task_id, transitivas)
+
+    @metricas.cronometrado('get_orden_topologico')
+    def get_orden_topologico(self):
+        return self.grafo.orden_topologico()
+
+    @staticmethod
+    def _format_microsegundos(microsegundos):
+        return DataHandler._format_fecha(EPOCA + microsegundos * MICROSEGUNDO)
+
+    @metricas.cronometrado('get_planificacion')
+    def get_planificacion(self, task_id):
+        """Fecha esperada de fin, fecha mas temprana en que puede terminar y ruta critica de la tarea"""
+        if not self.get_tarea_por_id(task_id):
+            return False, "Tarea no encontrada"
+        plan = self._planificacion()
+        fecha, temprana = plan.fecha(task_id), plan.temprana(task_id)
+        return True, {
+            "id": task_id,
+            "fecha_esperada_fin": self._format_microsegundos(fecha),
+            "fecha_mas_temprana": self._format_microsegundos(temprana),
+            "atrasada": temprana > fecha,
+            "ruta_critica": plan.ruta_critica(task_id)
+        }
+
+    @metricas.cronometrado('get_ruta_critica')
+    def get_ruta_critica(self):
+        """Ruta critica del proyecto: la cadena de dependencias de la tarea que termina ultima"""
+        plan = self._planificacion()
+        ultima = plan.ultima()
+        if ultima is None:
+            return {"fecha_fin": None, "ruta_critica": []}
+        return {
+            "fecha_fin": self._format_microsegundos(plan.temprana(ultima)),
+            "ruta_critica": plan.ruta_critica(ultima)
+        }
+
+    # --- Reportes ---
+
+    def _reporte(self, clave, calcular, instante=None):
+        """JSON codificado del reporte y su etag.
+
+        Se cachea bajo el numero de cambio (y el instante de referencia, si lo usa): hasta
+        el proximo cambio se responde lo ya calculado. Se calcula sobre una copia de las
+        columnas, asi que solo la copia toma el lock del handler.
+        """
+        cacheado = self.cache.obtener(clave, (self.seq, instante))
+        if cacheado:
+            return cacheado
+        foto = self._foto_reporte()
+        datos = self._codificar(dict(calcular(foto), seq=foto.seq))
+        return datos, self.cache.guardar(clave, (foto.seq, instante), datos)
+
+    @staticmethod
+    def _instante(fecha):
+        """Microsegundos de `fecha` o, sin fecha, del comienzo del minuto actual (ValueError si es invalida)"""
+        if fecha is None:
+            instante = datetime.datetime.now().replace(second=0, microsecond=0)
+        else:
+            instante = datetime.datetime.fromisoformat(fecha)
+        return (instante - EPOCA) // MICROSEGUNDO
+
+    @metricas.cronometrado('reporte_carga')
+    def reporte_carga(self, limite, fecha=None):
+        """Asignaciones por estado, pendientes y atrasadas a `fecha` de los `limite` usuarios mas cargados"""
+        if not isinstance(limite, int) or not 1 <= limite <= LIMITE_PAGINA_MAXIMO:
+            return False, f"El límite debe ser un entero entre 1 y {LIMITE_PAGINA_MAXIMO}"
+        try:
+            ahora = self._instante(fecha)
+        except ValueError:
+            return False, "Fecha inválida. Debe tener el formato AAAA-MM-DD o AAAA-MM-DD HH:MM:SS"
+        return True, self._reporte(
+            ('reporte', 'carga', limite, fecha),
+            lambda foto: dict(carga_de_trabajo(foto, ahora, limite), fecha=self._format_microsegundos(ahora)),
+            ahora
+        )
+
+    @metricas.cronometrado('reporte_desglose')
+    def reporte_desglose(self):
+        """Tareas por estado y asignaciones por rol y estado"""
+        return True, self._reporte(('reporte', 'desglose'), desglose)
+
+    @metricas.cronometrado('reporte_atrasos')
+    def reporte_atrasos(self, fecha=None):
+        """Tareas sin finalizar cuya fecha esperada de fin es anterior a `fecha` (por defecto, ahora)"""
+        try:
+            ahora = self._instante(fecha)
+        except ValueError:
+            return False, "Fecha inválida. Debe tener el formato AAAA-MM-DD o AAAA-MM-DD HH:MM:SS"
+        return True, self._reporte(
+            ('reporte', 'atrasos', fecha),
+            lambda foto: dict(atrasos(foto, ahora), fecha=self._format_microsegundos(ahora)),
+            ahora
+        )
+
+    @metricas.cronometrado('reporte_rendimiento')
+    def reporte_rendimiento(self, periodo="semana", desde=None, hasta=None):
+        """Tareas que vencen, finalizadas y asignaciones hechas en cada dia, semana o mes"""
+        if periodo not in PERIODOS:
+            return False, f"Periodo inválido. Debe ser uno de: {', '.join(PERIODOS)}"
+        try:
+            inicio = None if desde is None else self._instante(desde)
+            fin = None if hasta is None else self._instante(hasta)
+        except ValueError:
+            return False, "Fecha inválida. Debe tener el formato AAAA-MM-DD o AAAA-MM-DD HH:MM:SS"
+        return True, self._reporte(
+            ('reporte', 'rendimiento', periodo, desde, hasta),
+            lambda foto: rendimiento(foto, periodo, inicio, fin)
+        )
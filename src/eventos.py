@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from collections import deque
+
+# Segundos entre comprobaciones de cambios de otros procesos mientras un flujo espera eventos
+ESPERA_EVENTOS = 1.0
+# Segundos sin eventos tras los que se envia un comentario para que los proxies no corten la conexion
+INTERVALO_KEEPALIVE = 15.0
+KEEPALIVE = ': keepalive\n\n'
+# Primer bloque de cada flujo: sale enseguida para que el cliente reciba los headers aunque no haya eventos
+INICIO = ': conectado\n\n'
+
+
+class BufferEventos:
+    """Ultimos cambios aplicados, en un buffer circular de `capacidad` eventos.
+
+    Cada evento es el registro del cambio (con su `seq`, que crece de a uno) mas los
+    alias de los usuarios cuya vista cambia. Publica el hilo que tiene el lock de
+    DataHandler; los suscriptores leen con el lock propio del buffer y esperan en su
+    condicion o, desde asyncio, registran un oyente que se llama tras cada publicacion.
+    """
+
+    def __init__(self, capacidad=10000):
+        self._eventos = deque(maxlen=capacidad)
+        self._condicion = threading.Condition()
+        self._oyentes = set()
+        # Los eventos con seq menor o igual ya no estan (descartados o anteriores al arranque)
+        self._horizonte = 0
+
+    def reiniciar(self, seq):
+        """Vacia el buffer: los cambios hasta `seq` (por ejemplo, los cargados al iniciar) no se pueden pedir"""
+        with self._condicion:
+            self._eventos.clear()
+            self._horizonte = seq
+
+    def publicar(self, eventos):
+        if not eventos:
+            return
+        with self._condicion:
+            for evento in eventos:
+                if len(self._eventos) == self._eventos.maxlen:
+                    self._horizonte = self._eventos[0]['seq']
+                self._eventos.append(evento)
+            self._condicion.notify_all()
+            oyentes = list(self._oyentes)
+        for oyente in oyentes:
+            oyente()
+
+    def desde(self, seq):
+        """(eventos con seq mayor que `seq`, completos, ultimo seq).
+
+        completos es False si falta alguno de los eventos posteriores a `seq`, o si `seq`
+        es de un cambio que este proceso no conoce (por ejemplo, de otros datos).
+        """
+        with self._condicion:
+            nuevos = []
+            # Los suscriptores suelen estar al dia: se recorre desde el final
+            for evento in reversed(self._eventos):
+                if evento['seq'] <= seq:
+                    break
+                nuevos.append(evento)
+            nuevos.reverse()
+            ultimo = self._eventos[-1]['seq'] if self._eventos else self._horizonte
+            return nuevos, self._horizonte <= seq <= ultimo, ultimo
+
+    def ultimo_seq(self):
+        with self._condicion:
+            return self._eventos[-1]['seq'] if self._eventos else self._horizonte
+
+    def esperar(self, seq, timeout):
+        """Espera hasta `timeout` segundos a que haya un evento posterior a `seq`"""
+        with self._condicion:
+            return self._condicion.wait_for(lambda: self._eventos and self._eventos[-1]['seq'] > seq, timeout)
+
+    def agregar_oyente(self, oyente):
+        with self._condicion:
+            self._oyentes.add(oyente)
+
+    def quitar_oyente(self, oyente):
+        with self._condicion:
+            self._oyentes.discard(oyente)
+
+
+class Suscripcion:
+    """Flujo server-sent events de los cambios de un DataHandler, filtrado por usuario o tarea.
+
+    Empieza despues de `desde` (el id del ultimo evento que recibio el cliente) o, sin
+    `desde`, con el proximo cambio. Si los eventos siguientes ya no estan en el buffer,
+    envia un evento `reinicio`: el cliente tiene que volver a leer lo que muestra y
+    seguir desde el seq que trae.
+    """
+
+    def __init__(self, data_handler, desde=None, usuario=None, task_id=None):
+        self.data_handler = data_handler
+        self.usuario = usuario
+        self.task_id = task_id
+        self._seq = data_handler.eventos.ultimo_seq() if desde is None else desde
+        self._inicio = INICIO
+        self._ultimo_envio = time.monotonic()
+
+    def _incluye(self, evento):
+        if self.usuario is not None and self.usuario not in evento['usuarios']:
+            return False
+        return self.task_id is None or self.task_id in (evento.get('id'), evento.get('dependencia'))
+
+    def pendientes(self):
+        """Texto SSE de los eventos nuevos que pasan el filtro ('' si no hay)"""
+        eventos, completos, ultimo = self.data_handler.eventos.desde(self._seq)
+        self._seq = ultimo
+        if not completos:
+            # El cliente vuelve a leer todo, asi que los eventos que si estan no hacen falta
+            return _formatear(ultimo, 'reinicio', {'seq': ultimo})
+        return ''.join(_formatear(evento['seq'], evento['op'], evento)
+                       for evento in eventos if self._incluye(evento))
+
+    def siguiente(self):
+        """Texto a enviar ahora: eventos nuevos, el comentario inicial o un keepalive ('' si no toca nada)"""
+        texto, self._inicio = self._inicio + self.pendientes(), ''
+        if not texto and time.monotonic() - self._ultimo_envio >= INTERVALO_KEEPALIVE:
+            texto = KEEPALIVE
+        if texto:
+            self._ultimo_envio = time.monotonic()
+        return texto
+
+    def esperar(self, timeout=ESPERA_EVENTOS):
+        return self.data_handler.eventos.esperar(self._seq, timeout)
+
+    def refrescar(self):
+        """Aplica los cambios de otros procesos, que asi tambien llegan al buffer (modo multiproceso)"""
+        if self.data_handler.almacenamiento.hay_cambios():
+            self.data_handler.refrescar()
+
+    def bloques(self):
+        """Generador del flujo para WSGI: bloquea el hilo de la peticion mientras espera eventos"""
+        while True:
+            texto = self.siguiente()
+            if texto:
+                yield texto
+            if not self.esperar():
+                self.refrescar()
+
+
+def _formatear(seq, tipo, datos):
+    return f"id: {seq}\nevent: {tipo}\ndata: {json.dumps(datos, separators=(',', ':'), ensure_ascii=False)}\n\n"
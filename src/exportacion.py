@@ -0,0 +1,296 @@
+"""Exportacion e importacion de todos los datos como NDJSON (un objeto JSON por linea).
+
+Cada linea tiene un campo "tipo":
+
+- inicio: {"seq"}, el numero de cambio de la foto exportada
+- usuario: {"alias", "nombre"}
+- tarea: {"id", "nombre", "descripcion", "estado", "fecha_esperada_fin"}
+- asignacion: {"tarea", "usuario", "rol", "fecha_asignacion"}, despues de su tarea; sin
+  fecha_asignacion (o null) se importa con la fecha actual, como una asignacion nueva
+- dependencia: {"tarea", "dependencia"}, despues de todas las tareas
+- fin: {"registros"}, cantidad de lineas entre inicio y fin
+
+El orden (usuarios, tareas con sus asignaciones, dependencias) es el que necesita la
+importacion para que cada registro encuentre lo que referencia.
+"""
+import datetime
+import json
+from models.tarea import Tarea
+
+TIPO_NDJSON = 'application/x-ndjson'
+# Tareas que se leen con el lock del handler por vez al exportar
+BLOQUE_EXPORTACION = 1000
+# Registros que se aplican y persisten juntos al importar
+LOTE_IMPORTACION = 1000
+# Errores que se informan en la respuesta de una importacion (se cuentan todos)
+MAXIMO_ERRORES_INFORMADOS = 100
+TIPOS_REGISTRO = ('inicio', 'usuario', 'tarea', 'asignacion', 'dependencia', 'fin')
+
+
+def _linea(datos):
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class Exportacion:
+    """Los datos de un DataHandler tal como estaban en un numero de cambio, como NDJSON.
+
+    No se copia el estado ni se tiene el lock durante toda la exportacion: usuarios y
+    tareas son listas de solo-agregado, asi que basta recordar cuantos habia, y las
+    tareas se leen de a BLOQUE_EXPORTACION con el lock. Mientras la exportacion esta
+    en curso, el primer cambio sobre cada tarea guarda antes su estado anterior
+    (preservar, llamado por DataHandler._antes_de_cambiar) y la exportacion usa ese.
+    La memoria extra es proporcional a las tareas que cambian mientras tanto.
+    """
+    TIPO = TIPO_NDJSON
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.seq = None
+        self._anteriores = {}  # id -> tarea serializada como estaba al empezar
+
+    def preservar(self, tarea):
+        if tarea.id not in self._anteriores:
+            self._anteriores[tarea.id] = self.handler._serialize_tarea(tarea)
+
+    def bloques(self):
+        """Generador de bloques de texto NDJSON; la foto se toma al pedir el primero"""
+        handler = self.handler
+        with handler._lock:
+            self.seq = handler.seq
+            usuarios, tareas = handler.usuarios, handler.tareas
+            cantidad_usuarios, cantidad_tareas = len(usuarios), len(tareas)
+            handler._exportaciones = handler._exportaciones + [self]
+        try:
+            registros = 0
+            yield _linea({'tipo': 'inicio', 'seq': self.seq})
+            for inicio in range(0, cantidad_usuarios, BLOQUE_EXPORTACION):
+                # Los usuarios no cambian: no hace falta el lock
+                bloque = [_linea({'tipo': 'usuario', 'alias': usuario.alias, 'nombre': usuario.nombre})
+                          for usuario in usuarios[inicio:min(inicio + BLOQUE_EXPORTACION, cantidad_usuarios)]]
+                registros += len(bloque)
+                yield ''.join(bloque)
+            for inicio in range(0, cantidad_tareas, BLOQUE_EXPORTACION):
+                with handler._lock:
+                    datos = [self._anteriores.get(tarea.id) or handler._serialize_tarea(tarea)
+                             for tarea in tareas[inicio:min(inicio + BLOQUE_EXPORTACION, cantidad_tareas)]]
+                bloque = []
+                for tarea in datos:
+                    bloque.append(_linea({'tipo': 'tarea', 'id': tarea['id'], 'nombre': tarea['nombre'],
+                                          'descripcion': tarea['descripcion'], 'estado': tarea['estado'],
+                                          'fecha_esperada_fin': tarea['fecha_esperada_fin']}))
+                    bloque.extend(_linea(dict(asignacion, tipo='asignacion', tarea=tarea['id']))
+                                  for asignacion in tarea['usuarios_asignados'])
+                registros += len(bloque)
+                yield ''.join(bloque)
+            # Segunda pasada: una dependencia puede nombrar una tarea que aparece despues
+            for inicio in range(0, cantidad_tareas, BLOQUE_EXPORTACION):
+                with handler._lock:
+                    datos = [(tarea.id, self._dependencias(tarea))
+                             for tarea in tareas[inicio:min(inicio + BLOQUE_EXPORTACION, cantidad_tareas)]]
+                bloque = [_linea({'tipo': 'dependencia', 'tarea': task_id, 'dependencia': dependencia})
+                          for task_id, dependencias in datos for dependencia in dependencias]
+                registros += len(bloque)
+                if bloque:
+                    yield ''.join(bloque)
+            yield _linea({'tipo': 'fin', 'registros': registros})
+        finally:
+            with handler._lock:
+                handler._exportaciones = [vista for vista in handler._exportaciones if vista is not self]
+
+    def _dependencias(self, tarea):
+        anterior = self._anteriores.get(tarea.id)
+        # Las dependencias se cargan sin hidratar la tarea (ver TareaDiferida)
+        return anterior['dependencias'] if anterior else list(tarea.dependencias)
+
+
+def lineas(fragmentos):
+    """Lineas de texto de un cuerpo que llega en fragmentos de bytes, sin juntarlo entero"""
+    resto = b''
+    for fragmento in fragmentos:
+        partes = (resto + fragmento).split(b'\n')
+        resto = partes.pop()
+        for parte in partes:
+            yield parte.decode('utf-8')
+    if resto:
+        yield resto.decode('utf-8')
+
+
+class Importacion:
+    """Aplica registros NDJSON (el formato de Exportacion) sobre un DataHandler.
+
+    Cada registro se valida con las mismas reglas que la API (Asignacion para los
+    roles, Tarea.cambiar_estado para los estados, el grafo para los ciclos); los
+    invalidos se informan y se saltean. Cada LOTE_IMPORTACION registros se aplican con
+    el lock y se persisten con una sola escritura, asi que entre lotes la API sigue
+    atendiendo cambios. Un registro que ya esta aplicado (mismo alias, id, asignacion o
+    dependencia) se omite, de modo que una importacion cortada se puede repetir.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.importados = dict.fromkeys(TIPOS_REGISTRO[1:-1], 0)
+        self.omitidos = 0
+        self.errores = []
+        self.cantidad_errores = 0
+        self.registros = 0
+        self.fin = None
+
+    def importar(self, lineas):
+        lote = []
+        for numero, texto in enumerate(lineas, 1):
+            if not texto.strip():
+                continue
+            lote.append((numero, texto))
+            if len(lote) == LOTE_IMPORTACION:
+                self._aplicar_lote(lote)
+                lote = []
+        if lote:
+            self._aplicar_lote(lote)
+        return self.resumen()
+
+    def resumen(self):
+        return {
+            "importados": self.importados,
+            "omitidos": self.omitidos,
+            "errores": self.errores,
+            "cantidad_errores": self.cantidad_errores,
+            # Si llego el registro fin y no falta ninguno de los anteriores
+            "completa": self.fin is not None and self.fin.get('registros') == self.registros
+        }
+
+    def _aplicar_lote(self, lote):
+        self.handler._aplicar_en_lote(lambda: self._aplicar_registros(lote))
+
+    def _aplicar_registros(self, lote):
+        for numero, texto in lote:
+            try:
+                registro = json.loads(texto)
+                error = self._aplicar(registro) if isinstance(registro, dict) else "El registro no es un objeto"
+            except ValueError as e:
+                error = f"JSON inválido: {e}"
+            if error:
+                self.cantidad_errores += 1
+                if len(self.errores) < MAXIMO_ERRORES_INFORMADOS:
+                    self.errores.append({"linea": numero, "error": error})
+
+    def _aplicar(self, registro):
+        """Aplica un registro; devuelve el mensaje de error o None"""
+        tipo = registro.get('tipo')
+        if tipo == 'inicio':
+            return None
+        if tipo == 'fin':
+            self.fin = registro
+            return None
+        if tipo not in self.importados:
+            return f"Tipo de registro inválido. Debe ser uno de: {', '.join(TIPOS_REGISTRO)}"
+        self.registros += 1
+        resultado = getattr(self, f'_{tipo}')(registro)
+        if resultado is True:
+            self.importados[tipo] += 1
+        elif resultado is False:
+            self.omitidos += 1
+        else:
+            return resultado
+
+    @staticmethod
+    def _error_tipos(registro, textos, fecha=None):
+        """Mensaje si algun campo de `textos` no es texto o `fecha` no es texto ni null; None si estan bien"""
+        for campo in textos:
+            if not isinstance(registro[campo], str):
+                return f"Tipo inválido. El campo {campo} debe ser texto"
+        if fecha is not None and not isinstance(registro.get(fecha), (str, type(None))):
+            return f"Tipo inválido. El campo {fecha} debe ser texto o null"
+        return None
+
+    # Cada metodo devuelve True si aplico el registro, False si ya estaba o el mensaje de error
+
+    def _usuario(self, registro):
+        handler = self.handler
+        if handler._faltan_campos(registro, ('alias', 'nombre')):
+            return "Datos incompletos. Se requiere alias y nombre"
+        error = self._error_tipos(registro, ('alias', 'nombre'))
+        if error:
+            return error
+        existente = handler.get_usuario_por_alias(registro['alias'])
+        if existente:
+            return False if existente.nombre == registro['nombre'] else "El alias ya está en uso"
+        handler.crear_usuario(registro['alias'], registro['nombre'])
+        return True
+
+    def _tarea(self, registro):
+        handler = self.handler
+        if handler._faltan_campos(registro, ('id', 'nombre', 'descripcion', 'estado')):
+            return "Datos incompletos. Se requieren id, nombre, descripcion y estado"
+        error = self._error_tipos(registro, ('id', 'nombre', 'descripcion', 'estado'), 'fecha_esperada_fin')
+        if error:
+            return error
+        existente = handler.get_tarea_por_id(registro['id'])
+        if existente:
+            # Una tarea existente solo puede cambiar de estado, con las reglas de siempre
+            if existente.estado == registro['estado']:
+                return False
+            resultado, mensaje = handler.cambiar_estado_tarea(registro['id'], registro['estado'])
+            return True if resultado else mensaje
+        try:
+            tarea = Tarea(registro['nombre'], registro['descripcion'],
+                          handler._parse_fecha(registro.get('fecha_esperada_fin')))
+        except ValueError as e:
+            return str(e)
+        resultado, mensaje = tarea.cambiar_estado(registro['estado'])
+        if not resultado:
+            return mensaje
+        tarea.id = registro['id']
+        tarea.version = 0
+        handler._agregar_tarea(tarea)
+        handler._registrar_cambio(
+            'crear_tarea',
+            id=tarea.id,
+            nombre=tarea.nombre,
+            descripcion=tarea.descripcion,
+            estado=tarea.estado,
+            fecha_esperada_fin=handler._format_fecha(tarea.fechaEsperadaFin)
+        )
+        return True
+
+    def _asignacion(self, registro):
+        handler = self.handler
+        if handler._faltan_campos(registro, ('tarea', 'usuario', 'rol')):
+            return "Datos incompletos. Se requiere tarea, usuario y rol"
+        error = self._error_tipos(registro, ('tarea', 'usuario', 'rol'), 'fecha_asignacion')
+        if error:
+            return error
+        tarea = handler.get_tarea_por_id(registro['tarea'])
+        if not tarea:
+            return "Tarea no encontrada"
+        usuario = handler.get_usuario_por_alias(registro['usuario'])
+        if not usuario:
+            return "Usuario no encontrado"
+        if handler._esta_asignado(tarea, registro['usuario']):
+            return False
+        error = handler._error_rol(usuario, registro['rol'])
+        if error:
+            return error
+        try:
+            fecha_asignacion = handler._parse_fecha(registro.get('fecha_asignacion'))
+        except ValueError as e:
+            return str(e)
+        # Toda asignacion tiene fecha: sin ella se usa la actual, igual que Asignacion()
+        fecha_asignacion = handler._format_fecha(fecha_asignacion or datetime.datetime.now())
+        cambio = {'id': tarea.id, 'usuario': usuario.alias, 'rol': registro['rol'],
+                  'fecha_asignacion': fecha_asignacion}
+        handler._antes_de_cambiar(tarea)
+        handler._aplicar_asignacion(tarea, cambio)
+        handler._registrar_cambio('asignar_usuario', **cambio)
+        return True
+
+    def _dependencia(self, registro):
+        handler = self.handler
+        if handler._faltan_campos(registro, ('tarea', 'dependencia')):
+            return "Datos incompletos. Se requiere tarea y dependencia"
+        error = self._error_tipos(registro, ('tarea', 'dependencia'))
+        if error:
+            return error
+        if handler.grafo.tiene_dependencia(registro['tarea'], registro['dependencia']):
+            return False
+        resultado, mensaje = handler.gestionar_dependencia(registro['tarea'], registro['dependencia'], "adicionar")
+        return True if resultado else mensaje
@@ -0,0 +1,103 @@
+"""Los datos de un DataHandler en un numero de cambio, para leerlos sin tener su lock.
+
+FotoEstado se usa para serializar el estado al compactar y para armar las estructuras
+derivadas (IndiceTareas, Planificacion, ColumnasReporte) en el hilo de la consulta
+mientras los cambios siguen; Construccion ocupa el lugar de la estructura mientras se arma.
+"""
+import threading
+import metricas
+from exportacion import BLOQUE_EXPORTACION
+
+
+class FotoEstado:
+    """Usuarios y tareas de un DataHandler como estaban en un numero de cambio.
+
+    Como en Exportacion, no se copia nada al tomarla: usuarios y tareas son listas de
+    solo-agregado, asi que basta recordar cuantos habia, y el primer cambio sobre cada
+    tarea guarda antes lo que la foto lee de ella (preservar). Lo que se lee de cada
+    tarea es datos(tarea), por defecto la tarea serializada. tareas() no toma el lock
+    del handler sino el de la foto, de a BLOQUE_EXPORTACION tareas: cada tarea se lee
+    antes de que un cambio empiece o se usa la preservada. Asi un hilo que tiene el
+    lock del handler puede esperar a que la lectura termine.
+    """
+
+    def __init__(self, handler, datos=None):
+        # Se toma con el lock del handler
+        self.handler = handler
+        self.seq = handler.seq
+        self._datos = datos or handler._serialize_tarea
+        self._usuarios, self._tareas = handler.usuarios, handler.tareas
+        self._cantidad_usuarios, self._cantidad_tareas = len(self._usuarios), len(self._tareas)
+        self._anteriores = {}  # id -> datos de la tarea como estaba al tomar la foto
+        self._lock = threading.Lock()
+        self.terminada = False
+        handler._exportaciones = handler._exportaciones + [self]
+
+    def preservar(self, tarea):
+        with self._lock:
+            if not self.terminada and tarea.id not in self._anteriores:
+                self._anteriores[tarea.id] = self._datos(tarea)
+
+    def retirar(self):
+        """Saca la foto de la lista del handler, con su lock como al agregarla"""
+        handler = self.handler
+        with handler._lock:
+            handler._exportaciones = [vista for vista in handler._exportaciones if vista is not self]
+
+    def usuarios(self):
+        # Los usuarios no cambian: no hace falta el lock
+        return self._usuarios[:self._cantidad_usuarios]
+
+    def tareas(self):
+        """datos(tarea) de cada tarea de la foto; despues la foto ya no preserva tareas"""
+        tareas = []
+        for inicio in range(0, self._cantidad_tareas, BLOQUE_EXPORTACION):
+            with self._lock:
+                tareas.extend(self._anteriores.get(tarea.id) or self._datos(tarea)
+                              for tarea in self._tareas[inicio:min(inicio + BLOQUE_EXPORTACION,
+                                                                   self._cantidad_tareas)])
+        with self._lock:
+            self.terminada = True
+            self._anteriores = {}
+        return tareas
+
+    def serializar(self):
+        """Lo mismo que DataHandler._serializar() en el numero de cambio de la foto"""
+        with metricas.Cronometro('serializar'):
+            tareas = self.tareas()
+            return {
+                'seq': self.seq,
+                'usuarios': [self.handler._serialize_usuario(usuario) for usuario in self.usuarios()],
+                'tareas': tareas
+            }
+
+
+class Construccion:
+    """Lugar de una estructura derivada mientras se arma sin el lock del handler.
+
+    Los cambios la actualizan igual que a la estructura (self._indice.asignar(...) con el
+    lock): aca esas llamadas se anotan, y aplicar() las repite en orden sobre la
+    estructura ya armada antes de publicarla. Las consultas que la necesitan mientras
+    tanto esperan a que termine.
+    """
+
+    def __init__(self):
+        self._llamadas = []
+        self._terminada = threading.Event()
+
+    def __getattr__(self, nombre):
+        # Solo se invoca para los metodos de la estructura: los atributos propios existen
+        def anotar(*args):
+            self._llamadas.append((nombre, args))
+        return anotar
+
+    def aplicar(self, estructura):
+        for nombre, args in self._llamadas:
+            getattr(estructura, nombre)(*args)
+        return estructura
+
+    def terminar(self):
+        self._terminada.set()
+
+    def esperar(self):
+        self._terminada.wait()
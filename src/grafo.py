@@ -0,0 +1,148 @@
+from collections import deque
+
+
+class GrafoDependencias:
+    """Grafo de dependencias entre tareas con aristas directas e inversas.
+
+    Una arista dependencia -> tarea indica que la tarea depende de la dependencia.
+    Se mantiene un orden topologico incremental (algoritmo de Pearce-Kelly): al
+    agregar una arista solo se recorre la region del grafo afectada, lo que permite
+    rechazar ciclos sin recorrer el grafo completo.
+
+    Las modificaciones las hace un solo hilo a la vez (el lock de escritura de
+    DataHandler); las consultas no toman lock: copian cada conjunto de vecinos antes
+    de recorrerlo (list() sobre un set no suelta el GIL) y el orden se actualiza de
+    una sola vez.
+    """
+
+    def __init__(self):
+        # Solo tienen entrada las tareas con aristas: la mayoria no tiene dependencias
+        # y un set vacio por tarea ocuparia mas que la propia tarea
+        self._dependencias = {}  # tarea -> set de tareas de las que depende
+        self._dependientes = {}  # tarea -> set de tareas que dependen de ella
+        self._orden = {}         # tarea -> posicion en el orden topologico
+        self._siguiente = 0
+
+    def agregar_nodo(self, tarea_id):
+        if tarea_id not in self._orden:
+            self._orden[tarea_id] = self._siguiente
+            self._siguiente += 1
+
+    def tiene_dependencia(self, tarea_id, dependencia_id):
+        return dependencia_id in self._dependencias.get(tarea_id, ())
+
+    def agregar_arista(self, dependencia_id, tarea_id):
+        """Agrega la arista sin verificar ciclos (carga de datos ya validados).
+        Despues de una carga masiva se debe llamar a recalcular_orden()."""
+        self.agregar_nodo(dependencia_id)
+        self.agregar_nodo(tarea_id)
+        self._conectar(dependencia_id, tarea_id)
+
+    def _conectar(self, dependencia_id, tarea_id):
+        self._dependencias.setdefault(tarea_id, set()).add(dependencia_id)
+        self._dependientes.setdefault(dependencia_id, set()).add(tarea_id)
+
+    def agregar_dependencia(self, tarea_id, dependencia_id):
+        if tarea_id == dependencia_id or self.tiene_dependencia(tarea_id, dependencia_id):
+            return False, "La dependencia ya existe o es la misma tarea"
+        self.agregar_nodo(dependencia_id)
+        self.agregar_nodo(tarea_id)
+
+        limite_inferior = self._orden[tarea_id]
+        limite_superior = self._orden[dependencia_id]
+        if limite_inferior < limite_superior:
+            # La tarea esta antes que su nueva dependencia: hay que reordenar la region afectada
+            adelante = self._alcanzables(tarea_id, self._dependientes, lambda n: self._orden[n] <= limite_superior,
+                                         objetivo=dependencia_id)
+            if adelante is None:
+                return False, "La dependencia generaría un ciclo"
+            atras = self._alcanzables(dependencia_id, self._dependencias, lambda n: self._orden[n] >= limite_inferior)
+            self._reordenar(atras, adelante)
+
+        self._conectar(dependencia_id, tarea_id)
+        return True, "Dependencia agregada correctamente"
+
+    def remover_dependencia(self, tarea_id, dependencia_id):
+        if not self.tiene_dependencia(tarea_id, dependencia_id):
+            return False, "La dependencia no existe en esta tarea"
+        # Quitar una arista nunca invalida el orden topologico
+        self._desconectar(self._dependencias, tarea_id, dependencia_id)
+        self._desconectar(self._dependientes, dependencia_id, tarea_id)
+        return True, "Dependencia removida correctamente"
+
+    @staticmethod
+    def _desconectar(adyacencia, nodo, vecino):
+        vecinos = adyacencia[nodo]
+        vecinos.discard(vecino)
+        if not vecinos:
+            del adyacencia[nodo]
+
+    def _alcanzables(self, inicio, adyacencia, dentro_de_region, objetivo=None):
+        """Nodos alcanzables desde inicio sin salir de la region; None si se llega al objetivo"""
+        visitados = {inicio}
+        pila = [inicio]
+        while pila:
+            nodo = pila.pop()
+            for vecino in adyacencia.get(nodo, ()):
+                if vecino == objetivo:
+                    return None
+                if vecino not in visitados and dentro_de_region(vecino):
+                    visitados.add(vecino)
+                    pila.append(vecino)
+        return visitados
+
+    def _reordenar(self, atras, adelante):
+        # Las dependencias alcanzadas hacia atras pasan a ocupar las primeras posiciones
+        # del conjunto afectado, manteniendo el orden relativo dentro de cada grupo
+        atras = sorted(atras, key=self._orden.__getitem__)
+        adelante = sorted(adelante, key=self._orden.__getitem__)
+        posiciones = sorted(self._orden[n] for n in atras + adelante)
+        # Un solo update: una consulta concurrente ve el orden anterior o el nuevo
+        self._orden.update(zip(atras + adelante, posiciones))
+
+    def recalcular_orden(self):
+        """Recalcula el orden topologico completo (algoritmo de Kahn).
+        Los nodos que formen ciclos en datos antiguos quedan al final."""
+        grados = {nodo: len(dependencias) for nodo, dependencias in self._dependencias.items()}
+        cola = deque(nodo for nodo in self._orden if nodo not in grados)
+        orden = []
+        while cola:
+            nodo = cola.popleft()
+            orden.append(nodo)
+            for dependiente in self._dependientes.get(nodo, ()):
+                grados[dependiente] -= 1
+                if grados[dependiente] == 0:
+                    cola.append(dependiente)
+        ordenados = set(orden)
+        orden.extend(nodo for nodo in self._orden if nodo not in ordenados)
+        self._orden = {nodo: posicion for posicion, nodo in enumerate(orden)}
+        self._siguiente = len(orden)
+
+    def dependencias(self, tarea_id, transitivas=False):
+        return self._recorrer(tarea_id, self._dependencias, transitivas)
+
+    def dependientes(self, tarea_id, transitivas=False):
+        return self._recorrer(tarea_id, self._dependientes, transitivas)
+
+    def _recorrer(self, tarea_id, adyacencia, transitivas):
+        if not transitivas:
+            return list(adyacencia.get(tarea_id, ()))
+        visitados = {tarea_id}
+        resultado = []
+        cola = deque([tarea_id])
+        while cola:
+            for vecino in list(adyacencia.get(cola.popleft(), ())):
+                if vecino not in visitados:
+                    visitados.add(vecino)
+                    resultado.append(vecino)
+                    cola.append(vecino)
+        return resultado
+
+    def posicion(self, tarea_id):
+        """Posicion de la tarea en el orden topologico: menor que la de todos sus dependientes"""
+        return self._orden[tarea_id]
+
+    def orden_topologico(self):
+        """Ids de las tareas ordenados de modo que cada una aparece despues de sus dependencias"""
+        orden = self._orden.copy()
+        return sorted(orden, key=orden.__getitem__)
@@ -0,0 +1,154 @@
+from bisect import bisect_left, bisect_right, insort
+
+TAMANO_BLOQUE = 512
+
+
+class ListaOrdenada:
+    """Lista ordenada de claves guardada en bloques de a lo sumo TAMANO_BLOQUE.
+
+    Insertar o quitar una clave copia solo el bloque afectado y la lista de bloques
+    (O(TAMANO_BLOQUE + n / TAMANO_BLOQUE)) en lugar de correr la lista entera. Cada
+    cambio publica un estado nuevo de una sola vez y los estados publicados no se
+    modifican, asi que quien recorre sin lock ve la lista anterior o la nueva entera.
+    """
+
+    def __init__(self, claves=()):
+        """`claves` ya ordenadas"""
+        claves = list(claves)
+        bloques = [tuple(claves[i:i + TAMANO_BLOQUE]) for i in range(0, len(claves), TAMANO_BLOQUE)]
+        self._estado = (bloques, [bloque[-1] for bloque in bloques], len(claves))
+
+    def __len__(self):
+        return self._estado[2]
+
+    def agregar(self, clave):
+        bloques, maximos, cantidad = self._estado
+        if not bloques:
+            self._estado = ([(clave,)], [clave], 1)
+            return
+        i = min(bisect_left(maximos, clave), len(bloques) - 1)
+        bloque = list(bloques[i])
+        insort(bloque, clave)
+        if len(bloque) > TAMANO_BLOQUE:
+            mitad = len(bloque) // 2
+            nuevos = [tuple(bloque[:mitad]), tuple(bloque[mitad:])]
+        else:
+            nuevos = [tuple(bloque)]
+        self._estado = (bloques[:i] + nuevos + bloques[i + 1:],
+                        maximos[:i] + [nuevo[-1] for nuevo in nuevos] + maximos[i + 1:],
+                        cantidad + 1)
+
+    def quitar(self, clave):
+        bloques, maximos, cantidad = self._estado
+        i = bisect_left(maximos, clave)
+        if i == len(bloques):
+            return False
+        bloque = bloques[i]
+        j = bisect_left(bloque, clave)
+        if j == len(bloque) or bloque[j] != clave:
+            return False
+        bloque = bloque[:j] + bloque[j + 1:]
+        nuevos = [bloque] if bloque else []
+        self._estado = (bloques[:i] + nuevos + bloques[i + 1:],
+                        maximos[:i] + [bloque[-1] for bloque in nuevos] + maximos[i + 1:],
+                        cantidad - 1)
+        return True
+
+    def recorrer(self, inicio=None, descendente=False):
+        """Claves mayores que `inicio` (o menores, si es descendente), desde la mas cercana.
+
+        Recorre el estado publicado al empezar: los cambios posteriores no se ven.
+        """
+        bloques, maximos, _ = self._estado
+        if not descendente:
+            i = 0 if inicio is None else bisect_right(maximos, inicio)
+            for bloque in bloques[i:]:
+                j = 0 if inicio is None else bisect_right(bloque, inicio)
+                yield from bloque[j:]
+                inicio = None
+        else:
+            i = len(bloques) - 1 if inicio is None else min(bisect_left(maximos, inicio), len(bloques) - 1)
+            for k in range(i, -1, -1):
+                bloque = bloques[k]
+                j = len(bloque) if inicio is None else bisect_left(bloque, inicio)
+                yield from reversed(bloque[:j])
+                inicio = None
+
+
+class IndiceTareas:
+    """Indices secundarios de las tareas, todos ordenados por fecha esperada de fin.
+
+    Las claves son (fecha, id), con la fecha en microsegundos como la guarda Tarea; la
+    fecha de una tarea no cambia, asi que su clave tampoco. Hay una lista con todas
+    las tareas, una por estado y una por rol (una tarea esta en la de cada rol que
+    tenga alguna de sus asignaciones). Los cambios los hace el hilo que tiene el lock
+    de DataHandler; las consultas recorren las listas sin lock.
+    """
+
+    def __init__(self, tareas=()):
+        """`tareas` son tuplas (id, fecha, estado, roles)"""
+        self._claves = {}
+        self._roles = {}  # (id, rol) -> cantidad de asignaciones de la tarea con ese rol
+        datos = {}
+        for task_id, fecha, estado, roles in tareas:
+            self._claves[task_id] = (fecha, task_id)
+            datos[task_id] = (estado, roles)
+        # Se ordena una sola vez; repartidas en ese orden, las demas listas ya quedan ordenadas
+        ordenadas = sorted(self._claves.values())
+        por_estado = {}
+        por_rol = {}
+        for clave in ordenadas:
+            estado, roles = datos[clave[1]]
+            por_estado.setdefault(estado, []).append(clave)
+            for rol in roles:
+                if self._sumar_rol(clave[1], rol, 1) == 1:
+                    por_rol.setdefault(rol, []).append(clave)
+        self.todas = ListaOrdenada(ordenadas)
+        self._por_estado = {estado: ListaOrdenada(claves) for estado, claves in por_estado.items()}
+        self._por_rol = {rol: ListaOrdenada(claves) for rol, claves in por_rol.items()}
+
+    def clave(self, task_id):
+        return self._claves.get(task_id)
+
+    def por_estado(self, estado):
+        return self._por_estado.get(estado) or ListaOrdenada()
+
+    def por_rol(self, rol):
+        return self._por_rol.get(rol) or ListaOrdenada()
+
+    def agregar(self, task_id, fecha, estado, roles=()):
+        clave = self._claves[task_id] = (fecha, task_id)
+        self.todas.agregar(clave)
+        self._lista(self._por_estado, estado).agregar(clave)
+        for rol in roles:
+            self.asignar(task_id, rol)
+
+    def cambiar_estado(self, task_id, anterior, nuevo):
+        if anterior == nuevo:
+            return
+        clave = self._claves[task_id]
+        self._lista(self._por_estado, nuevo).agregar(clave)
+        self._lista(self._por_estado, anterior).quitar(clave)
+
+    def asignar(self, task_id, rol):
+        if self._sumar_rol(task_id, rol, 1) == 1:
+            self._lista(self._por_rol, rol).agregar(self._claves[task_id])
+
+    def desasignar(self, task_id, rol):
+        if self._sumar_rol(task_id, rol, -1) == 0:
+            self._lista(self._por_rol, rol).quitar(self._claves[task_id])
+
+    def _sumar_rol(self, task_id, rol, cantidad):
+        total = self._roles.get((task_id, rol), 0) + cantidad
+        if total:
+            self._roles[(task_id, rol)] = total
+        else:
+            self._roles.pop((task_id, rol), None)
+        return total
+
+    @staticmethod
+    def _lista(listas, valor):
+        lista = listas.get(valor)
+        if lista is None:
+            lista = listas[valor] = ListaOrdenada()
+        return lista
@@ -0,0 +1,181 @@
+"""Metricas de la aplicacion en el formato de texto de Prometheus.
+
+Las metricas son globales al proceso (como las de prometheus_client) para poder
+medirse desde cualquier capa sin pasar objetos. Registrar una observacion cuesta
+una busqueda en un dict y un lock sin contencion, del orden de un microsegundo.
+"""
+import bisect
+import cProfile
+import functools
+import os
+import random
+import re
+import threading
+import time
+
+# Limites de los buckets de latencia, en segundos (de 50 microsegundos a 10 segundos)
+LIMITES_SEGUNDOS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _etiquetas(nombres, valores, extra=()):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    pares.extend(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, cantidad=1, *etiquetas):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + cantidad
+
+    def valor(self, *etiquetas):
+        return self._valores.get(etiquetas, 0)
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for etiquetas, valor in valores:
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {_numero(valor)}")
+        return lineas
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = limites
+        # valores de etiquetas -> [cantidad por bucket..., cantidad sobre el ultimo limite, suma]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [0] * (len(self.limites) + 1) + [0.0]
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def cantidad(self, *etiquetas):
+        serie = self._series.get(etiquetas)
+        return sum(serie[:-1]) if serie else 0
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = sorted((etiquetas, list(serie)) for etiquetas, serie in self._series.items())
+        for etiquetas, serie in series:
+            acumulado = 0
+            for limite, cantidad in zip(self.limites + ('+Inf',), serie):
+                acumulado += cantidad
+                le = 'le="+Inf"' if limite == '+Inf' else f'le="{limite}"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, etiquetas, [le])} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, etiquetas)} {_numero(serie[-1])}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, etiquetas)} {acumulado}")
+        return lineas
+
+
+PETICIONES = Histograma('tareas_peticion_segundos', 'Duracion de las peticiones HTTP por ruta',
+                        ('metodo', 'ruta', 'codigo'))
+OPERACIONES = Histograma('tareas_operacion_segundos',
+                         'Duracion de las consultas, cambios, serializacion y escrituras de DataHandler',
+                         ('operacion',))
+BYTES_ESCRITOS = Contador('tareas_bytes_escritos_total', 'Bytes escritos por el almacenamiento', ('destino',))
+OBJETOS_CARGADOS = Contador('tareas_objetos_cargados_total', 'Usuarios y tareas cargados desde el almacenamiento',
+                            ('tipo',))
+PERFILES_GUARDADOS = Contador('tareas_perfiles_guardados_total', 'Perfiles de peticiones lentas guardados')
+METRICAS = [PETICIONES, OPERACIONES, BYTES_ESCRITOS, OBJETOS_CARGADOS, PERFILES_GUARDADOS]
+
+
+class Cronometro:
+    """Bloque `with` que registra su duracion en OPERACIONES"""
+    __slots__ = ('operacion', 'inicio')
+
+    def __init__(self, operacion):
+        self.operacion = operacion
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        OPERACIONES.observar(time.perf_counter() - self.inicio, self.operacion)
+
+
+def cronometrado(operacion):
+    """Decorador que registra en OPERACIONES la duracion de cada llamada"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                OPERACIONES.observar(time.perf_counter() - inicio, operacion)
+        return envoltura
+    return decorador
+
+
+def exportar(adicionales=()):
+    """Texto de /metrics. `adicionales` son (nombre, tipo, ayuda, valor) calculados al momento"""
+    lineas = []
+    for metrica in METRICAS:
+        lineas.extend(metrica.exportar())
+    for nombre, tipo, ayuda, valor in adicionales:
+        lineas.extend([f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}", f"{nombre} {_numero(valor)}"])
+    return '\n'.join(lineas) + '\n'
+
+
+class PerfiladorLento:
+    """Perfila con cProfile una fraccion de las peticiones y guarda las que tardan mas que el umbral.
+
+    Solo se perfila una peticion a la vez (cProfile no admite perfiles simultaneos en
+    todas las versiones de Python); el resto de las peticiones no paga nada extra.
+    Con umbral 0 esta desactivado.
+    """
+
+    def __init__(self, umbral=0.0, muestreo=0.01, directorio='perfiles'):
+        self.umbral = umbral
+        self.muestreo = muestreo
+        self.directorio = directorio
+        self._ocupado = threading.Lock()
+
+    def iniciar(self):
+        """Devuelve un perfil ya activo si esta peticion se muestrea, o None"""
+        if not self.umbral or random.random() >= self.muestreo or not self._ocupado.acquire(blocking=False):
+            return None
+        perfil = cProfile.Profile()
+        perfil.enable()
+        return perfil
+
+    def terminar(self, perfil, duracion, descripcion):
+        """Detiene el perfil; si la peticion fue lenta lo guarda y devuelve la ruta del archivo"""
+        perfil.disable()
+        self._ocupado.release()
+        if duracion < self.umbral:
+            return None
+        os.makedirs(self.directorio, exist_ok=True)
+        nombre = re.sub(r'[^A-Za-z0-9_.-]+', '_', descripcion).strip('_')
+        ruta = os.path.join(self.directorio, f"{time.strftime('%Y%m%d-%H%M%S')}-{nombre}-{duracion * 1000:.0f}ms.prof")
+        perfil.dump_stats(ruta)
+        PERFILES_GUARDADOS.incrementar()
+        return ruta
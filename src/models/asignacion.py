@@ -1,15 +1,21 @@
 import datetime
+from .campos import CampoCanonico, CampoFecha
+
+ROLES_VALIDOS = ["analisis", "diseño", "programacion", "infra"]
 
 class Asignacion:
+    __slots__ = ('usuarioAsignado', '_rol', '_fecha_asignacion')
+    rol = CampoCanonico('_rol', ROLES_VALIDOS)
+    fechaAsignacion = CampoFecha('_fecha_asignacion')
+
     def __init__(self, usuario_asignado, rol):
         self.usuarioAsignado = usuario_asignado
         self.rol = rol
         self.fechaAsignacion = datetime.datetime.now()
         
         # Validar el rol
-        roles_validos = ["analisis", "diseño", "programacion", "infra"]
-        if rol not in roles_validos:
-            raise ValueError(f"Rol inválido. Debe ser uno de: {', '.join(roles_validos)}")
+        if rol not in ROLES_VALIDOS:
+            raise ValueError(f"Rol inválido. Debe ser uno de: {', '.join(ROLES_VALIDOS)}")
 
     def get_assignment_details(self):
         return {
@@ -0,0 +1,48 @@
+import datetime
+
+EPOCA = datetime.datetime(1970, 1, 1)
+MICROSEGUNDO = datetime.timedelta(microseconds=1)
+
+
+class CampoFecha:
+    """Atributo datetime guardado como entero (microsegundos desde EPOCA) en un slot.
+
+    Un int ocupa menos que un datetime y la conversion es exacta en ambos sentidos.
+    """
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, instancia, propietario=None):
+        if instancia is None:
+            return self
+        valor = getattr(instancia, self.slot)
+        return None if valor is None else EPOCA + valor * MICROSEGUNDO
+
+    def __set__(self, instancia, fecha):
+        setattr(instancia, self.slot, None if fecha is None else (fecha - EPOCA) // MICROSEGUNDO)
+
+
+class CampoCanonico:
+    """Atributo de texto que guarda la instancia compartida de los valores conocidos.
+
+    Los valores leidos de JSON o recibidos en una peticion son objetos str nuevos;
+    reemplazarlos por el canonico evita una copia por tarea o asignacion.
+    """
+
+    def __init__(self, slot, valores):
+        self.slot = slot
+        self.canonicos = {valor: valor for valor in valores}
+
+    def __get__(self, instancia, propietario=None):
+        if instancia is None:
+            return self
+        return getattr(instancia, self.slot)
+
+    def __set__(self, instancia, valor):
+        try:
+            valor = self.canonicos.get(valor, valor)
+        except TypeError:
+            # Un valor no hashable (lista, dict) se guarda tal cual: la validacion del modelo lo rechaza
+            pass
+        setattr(instancia, self.slot, valor)
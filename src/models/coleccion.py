@@ -0,0 +1,144 @@
+# Con menos elementos que esto no se arma el indice por clave: se busca recorriendo
+MINIMO_INDICE = 8
+
+
+class Coleccion:
+    """Elementos en orden de llegada, a lo sumo uno por clave.
+
+    Se usa como una lista (se recorre, tiene largo, se compara con listas), pero buscar,
+    agregar y quitar por clave son O(1). Los elementos estan en una lista de
+    solo-agregado: quitar deja un hueco (None) en su posicion en lugar de correr el
+    resto, y cuando hay mas huecos que elementos la lista se reemplaza por una nueva
+    sin huecos. Asi quien la recorre sin lock (ver DataHandler) ve cada cambio entero
+    o no lo ve.
+
+    El indice clave -> posicion se arma recien con mas de MINIMO_INDICE elementos; la
+    mayoria de las tareas tienen uno o dos asignados y no necesitan un dict.
+    """
+    __slots__ = ('_elementos', '_posiciones', '_cantidad')
+
+    def __init__(self, elementos=()):
+        self._elementos = []
+        self._posiciones = None
+        self._cantidad = 0
+        for elemento in elementos:
+            self.agregar(elemento)
+
+    @staticmethod
+    def clave(elemento):
+        raise NotImplementedError
+
+    def __len__(self):
+        return self._cantidad
+
+    def __iter__(self):
+        return (elemento for elemento in self._elementos if elemento is not None)
+
+    def __contains__(self, elemento):
+        return self.obtener(self.clave(elemento)) is elemento
+
+    def __getitem__(self, indice):
+        # Por posicion entre los elementos presentes: O(n) si hay huecos
+        elementos = self._elementos
+        if len(elementos) == self._cantidad:
+            return elementos[indice]
+        return list(self)[indice]
+
+    def __eq__(self, otro):
+        if isinstance(otro, (Coleccion, list)):
+            return list(self) == list(otro)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def _buscar(self, clave):
+        """(lista de elementos, posicion en ella del elemento con esa clave o None)"""
+        # Primero el indice y despues la lista: al compactar se publica la lista nueva antes
+        # que su indice, asi que si no coinciden se busca recorriendo la lista
+        posiciones = self._posiciones
+        elementos = self._elementos
+        if posiciones is not None:
+            posicion = posiciones.get(clave)
+            if posicion is None:
+                return elementos, None
+            if posicion < len(elementos):
+                elemento = elementos[posicion]
+                if elemento is not None and self.clave(elemento) == clave:
+                    return elementos, posicion
+        for posicion, elemento in enumerate(elementos):
+            if elemento is not None and self.clave(elemento) == clave:
+                return elementos, posicion
+        return elementos, None
+
+    def obtener(self, clave):
+        elementos, posicion = self._buscar(clave)
+        return None if posicion is None else elementos[posicion]
+
+    def agregar(self, elemento):
+        """Agrega al final; si ya hay un elemento con la misma clave no lo agrega y devuelve False"""
+        clave = self.clave(elemento)
+        elementos, posicion = self._buscar(clave)
+        if posicion is not None:
+            return False
+        elementos.append(elemento)
+        self._cantidad += 1
+        if self._posiciones is not None:
+            self._posiciones[clave] = len(elementos) - 1
+        elif self._cantidad > MINIMO_INDICE:
+            self._posiciones = self._indexar(elementos)
+        return True
+
+    def quitar(self, clave):
+        """Quita el elemento con esa clave y lo devuelve (None si no estaba)"""
+        elementos, posicion = self._buscar(clave)
+        if posicion is None:
+            return None
+        elemento = elementos[posicion]
+        if self._posiciones is not None:
+            del self._posiciones[clave]
+        elementos[posicion] = None
+        self._cantidad -= 1
+        if len(elementos) - self._cantidad > self._cantidad:
+            # Lista nueva: la anterior queda como estaba para quien la este recorriendo
+            elementos = [elemento for elemento in elementos if elemento is not None]
+            self._elementos = elementos
+            self._posiciones = self._indexar(elementos) if len(elementos) > MINIMO_INDICE else None
+        return elemento
+
+    def recorrer(self, despues_de=None):
+        """Iterador de (posicion, elemento) a partir del siguiente al de clave `despues_de`.
+
+        Devuelve None si no hay elemento con esa clave. Recorre la lista tal como esta al
+        empezar, cortada en su largo de ese momento.
+        """
+        if despues_de is None:
+            elementos, posicion = self._elementos, -1
+        else:
+            elementos, posicion = self._buscar(despues_de)
+            if posicion is None:
+                return None
+        return ((i, elementos[i]) for i in range(posicion + 1, len(elementos)) if elementos[i] is not None)
+
+    def _indexar(self, elementos):
+        return {self.clave(elemento): posicion for posicion, elemento in enumerate(elementos) if elemento is not None}
+
+
+class TareasAsociadas(Coleccion):
+    """Tareas de un usuario, por id"""
+    __slots__ = ()
+
+    @staticmethod
+    def clave(tarea):
+        return tarea.id
+
+
+class UsuariosAsignados(Coleccion):
+    """Asignaciones de una tarea, por alias del usuario"""
+    __slots__ = ()
+
+    @staticmethod
+    def clave(asignacion):
+        return asignacion.usuarioAsignado.alias
@@ -1,38 +1,51 @@
 import datetime
 import uuid
+from .campos import CampoCanonico, CampoFecha
+from .coleccion import UsuariosAsignados
+
+ESTADOS_VALIDOS = ["Nueva", "Progreso", "Finalizada"]
 
 class Tarea:
+    # Sin __dict__ por instancia; estado y fecha se guardan en forma compacta
+    __slots__ = ('id', 'nombre', 'descripcion', '_estado', '_fecha_esperada_fin', 'usuariosAsignados',
+                 'dependencias', 'version')
+    estado = CampoCanonico('_estado', ESTADOS_VALIDOS)
+    fechaEsperadaFin = CampoFecha('_fecha_esperada_fin')
+
     def __init__(self, nombre, descripcion, fecha_esperada_fin=None, estado="Nueva"):
         self.id = str(uuid.uuid4())
         self.nombre = nombre
         self.descripcion = descripcion
         self.estado = estado
         self.fechaEsperadaFin = fecha_esperada_fin or datetime.datetime.now() + datetime.timedelta(days=7)
-        self.usuariosAsignados = []
+        self.usuariosAsignados = UsuariosAsignados()
         self.dependencias = []  # Lista de IDs de tareas de las que depende esta tarea
+        self.version = 0  # Se incrementa con cada cambio; invalida las representaciones cacheadas
 
     def cambiar_estado(self, nuevo_estado):
-        estados_validos = ["Nueva", "Progreso", "Finalizada"]
-        
-        if nuevo_estado not in estados_validos:
-            return False, f"Estado inválido. Debe ser uno de: {', '.join(estados_validos)}"
+        if nuevo_estado not in ESTADOS_VALIDOS:
+            return False, f"Estado inválido. Debe ser uno de: {', '.join(ESTADOS_VALIDOS)}"
         
         # No permitir cambiar de Finalizada a Nueva
         if self.estado == "Finalizada" and nuevo_estado == "Nueva":
             return False, "No se puede cambiar una tarea Finalizada a estado Nueva"
             
         self.estado = nuevo_estado
+        self.version += 1
         return True, "Estado actualizado correctamente"
         
     def agregar_dependencia(self, tarea_id):
         if tarea_id not in self.dependencias and tarea_id != self.id:
             self.dependencias.append(tarea_id)
+            self.version += 1
             return True, "Dependencia agregada correctamente"
         return False, "La dependencia ya existe o es la misma tarea"
         
     def remover_dependencia(self, tarea_id):
         if tarea_id in self.dependencias:
-            self.dependencias.remove(tarea_id)
+            # Lista nueva en lugar de remove(): quien la este recorriendo sin lock no se saltea elementos
+            self.dependencias = [dependencia for dependencia in self.dependencias if dependencia != tarea_id]
+            self.version += 1
             return True, "Dependencia removida correctamente"
         return False, "La dependencia no existe en esta tarea"
     
@@ -1,8 +1,14 @@
+from .coleccion import TareasAsociadas
+
+
 class Usuario:
+    __slots__ = ('alias', 'nombre', 'tareasAsociadas', 'version')
+
     def __init__(self, alias, nombre):
         self.alias = alias
         self.nombre = nombre
-        self.tareasAsociadas = []
+        self.tareasAsociadas = TareasAsociadas()
+        self.version = 0  # Se incrementa cuando cambian sus tareas; invalida su vista cacheada
 
     def get_user_info(self):
         return {
@@ -0,0 +1,111 @@
+import heapq
+from indices import ListaOrdenada
+
+
+class Planificacion:
+    """Fecha mas temprana en que puede terminar cada tarea, segun sus dependencias.
+
+    Una tarea no termina antes de su fecha esperada de fin ni antes que la mas tardia de
+    sus dependencias: temprana(t) = max(fecha(t), temprana(d) para cada dependencia d).
+    La dependencia que fija ese maximo (si supera la fecha propia) es la critica de la
+    tarea, y siguiendo las criticas hacia atras se obtiene su ruta critica.
+
+    Se calcula una vez en orden topologico; despues, cada cambio recalcula la tarea
+    afectada y solo los dependientes cuya fecha cambia, en orden topologico. Las fechas
+    son enteros en microsegundos, como en IndiceTareas. Los cambios los hace el hilo que
+    tiene el lock de DataHandler; las consultas leen sin lock.
+    """
+
+    def __init__(self, grafo, fechas):
+        """`fechas`: id -> fecha esperada de fin de cada tarea"""
+        self._grafo = grafo
+        self._fechas = dict(fechas)
+        self._temprana = {}
+        self._critica = {}
+        self._finales = None
+        for tarea_id in grafo.orden_topologico():
+            self._calcular(tarea_id)
+        # (temprana, id) de todas las tareas, para encontrar la que termina ultima
+        self._finales = ListaOrdenada(sorted((fecha, tarea_id) for tarea_id, fecha in self._temprana.items()
+                                             if fecha is not None))
+
+    def fecha(self, tarea_id):
+        return self._fechas.get(tarea_id)
+
+    def temprana(self, tarea_id):
+        return self._temprana.get(tarea_id)
+
+    def ruta_critica(self, tarea_id):
+        """Ids desde la primera dependencia de la cadena que fija la fecha de la tarea hasta la tarea"""
+        ruta = []
+        visitados = set()
+        # visitados: una lectura concurrente con un cambio podria mezclar aristas viejas y nuevas
+        while tarea_id is not None and tarea_id not in visitados:
+            ruta.append(tarea_id)
+            visitados.add(tarea_id)
+            tarea_id = self._critica.get(tarea_id)
+        ruta.reverse()
+        return ruta
+
+    def ultima(self):
+        """Id de la tarea que termina mas tarde, o None si no hay tareas.
+
+        Una tarea y sus dependientes de la misma cadena empatan en fecha: entre las que
+        empatan se elige la ultima en orden topologico, donde termina la cadena.
+        """
+        ultima = fecha_ultima = None
+        for fecha, tarea_id in self._finales.recorrer(descendente=True):
+            if ultima is not None and fecha < fecha_ultima:
+                break
+            if ultima is None or self._grafo.posicion(tarea_id) > self._grafo.posicion(ultima):
+                ultima, fecha_ultima = tarea_id, fecha
+        return ultima
+
+    def agregar_tarea(self, tarea_id, fecha):
+        self._fechas[tarea_id] = fecha
+        return self.actualizar(tarea_id)
+
+    def actualizar(self, tarea_id):
+        """Recalcula la tarea y propaga a sus dependientes mientras su fecha cambie.
+
+        Se llama despues de cambiar las dependencias de la tarea (el orden topologico del
+        grafo ya esta al dia). Devuelve cuantas tareas se recalcularon.
+        """
+        pendientes = [(self._grafo.posicion(tarea_id), tarea_id)]
+        encoladas = {tarea_id}
+        recalculadas = 0
+        while pendientes:
+            _, tarea_id = heapq.heappop(pendientes)
+            encoladas.discard(tarea_id)
+            recalculadas += 1
+            if not self._calcular(tarea_id):
+                continue
+            for dependiente in self._grafo.dependientes(tarea_id):
+                if dependiente not in encoladas:
+                    encoladas.add(dependiente)
+                    heapq.heappush(pendientes, (self._grafo.posicion(dependiente), dependiente))
+        return recalculadas
+
+    def _calcular(self, tarea_id):
+        """Recalcula la fecha y la dependencia critica de la tarea; indica si la fecha cambio"""
+        fecha = self._fechas.get(tarea_id)
+        critica = None
+        for dependencia_id in self._grafo.dependencias(tarea_id):
+            temprana = self._temprana.get(dependencia_id)
+            if temprana is None:
+                continue
+            # Ante empates gana la fecha propia y, entre dependencias, el id menor
+            if fecha is None or temprana > fecha or (temprana == fecha and critica is not None
+                                                     and dependencia_id < critica):
+                fecha, critica = temprana, dependencia_id
+        self._critica[tarea_id] = critica
+        anterior = self._temprana.get(tarea_id)
+        if fecha == anterior:
+            return False
+        self._temprana[tarea_id] = fecha
+        if self._finales is not None:
+            if anterior is not None:
+                self._finales.quitar((anterior, tarea_id))
+            if fecha is not None:
+                self._finales.agregar((fecha, tarea_id))
+        return True
@@ -0,0 +1,265 @@
+"""Reportes de carga de trabajo sobre una copia en columnas (arreglos NumPy) de tareas y asignaciones.
+
+Cada reporte es una funcion de una Foto a un dict listo para codificar como JSON. Las
+agregaciones se hacen con operaciones vectorizadas (bincount, mascaras) sobre las
+columnas, sin recorrer objetos Tarea ni Asignacion.
+"""
+import numpy as np
+from models.tarea import ESTADOS_VALIDOS
+from models.asignacion import ROLES_VALIDOS
+
+# Codigo de cada estado y rol en las columnas: su posicion en ESTADOS_VALIDOS y ROLES_VALIDOS
+CODIGOS_ESTADO = {estado: codigo for codigo, estado in enumerate(ESTADOS_VALIDOS)}
+CODIGOS_ROL = {rol: codigo for codigo, rol in enumerate(ROLES_VALIDOS)}
+FINALIZADA = CODIGOS_ESTADO["Finalizada"]
+MICROSEGUNDOS_POR_DIA = 24 * 60 * 60 * 1000000
+# Agrupacion de GET /reports/throughput -> unidad de numpy.datetime64
+PERIODOS = {"dia": 'D', "semana": 'W', "mes": 'M'}
+CAPACIDAD_INICIAL = 1024
+
+
+class Columna:
+    """Arreglo NumPy que crece duplicando su capacidad; los datos son sus primeros len() valores"""
+
+    def __init__(self, tipo, valores=()):
+        valores = np.asarray(valores, dtype=tipo)
+        self._datos = np.empty(max(CAPACIDAD_INICIAL, 2 * len(valores)), dtype=tipo)
+        self._datos[:len(valores)] = valores
+        self._cantidad = len(valores)
+
+    def __len__(self):
+        return self._cantidad
+
+    def agregar(self, valor):
+        if self._cantidad == len(self._datos):
+            datos = np.empty(len(self._datos) * 2, dtype=self._datos.dtype)
+            datos[:self._cantidad] = self._datos
+            self._datos = datos
+        self._datos[self._cantidad] = valor
+        self._cantidad += 1
+
+    def __setitem__(self, fila, valor):
+        self._datos[fila] = valor
+
+    def vista(self):
+        """Los datos sin copiar: cambian con la columna"""
+        return self._datos[:self._cantidad]
+
+
+class Foto:
+    """Columnas copiadas en un numero de cambio; no cambian despues"""
+
+    def __init__(self, seq, aliases, estado, fin, asignacion_tarea, asignacion_usuario, asignacion_rol,
+                 asignacion_fecha):
+        self.seq = seq
+        self.aliases = aliases
+        self.estado = estado
+        self.fin = fin
+        self.asignacion_tarea = asignacion_tarea
+        self.asignacion_usuario = asignacion_usuario
+        self.asignacion_rol = asignacion_rol
+        self.asignacion_fecha = asignacion_fecha
+
+    def atrasadas(self, ahora):
+        """Mascara de las tareas sin finalizar cuya fecha esperada de fin es anterior a `ahora`"""
+        return (self.estado != FINALIZADA) & (self.fin < ahora)
+
+
+class ColumnasReporte:
+    """Tareas y asignaciones de un DataHandler como columnas, una fila por tarea o asignacion.
+
+    Tareas: estado (posicion en ESTADOS_VALIDOS) y fecha esperada de fin. Asignaciones:
+    fila de la tarea, fila del usuario, rol (posicion en ROLES_VALIDOS), fecha de
+    asignacion y si sigue vigente; quitar una asignacion la marca como no vigente en vez
+    de correr las filas. Las fechas son microsegundos desde EPOCA, como en IndiceTareas.
+
+    Se mantiene como IndiceTareas: la arma la primera consulta y despues la actualizan
+    los cambios, con el lock del handler. foto() copia las columnas (tambien con el
+    lock); los reportes se calculan sobre la copia, sin el lock.
+    """
+
+    def __init__(self, aliases, datos_tareas):
+        """`datos_tareas`: (id, fecha, estado, [(alias, rol, fecha de asignacion)]) de cada tarea"""
+        self.aliases = list(aliases)
+        self._usuarios = {alias: fila for fila, alias in enumerate(self.aliases)}
+        self._tareas = {}  # id -> fila
+        self._asignaciones = {}  # fila de tarea << 32 | fila de usuario -> fila de la asignacion vigente
+        self._foto = None
+        # Se juntan en listas y se convierten de una vez: asignar de a un elemento a un arreglo es lento
+        estados, fines, tareas, usuarios, roles, fechas = [], [], [], [], [], []
+        for fila, (task_id, fecha, estado, asignaciones) in enumerate(datos_tareas):
+            self._tareas[task_id] = fila
+            estados.append(CODIGOS_ESTADO[estado])
+            fines.append(fecha)
+            for alias, rol, fecha_asignacion in asignaciones:
+                usuario = self._usuarios[alias]
+                self._asignaciones[fila << 32 | usuario] = len(tareas)
+                tareas.append(fila)
+                usuarios.append(usuario)
+                roles.append(CODIGOS_ROL[rol])
+                fechas.append(fecha_asignacion)
+        self.estado = Columna(np.int8, estados)
+        self.fin = Columna(np.int64, fines)
+        self.asignacion_tarea = Columna(np.int32, tareas)
+        self.asignacion_usuario = Columna(np.int32, usuarios)
+        self.asignacion_rol = Columna(np.int8, roles)
+        self.asignacion_fecha = Columna(np.int64, fechas)
+        self.vigente = Columna(np.bool_, [True] * len(tareas))
+
+    def agregar_usuario(self, alias):
+        self._usuarios[alias] = len(self.aliases)
+        self.aliases.append(alias)
+
+    def agregar_tarea(self, task_id, fecha, estado, asignaciones):
+        self._tareas[task_id] = len(self.estado)
+        self.estado.agregar(CODIGOS_ESTADO[estado])
+        self.fin.agregar(fecha)
+        for alias, rol, fecha_asignacion in asignaciones:
+            self.asignar(task_id, alias, rol, fecha_asignacion)
+
+    def cambiar_estado(self, task_id, estado):
+        self.estado[self._tareas[task_id]] = CODIGOS_ESTADO[estado]
+
+    def asignar(self, task_id, alias, rol, fecha):
+        tarea, usuario = self._tareas[task_id], self._usuarios[alias]
+        self._asignaciones[tarea << 32 | usuario] = len(self.vigente)
+        self.asignacion_tarea.agregar(tarea)
+        self.asignacion_usuario.agregar(usuario)
+        self.asignacion_rol.agregar(CODIGOS_ROL[rol])
+        self.asignacion_fecha.agregar(fecha)
+        self.vigente.agregar(True)
+
+    def desasignar(self, task_id, alias):
+        fila = self._asignaciones.pop(self._tareas[task_id] << 32 | self._usuarios[alias], None)
+        if fila is not None:
+            self.vigente[fila] = False
+
+    def foto(self, seq):
+        """Copia de las columnas en el cambio `seq` (la misma mientras no haya otro cambio)"""
+        if self._foto is None or self._foto.seq != seq:
+            vigente = self.vigente.vista()
+            self._foto = Foto(
+                seq,
+                self.aliases[:],
+                self.estado.vista().copy(),
+                self.fin.vista().copy(),
+                # Indexar con una mascara ya copia
+                self.asignacion_tarea.vista()[vigente],
+                self.asignacion_usuario.vista()[vigente],
+                self.asignacion_rol.vista()[vigente],
+                self.asignacion_fecha.vista()[vigente]
+            )
+        return self._foto
+
+
+def _por_estado(conteos):
+    return {estado: int(conteos[i]) for i, estado in enumerate(ESTADOS_VALIDOS)}
+
+
+def carga_de_trabajo(foto, ahora, limite):
+    """Asignaciones de cada usuario por estado, pendientes y atrasadas; los `limite` con mas pendientes"""
+    cantidad_usuarios, cantidad_estados = len(foto.aliases), len(ESTADOS_VALIDOS)
+    estados = foto.estado[foto.asignacion_tarea]
+    conteos = np.bincount(foto.asignacion_usuario * cantidad_estados + estados,
+                          minlength=cantidad_usuarios * cantidad_estados).reshape(cantidad_usuarios, cantidad_estados)
+    atrasadas = np.bincount(foto.asignacion_usuario[foto.atrasadas(ahora)[foto.asignacion_tarea]],
+                            minlength=cantidad_usuarios)
+    pendientes = conteos.sum(axis=1) - conteos[:, FINALIZADA]
+    # Orden estable: entre los que empatan, el orden en que se crearon los usuarios
+    orden = np.argsort(-pendientes, kind='stable')[:limite]
+    return {
+        "usuarios": [
+            {
+                "usuario": foto.aliases[i],
+                "asignadas": int(conteos[i].sum()),
+                "pendientes": int(pendientes[i]),
+                "atrasadas": int(atrasadas[i]),
+                "por_estado": _por_estado(conteos[i])
+            } for i in orden.tolist()
+        ],
+        "total_usuarios": cantidad_usuarios
+    }
+
+
+def desglose(foto):
+    """Tareas por estado y asignaciones por rol y estado"""
+    cantidad_roles, cantidad_estados = len(ROLES_VALIDOS), len(ESTADOS_VALIDOS)
+    estados = foto.estado[foto.asignacion_tarea]
+    por_rol = np.bincount(foto.asignacion_rol * cantidad_estados + estados,
+                          minlength=cantidad_roles * cantidad_estados).reshape(cantidad_roles, cantidad_estados)
+    return {
+        "tareas_por_estado": _por_estado(np.bincount(foto.estado, minlength=cantidad_estados)),
+        "asignaciones_por_rol": {rol: _por_estado(por_rol[i]) for i, rol in enumerate(ROLES_VALIDOS)}
+    }
+
+
+def atrasos(foto, ahora):
+    """Tareas sin finalizar con la fecha esperada de fin vencida, por estado y rol, y cuantos dias de atraso"""
+    atrasadas = foto.atrasadas(ahora)
+    roles = foto.asignacion_rol[atrasadas[foto.asignacion_tarea]]
+    dias = (ahora - foto.fin[atrasadas]) / MICROSEGUNDOS_POR_DIA
+    return {
+        "total": int(np.count_nonzero(atrasadas)),
+        "por_estado": {estado: cantidad for estado, cantidad in
+                       _por_estado(np.bincount(foto.estado[atrasadas], minlength=len(ESTADOS_VALIDOS))).items()
+                       if estado != ESTADOS_VALIDOS[FINALIZADA]},
+        "por_rol": {rol: int(cantidad) for rol, cantidad in
+                    zip(ROLES_VALIDOS, np.bincount(roles, minlength=len(ROLES_VALIDOS)))},
+        "dias_de_atraso": {
+            "promedio": round(float(dias.mean()), 2) if len(dias) else None,
+            "mediana": round(float(np.median(dias)), 2) if len(dias) else None,
+            "maximo": round(float(dias.max()), 2) if len(dias) else None
+        }
+    }
+
+
+def _periodos(microsegundos, periodo):
+    """Numero de periodo de cada fecha: dias (o meses) desde 1970-01-01; una semana es el dia de su lunes"""
+    dias = microsegundos // MICROSEGUNDOS_POR_DIA
+    if periodo == 'M' and len(dias):
+        # Convertir cada fecha a datetime64[M] es lento: se convierte cada dia del rango una vez
+        primero = int(dias.min())
+        meses = np.arange(primero, int(dias.max()) + 1).astype('datetime64[D]').astype('datetime64[M]')
+        return meses.astype(np.int64)[dias - primero]
+    # 1970-01-01 fue jueves
+    return dias - (dias + 3) % 7 if periodo == 'W' else dias
+
+
+def rendimiento(foto, periodo, desde=None, hasta=None):
+    """Por periodo: tareas que vencen, cuantas de ellas estan finalizadas y asignaciones hechas.
+
+    Las tareas no guardan cuando se finalizaron: se agrupan por fecha esperada de fin.
+    `desde` y `hasta` (microsegundos, inclusive) acotan las fechas que se cuentan.
+    """
+    def en_rango(fechas):
+        mascara = np.ones(len(fechas), dtype=np.bool_)
+        if desde is not None:
+            mascara &= fechas >= desde
+        if hasta is not None:
+            mascara &= fechas <= hasta
+        return mascara
+
+    unidad = PERIODOS[periodo]
+    vencen = en_rango(foto.fin)
+    grupos = [
+        _periodos(foto.fin[vencen], unidad),
+        _periodos(foto.fin[vencen & (foto.estado == FINALIZADA)], unidad),
+        _periodos(foto.asignacion_fecha[en_rango(foto.asignacion_fecha)], unidad)
+    ]
+    no_vacios = [grupo for grupo in grupos if len(grupo)]
+    if not no_vacios:
+        return {"periodo": periodo, "periodos": []}
+    # Conteo por periodo con bincount desde el primero; se informan los que tienen algo
+    primero = min(int(grupo.min()) for grupo in no_vacios)
+    cantidad = max(int(grupo.max()) for grupo in no_vacios) - primero + 1
+    conteos = np.stack([np.bincount(grupo - primero, minlength=cantidad) for grupo in grupos])
+    con_datos = np.flatnonzero(conteos.any(axis=0))
+    inicios = (con_datos + primero).astype('datetime64[M]' if unidad == 'M' else 'datetime64[D]')
+    return {
+        "periodo": periodo,
+        "periodos": [
+            {"inicio": inicio, "vencen": vencen, "finalizadas": finalizadas, "asignaciones": asignaciones}
+            for inicio, vencen, finalizadas, asignaciones in zip(inicios.astype(str).tolist(),
+                                                                   *conteos[:, con_datos].tolist())
+        ]
+    }
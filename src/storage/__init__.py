@@ -0,0 +1 @@
+# Archivo en blanco de forma intencional
\ No newline at end of file
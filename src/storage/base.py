@@ -0,0 +1,59 @@
+import contextlib
+
+
+class Almacenamiento:
+    """Interfaz de los backends de persistencia usados por DataHandler.
+
+    El backend reconstruye el estado en memoria del handler al cargar y recibe
+    cada cambio como un registro ({'seq': n, 'op': ..., ...}) para persistirlo.
+    """
+    # Si es True, cada escritura se sincroniza a disco (fsync) antes de confirmarse
+    fsync = False
+    # Si es True, DataHandler espera a que cada cambio quede escrito antes de devolver
+    espera_commit = False
+    # Si es True, los datos son de otro proceso (una replica): no se aceptan cambios
+    solo_lectura = False
+
+    def cargar(self, handler):
+        raise NotImplementedError
+
+    def guardar(self, handler):
+        """Persiste el estado completo del handler"""
+        raise NotImplementedError
+
+    def registrar(self, handler, registro):
+        """Persiste un unico cambio"""
+        raise NotImplementedError
+
+    def registrar_lote(self, handler, registros):
+        """Persiste varios cambios; los backends con transacciones los aplican de una vez"""
+        for registro in registros:
+            self.registrar(handler, registro)
+
+    def bloquear(self):
+        """Exclusion entre procesos que comparten los datos; ninguna si el backend no se comparte"""
+        return contextlib.nullcontext()
+
+    def sincronizar(self, handler):
+        """Aplica al handler los cambios persistidos por otros procesos (con bloquear() tomado)"""
+
+    def hay_cambios(self):
+        """Indica si otros procesos persistieron cambios que este todavia no aplico"""
+        return False
+
+    def refrescar(self, handler):
+        """Como sincronizar, pero para lecturas: toma el lock compartido solo si hay cambios"""
+
+    def alcanzar(self, handler, seq, timeout=None):
+        """Espera hasta `timeout` segundos a que el handler aplique el cambio `seq` de otro proceso.
+
+        Devuelve si lo aplico; los backends que no siguen a otro proceso ya tienen todos sus cambios.
+        """
+        return handler.seq >= seq
+
+    def esperar(self, seq, timeout=None):
+        """Bloquea hasta que el cambio `seq` este persistido. Los backends sincronicos ya lo estan."""
+        return True
+
+    def cerrar(self):
+        pass
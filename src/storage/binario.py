@@ -0,0 +1,182 @@
+"""Snapshot binario: el mismo contenido que data.json, en tablas de registros de ancho fijo.
+
+Estructura del archivo (enteros little-endian):
+
+- cabecera: MAGICO, seq, cantidades y posicion de cada seccion
+- indice de cadenas: n + 1 posiciones (uint64) dentro de los datos de cadenas
+- datos de cadenas: todos los textos en UTF-8, uno detras de otro y sin repetir
+- usuarios: (alias, nombre)
+- tareas: (id, nombre, descripcion, estado, fecha, primera asignacion, cantidad,
+  primera dependencia, cantidad)
+- asignaciones: (alias, rol, fecha)
+- dependencias: (id)
+
+Los textos se guardan como numero de cadena y las fechas como microsegundos desde
+EPOCA (FECHA_NULA si no hay). Con registros de ancho fijo, la tarea i esta en una
+posicion calculable: al cargar se mapea el archivo (mmap) y se leen solo id, nombre,
+estado, dependencias y alias asignados; descripcion, fechas y asignaciones se leen
+del mapa cuando la tarea se hidrata.
+"""
+import datetime
+import mmap
+import struct
+from itertools import accumulate
+from models.campos import EPOCA, MICROSEGUNDO
+from storage.carga_diferida import TareaDiferida
+
+MAGICO = b'TAREASB1'
+CABECERA = struct.Struct('<8sQIIIIIQQQQQQ')
+USUARIO = struct.Struct('<II')
+TAREA = struct.Struct('<IIIIqIIII')
+ASIGNACION = struct.Struct('<IIq')
+DEPENDENCIA = struct.Struct('<I')
+FECHA_NULA = -2 ** 63
+
+
+def escribir(data, archivo):
+    """Escribe en `archivo` (abierto en binario) el estado serializado por DataHandler._serializar()"""
+    cadenas = {}
+
+    def cadena(texto):
+        numero = cadenas.get(texto)
+        if numero is None:
+            numero = cadenas[texto] = len(cadenas)
+        return numero
+
+    def fecha(texto):
+        return (datetime.datetime.fromisoformat(texto) - EPOCA) // MICROSEGUNDO if texto else FECHA_NULA
+
+    usuarios = bytearray()
+    for usuario in data['usuarios']:
+        usuarios += USUARIO.pack(cadena(usuario['alias']), cadena(usuario['nombre']))
+    tareas = bytearray()
+    asignaciones = bytearray()
+    dependencias = bytearray()
+    cantidad_asignaciones = cantidad_dependencias = 0
+    for tarea in data['tareas']:
+        asignadas = tarea.get('usuarios_asignados', [])
+        ids = tarea.get('dependencias', [])
+        tareas += TAREA.pack(cadena(tarea['id']), cadena(tarea['nombre']), cadena(tarea['descripcion']),
+                             cadena(tarea['estado']), fecha(tarea.get('fecha_esperada_fin')),
+                             cantidad_asignaciones, len(asignadas), cantidad_dependencias, len(ids))
+        for asignacion in asignadas:
+            asignaciones += ASIGNACION.pack(cadena(asignacion['usuario']), cadena(asignacion['rol']),
+                                            fecha(asignacion['fecha_asignacion']))
+        for dependencia in ids:
+            dependencias += DEPENDENCIA.pack(cadena(dependencia))
+        cantidad_asignaciones += len(asignadas)
+        cantidad_dependencias += len(ids)
+
+    textos = [texto.encode('utf-8') for texto in cadenas]
+    indice = struct.pack(f'<{len(textos) + 1}Q', *accumulate((len(texto) for texto in textos), initial=0))
+    secciones = [indice, b''.join(textos), usuarios, tareas, asignaciones, dependencias]
+    posiciones = list(accumulate((len(seccion) for seccion in secciones[:-1]), initial=CABECERA.size))
+    archivo.write(CABECERA.pack(MAGICO, data['seq'], len(textos), len(data['usuarios']), len(data['tareas']),
+                                cantidad_asignaciones, cantidad_dependencias, *posiciones))
+    for seccion in secciones:
+        archivo.write(seccion)
+
+
+class SnapshotBinario:
+    """Lectura de un snapshot binario a traves de un mmap del archivo.
+
+    El mapa queda abierto mientras alguna TareaMapeada sin hidratar lo referencie;
+    reemplazar el archivo con os.replace no lo afecta (el mapa sigue apuntando al anterior).
+    """
+
+    def __init__(self, ruta):
+        with open(ruta, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapa.size() < CABECERA.size or self._mapa[:len(MAGICO)] != MAGICO:
+            self._mapa.close()
+            raise ValueError(f"{ruta} no es un snapshot binario")
+        (_, self.seq, cantidad_cadenas, self.cantidad_usuarios, self.cantidad_tareas, self.cantidad_asignaciones,
+         self.cantidad_dependencias,
+         inicio_indice, self._inicio_cadenas, self._inicio_usuarios, self._inicio_tareas,
+         self._inicio_asignaciones, self._inicio_dependencias) = CABECERA.unpack_from(self._mapa)
+        self._posiciones = struct.unpack_from(f'<{cantidad_cadenas + 1}Q', self._mapa, inicio_indice)
+        # Alias, roles y estados se repiten: se decodifican una vez y se comparte el str
+        self._compartidas = {}
+
+    def cadena(self, numero):
+        inicio = self._inicio_cadenas
+        return str(self._mapa[inicio + self._posiciones[numero]:inicio + self._posiciones[numero + 1]], 'utf-8')
+
+    def cadena_compartida(self, numero):
+        texto = self._compartidas.get(numero)
+        if texto is None:
+            texto = self._compartidas[numero] = self.cadena(numero)
+        return texto
+
+    def _tabla(self, registro, inicio, primero, cantidad):
+        inicio += primero * registro.size
+        return registro.iter_unpack(memoryview(self._mapa)[inicio:inicio + cantidad * registro.size])
+
+    def usuarios(self):
+        """(alias, nombre) de cada usuario, en orden"""
+        for alias, nombre in self._tabla(USUARIO, self._inicio_usuarios, 0, self.cantidad_usuarios):
+            yield self.cadena(alias), self.cadena(nombre)
+
+    def tareas(self):
+        """(id, nombre, estado, dependencias, alias asignados) de cada tarea, sin leer el resto"""
+        cadena, compartidas = self.cadena, self._compartidas
+        # Las dependencias y asignaciones de cada tarea son consecutivas: se leen las tablas
+        # enteras de una vez y a cada tarea le toca un tramo
+        ids = [cadena(dependencia) for dependencia,
+               in self._tabla(DEPENDENCIA, self._inicio_dependencias, 0, self.cantidad_dependencias)]
+        alias = [compartidas.get(numero) or self.cadena_compartida(numero) for numero, _, _
+                 in self._tabla(ASIGNACION, self._inicio_asignaciones, 0, self.cantidad_asignaciones)]
+        for task_id, nombre, _, estado, _, primera_asignacion, asignaciones, primera_dependencia, dependencias \
+                in self._tabla(TAREA, self._inicio_tareas, 0, self.cantidad_tareas):
+            yield (cadena(task_id), cadena(nombre), compartidas.get(estado) or self.cadena_compartida(estado),
+                   ids[primera_dependencia:primera_dependencia + dependencias],
+                   alias[primera_asignacion:primera_asignacion + asignaciones])
+
+    def cuerpo(self, indice):
+        """(descripcion, fecha esperada de fin, dependencias, [(alias, rol, fecha)]) de la tarea `indice`"""
+        (_, _, descripcion, _, fecha, primera_asignacion, asignaciones, primera_dependencia,
+         dependencias) = TAREA.unpack_from(self._mapa, self._inicio_tareas + indice * TAREA.size)
+        return (self.cadena(descripcion), _fecha(fecha),
+                [self.cadena(dependencia) for dependencia,
+                 in self._tabla(DEPENDENCIA, self._inicio_dependencias, primera_dependencia, dependencias)],
+                [(self.cadena_compartida(alias), self.cadena_compartida(rol), _fecha(fecha_asignacion))
+                 for alias, rol, fecha_asignacion
+                 in self._tabla(ASIGNACION, self._inicio_asignaciones, primera_asignacion, asignaciones)])
+
+
+def _fecha(microsegundos):
+    return None if microsegundos == FECHA_NULA else EPOCA + microsegundos * MICROSEGUNDO
+
+
+class TareaMapeada(TareaDiferida):
+    """TareaDiferida cuyo cuerpo se lee del snapshot binario; `_origen` es su numero de registro"""
+    __slots__ = ('_snapshot',)
+
+    def __init__(self, task_id, nombre, estado, indice, handler, snapshot):
+        super().__init__(task_id, nombre, estado, indice, handler)
+        self._snapshot = snapshot
+
+    def _leer(self):
+        return self._snapshot.cuerpo(self._origen)
+
+    def _hidratar(self):
+        super()._hidratar()
+        # Ya no se lee del mapa: se suelta para que pueda cerrarse
+        self._snapshot = None
+
+    def _serializar_origen(self):
+        descripcion, fecha_esperada_fin, _, asignaciones = self._leer()
+        formatear = self._handler._format_fecha
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'descripcion': descripcion,
+            'estado': self.estado,
+            'fecha_esperada_fin': formatear(fecha_esperada_fin),
+            'usuarios_asignados': [
+                {'usuario': alias, 'rol': rol, 'fecha_asignacion': formatear(fecha_asignacion)}
+                for alias, rol, fecha_asignacion in asignaciones
+                if self._handler.get_usuario_por_alias(alias)
+            ],
+            'dependencias': list(self.dependencias)
+        }
@@ -0,0 +1,117 @@
+import datetime
+import json
+from models.tarea import Tarea
+from models.asignacion import Asignacion
+from models.coleccion import UsuariosAsignados
+
+
+class TareaDiferida(Tarea):
+    """Tarea cargada solo con id, nombre y estado.
+
+    El resto del cuerpo (descripcion, fechas, asignaciones y dependencias) se
+    guarda como el texto JSON original y se hidrata al primer acceso. `_origen` es
+    lo necesario para leer ese cuerpo; las subclases pueden leerlo de otra fuente
+    redefiniendo _leer() y _serializar_origen().
+
+    La hidratacion no toma el lock del handler, asi una lectura no espera a las
+    escrituras, sino el de hidratacion del handler: el origen no cambia despues de la
+    carga, y ese lock solo evita que dos hidrataciones de la misma tarea se crucen o que
+    se lea el origen mientras se descarta. Un cambio sobre un campo diferido lo lee
+    antes, asi que tambien espera a que la hidratacion termine.
+    """
+    __slots__ = ('_origen', '_handler')
+    CAMPOS_DIFERIDOS = ('descripcion', 'fechaEsperadaFin', 'usuariosAsignados', 'dependencias')
+
+    def __init__(self, task_id, nombre, estado, origen, handler):
+        # No se llama a Tarea.__init__: los campos diferidos se completan en _hidratar
+        self.id = task_id
+        self.nombre = nombre
+        self.estado = estado
+        self.version = 0
+        self._origen = origen
+        self._handler = handler
+
+    @property
+    def hidratada(self):
+        return self._origen is None
+
+    def __getattr__(self, nombre):
+        # Solo se invoca para atributos cuyo slot todavia no tiene valor
+        if nombre in TareaDiferida.CAMPOS_DIFERIDOS and self._origen is not None:
+            with self._handler._lock_hidratacion:
+                if self._origen is not None:
+                    self._hidratar()
+            return getattr(self, nombre)
+        raise AttributeError(nombre)
+
+    def leer_sin_hidratar(self):
+        """Lo mismo que _leer(), o None si la tarea ya esta hidratada (y se leen sus campos)"""
+        with self._handler._lock_hidratacion:
+            return None if self._origen is None else self._leer()
+
+    def _asignado(self, slot):
+        """Indica si el campo ya tiene valor (por ejemplo, asignado antes de hidratar)"""
+        try:
+            object.__getattribute__(self, slot)
+            return True
+        except AttributeError:
+            return False
+
+    def _leer(self):
+        """(descripcion, fecha esperada de fin, dependencias, [(alias, rol, fecha de asignacion)])"""
+        datos = json.loads(self._origen)
+        parse_fecha = self._handler._parse_fecha
+        asignaciones = [
+            (asignacion_data['usuario'], asignacion_data['rol'], parse_fecha(asignacion_data['fecha_asignacion']))
+            for asignacion_data in datos.get('usuarios_asignados', [])
+        ]
+        return (datos['descripcion'], parse_fecha(datos.get('fecha_esperada_fin')), datos.get('dependencias', []),
+                asignaciones)
+
+    def _hidratar(self):
+        descripcion, fecha_esperada_fin, dependencias, asignaciones_data = self._leer()
+        if not self._asignado('descripcion'):
+            self.descripcion = descripcion
+        if not self._asignado('_fecha_esperada_fin'):
+            # Mismo valor por defecto que Tarea.__init__ cuando no hay fecha guardada
+            self.fechaEsperadaFin = fecha_esperada_fin or datetime.datetime.now() + datetime.timedelta(days=7)
+        if not self._asignado('dependencias'):
+            self.dependencias = dependencias
+        if not self._asignado('usuariosAsignados'):
+            asignaciones = UsuariosAsignados()
+            for alias, rol, fecha_asignacion in asignaciones_data:
+                usuario = self._handler.get_usuario_por_alias(alias)
+                if usuario:
+                    asignacion = Asignacion(usuario, rol)
+                    asignacion.fechaAsignacion = fecha_asignacion
+                    asignaciones.agregar(asignacion)
+            self.usuariosAsignados = asignaciones
+        self._origen = None
+
+    def datos_sin_hidratar(self):
+        """Forma serializada de la tarea sin crear sus objetos (para volcarla de nuevo a disco).
+
+        None si ya esta hidratada: entonces se serializa como cualquier tarea.
+        """
+        with self._handler._lock_hidratacion:
+            return None if self._origen is None else self._serializar_origen()
+
+    def _serializar_origen(self):
+        datos = json.loads(self._origen)
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'descripcion': datos['descripcion'],
+            'estado': self.estado,
+            'fecha_esperada_fin': datos.get('fecha_esperada_fin'),
+            'usuarios_asignados': [
+                {
+                    'usuario': asignacion_data['usuario'],
+                    'rol': asignacion_data['rol'],
+                    'fecha_asignacion': asignacion_data['fecha_asignacion']
+                } for asignacion_data in datos.get('usuarios_asignados', [])
+                if self._handler.get_usuario_por_alias(asignacion_data['usuario'])
+            ],
+            # Las dependencias se cargan de entrada y pueden haber cambiado sin hidratar la tarea
+            'dependencias': list(self.dependencias)
+        }
@@ -0,0 +1,145 @@
+import logging
+import threading
+from storage.base import Almacenamiento
+
+DURABILIDADES = ["none", "batch", "fsync-per-commit"]
+
+logger = logging.getLogger(__name__)
+
+
+class EscrituraDiferida(Almacenamiento):
+    """Envuelve otro almacenamiento y persiste sus cambios desde un hilo en segundo plano.
+
+    Los cambios de muchas peticiones se agrupan y se escriben juntos cada `intervalo`
+    segundos o al juntar `tamano_lote` registros. Durabilidad:
+      - none: sin fsync; las peticiones no esperan la escritura.
+      - batch: un fsync por grupo escrito; las peticiones no esperan la escritura.
+      - fsync-per-commit: cada cambio espera a que su grupo este escrito y sincronizado.
+
+    guardar() y cargar() se llaman con el lock del handler, que el hilo puede necesitar
+    para escribir (el snapshot se serializa con el lock): esperan la escritura en curso
+    soltando el lock y escriben lo que quede pendiente en el hilo que llama.
+    """
+
+    def __init__(self, interno, intervalo=0.05, tamano_lote=1000, durabilidad='batch'):
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"Durabilidad inválida. Debe ser una de: {', '.join(DURABILIDADES)}")
+        self.interno = interno
+        self.interno.fsync = durabilidad != 'none'
+        self.intervalo = intervalo
+        self.tamano_lote = tamano_lote
+        self.durabilidad = durabilidad
+        self._handler = None
+        self._pendientes = []
+        self._seq_confirmado = 0
+        self._condicion = threading.Condition()
+        # Sobre el lock del handler: el hilo marca con el lock tomado que esta escribiendo
+        self._libre = None
+        self._escribiendo = False
+        self._detenido = False
+        self._hilo = None
+
+    @property
+    def espera_commit(self):
+        return self.durabilidad == 'fsync-per-commit'
+
+    @property
+    def seq_confirmado(self):
+        return self._seq_confirmado
+
+    def cargar(self, handler):
+        if self._handler is not None:
+            self._drenar()
+        self.interno.cargar(handler)
+        self._handler = handler
+        self._libre = threading.Condition(handler._lock)
+        self._seq_confirmado = handler.seq
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._ciclo, name='escritura-diferida', daemon=True)
+            self._hilo.start()
+
+    def guardar(self, handler):
+        if self._handler is not None:
+            self._drenar()
+        self.interno.guardar(handler)
+        # El estado completo ya esta escrito: cubre todos los cambios hechos hasta aca
+        with self._condicion:
+            self._seq_confirmado = max(self._seq_confirmado, handler.seq)
+            self._condicion.notify_all()
+
+    def registrar(self, handler, registro):
+        self.registrar_lote(handler, [registro])
+
+    def registrar_lote(self, handler, registros):
+        with self._condicion:
+            self._pendientes.extend(registros)
+            if len(self._pendientes) >= self.tamano_lote:
+                self._condicion.notify_all()
+
+    def esperar(self, seq, timeout=None):
+        """Bloquea hasta que el cambio `seq` este escrito; devuelve False si vence el timeout"""
+        with self._condicion:
+            # Despierta al hilo para no esperar el intervalo completo
+            self._condicion.notify_all()
+            return self._condicion.wait_for(lambda: self._seq_confirmado >= seq, timeout)
+
+    def _drenar(self):
+        """Escribe lo pendiente en el hilo que llama, que tiene el lock del handler"""
+        with self._libre:
+            # wait() suelta el lock del handler: la escritura en curso puede necesitarlo
+            self._libre.wait_for(lambda: not self._escribiendo)
+            with self._condicion:
+                registros, self._pendientes = self._pendientes, []
+            if registros:
+                self._escribir(registros)
+
+    def vaciar(self, timeout=None):
+        """Espera a que se escriban todos los cambios pendientes (sin tener el lock del handler)"""
+        with self._condicion:
+            if not self._pendientes:
+                return True
+            seq = self._pendientes[-1]['seq']
+        return self.esperar(seq, timeout)
+
+    def cerrar(self):
+        with self._condicion:
+            self._detenido = True
+            self._condicion.notify_all()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        self.interno.cerrar()
+
+    def _ciclo(self):
+        while True:
+            with self._condicion:
+                if not self._detenido and len(self._pendientes) < self.tamano_lote:
+                    self._condicion.wait(self.intervalo)
+            # El lote se toma con el lock del handler: asi _drenar sabe si hay una escritura en curso
+            with self._libre, self._condicion:
+                registros, self._pendientes = self._pendientes, []
+                detenido = self._detenido
+                self._escribiendo = bool(registros)
+            if registros:
+                escrito = self._escribir(registros)
+                with self._libre:
+                    self._escribiendo = False
+                    self._libre.notify_all()
+                if not escrito and detenido:
+                    logger.error("Se descartan %d cambios sin persistir al cerrar", len(registros))
+                    return
+            elif detenido:
+                return
+
+    def _escribir(self, registros):
+        try:
+            self.interno.registrar_lote(self._handler, registros)
+        except Exception:
+            logger.exception("Error al persistir %d cambios; se reintentará", len(registros))
+            with self._condicion:
+                self._pendientes[:0] = registros
+            return False
+        with self._condicion:
+            self._seq_confirmado = max(self._seq_confirmado, registros[-1]['seq'])
+            self._condicion.notify_all()
+        return True
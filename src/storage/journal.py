@@ -0,0 +1,123 @@
+import json
+import os
+import metricas
+
+# Primer registro del log nuevo tras una compactacion: su seq es el ultimo cubierto por el
+# snapshot, y no representa ningun cambio. Con el, quien sigue el log (otro worker del modo
+# multiproceso o una replica) sabe si no se perdio ningun registro al pasar al log nuevo
+MARCA_COMPACTACION = 'compactacion'
+
+
+class Journal:
+    """Log de solo-agregado con un registro JSON compacto por linea"""
+
+    def __init__(self, ruta, fsync=False, solo_lectura=False):
+        self.ruta = ruta
+        self.fsync = fsync
+        if solo_lectura:
+            # Log de otro proceso (una replica siguiendo al primario): ni se recorta ni se escribe
+            self._archivo = open(self.ruta, 'rb')
+        else:
+            self._recortar_linea_incompleta()
+            self._archivo = open(self.ruta, 'a+b')
+        self.tamano = self._archivo.tell()
+
+    def _recortar_linea_incompleta(self):
+        # Tras una caida puede quedar una ultima linea a medias; se descarta para
+        # que los nuevos registros no queden pegados a ella
+        try:
+            with open(self.ruta, 'r+b') as f:
+                fin = f.seek(0, os.SEEK_END)
+                posicion = fin
+                while posicion > 0:
+                    inicio = max(0, posicion - 4096)
+                    f.seek(inicio)
+                    bloque = f.read(posicion - inicio)
+                    salto = bloque.rfind(b'\n')
+                    if salto != -1:
+                        posicion = inicio + salto + 1
+                        break
+                    posicion = inicio
+                if posicion != fin:
+                    f.truncate(posicion)
+        except FileNotFoundError:
+            pass
+
+    @property
+    def ruta_rotada(self):
+        return self.ruta + '.1'
+
+    def agregar(self, registro):
+        self.agregar_lote([registro])
+
+    def agregar_lote(self, registros):
+        datos = b''.join(self.codificar(registro) for registro in registros)
+        with metricas.Cronometro('escribir_journal'):
+            self._archivo.write(datos)
+            self._archivo.flush()
+            if self.fsync:
+                os.fsync(self._archivo.fileno())
+        self.tamano += len(datos)
+        metricas.BYTES_ESCRITOS.incrementar(len(datos), 'journal')
+
+    def rotar(self):
+        """Mueve el log actual a ruta_rotada y empieza uno vacio"""
+        self._archivo.close()
+        os.replace(self.ruta, self.ruta_rotada)
+        self._archivo = open(self.ruta, 'a+b')
+        self.tamano = 0
+        return self.ruta_rotada
+
+    # --- Lectura de lo que agregan otros procesos al mismo log ---
+
+    def tamano_en_disco(self):
+        return os.fstat(self._archivo.fileno()).st_size
+
+    def rotado(self):
+        """Indica si otro proceso roto el log: la ruta ya no es el archivo abierto"""
+        try:
+            return os.stat(self.ruta).st_ino != os.fstat(self._archivo.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def reabrir(self):
+        """Pasa a escribir en el archivo que esta ahora en la ruta"""
+        self._archivo.close()
+        self._archivo = open(self.ruta, 'a+b')
+        self.tamano = self._archivo.tell()
+
+    def leer_desde(self, posicion):
+        """Registros completos a partir de `posicion` y la posicion siguiente al ultimo"""
+        fin = self.tamano_en_disco()
+        datos = os.pread(self._archivo.fileno(), fin - posicion, posicion) if fin > posicion else b''
+        completo = datos.rfind(b'\n') + 1
+        registros = [json.loads(linea) for linea in datos[:completo].splitlines()]
+        return registros, posicion + completo
+
+    def truncar(self, posicion):
+        """Descarta lo escrito despues de `posicion` (una linea a medias de un proceso caido)"""
+        os.ftruncate(self._archivo.fileno(), posicion)
+        self.tamano = posicion
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self._archivo.close()
+
+    @staticmethod
+    def codificar(registro):
+        return (json.dumps(registro, separators=(',', ':'), ensure_ascii=False) + '\n').encode('utf-8')
+
+    @staticmethod
+    def leer(ruta):
+        """Itera los registros de un log. Una ultima linea incompleta (caida a medio escribir) se ignora."""
+        try:
+            with open(ruta, 'rb') as f:
+                for linea in f:
+                    if not linea.endswith(b'\n'):
+                        break
+                    try:
+                        yield json.loads(linea)
+                    except json.JSONDecodeError:
+                        break
+        except FileNotFoundError:
+            return
@@ -0,0 +1,100 @@
+import contextlib
+import fcntl
+import os
+from storage.journal import MARCA_COMPACTACION
+from storage.json_storage import AlmacenamientoJSON
+
+
+class AlmacenamientoJSONCompartido(AlmacenamientoJSON):
+    """data.json en modo journal compartido por varios procesos (p. ej. workers de gunicorn).
+
+    Las escrituras se serializan con un flock exclusivo sobre data.json.lock: antes de
+    validar y aplicar un cambio, el proceso reaplica los registros que otros agregaron
+    al journal desde su ultima lectura, asi que su numero de secuencia es el siguiente
+    del log. Las lecturas solo toman el lock (compartido) cuando el log crecio.
+
+    Los numeros de secuencia son consecutivos y cada log nuevo empieza con una marca con
+    el ultimo seq del anterior: si al ponerse al dia falta alguno (el log se compacto mas
+    de una vez mientras el proceso no lo leia) se recarga todo el estado.
+    """
+
+    def __init__(self, filename='data.json', umbral_compactacion=16 * 1024 * 1024, carga_diferida=False):
+        super().__init__(filename, 'journal', umbral_compactacion, carga_diferida)
+        self.ruta_lock = filename + '.lock'
+        self._archivo_lock = open(self.ruta_lock, 'a+b')
+        self._posicion = 0  # Hasta donde se leyo el journal
+        # flock es por descriptor abierto: un hijo creado con fork (gunicorn --preload)
+        # compartiria el lock del padre si no abre el suyo
+        os.register_at_fork(after_in_child=self._reabrir_lock)
+
+    def _reabrir_lock(self):
+        self._archivo_lock = open(self.ruta_lock, 'a+b')
+
+    @contextlib.contextmanager
+    def bloquear(self, exclusivo=True):
+        descriptor = self._archivo_lock.fileno()
+        fcntl.flock(descriptor, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+
+    def cargar(self, handler):
+        super().cargar(handler)
+        self._posicion = self.journal.tamano
+
+    def hay_cambios(self):
+        return self.journal is not None and (
+            self.journal.tamano_en_disco() > self._posicion or self.journal.rotado())
+
+    def refrescar(self, handler):
+        if not self.hay_cambios():
+            return
+        with self.bloquear(exclusivo=False):
+            self._ponerse_al_dia(handler)
+
+    def sincronizar(self, handler):
+        if self.journal is None:
+            return
+        self._ponerse_al_dia(handler)
+        # Con el lock exclusivo nadie esta escribiendo: lo que sigue a la ultima linea
+        # completa es un registro a medias de un proceso que cayo
+        if self.journal.tamano_en_disco() > self._posicion:
+            self.journal.truncar(self._posicion)
+        self.journal.tamano = self._posicion
+
+    def _ponerse_al_dia(self, handler):
+        registros, self._posicion = self.journal.leer_desde(self._posicion)
+        recargar = False
+        if self.journal.rotado():
+            # Otro proceso compacto: lo que faltaba del log anterior ya se leyo del
+            # descriptor abierto; se sigue desde el inicio del log nuevo
+            ultimo = max([handler.seq] + [registro['seq'] for registro in registros])
+            self.journal.reabrir()
+            nuevos, self._posicion = self.journal.leer_desde(0)
+            recargar = not nuevos or nuevos[0]['op'] != MARCA_COMPACTACION or nuevos[0]['seq'] != ultimo
+            registros.extend(nuevos)
+        registros = [registro for registro in registros
+                     if registro['seq'] > handler.seq and registro['op'] != MARCA_COMPACTACION]
+        if recargar or (registros and registros[0]['seq'] != handler.seq + 1):
+            self.cargar(handler)
+            handler.grafo.recalcular_orden()
+        else:
+            handler._aplicar_cambios(registros)
+
+    def registrar_lote(self, handler, registros):
+        super().registrar_lote(handler, registros)
+        self._posicion = self.journal.tamano
+
+    def compactar(self, handler, esperar=True):
+        # Siempre sincronica y con el lock tomado: otro proceso podria volver a rotar el
+        # log antes de que termine de escribirse el snapshot que lo cubre
+        data = handler._serializar()
+        ruta_rotada = self.journal.rotar()
+        self.journal.agregar({'seq': handler.seq, 'op': MARCA_COMPACTACION})
+        self._finalizar_compactacion(data, ruta_rotada)
+        self._posicion = self.journal.tamano
+
+    def cerrar(self):
+        super().cerrar()
+        self._archivo_lock.close()
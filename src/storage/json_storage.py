@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+import metricas
+from foto import FotoEstado
+from storage import binario
+from storage.base import Almacenamiento
+from storage.carga_diferida import TareaDiferida
+from storage.journal import Journal, MARCA_COMPACTACION
+from storage.lector_json import LectorJSONIncremental
+
+MODOS_PERSISTENCIA = ["snapshot", "journal"]
+# 'binario' guarda el snapshot con el formato de storage/binario.py junto a data.json (data.bin)
+FORMATOS_SNAPSHOT = ["json", "binario"]
+
+
+class AlmacenamientoJSON(Almacenamiento):
+    """Persistencia en un archivo JSON, reescrito completo o complementado por un journal"""
+
+    def __init__(self, filename='data.json', modo_persistencia='snapshot', umbral_compactacion=16 * 1024 * 1024,
+                 carga_diferida=False, formato_snapshot='json'):
+        if modo_persistencia not in MODOS_PERSISTENCIA:
+            raise ValueError(f"Modo de persistencia inválido. Debe ser uno de: {', '.join(MODOS_PERSISTENCIA)}")
+        if formato_snapshot not in FORMATOS_SNAPSHOT:
+            raise ValueError(f"Formato de snapshot inválido. Debe ser uno de: {', '.join(FORMATOS_SNAPSHOT)}")
+        self.filename = filename
+        self.formato_snapshot = formato_snapshot
+        self.ruta_binaria = os.path.splitext(filename)[0] + '.bin'
+        self.modo_persistencia = modo_persistencia
+        self.umbral_compactacion = umbral_compactacion
+        self.carga_diferida = carga_diferida
+        self.journal = None
+        self._hilo_compactacion = None
+        self._foto = None
+
+    def cargar(self, handler):
+        handler._vaciar()
+        handler.seq = 0
+        # Sin data.bin se lee data.json: asi se migra, y la proxima escritura ya es binaria
+        if self.formato_snapshot == 'binario' and os.path.exists(self.ruta_binaria):
+            self._cargar_binario(handler)
+        else:
+            try:
+                with open(self.filename, 'r') as f:
+                    self._cargar_snapshot(handler, f)
+            except FileNotFoundError:
+                pass
+            except json.JSONDecodeError:
+                handler._vaciar()
+                handler.seq = 0
+
+        if self.modo_persistencia == 'journal':
+            self._reproducir_journal(handler)
+            self._abrir_journal(handler)
+
+    def _cargar_snapshot(self, handler, archivo):
+        """Carga el snapshot en streaming, sin leer el archivo completo de una vez"""
+        # Los snapshots antiguos tienen 'tareas' antes que 'usuarios': las tareas (o sus
+        # enlaces a usuarios, en carga diferida) se resuelven cuando ya estan todos los usuarios
+        pendientes = []
+        usuarios_cargados = False
+        ultima_clave = None
+        for clave, valor, texto in LectorJSONIncremental(archivo).secciones():
+            if ultima_clave == 'usuarios' and clave != 'usuarios':
+                usuarios_cargados = True
+            ultima_clave = clave
+            if clave == 'usuarios':
+                handler._cargar_usuario(valor)
+            elif clave == 'tareas':
+                if self.carga_diferida:
+                    self._cargar_tarea_diferida(handler, valor, texto, pendientes)
+                elif usuarios_cargados:
+                    handler._cargar_tarea(valor)
+                else:
+                    pendientes.append(valor)
+            elif clave == 'seq':
+                handler.seq = valor
+
+        for pendiente in pendientes:
+            if self.carga_diferida:
+                alias, tarea = pendiente
+                usuario = handler.get_usuario_por_alias(alias)
+                if usuario:
+                    usuario.tareasAsociadas.agregar(tarea)
+            else:
+                handler._cargar_tarea(pendiente)
+
+    def _cargar_binario(self, handler):
+        snapshot = binario.SnapshotBinario(self.ruta_binaria)
+        handler.seq = snapshot.seq
+        for alias, nombre in snapshot.usuarios():
+            handler._cargar_usuario({'alias': alias, 'nombre': nombre})
+        # Como en la carga diferida de JSON: el cuerpo de cada tarea queda en el mapa. Sin
+        # carga diferida se hidrata enseguida, pero igual sin decodificar JSON ni fechas de texto
+        for indice, (task_id, nombre, estado, dependencias, asignados) in enumerate(snapshot.tareas()):
+            tarea = binario.TareaMapeada(task_id, nombre, estado, indice, handler, snapshot)
+            tarea.dependencias = dependencias
+            for alias in asignados:
+                usuario = handler.get_usuario_por_alias(alias)
+                if usuario:
+                    usuario.tareasAsociadas.agregar(tarea)
+            if not self.carga_diferida:
+                tarea._hidratar()
+            handler._agregar_tarea(tarea)
+
+    @staticmethod
+    def _cargar_tarea_diferida(handler, task_data, texto, pendientes):
+        tarea = TareaDiferida(task_data['id'], task_data['nombre'], task_data['estado'], texto, handler)
+        # Las dependencias se toman de inmediato para armar el grafo sin hidratar la tarea
+        tarea.dependencias = task_data.get('dependencias', [])
+        for asignacion_data in task_data.get('usuarios_asignados', []):
+            usuario = handler.get_usuario_por_alias(asignacion_data['usuario'])
+            if usuario:
+                usuario.tareasAsociadas.agregar(tarea)
+            else:
+                pendientes.append((asignacion_data['usuario'], tarea))
+        handler._agregar_tarea(tarea)
+
+    def guardar(self, handler):
+        if self.journal:
+            self.compactar(handler, esperar=True)
+        else:
+            self._escribir_snapshot(handler._serializar(), fsync=self.fsync)
+
+    def registrar(self, handler, registro):
+        self.registrar_lote(handler, [registro])
+
+    def registrar_lote(self, handler, registros):
+        if not self.journal:
+            self.guardar(handler)
+            return
+        self.journal.agregar_lote(registros)
+        if self.journal.tamano >= self.umbral_compactacion and not self._compactando():
+            self.compactar(handler)
+
+    def cerrar(self):
+        if self._compactando():
+            self._hilo_compactacion.join()
+        if self._foto is not None:
+            self._foto.retirar()
+            self._foto = None
+        if self.journal:
+            self.journal.cerrar()
+            self.journal = None
+
+    def _escribir_snapshot(self, data, fsync=True):
+        # Se escribe en un temporal y se renombra para no dejar nunca un snapshot a medias
+        ruta = self.ruta_binaria if self.formato_snapshot == 'binario' else self.filename
+        temporal = ruta + '.tmp'
+        with metricas.Cronometro('escribir_snapshot'):
+            with open(temporal, 'wb' if self.formato_snapshot == 'binario' else 'w') as f:
+                if self.formato_snapshot == 'binario':
+                    binario.escribir(data, f)
+                else:
+                    json.dump(data, f)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+                metricas.BYTES_ESCRITOS.incrementar(f.tell(), 'snapshot')
+            os.replace(temporal, ruta)
+
+    # --- Journal de cambios ---
+
+    def _reproducir_journal(self, handler):
+        ruta = self.filename + '.log'
+        for ruta_log in (ruta + '.1', ruta):
+            for registro in Journal.leer(ruta_log):
+                if registro['seq'] > handler.seq and registro['op'] != MARCA_COMPACTACION:
+                    handler._aplicar_cambio(registro)
+                    handler.seq = registro['seq']
+
+    def _abrir_journal(self, handler):
+        if self.journal:
+            self.journal.cerrar()
+        self.journal = Journal(self.filename + '.log', fsync=self.fsync)
+        # Si quedo un log rotado de una compactacion interrumpida, ya fue reproducido:
+        # se consolida en un snapshot antes de aceptar nuevos cambios
+        if os.path.exists(self.journal.ruta_rotada):
+            self._escribir_snapshot(handler._serializar())
+            os.remove(self.journal.ruta_rotada)
+
+    def _compactando(self):
+        return self._hilo_compactacion is not None and self._hilo_compactacion.is_alive()
+
+    def compactar(self, handler, esperar=False):
+        """Vuelca el estado a un snapshot y descarta el journal que este cubre.
+
+        La foto del estado (FotoEstado, sin copiar nada) y la rotacion del log se hacen
+        en el hilo que llama; la serializacion y la escritura del snapshot corren en
+        segundo plano salvo que esperar=True.
+        """
+        if self._compactando():
+            self._hilo_compactacion.join()
+        # La foto anterior ya no preserva tareas (la serializacion no puede tomar el lock del handler para retirarla)
+        if self._foto is not None:
+            self._foto.retirar()
+        with handler._lock:
+            foto = self._foto = FotoEstado(handler)
+        ruta_rotada = self.journal.rotar()
+        self.journal.agregar({'seq': foto.seq, 'op': MARCA_COMPACTACION})
+        self._hilo_compactacion = threading.Thread(
+            target=self._compactar_foto, args=(foto, ruta_rotada), daemon=True
+        )
+        self._hilo_compactacion.start()
+        if esperar:
+            self._hilo_compactacion.join()
+
+    def _compactar_foto(self, foto, ruta_rotada):
+        self._finalizar_compactacion(foto.serializar(), ruta_rotada)
+
+    def _finalizar_compactacion(self, data, ruta_rotada):
+        self._escribir_snapshot(data)
+        os.remove(ruta_rotada)
@@ -0,0 +1,87 @@
+import json
+
+ESPACIOS = ' \t\r\n'
+
+
+class LectorJSONIncremental:
+    """Recorre un objeto JSON de primer nivel sin cargar el archivo completo en memoria.
+
+    Los valores que son listas se entregan elemento por elemento, de modo que la
+    memoria usada queda acotada por el tamano del bloque y del elemento mas grande.
+    """
+
+    def __init__(self, archivo, tamano_bloque=1 << 16):
+        self.archivo = archivo
+        self.tamano_bloque = tamano_bloque
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def secciones(self):
+        """Itera tuplas (clave, valor, texto); para claves con listas, una tupla por elemento"""
+        self._esperar('{')
+        if self._siguiente() == '}':
+            return
+        while True:
+            clave, _ = self._valor()
+            self._esperar(':')
+            if self._siguiente() == '[':
+                self.pos += 1
+                if self._siguiente() == ']':
+                    self.pos += 1
+                else:
+                    while True:
+                        valor, texto = self._valor()
+                        yield clave, valor, texto
+                        if self._consumir(',]') == ']':
+                            break
+            else:
+                valor, texto = self._valor()
+                yield clave, valor, texto
+            if self._consumir(',}') == '}':
+                return
+
+    def _rellenar(self):
+        bloque = self.archivo.read(self.tamano_bloque)
+        if not bloque:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def _siguiente(self):
+        """Devuelve el siguiente caracter significativo sin consumirlo ('' al final del archivo)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ESPACIOS:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._rellenar():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def _consumir(self, esperados):
+        caracter = self._siguiente()
+        if not caracter or caracter not in esperados:
+            raise json.JSONDecodeError(f"Se esperaba uno de {esperados!r}", self.buffer, self.pos)
+        self.pos += 1
+        return caracter
+
+    def _esperar(self, caracter):
+        self._consumir(caracter)
+
+    def _valor(self):
+        self._siguiente()
+        while True:
+            try:
+                valor, fin = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # El valor puede estar cortado por el final del bloque
+                if self._rellenar():
+                    continue
+                raise
+            # Un numero al final del bloque podria continuar en el siguiente
+            if fin == len(self.buffer) and not self.eof and self._rellenar():
+                continue
+            texto = self.buffer[self.pos:fin]
+            self.pos = fin
+            return valor, texto
@@ -0,0 +1,245 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import metricas
+from storage.base import Almacenamiento
+from storage.json_storage import AlmacenamientoJSON
+from storage.lector_json import LectorJSONIncremental
+
+ARCHIVO_META = 'meta.json'
+# Particiones que una escritura de varias esta reemplazando; si queda al caer el proceso, la carga la termina
+ARCHIVO_INTENCION = 'intencion.json'
+
+
+class AlmacenamientoParticionado(Almacenamiento):
+    """Persistencia en N archivos JSON (particiones) dentro de un directorio.
+
+    Cada usuario va a la particion del hash de su alias y cada tarea, con sus
+    asignaciones y dependencias, a la del hash de su id; las referencias entre
+    particiones son alias e ids, que se resuelven al cargar una vez leidos todos los
+    usuarios. Todo cambio toca una sola particion: se marca como sucia y solo las
+    sucias se reescriben. Al iniciar, las particiones se leen en paralelo.
+
+    Un lote o save_data puede ensuciar varias particiones, y se aplican todas o
+    ninguna: cada una se escribe primero en un temporal y, ya escritas todas, se
+    registran en ARCHIVO_INTENCION antes de reemplazar los archivos. Ese registro es el
+    commit: si el proceso cae despues, la carga termina los reemplazos; si cae antes,
+    descarta los temporales.
+
+    Cada usuario y tarea guarda su posicion ("orden") para que al recargar queden en
+    el mismo orden que con un unico data.json.
+    """
+
+    def __init__(self, directorio='particiones', particiones=16, carga_diferida=False, hilos=8):
+        if particiones < 1:
+            raise ValueError("La cantidad de particiones debe ser al menos 1")
+        self.directorio = directorio
+        self.particiones = particiones
+        self.carga_diferida = carga_diferida
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(hilos, particiones)),
+                                        thread_name_prefix='particiones')
+        self._vaciar_miembros()
+        # Los reemplazos de archivos de cada escritura, de a una (ver _confirmar)
+        self._lock_escritura = threading.Lock()
+        self._temporales = itertools.count()
+
+    def _vaciar_miembros(self):
+        # Por particion: alias o id -> orden, en el orden en que se escriben
+        self._usuarios = [{} for _ in range(self.particiones)]
+        self._tareas = [{} for _ in range(self.particiones)]
+        self._siguiente_usuario = 0
+        self._siguiente_tarea = 0
+        self._sucias = set()
+        self._seq_escrito = [0] * self.particiones
+
+    def particion(self, clave):
+        # crc32 y no hash(): tiene que dar lo mismo en todos los procesos y ejecuciones
+        return zlib.crc32(clave.encode()) % self.particiones
+
+    def _ruta(self, indice):
+        return os.path.join(self.directorio, f'particion-{indice:03d}.json')
+
+    def cargar(self, handler):
+        handler._vaciar()
+        handler.seq = 0
+        self._vaciar_miembros()
+        self._verificar_meta()
+        self._recuperar()
+
+        datos = list(self._pool.map(self._leer_particion, range(self.particiones)))
+        # Primero todos los usuarios: las tareas los referencian desde cualquier particion
+        for valor, _ in heapq.merge(*(particion['usuarios'] for particion in datos), key=_orden):
+            handler._cargar_usuario(valor)
+            self._usuarios[self.particion(valor['alias'])][valor['alias']] = valor['orden']
+        pendientes = []
+        for valor, texto in heapq.merge(*(particion['tareas'] for particion in datos), key=_orden):
+            if self.carga_diferida:
+                AlmacenamientoJSON._cargar_tarea_diferida(handler, valor, texto, pendientes)
+            else:
+                handler._cargar_tarea(valor)
+            self._tareas[self.particion(valor['id'])][valor['id']] = valor['orden']
+
+        self._seq_escrito = [particion['seq'] for particion in datos]
+        handler.seq = max(self._seq_escrito)
+        self._siguiente_usuario = 1 + max((valor['orden'] for particion in datos
+                                           for valor, _ in particion['usuarios'][-1:]), default=-1)
+        self._siguiente_tarea = 1 + max((valor['orden'] for particion in datos
+                                         for valor, _ in particion['tareas'][-1:]), default=-1)
+
+    def _verificar_meta(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = os.path.join(self.directorio, ARCHIVO_META)
+        try:
+            with open(ruta) as f:
+                particiones = json.load(f)['particiones']
+        except FileNotFoundError:
+            with open(ruta, 'w') as f:
+                json.dump({'particiones': self.particiones}, f)
+            return
+        if particiones != self.particiones:
+            raise ValueError(f"El directorio {self.directorio} tiene {particiones} particiones, "
+                             f"no {self.particiones}")
+
+    def _recuperar(self):
+        """Termina la escritura de varias particiones que quedo confirmada y descarta los temporales"""
+        ruta = os.path.join(self.directorio, ARCHIVO_INTENCION)
+        try:
+            with open(ruta) as f:
+                reemplazos = json.load(f)['reemplazos']
+        except FileNotFoundError:
+            reemplazos = []
+        for indice, nombre in reemplazos:
+            temporal = os.path.join(self.directorio, nombre)
+            # Si ya no esta, se habia reemplazado antes de la caida
+            if os.path.exists(temporal):
+                os.replace(temporal, self._ruta(indice))
+        if reemplazos:
+            os.remove(ruta)
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.tmp'):
+                os.remove(os.path.join(self.directorio, nombre))
+
+    def _leer_particion(self, indice):
+        """Lee una particion en un hilo del pool; devuelve sus listas de (valor, texto) en orden"""
+        datos = {'seq': 0, 'usuarios': [], 'tareas': []}
+        try:
+            with open(self._ruta(indice)) as f:
+                for clave, valor, texto in LectorJSONIncremental(f).secciones():
+                    if clave == 'seq':
+                        datos['seq'] = valor
+                    elif clave in ('usuarios', 'tareas'):
+                        datos[clave].append((valor, texto))
+        except FileNotFoundError:
+            pass
+        return datos
+
+    def guardar(self, handler):
+        self._verificar_meta()
+        with handler._lock:
+            # Reparte de nuevo todo el estado, respetando el orden actual del handler
+            self._usuarios = [{} for _ in range(self.particiones)]
+            self._tareas = [{} for _ in range(self.particiones)]
+            for orden, usuario in enumerate(handler.usuarios):
+                self._usuarios[self.particion(usuario.alias)][usuario.alias] = orden
+            for orden, tarea in enumerate(handler.tareas):
+                self._tareas[self.particion(tarea.id)][tarea.id] = orden
+            self._siguiente_usuario = len(handler.usuarios)
+            self._siguiente_tarea = len(handler.tareas)
+            self._sucias = set(range(self.particiones))
+        self._escribir_sucias(handler, handler.seq)
+
+    def registrar(self, handler, registro):
+        self.registrar_lote(handler, [registro])
+
+    def registrar_lote(self, handler, registros):
+        with handler._lock:
+            for registro in registros:
+                self._marcar(registro)
+        self._escribir_sucias(handler, registros[-1]['seq'])
+
+    def _marcar(self, registro):
+        if registro['op'] == 'crear_usuario':
+            indice = self.particion(registro['alias'])
+            self._usuarios[indice][registro['alias']] = self._siguiente_usuario
+            self._siguiente_usuario += 1
+        else:
+            # Las asignaciones y dependencias se guardan con la tarea: solo cambia su particion
+            indice = self.particion(registro['id'])
+            if registro['op'] == 'crear_tarea':
+                self._tareas[indice][registro['id']] = self._siguiente_tarea
+                self._siguiente_tarea += 1
+        self._sucias.add(indice)
+
+    def _escribir_sucias(self, handler, seq):
+        # La foto se toma con el lock del handler (puede llamarse desde el hilo de
+        # EscrituraDiferida); los temporales se escriben despues, en paralelo
+        with handler._lock:
+            sucias, self._sucias = sorted(self._sucias), set()
+            datos = [(indice, self._serializar_particion(handler, indice, seq)) for indice in sucias]
+        temporales = []
+        try:
+            if len(datos) == 1:
+                temporales.append(self._escribir_temporal(datos[0]))
+            else:
+                temporales.extend(self._pool.map(self._escribir_temporal, datos))
+            self._confirmar(seq, temporales)
+        except Exception:
+            # Lo que no se pudo escribir sigue sucio para la proxima escritura
+            self._sucias.update(sucias)
+            for _, temporal in temporales:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+            raise
+
+    def _serializar_particion(self, handler, indice, seq):
+        usuarios = [dict(handler._serialize_usuario(handler.get_usuario_por_alias(alias)), orden=orden)
+                    for alias, orden in self._usuarios[indice].items()]
+        tareas = [dict(handler._serialize_tarea(handler.get_tarea_por_id(task_id)), orden=orden)
+                  for task_id, orden in self._tareas[indice].items()]
+        return {'seq': seq, 'usuarios': usuarios, 'tareas': tareas}
+
+    def _escribir_temporal(self, dato):
+        """Escribe la particion en un temporal propio de esta escritura; devuelve (indice, ruta del temporal)"""
+        indice, data = dato
+        temporal = f'{self._ruta(indice)}.{next(self._temporales)}.tmp'
+        with metricas.Cronometro('escribir_particion'):
+            with open(temporal, 'w') as f:
+                json.dump(data, f)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+                metricas.BYTES_ESCRITOS.incrementar(f.tell(), 'particion')
+        return indice, temporal
+
+    def _confirmar(self, seq, temporales):
+        """Reemplaza las particiones por sus temporales, todas o ninguna si el proceso cae"""
+        with self._lock_escritura:
+            # Dos escrituras de la misma particion pueden cruzarse: no se pisa una mas nueva
+            vigentes = [(indice, temporal) for indice, temporal in temporales if seq >= self._seq_escrito[indice]]
+            for _, temporal in set(temporales) - set(vigentes):
+                os.remove(temporal)
+            intencion = os.path.join(self.directorio, ARCHIVO_INTENCION)
+            if len(vigentes) > 1:
+                with open(intencion + '.tmp', 'w') as f:
+                    json.dump({'seq': seq, 'reemplazos': [(indice, os.path.basename(temporal))
+                                                          for indice, temporal in vigentes]}, f)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(intencion + '.tmp', intencion)
+            for indice, temporal in vigentes:
+                os.replace(temporal, self._ruta(indice))
+                self._seq_escrito[indice] = seq
+            if len(vigentes) > 1:
+                os.remove(intencion)
+
+    def cerrar(self):
+        self._pool.shutdown()
+
+
+def _orden(par):
+    return par[0]['orden']
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from storage.journal import Journal, MARCA_COMPACTACION
+from storage.json_storage import AlmacenamientoJSON
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre lecturas del journal del primario
+INTERVALO_REPLICA = 0.05
+# Veces que se repite la carga si el primario compacta mientras la replica lee sus archivos
+INTENTOS_CARGA = 5
+
+
+class CargaIncompleta(Exception):
+    """Falta algun registro entre el snapshot y el journal leidos (el primario compacto en el medio)"""
+
+
+class AlmacenamientoReplica(AlmacenamientoJSON):
+    """Copia de solo lectura de un primario que guarda data.json en modo journal.
+
+    El log que se envia es el propio journal del primario, en un directorio compartido:
+    la replica carga su snapshot y un hilo lee cada `intervalo` segundos lo que el
+    primario agrego al journal y lo aplica al DataHandler, igual que un worker del modo
+    multiproceso (incluido el paso al log nuevo cuando el primario compacta). Nunca
+    escribe ni bloquea los archivos del primario.
+
+    Las lecturas no esperan al hilo: ven lo aplicado hasta el momento (hay_cambios()
+    es siempre False). atraso() indica cuanto falta, y alcanzar() pone la replica al
+    dia para una lectura que necesita un cambio en particular.
+    """
+    solo_lectura = True
+
+    def __init__(self, filename='data.json', intervalo=INTERVALO_REPLICA, carga_diferida=False,
+                 formato_snapshot='json'):
+        super().__init__(filename, 'journal', carga_diferida=carga_diferida, formato_snapshot=formato_snapshot)
+        self.intervalo = intervalo
+        self._posicion = 0  # Hasta donde se leyo el journal
+        self._al_dia = time.monotonic()  # Ultima vez que no quedaba nada del journal por aplicar
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def cargar(self, handler):
+        for intento in range(INTENTOS_CARGA):
+            try:
+                super().cargar(handler)
+                break
+            except CargaIncompleta:
+                if intento == INTENTOS_CARGA - 1:
+                    raise
+        self._al_dia = time.monotonic()
+        if self._hilo is None:
+            # Empieza a aplicar cuando la carga suelta el lock del handler
+            self._hilo = threading.Thread(target=self._seguir, args=(handler,), name='replica', daemon=True)
+            self._hilo.start()
+
+    def _reproducir_journal(self, handler):
+        ruta = self.filename + '.log'
+        if self.journal:
+            self.journal.cerrar()
+        # El log actual se abre antes de leer el rotado: si el primario compacta entre medio,
+        # el que se tiene abierto es el rotado y sus registros se leen dos veces (se omiten)
+        try:
+            self.journal = Journal(ruta, solo_lectura=True)
+        except FileNotFoundError:
+            self.journal = None
+        registros = list(Journal.leer(ruta + '.1'))
+        if self.journal:
+            nuevos, self._posicion = self.journal.leer_desde(0)
+            registros.extend(nuevos)
+        for registro in registros:
+            if registro['seq'] <= handler.seq or registro['op'] == MARCA_COMPACTACION:
+                continue
+            if registro['seq'] != handler.seq + 1:
+                raise CargaIncompleta()
+            handler._aplicar_cambio(registro)
+            handler.seq = registro['seq']
+
+    def _abrir_journal(self, handler):
+        # Ya lo abrio _reproducir_journal, y solo para leer
+        pass
+
+    def _pendiente(self):
+        """Indica si el primario escribio algo que la replica todavia no aplico"""
+        if self.journal is None:
+            # El primario todavia no habia creado su journal
+            return os.path.exists(self.filename + '.log')
+        return self.journal.tamano_en_disco() > self._posicion or self.journal.rotado()
+
+    def hay_cambios(self):
+        return False
+
+    def refrescar(self, handler):
+        if not self._pendiente():
+            self._al_dia = time.monotonic()
+            return
+        with handler._lock:
+            self._ponerse_al_dia(handler)
+        self._al_dia = time.monotonic()
+
+    def _ponerse_al_dia(self, handler):
+        if self.journal is None:
+            self._recargar(handler)
+            return
+        # Se mira antes de leer: si el log ya esta rotado, lo que se lee de el es todo lo que tiene
+        rotado = self.journal.rotado()
+        registros, self._posicion = self.journal.leer_desde(self._posicion)
+        recargar = False
+        if rotado:
+            try:
+                journal = Journal(self.filename + '.log', solo_lectura=True)
+            except FileNotFoundError:
+                journal = None
+            nuevos, posicion = journal.leer_desde(0) if journal else ([], 0)
+            if nuevos:
+                ultimo = max([handler.seq] + [registro['seq'] for registro in registros])
+                recargar = nuevos[0]['op'] != MARCA_COMPACTACION or nuevos[0]['seq'] != ultimo
+                self.journal.cerrar()
+                self.journal, self._posicion = journal, posicion
+                registros.extend(nuevos)
+            elif journal:
+                # El log nuevo todavia no tiene la marca de compactacion: se pasa a el en la proxima lectura
+                journal.cerrar()
+        registros = [registro for registro in registros
+                     if registro['seq'] > handler.seq and registro['op'] != MARCA_COMPACTACION]
+        if recargar or (registros and registros[0]['seq'] != handler.seq + 1):
+            self._recargar(handler)
+        else:
+            handler._aplicar_cambios(registros)
+
+    def _recargar(self, handler):
+        # Aparte: las consultas no esperan al hilo y verian las listas a medio llenar
+        handler._recargar_aparte(self.cargar)
+        # Como al iniciar: quien siga GET /events desde antes tiene que volver a leer
+        handler.eventos.reiniciar(handler.seq)
+
+    def _seguir(self, handler):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.refrescar(handler)
+            except Exception:
+                logger.exception("Error aplicando el journal del primario")
+
+    def atraso(self):
+        """(segundos desde que la replica estuvo al dia por ultima vez, bytes del journal sin aplicar)"""
+        if not self._pendiente():
+            return 0.0, 0
+        sin_leer = self.journal.tamano_en_disco() - self._posicion if self.journal else 0
+        return time.monotonic() - self._al_dia, max(sin_leer, 0)
+
+    def alcanzar(self, handler, seq, timeout=None):
+        limite = time.monotonic() + (timeout or 0)
+        while True:
+            self.refrescar(handler)
+            if handler.seq >= seq:
+                return True
+            if time.monotonic() >= limite:
+                return False
+            time.sleep(self.intervalo)
+
+    def registrar_lote(self, handler, registros):
+        raise PermissionError("Réplica de solo lectura: los cambios se hacen en el primario")
+
+    def guardar(self, handler):
+        raise PermissionError("Réplica de solo lectura: los cambios se hacen en el primario")
+
+    def cerrar(self):
+        self._detener.set()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join()
+        super().cerrar()
@@ -0,0 +1,171 @@
+import sqlite3
+import threading
+import metricas
+from storage.base import Almacenamiento
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    alias TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tareas (
+    id TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    fecha_esperada_fin TEXT
+);
+CREATE TABLE IF NOT EXISTS asignaciones (
+    tarea_id TEXT NOT NULL REFERENCES tareas(id),
+    usuario TEXT NOT NULL REFERENCES usuarios(alias),
+    rol TEXT NOT NULL,
+    fecha_asignacion TEXT NOT NULL,
+    UNIQUE (tarea_id, usuario)
+);
+CREATE TABLE IF NOT EXISTS dependencias (
+    tarea_id TEXT NOT NULL REFERENCES tareas(id),
+    dependencia_id TEXT NOT NULL REFERENCES tareas(id),
+    UNIQUE (tarea_id, dependencia_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tareas_estado ON tareas(estado);
+CREATE INDEX IF NOT EXISTS idx_asignaciones_usuario ON asignaciones(usuario);
+"""
+
+# Sentencias fijas: sqlite3 mantiene en cache la sentencia preparada de cada texto SQL
+SQL_INSERTAR_USUARIO = "INSERT INTO usuarios (alias, nombre) VALUES (?, ?)"
+SQL_INSERTAR_TAREA = "INSERT INTO tareas (id, nombre, descripcion, estado, fecha_esperada_fin) VALUES (?, ?, ?, ?, ?)"
+SQL_INSERTAR_ASIGNACION = "INSERT INTO asignaciones (tarea_id, usuario, rol, fecha_asignacion) VALUES (?, ?, ?, ?)"
+SQL_BORRAR_ASIGNACION = "DELETE FROM asignaciones WHERE tarea_id = ? AND usuario = ?"
+SQL_CAMBIAR_ESTADO = "UPDATE tareas SET estado = ? WHERE id = ?"
+SQL_INSERTAR_DEPENDENCIA = "INSERT INTO dependencias (tarea_id, dependencia_id) VALUES (?, ?)"
+SQL_BORRAR_DEPENDENCIA = "DELETE FROM dependencias WHERE tarea_id = ? AND dependencia_id = ?"
+SQL_GUARDAR_SEQ = "INSERT OR REPLACE INTO meta (clave, valor) VALUES ('seq', ?)"
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    """Persistencia en SQLite: cada cambio es una transaccion con solo las filas afectadas"""
+
+    def __init__(self, ruta='data.db'):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._conexiones = []
+        self._lock_conexiones = threading.Lock()
+        with self._conexion() as conexion:
+            conexion.executescript(ESQUEMA)
+
+    def _conexion(self):
+        """Conexion reutilizada por hilo (sqlite3 no comparte conexiones entre hilos)"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            # check_same_thread=False solo para poder cerrarlas todas desde cerrar()
+            conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=FULL" if self.fsync else "PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+            with self._lock_conexiones:
+                self._conexiones.append(conexion)
+        return conexion
+
+    def cargar(self, handler):
+        handler._vaciar()
+        conexion = self._conexion()
+
+        for alias, nombre in conexion.execute("SELECT alias, nombre FROM usuarios ORDER BY rowid"):
+            handler._cargar_usuario({'alias': alias, 'nombre': nombre})
+
+        asignaciones = {}
+        for tarea_id, usuario, rol, fecha in conexion.execute(
+            "SELECT tarea_id, usuario, rol, fecha_asignacion FROM asignaciones ORDER BY rowid"
+        ):
+            asignaciones.setdefault(tarea_id, []).append(
+                {'usuario': usuario, 'rol': rol, 'fecha_asignacion': fecha}
+            )
+        dependencias = {}
+        for tarea_id, dependencia_id in conexion.execute(
+            "SELECT tarea_id, dependencia_id FROM dependencias ORDER BY rowid"
+        ):
+            dependencias.setdefault(tarea_id, []).append(dependencia_id)
+
+        for tarea_id, nombre, descripcion, estado, fecha in conexion.execute(
+            "SELECT id, nombre, descripcion, estado, fecha_esperada_fin FROM tareas ORDER BY rowid"
+        ):
+            handler._cargar_tarea({
+                'id': tarea_id,
+                'nombre': nombre,
+                'descripcion': descripcion,
+                'estado': estado,
+                'fecha_esperada_fin': fecha,
+                'usuarios_asignados': asignaciones.get(tarea_id, []),
+                'dependencias': dependencias.get(tarea_id, [])
+            })
+
+        fila = conexion.execute("SELECT valor FROM meta WHERE clave = 'seq'").fetchone()
+        handler.seq = fila[0] if fila else 0
+
+    def guardar(self, handler):
+        data = handler._serializar()
+        conexion = self._conexion()
+        with conexion, metricas.Cronometro('escribir_sqlite'):
+            for tabla in ("dependencias", "asignaciones", "tareas", "usuarios"):
+                conexion.execute(f"DELETE FROM {tabla}")
+            conexion.executemany(SQL_INSERTAR_USUARIO, [(u['alias'], u['nombre']) for u in data['usuarios']])
+            conexion.executemany(SQL_INSERTAR_TAREA, [
+                (t['id'], t['nombre'], t['descripcion'], t['estado'], t['fecha_esperada_fin'])
+                for t in data['tareas']
+            ])
+            conexion.executemany(SQL_INSERTAR_ASIGNACION, [
+                (t['id'], a['usuario'], a['rol'], a['fecha_asignacion'])
+                for t in data['tareas'] for a in t['usuarios_asignados']
+            ])
+            conexion.executemany(SQL_INSERTAR_DEPENDENCIA, [
+                (t['id'], dependencia) for t in data['tareas'] for dependencia in t['dependencias']
+            ])
+            conexion.execute(SQL_GUARDAR_SEQ, (data['seq'],))
+
+    def registrar(self, handler, registro):
+        self.registrar_lote(handler, [registro])
+
+    def registrar_lote(self, handler, registros):
+        conexion = self._conexion()
+        with conexion, metricas.Cronometro('escribir_sqlite'):
+            for registro in registros:
+                self._ejecutar(conexion, registro)
+            conexion.execute(SQL_GUARDAR_SEQ, (registros[-1]['seq'],))
+
+    @staticmethod
+    def _ejecutar(conexion, registro):
+        op = registro['op']
+        if op == 'crear_usuario':
+            conexion.execute(SQL_INSERTAR_USUARIO, (registro['alias'], registro['nombre']))
+        elif op == 'crear_tarea':
+            conexion.execute(SQL_INSERTAR_TAREA, (
+                registro['id'], registro['nombre'], registro['descripcion'],
+                registro['estado'], registro['fecha_esperada_fin']
+            ))
+            if 'usuario' in registro:
+                conexion.execute(SQL_INSERTAR_ASIGNACION, (
+                    registro['id'], registro['usuario'], registro['rol'], registro['fecha_asignacion']
+                ))
+        elif op == 'asignar_usuario':
+            conexion.execute(SQL_INSERTAR_ASIGNACION, (
+                registro['id'], registro['usuario'], registro['rol'], registro['fecha_asignacion']
+            ))
+        elif op == 'remover_usuario':
+            conexion.execute(SQL_BORRAR_ASIGNACION, (registro['id'], registro['usuario']))
+        elif op == 'cambiar_estado':
+            conexion.execute(SQL_CAMBIAR_ESTADO, (registro['estado'], registro['id']))
+        elif op == 'agregar_dependencia':
+            conexion.execute(SQL_INSERTAR_DEPENDENCIA, (registro['id'], registro['dependencia']))
+        elif op == 'remover_dependencia':
+            conexion.execute(SQL_BORRAR_DEPENDENCIA, (registro['id'], registro['dependencia']))
+
+    def cerrar(self):
+        with self._lock_conexiones:
+            for conexion in self._conexiones:
+                conexion.close()
+            self._conexiones = []
+        self._local = threading.local()
@@ -0,0 +1,348 @@
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Directorio src al path, igual que app.py, para importar la app y sus dependencias
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import controller
+from asgi import AppASGI
+from controller import ProveedorDatos
+from data_handler import DataHandler
+
+
+async def peticion(app, metodo, ruta, cuerpo=None, headers=None):
+    """Envia una peticion HTTP a la app ASGI y devuelve (codigo, headers, cuerpo)"""
+    ruta, _, query = ruta.partition('?')
+    lista_headers = [(nombre.lower().encode(), valor.encode()) for nombre, valor in (headers or {}).items()]
+    datos = b''
+    if cuerpo is not None:
+        datos = json.dumps(cuerpo).encode()
+        lista_headers.append((b'content-type', b'application/json'))
+    scope = {'type': 'http', 'method': metodo, 'path': ruta, 'query_string': query.encode(), 'headers': lista_headers}
+    mensajes = [{'type': 'http.request', 'body': datos, 'more_body': False}]
+    respuesta = {}
+
+    async def receive():
+        return mensajes.pop(0)
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            respuesta['codigo'] = mensaje['status']
+            respuesta['headers'] = {nombre.decode(): valor.decode() for nombre, valor in mensaje['headers']}
+        else:
+            respuesta['cuerpo'] = respuesta.get('cuerpo', b'') + mensaje['body']
+
+    await app(scope, receive, send)
+    return respuesta['codigo'], respuesta['headers'], respuesta['cuerpo']
+
+
+async def peticion_cruda(app, scope, receive):
+    """Envia una peticion con el receive dado y devuelve (codigo, cuerpo)"""
+    respuesta = {}
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            respuesta['codigo'] = mensaje['status']
+        else:
+            respuesta['cuerpo'] = respuesta.get('cuerpo', b'') + mensaje['body']
+
+    await app(scope, receive, send)
+    return respuesta['codigo'], respuesta['cuerpo']
+
+
+class TestAppASGI(unittest.TestCase):
+    """Pruebas para la app ASGI sobre un DataHandler en un archivo temporal"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.data_handler = DataHandler(os.path.join(self.directorio, 'data.json'))
+        self.app = AppASGI(ProveedorDatos(data_handler=self.data_handler), hilos=4)
+
+    def tearDown(self):
+        self.app.executor.shutdown()
+        self.data_handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def pedir(self, metodo, ruta, cuerpo=None, headers=None):
+        return asyncio.run(peticion(self.app, metodo, ruta, cuerpo, headers))
+
+    def test_mismas_respuestas_que_flask(self):
+        """
+        Prueba que la app ASGI responda lo mismo que la app Flask a la misma secuencia de peticiones
+        """
+        # Arrange
+        secuencia = [
+            ('POST', '/usuarios', {"contacto": "ana", "nombre": "Ana"}),
+            ('POST', '/usuarios', {"contacto": "ana", "nombre": "Ana"}),
+            ('POST', '/usuarios', {"contacto": "beto"}),
+            ('POST', '/usuarios/batch', [{"contacto": "ñandu", "nombre": "Ñandú"}]),
+            ('POST', '/tasks', {"nombre": "T", "descripcion": "D", "usuario": "nadie", "rol": "programacion"}),
+            ('POST', '/tasks/no-existe', {"estado": "Progreso"}),
+            ('POST', '/tasks/batch/dependencies', []),
+            ('GET', '/usuarios/mialias=ana', None),
+            ('GET', '/usuarios/mialias=ana?limit=dos', None),
+            ('GET', '/usuarios/mialias=nadie', None),
+            ('GET', '/tasks/topological-order', None),
+            ('GET', '/tasks?usuario=ana&estado=Nueva', None),
+            ('GET', '/tasks?rol=gerencia', None),
+            ('GET', '/tasks/no-existe/dependents', None),
+            ('POST', '/tasks/no-existe/transition', {"estado": "Finalizada"}),
+            ('GET', '/tasks/no-existe/schedule', None),
+            ('GET', '/tasks/critical-path', None),
+            ('GET', '/reports/breakdown', None),
+            ('GET', '/reports/workload?limit=dos', None),
+            ('GET', '/reports/overdue?fecha=2030-01-01', None),
+            ('GET', '/reports/throughput?periodo=anio', None),
+            ('GET', '/events?usuario=nadie', None),
+            ('GET', '/export', None),
+            ('POST', '/import', {"tipo": "usuario", "alias": "ñandu", "nombre": "Otro"}),
+            ('GET', '/replication', None),
+            ('GET', '/tasks', None, {"X-Seq-Minima": "1"}),
+            ('GET', '/ready', None),
+        ]
+        directorio = tempfile.mkdtemp()
+        flask_handler = DataHandler(os.path.join(directorio, 'data.json'))
+
+        # Act
+        client = controller.crear_app(data_handler=flask_handler).test_client()
+        # Cada paso puede llevar un cuarto elemento con headers
+        esperadas = [client.open(ruta, method=metodo, json=cuerpo, headers=dict(*headers))
+                     for metodo, ruta, cuerpo, *headers in secuencia]
+        obtenidas = [self.pedir(metodo, ruta, cuerpo, dict(*headers)) for metodo, ruta, cuerpo, *headers in secuencia]
+        flask_handler.cerrar()
+        shutil.rmtree(directorio)
+
+        # Assert
+        for esperada, (codigo, headers, cuerpo) in zip(esperadas, obtenidas):
+            self.assertEqual(codigo, esperada.status_code)
+            self.assertEqual(cuerpo, esperada.data)
+            self.assertEqual(headers.get('etag'), esperada.headers.get('ETag'))
+            self.assertEqual(headers.get('x-seq'), esperada.headers.get('X-Seq'))
+
+    def test_tarea_con_etag_e_if_match(self):
+        """
+        Prueba el ciclo crear tarea, consultarla, 304 con If-None-Match y 409 con un If-Match viejo
+        """
+        # Arrange
+        self.pedir('POST', '/usuarios', {"contacto": "ana", "nombre": "Ana"})
+        _, _, cuerpo = self.pedir('POST', '/tasks', {"nombre": "T", "descripcion": "D", "usuario": "ana",
+                                                     "rol": "programacion"})
+        task_id = json.loads(cuerpo)["id"]
+
+        # Act
+        codigo, headers, cuerpo = self.pedir('GET', f'/tasks/{task_id}')
+        no_modificada = self.pedir('GET', f'/tasks/{task_id}', headers={"If-None-Match": headers['etag']})
+        cambio = self.pedir('POST', f'/tasks/{task_id}', {"estado": "Progreso"}, {"If-Match": headers['etag']})
+        conflicto = self.pedir('POST', f'/tasks/{task_id}', {"estado": "Finalizada"}, {"If-Match": headers['etag']})
+
+        # Assert
+        self.assertEqual(codigo, 200)
+        self.assertEqual(json.loads(cuerpo)["estado"], "Nueva")
+        self.assertEqual((no_modificada[0], no_modificada[2]), (304, b''))
+        self.assertEqual(cambio[0], 200)
+        self.assertEqual(conflicto[0], 409)
+        self.assertEqual(self.data_handler.get_tarea_por_id(task_id).estado, "Progreso")
+
+    def test_rutas_y_cuerpos_invalidos(self):
+        """
+        CASO DE ERROR: Prueba las respuestas a rutas inexistentes, métodos no permitidos y JSON mal formado
+        """
+        # Act
+        inexistente = self.pedir('GET', '/nada')
+        metodo = self.pedir('PUT', '/usuarios')
+        codigo, _, _ = asyncio.run(peticion(self.app, 'POST', '/usuarios', headers={"Content-Type": "application/json"}))
+
+        # Assert
+        self.assertEqual(inexistente[0], 404)
+        self.assertEqual(metodo[0], 405)
+        self.assertEqual(codigo, 400)
+
+    def test_peticiones_concurrentes(self):
+        """
+        Prueba que muchas peticiones simultáneas sobre el mismo loop se atiendan sin perder cambios
+        """
+        # Arrange
+        self.pedir('POST', '/usuarios', {"contacto": "ana", "nombre": "Ana"})
+        cantidad = 200
+
+        async def todas():
+            crear = [peticion(self.app, 'POST', '/tasks', {"nombre": f"T{i}", "descripcion": "D", "usuario": "ana",
+                                                           "rol": "programacion"}) for i in range(cantidad)]
+            leer = [peticion(self.app, 'GET', '/usuarios/mialias=ana?limit=10') for _ in range(cantidad)]
+            return await asyncio.gather(*crear, *leer)
+
+        # Act
+        respuestas = asyncio.run(todas())
+
+        # Assert
+        self.assertEqual([codigo for codigo, _, _ in respuestas], [201] * cantidad + [200] * cantidad)
+        self.assertEqual(len(self.data_handler.get_usuario_por_alias("ana").tareasAsociadas), cantidad)
+        self.assertEqual(self.data_handler.verificar_indices(), [])
+
+    def test_consulta_que_espera_el_lock_no_bloquea_el_loop(self):
+        """
+        Prueba que una consulta que arma el índice de tareas mientras otro hilo tiene el lock no demore al resto
+        """
+        # Arrange
+        self.pedir('POST', '/usuarios', {"contacto": "ana", "nombre": "Ana"})
+        self.pedir('POST', '/tasks', {"nombre": "T", "descripcion": "D", "usuario": "ana", "rol": "programacion"})
+        self.data_handler._indice = None
+        tomado = threading.Event()
+        orden = []
+
+        def escritura_lenta():
+            with self.data_handler._lock:
+                tomado.set()
+                time.sleep(1)
+
+        async def pedir_y_anotar(ruta):
+            codigo, _, _ = await peticion(self.app, 'GET', ruta)
+            orden.append((ruta, codigo))
+
+        async def todas():
+            consulta = asyncio.ensure_future(pedir_y_anotar('/tasks?estado=Nueva'))
+            await asyncio.sleep(0.1)
+            await pedir_y_anotar('/ready')
+            await consulta
+
+        # Act
+        hilo = threading.Thread(target=escritura_lenta)
+        hilo.start()
+        tomado.wait()
+        asyncio.run(todas())
+        hilo.join()
+
+        # Assert
+        self.assertEqual(orden, [('/ready', 200), ('/tasks?estado=Nueva', 200)])
+
+    def test_flujo_de_eventos(self):
+        """
+        Prueba que GET /events envíe los cambios a medida que ocurren y termine cuando el cliente se desconecta
+        """
+        # Arrange
+        self.data_handler.crear_usuario("ana", "Ana")
+        _, tarea = self.data_handler.crear_tarea("T", "D", "ana", "programacion")
+        recibido = []
+
+        async def suscribir():
+            desconectar = asyncio.Event()
+            mensajes = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                if mensajes:
+                    return mensajes.pop(0)
+                await desconectar.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(mensaje):
+                recibido.append(mensaje)
+                if b'event: cambiar_estado' in mensaje.get('body', b''):
+                    desconectar.set()
+
+            scope = {'type': 'http', 'method': 'GET', 'path': '/events',
+                     'query_string': f'task_id={tarea.id}'.encode(), 'headers': []}
+            flujo = asyncio.ensure_future(self.app(scope, receive, send))
+            await asyncio.sleep(0.05)
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.data_handler.cambiar_estado_tarea, tarea.id, "Progreso")
+            await asyncio.wait_for(flujo, timeout=5)
+
+        # Act
+        asyncio.run(suscribir())
+
+        # Assert
+        self.assertEqual(recibido[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), recibido[0]['headers'])
+        cuerpo = b''.join(mensaje.get('body', b'') for mensaje in recibido[1:]).decode()
+        self.assertTrue(cuerpo.startswith(': conectado'))
+        datos = json.loads(cuerpo.split('data: ')[1].splitlines()[0])
+        self.assertEqual((datos['id'], datos['estado'], datos['usuarios']), (tarea.id, "Progreso", ["ana"]))
+        self.assertEqual(self.data_handler.eventos._oyentes, set())
+
+    def test_exportar_e_importar(self):
+        """
+        Prueba que GET /export se envíe en varios mensajes y POST /import lea el cuerpo de a fragmentos
+        """
+        # Arrange
+        self.data_handler.crear_usuario("ana", "Ana")
+        self.data_handler.crear_tarea("T", "D", "ana", "programacion")
+        destino = DataHandler(os.path.join(self.directorio, 'destino.json'))
+        app_destino = AppASGI(ProveedorDatos(data_handler=destino), hilos=2)
+        enviados = []
+
+        async def exportar_e_importar():
+            async def recibir_nada():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(mensaje):
+                enviados.append(mensaje)
+
+            scope = {'type': 'http', 'method': 'GET', 'path': '/export', 'query_string': b'', 'headers': []}
+            await self.app(scope, recibir_nada, send)
+            cuerpo = b''.join(mensaje.get('body', b'') for mensaje in enviados[1:])
+            fragmentos = [cuerpo[i:i + 20] for i in range(0, len(cuerpo), 20)]
+
+            async def receive():
+                return {'type': 'http.request', 'body': fragmentos.pop(0), 'more_body': bool(fragmentos)}
+
+            scope = {'type': 'http', 'method': 'POST', 'path': '/import', 'query_string': b'',
+                     'headers': [(b'content-type', b'application/x-ndjson')]}
+            return await peticion_cruda(app_destino, scope, receive)
+
+        # Act
+        codigo, cuerpo = asyncio.run(exportar_e_importar())
+        app_destino.executor.shutdown()
+
+        # Assert
+        self.assertIn((b'content-type', b'application/x-ndjson'), enviados[0]['headers'])
+        self.assertGreater(len(enviados), 3)
+        self.assertEqual(codigo, 200)
+        self.assertTrue(json.loads(cuerpo)["completa"])
+        self.assertEqual(destino._serializar()['tareas'], self.data_handler._serializar()['tareas'])
+        destino.cerrar()
+
+    def test_metricas(self):
+        """
+        Prueba que la app ASGI sirva /metrics y registre sus peticiones con la ruta de la tabla
+        """
+        # Arrange
+        self.pedir('GET', '/usuarios/mialias=nadie')
+
+        # Act
+        codigo, headers, cuerpo = self.pedir('GET', '/metrics')
+
+        # Assert
+        self.assertEqual(codigo, 200)
+        self.assertTrue(headers['content-type'].startswith('text/plain'))
+        self.assertIn(b'ruta="/usuarios/mialias=<alias>",codigo="404"', cuerpo)
+
+    def test_ciclo_de_vida(self):
+        """
+        Prueba que la app complete el arranque y el apagado del protocolo lifespan
+        """
+        # Arrange
+        mensajes = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        enviados = []
+
+        async def receive():
+            return mensajes.pop(0)
+
+        async def send(mensaje):
+            enviados.append(mensaje['type'])
+
+        # Act
+        asyncio.run(self.app({'type': 'lifespan'}, receive, send))
+
+        # Assert
+        self.assertEqual(enviados, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import unittest
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from cache import CacheSerializacion
+
+
+class TestCacheSerializacion(unittest.TestCase):
+    """Pruebas para la cache LRU de representaciones serializadas"""
+
+    def test_acierto_y_fallo_por_version(self):
+        """
+        Prueba que una entrada solo se devuelva para la misma versión de la entidad
+        """
+        # Arrange
+        cache = CacheSerializacion()
+        etag = cache.guardar(('tarea', 'a'), 1, b'{"id":"a"}')
+
+        # Act
+        acierto = cache.obtener(('tarea', 'a'), 1)
+        fallo = cache.obtener(('tarea', 'a'), 2)
+
+        # Assert
+        self.assertEqual(acierto, (b'{"id":"a"}', etag))
+        self.assertIsNone(fallo)
+        self.assertEqual((cache.aciertos, cache.fallos), (1, 1))
+
+    def test_desaloja_la_menos_usada_al_superar_el_limite(self):
+        """
+        Prueba que al superar el límite de bytes se desaloje la entrada usada hace más tiempo
+        """
+        # Arrange
+        cache = CacheSerializacion(max_bytes=30)
+        cache.guardar('a', 0, b'x' * 10)
+        cache.guardar('b', 0, b'x' * 10)
+        cache.guardar('c', 0, b'x' * 10)
+        cache.obtener('a', 0)
+
+        # Act
+        cache.guardar('d', 0, b'x' * 10)
+
+        # Assert
+        self.assertIsNone(cache.obtener('b', 0))
+        self.assertIsNotNone(cache.obtener('a', 0))
+        self.assertEqual(cache.bytes, 30)
+        self.assertEqual(cache.estadisticas()["desalojos"], 1)
+
+    def test_reemplazar_y_entradas_demasiado_grandes(self):
+        """
+        Prueba que reemplazar una entrada descuente sus bytes y que no se guarden entradas mayores al límite
+        """
+        # Arrange
+        cache = CacheSerializacion(max_bytes=20)
+        cache.guardar('a', 0, b'x' * 10)
+
+        # Act
+        cache.guardar('a', 1, b'x' * 5)
+        etag = cache.guardar('b', 0, b'x' * 50)
+
+        # Assert
+        self.assertEqual(cache.bytes, 5)
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
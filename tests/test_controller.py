@@ -0,0 +1,908 @@
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# Directorio src al path, igual que app.py, para importar el controlador y sus dependencias
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import controller
+from data_handler import DataHandler
+from storage.replica import AlmacenamientoReplica
+
+
+class ControllerTestCase(unittest.TestCase):
+    """Base: cada prueba usa un DataHandler nuevo sobre un archivo temporal"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.data_handler = DataHandler(os.path.join(self.directorio, 'data.json'))
+        self.app = controller.crear_app(data_handler=self.data_handler)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.data_handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def crear_usuario(self, alias):
+        return self.client.post('/usuarios', json={"contacto": alias, "nombre": alias.title()})
+
+    def crear_tarea(self, alias, nombre="Tarea", rol="programacion"):
+        respuesta = self.client.post('/tasks', json={
+            "nombre": nombre, "descripcion": "Descripción", "usuario": alias, "rol": rol
+        })
+        return respuesta.get_json()["id"]
+
+
+class TestEndpointsLote(ControllerTestCase):
+    """Pruebas para los endpoints de creación y gestión en lote"""
+
+    def test_crear_usuarios_lote_success(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que un lote válido cree todos los usuarios con una sola escritura
+        """
+        # Arrange
+        items = [{"contacto": "ana", "nombre": "Ana"}, {"contacto": "beto", "nombre": "Beto"}]
+
+        # Act
+        with patch.object(self.data_handler.almacenamiento, 'registrar_lote',
+                          wraps=self.data_handler.almacenamiento.registrar_lote) as registrar_lote:
+            respuesta = self.client.post('/usuarios/batch', json=items)
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 201)
+        resultados = respuesta.get_json()["resultados"]
+        self.assertEqual([r["usuario"]["alias"] for r in resultados], ["ana", "beto"])
+        self.assertEqual(registrar_lote.call_count, 1)
+        self.assertEqual(len(registrar_lote.call_args[0][1]), 2)
+        self.assertIsNotNone(DataHandler(self.data_handler.filename).get_usuario_por_alias("beto"))
+
+    def test_crear_tareas_lote_invalido_no_aplica_nada(self):
+        """
+        CASO DE ERROR:
+        Prueba que un elemento inválido haga fallar el lote completo sin aplicar cambios
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        items = [
+            {"nombre": "T1", "descripcion": "D", "usuario": "ana", "rol": "programacion"},
+            {"nombre": "T2", "descripcion": "D", "usuario": "ana", "rol": "rol_inexistente"},
+            {"nombre": "T3", "descripcion": "D", "usuario": "nadie", "rol": "infra"}
+        ]
+
+        # Act
+        respuesta = self.client.post('/tasks/batch', json=items)
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 422)
+        resultados = respuesta.get_json()["resultados"]
+        self.assertTrue(resultados[0]["ok"])
+        self.assertIn("Rol inválido", resultados[1]["error"])
+        self.assertEqual(resultados[2]["error"], "Usuario no encontrado")
+        self.assertEqual(self.data_handler.tareas, [])
+
+    def test_lote_vacio(self):
+        """
+        CASO DE ERROR:
+        Prueba que un cuerpo que no es una lista se rechace
+        """
+        # Act
+        respuesta = self.client.post('/tasks/batch', json={"nombre": "T1"})
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 422)
+
+    def test_gestionar_usuarios_lote_valida_en_orden(self):
+        """
+        Prueba que las asignaciones del lote se validen considerando las anteriores del mismo lote
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        self.crear_usuario("beto")
+        task_id = self.crear_tarea("ana")
+        items = [
+            {"task_id": task_id, "usuario": "beto", "rol": "infra", "accion": "adicionar"},
+            {"task_id": task_id, "usuario": "beto", "rol": "infra", "accion": "remover"},
+            {"task_id": task_id, "usuario": "beto", "rol": "diseño", "accion": "adicionar"},
+            {"task_id": task_id, "usuario": "ana", "rol": "diseño", "accion": "adicionar"}
+        ]
+
+        # Act
+        invalido = self.client.post('/tasks/batch/users', json=items)
+        valido = self.client.post('/tasks/batch/users', json=items[:3])
+
+        # Assert
+        self.assertEqual(invalido.status_code, 422)
+        self.assertEqual(invalido.get_json()["resultados"][3]["error"], "El usuario ya está asignado a esta tarea")
+        self.assertEqual(valido.status_code, 200)
+        tarea = self.data_handler.get_tarea_por_id(task_id)
+        self.assertEqual([a.rol for a in tarea.usuariosAsignados], ["programacion", "diseño"])
+
+    def test_gestionar_dependencias_lote(self):
+        """
+        Prueba que un lote de dependencias se aplique y rechace duplicados dentro del lote
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        t1, t2, t3 = (self.crear_tarea("ana", nombre) for nombre in ("T1", "T2", "T3"))
+        duplicado = [
+            {"task_id": t1, "dependencytaskid": t2, "accion": "adicionar"},
+            {"task_id": t1, "dependencytaskid": t2, "accion": "adicionar"}
+        ]
+        valido = [
+            {"task_id": t1, "dependencytaskid": t2, "accion": "adicionar"},
+            {"task_id": t1, "dependencytaskid": t3, "accion": "adicionar"}
+        ]
+
+        # Act
+        respuesta_duplicado = self.client.post('/tasks/batch/dependencies', json=duplicado)
+        respuesta_valido = self.client.post('/tasks/batch/dependencies', json=valido)
+
+        # Assert
+        self.assertEqual(respuesta_duplicado.status_code, 422)
+        self.assertEqual(respuesta_valido.status_code, 200)
+        self.assertEqual(self.data_handler.get_tarea_por_id(t1).dependencias, [t2, t3])
+
+    def test_identificadores_que_no_son_texto(self):
+        """
+        CASO DE ERROR:
+        Prueba que un alias o id que no es texto (una lista, un objeto) se rechace con 422 o 404 y no con 500
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        task_id = self.crear_tarea("ana")
+        peticiones = [
+            ('/usuarios', {"contacto": ["x"], "nombre": "X"}),
+            ('/tasks', {"nombre": "T", "descripcion": "D", "usuario": ["ana"], "rol": "infra"}),
+            ('/usuarios/batch', [{"contacto": ["x"], "nombre": "X"}]),
+            ('/tasks/batch', [{"nombre": "T", "descripcion": "D", "usuario": ["ana"], "rol": "infra"}]),
+            ('/tasks/batch/users', [{"task_id": [task_id], "usuario": "ana", "rol": "infra", "accion": "adicionar"}]),
+            ('/tasks/batch/users', [{"task_id": task_id, "usuario": ["ana"], "rol": "infra", "accion": "adicionar"}]),
+            ('/tasks/batch/dependencies', [{"task_id": {"id": task_id}, "dependencytaskid": task_id,
+                                            "accion": "adicionar"}]),
+            (f'/tasks/{task_id}/users', {"usuario": ["ana"], "rol": "infra", "accion": "adicionar"}),
+            (f'/tasks/{task_id}/dependencies', {"dependencytaskid": {"id": task_id}, "accion": "adicionar"}),
+        ]
+
+        # Act
+        respuestas = [self.client.post(ruta, json=cuerpo) for ruta, cuerpo in peticiones]
+
+        # Assert
+        self.assertEqual([respuesta.status_code for respuesta in respuestas], [422] * 7 + [404] * 2)
+        self.assertEqual(respuestas[0].get_json()["error"], "Datos incompletos. Se requiere contacto y nombre")
+        self.assertEqual(respuestas[1].get_json()["error"], "Usuario no encontrado")
+        self.assertEqual(len(self.data_handler.usuarios), 1)
+
+    def test_rol_que_no_es_texto(self):
+        """
+        CASO DE ERROR:
+        Prueba que un rol que no es texto (una lista, un objeto) se rechace con 422 "Rol inválido" y no con 500
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        self.crear_usuario("beto")
+        task_id = self.crear_tarea("ana")
+        peticiones = [
+            ('/tasks', {"nombre": "T", "descripcion": "D", "usuario": "ana", "rol": ["x"]}),
+            ('/tasks', {"nombre": "T", "descripcion": "D", "usuario": "ana", "rol": {}}),
+            ('/tasks/batch', [{"nombre": "T", "descripcion": "D", "usuario": "ana", "rol": ["x"]}]),
+            (f'/tasks/{task_id}/users', {"usuario": "beto", "rol": {}, "accion": "adicionar"}),
+            (f'/tasks/{task_id}/users', {"usuario": "beto", "rol": ["x"], "accion": "adicionar"}),
+        ]
+
+        # Act
+        respuestas = [self.client.post(ruta, json=cuerpo) for ruta, cuerpo in peticiones]
+
+        # Assert
+        self.assertEqual([respuesta.status_code for respuesta in respuestas], [422] * 5)
+        self.assertTrue(all("Rol inválido" in str(respuesta.get_json()) for respuesta in respuestas))
+        self.assertEqual(len(self.data_handler.tareas), 1)
+
+
+class TestEndpointsGrafo(ControllerTestCase):
+    """Pruebas para las consultas y validaciones sobre el grafo de dependencias"""
+
+    def setUp(self):
+        super().setUp()
+        self.crear_usuario("ana")
+        self.t1, self.t2, self.t3 = (self.crear_tarea("ana", nombre) for nombre in ("T1", "T2", "T3"))
+        self.client.post(f'/tasks/{self.t1}/dependencies', json={"dependencytaskid": self.t2, "accion": "adicionar"})
+        self.client.post(f'/tasks/{self.t2}/dependencies', json={"dependencytaskid": self.t3, "accion": "adicionar"})
+
+    def test_dependencia_que_forma_ciclo(self):
+        """
+        CASO DE ERROR:
+        Prueba que se rechace una dependencia que cierra un ciclo
+        """
+        # Act
+        respuesta = self.client.post(f'/tasks/{self.t3}/dependencies',
+                                     json={"dependencytaskid": self.t1, "accion": "adicionar"})
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(respuesta.get_json()["error"], "La dependencia generaría un ciclo")
+        self.assertEqual(self.data_handler.get_tarea_por_id(self.t3).dependencias, [])
+
+    def test_consultas_de_dependencias(self):
+        """
+        CASO DE ÉXITO:
+        Prueba las consultas de dependencias, dependientes y orden topológico
+        """
+        # Act
+        directas = self.client.get(f'/tasks/{self.t1}/dependencies').get_json()
+        transitivas = self.client.get(f'/tasks/{self.t1}/dependencies?transitive=true').get_json()
+        dependientes = self.client.get(f'/tasks/{self.t3}/dependents?transitive=true').get_json()
+        orden = self.client.get('/tasks/topological-order').get_json()["orden"]
+
+        # Assert
+        self.assertEqual(directas["dependencias"], [self.t2])
+        self.assertEqual(transitivas["dependencias"], [self.t2, self.t3])
+        self.assertEqual(dependientes["dependientes"], [self.t2, self.t1])
+        self.assertEqual(orden, [self.t3, self.t2, self.t1])
+        self.assertEqual(self.client.get('/tasks/no-existe/dependents').status_code, 404)
+
+    def test_lote_con_ciclo_entre_elementos(self):
+        """
+        CASO DE ERROR:
+        Prueba que un lote cuyos elementos juntos forman un ciclo se rechace sin dejar rastros en el grafo
+        """
+        # Arrange
+        _, t4 = self.data_handler.crear_tarea("T4", "D", "ana", "infra")
+        items = [
+            {"task_id": self.t3, "dependencytaskid": t4.id, "accion": "adicionar"},
+            {"task_id": t4.id, "dependencytaskid": self.t1, "accion": "adicionar"}
+        ]
+
+        # Act
+        respuesta = self.client.post('/tasks/batch/dependencies', json=items)
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(respuesta.get_json()["resultados"][1]["error"], "La dependencia generaría un ciclo")
+        self.assertEqual(self.data_handler.grafo.dependencias(self.t3), [])
+        self.assertEqual(self.client.post('/tasks/batch/dependencies', json=items[:1]).status_code, 200)
+
+    def test_transicion_de_subarbol(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que finalizar una tarea con su subárbol cambie también sus dependencias transitivas
+        """
+        # Act
+        respuesta = self.client.post(f'/tasks/{self.t1}/transition', json={"estado": "Finalizada"})
+        invalida = self.client.post(f'/tasks/{self.t3}/transition',
+                                    json={"estado": "Nueva", "alcance": "dependientes"})
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r["id"] for r in respuesta.get_json()["resultados"]], [self.t3, self.t2, self.t1])
+        self.assertEqual(invalida.status_code, 422)
+        self.assertEqual(len(invalida.get_json()["resultados"]), 3)
+        self.assertEqual({self.data_handler.get_tarea_por_id(t).estado for t in (self.t1, self.t2, self.t3)},
+                         {"Finalizada"})
+        self.assertEqual(self.client.post('/tasks/no-existe/transition', json={"estado": "Progreso"}).status_code,
+                         404)
+
+    def test_planificacion_y_ruta_critica(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que la fecha más temprana de T1 sea la de T3, la última creada, a través de T2
+        """
+        # Act
+        planificacion = self.client.get(f'/tasks/{self.t1}/schedule').get_json()
+        ruta = self.client.get('/tasks/critical-path').get_json()
+
+        # Assert
+        t3 = self.data_handler.get_tarea_por_id(self.t3)
+        self.assertEqual(planificacion["fecha_mas_temprana"], self.data_handler._format_fecha(t3.fechaEsperadaFin))
+        self.assertEqual(planificacion["ruta_critica"], [self.t3, self.t2, self.t1])
+        self.assertEqual(ruta["ruta_critica"], [self.t3, self.t2, self.t1])
+        self.assertEqual(self.client.get('/tasks/no-existe/schedule').status_code, 404)
+
+
+class TestEventos(ControllerTestCase):
+    """Pruebas para el flujo de cambios GET /events"""
+
+    def test_flujo_de_eventos_de_un_usuario(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que el flujo retomado desde un seq traiga los cambios del usuario como server-sent events
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        self.crear_usuario("beto")
+        t1 = self.crear_tarea("ana")
+        self.crear_tarea("beto")
+        self.client.post(f'/tasks/{t1}', json={"estado": "Progreso"})
+
+        # Act
+        respuesta = self.client.get('/events?usuario=ana', headers={"Last-Event-ID": "1"}, buffered=False)
+        texto = next(iter(respuesta.response)).decode()
+        respuesta.close()
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.mimetype, 'text/event-stream')
+        self.assertIsNone(respuesta.headers.get('ETag'))
+        self.assertEqual([linea for linea in texto.splitlines() if linea.startswith('event: ')],
+                         ["event: crear_tarea", "event: cambiar_estado"])
+        self.assertIn(f'"id":"{t1}"', texto)
+
+    def test_parametros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba que se rechacen un seq inválido y un usuario o tarea inexistentes
+        """
+        # Act y Assert
+        self.assertEqual(self.client.get('/events?desde=uno').status_code, 422)
+        self.assertEqual(self.client.get('/events?usuario=nadie').status_code, 404)
+        self.assertEqual(self.client.get('/events?task_id=no-existe').status_code, 404)
+
+
+class TestExportacion(ControllerTestCase):
+    """Pruebas para GET /export y POST /import"""
+
+    def test_exportar_e_importar(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que el NDJSON de GET /export se pueda importar en otra instancia con POST /import
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        task_id = self.crear_tarea("ana")
+        self.client.post(f'/tasks/{task_id}', json={"estado": "Progreso"})
+        destino = DataHandler(os.path.join(self.directorio, 'destino.json'))
+
+        # Act
+        exportado = self.client.get('/export')
+        respuesta = controller.crear_app(data_handler=destino).test_client().post(
+            '/import', data=exportado.data, content_type='application/x-ndjson')
+
+        # Assert
+        self.assertEqual(exportado.status_code, 200)
+        self.assertEqual(exportado.mimetype, 'application/x-ndjson')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.get_json()["importados"], {"usuario": 1, "tarea": 1, "asignacion": 1,
+                                                              "dependencia": 0})
+        self.assertEqual(destino.get_tarea_por_id(task_id).estado, "Progreso")
+        destino.cerrar()
+
+    def test_importar_con_errores(self):
+        """
+        CASO DE ERROR:
+        Prueba que POST /import responda 422 con los errores por línea si algún registro es inválido
+        """
+        # Act
+        respuesta = self.client.post('/import', data='{"tipo":"usuario","alias":"ana","nombre":"Ana"}\n{"tipo":"x"}',
+                                     content_type='application/x-ndjson')
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(respuesta.get_json()["importados"]["usuario"], 1)
+        self.assertEqual(respuesta.get_json()["errores"][0]["linea"], 2)
+
+
+class TestReplica(unittest.TestCase):
+    """Pruebas para la app sobre una réplica que sigue el journal de un primario"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        filename = os.path.join(self.directorio, 'data.json')
+        self.primario = DataHandler(filename, modo_persistencia='journal')
+        self.replica = DataHandler(almacenamiento=AlmacenamientoReplica(filename, intervalo=60))
+        self.client_primario = controller.crear_app(data_handler=self.primario).test_client()
+        self.client = controller.crear_app(data_handler=self.replica).test_client()
+
+    def tearDown(self):
+        self.replica.cerrar()
+        self.primario.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_leer_lo_propio_con_seq_minima(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que con el X-Seq de una escritura en el primario la réplica responda con ese cambio aplicado
+        """
+        # Arrange
+        escritura = self.client_primario.post('/usuarios', json={"contacto": "ana", "nombre": "Ana"})
+
+        # Act
+        sin_token = self.client.get('/usuarios/mialias=ana')
+        estado = self.client.get('/replication').get_json()
+        con_token = self.client.get('/usuarios/mialias=ana', headers={"X-Seq-Minima": escritura.headers['X-Seq']})
+
+        # Assert
+        self.assertEqual(sin_token.status_code, 404)
+        self.assertEqual(estado["rol"], "replica")
+        self.assertGreater(estado["atraso_bytes"], 0)
+        self.assertEqual(con_token.status_code, 200)
+        self.assertEqual(con_token.headers['X-Seq'], escritura.headers['X-Seq'])
+        self.assertEqual(self.client.get('/replication').get_json()["atraso_bytes"], 0)
+        self.assertEqual(self.client_primario.get('/replication').get_json(), {"rol": "primario", "seq": 1})
+
+    def test_replica_rechaza_cambios_y_seq_inalcanzable(self):
+        """
+        CASO DE ERROR:
+        Prueba que la réplica rechace los cambios y responda 503 si el cambio pedido no llega a tiempo
+        """
+        # Act
+        with patch.object(controller.Config, 'ESPERA_SEQ_MINIMA', 0):
+            inalcanzable = self.client.get('/tasks', headers={"X-Seq-Minima": "7"})
+        cambio = self.client.post('/usuarios', json={"contacto": "ana", "nombre": "Ana"})
+
+        # Assert
+        self.assertEqual(inalcanzable.status_code, 503)
+        self.assertEqual(self.client.get('/tasks', headers={"X-Seq-Minima": "siete"}).status_code, 422)
+        self.assertEqual(cambio.status_code, 403)
+        self.assertIsNone(self.replica.get_usuario_por_alias("ana"))
+
+
+class TestUsuarioPaginado(ControllerTestCase):
+    """Pruebas para la vista paginada de GET /usuarios/mialias=<alias>"""
+
+    def setUp(self):
+        super().setUp()
+        self.crear_usuario("ana")
+        self.ids = [self.crear_tarea("ana", f"T{i}") for i in range(3)]
+
+    def test_sin_parametros_conserva_respuesta(self):
+        """
+        Prueba que sin parámetros de paginación la respuesta sea la de siempre
+        """
+        # Act
+        respuesta = self.client.get('/usuarios/mialias=ana')
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.get_json(), self.data_handler.get_usuario_por_alias("ana").to_dict())
+
+    def test_paginas_con_cursor(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que limit, after y fields devuelvan la página pedida
+        """
+        # Act
+        primera = self.client.get('/usuarios/mialias=ana?limit=2&fields=id,estado').get_json()
+        segunda = self.client.get(f'/usuarios/mialias=ana?limit=2&after={primera["siguiente"]}').get_json()
+
+        # Assert
+        self.assertEqual(primera["tareas_asignadas"], [{"id": i, "estado": "Nueva"} for i in self.ids[:2]])
+        self.assertEqual([t["id"] for t in segunda["tareas_asignadas"]], self.ids[2:])
+        self.assertIsNone(segunda["siguiente"])
+
+    def test_parametros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba los códigos de error de la vista paginada
+        """
+        # Act & Assert
+        self.assertEqual(self.client.get('/usuarios/mialias=nadie?limit=2').status_code, 404)
+        self.assertEqual(self.client.get('/usuarios/mialias=ana?limit=dos').status_code, 422)
+        self.assertEqual(self.client.get('/usuarios/mialias=ana?estado=Cerrada').status_code, 422)
+        self.assertEqual(self.client.get('/usuarios/mialias=ana?after=0:otro').status_code, 422)
+
+
+class TestConsultaTareas(ControllerTestCase):
+    """Pruebas para GET /tasks"""
+
+    def test_paginar_con_filtros(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que GET /tasks filtre por estado y usuario y pagine con el cursor en orden de fecha
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        self.crear_usuario("beto")
+        ids = [self.crear_tarea("ana", nombre=f"T{i}") for i in range(5)]
+        self.crear_tarea("beto")
+        for task_id in ids[1:]:
+            self.client.post(f'/tasks/{task_id}', json={"estado": "Progreso"})
+
+        # Act
+        primera = self.client.get('/tasks?estado=Progreso&usuario=ana&limit=3&fields=id,estado').get_json()
+        segunda = self.client.get(f'/tasks?estado=Progreso&usuario=ana&limit=3&after={primera["siguiente"]}')
+        descendente = self.client.get('/tasks?usuario=ana&sort=-fecha_esperada_fin').get_json()
+
+        # Assert
+        self.assertEqual([tarea["id"] for tarea in primera["tareas"]], ids[1:4])
+        self.assertEqual(primera["tareas"][0], {"id": ids[1], "estado": "Progreso"})
+        self.assertEqual([tarea["id"] for tarea in segunda.get_json()["tareas"]], ids[4:])
+        self.assertIsNone(segunda.get_json()["siguiente"])
+        self.assertEqual([tarea["id"] for tarea in descendente["tareas"]], ids[::-1])
+
+    def test_parametros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba que GET /tasks responda 422 ante parámetros inválidos
+        """
+        # Act
+        respuestas = [self.client.get(ruta) for ruta in
+                      ('/tasks?limit=diez', '/tasks?rol=gerencia', '/tasks?desde=ayer', '/tasks?sort=nombre')]
+
+        # Assert
+        self.assertEqual([respuesta.status_code for respuesta in respuestas], [422] * 4)
+
+
+class TestEtag(ControllerTestCase):
+    """Pruebas para las respuestas condicionales con ETag"""
+
+    def test_usuario_responde_304_si_no_cambio(self):
+        """
+        Prueba que If-None-Match con el ETag vigente devuelva 304 y que tras un cambio se devuelva 200
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        task_id = self.crear_tarea("ana")
+        etag = self.client.get('/usuarios/mialias=ana').headers['ETag']
+
+        # Act
+        sin_cambios = self.client.get('/usuarios/mialias=ana', headers={"If-None-Match": etag})
+        self.client.post(f'/tasks/{task_id}', json={"estado": "Progreso"})
+        con_cambios = self.client.get('/usuarios/mialias=ana', headers={"If-None-Match": etag})
+
+        # Assert
+        self.assertEqual(sin_cambios.status_code, 304)
+        self.assertEqual(sin_cambios.data, b'')
+        self.assertEqual(con_cambios.status_code, 200)
+        self.assertEqual(con_cambios.get_json()["tareas_asignadas"][0]["estado"], "Progreso")
+
+    def test_otras_consultas_llevan_etag(self):
+        """
+        Prueba que el resto de las consultas GET también respondan 304 con el ETag vigente
+        """
+        # Arrange
+        etag = self.client.get('/tasks/topological-order').headers['ETag']
+
+        # Act
+        respuesta = self.client.get('/tasks/topological-order', headers={"If-None-Match": etag})
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 304)
+
+
+class TestIfMatch(ControllerTestCase):
+    """Pruebas para las modificaciones condicionadas con If-Match"""
+
+    def setUp(self):
+        super().setUp()
+        self.crear_usuario("ana")
+        self.crear_usuario("beto")
+        self.task_id = self.crear_tarea("ana")
+
+    def test_get_tarea(self):
+        """
+        Prueba que GET /tasks/<id> devuelva la tarea con su ETag y 404 si no existe
+        """
+        # Act
+        respuesta = self.client.get(f'/tasks/{self.task_id}')
+        inexistente = self.client.get('/tasks/no-existe')
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.get_json()["id"], self.task_id)
+        self.assertEqual(respuesta.get_json()["usuarios_asignados"][0]["usuario"], "ana")
+        self.assertTrue(respuesta.headers['ETag'])
+        self.assertEqual(inexistente.status_code, 404)
+
+    def test_if_match_vigente(self):
+        """
+        CASO DE ÉXITO: Prueba que un cambio con el ETag vigente se aplique y cambie el ETag
+        """
+        # Arrange
+        etag = self.client.get(f'/tasks/{self.task_id}').headers['ETag']
+
+        # Act
+        respuesta = self.client.post(f'/tasks/{self.task_id}', json={"estado": "Progreso"},
+                                     headers={"If-Match": etag})
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(self.client.get(f'/tasks/{self.task_id}').headers['ETag'], etag)
+
+    def test_if_match_desactualizado(self):
+        """
+        CASO DE ERROR: Prueba que un ETag viejo devuelva 409 en todos los endpoints sin aplicar el cambio
+        """
+        # Arrange
+        otra_id = self.crear_tarea("ana")
+        etag = self.client.get(f'/tasks/{self.task_id}').headers['ETag']
+        self.client.post(f'/tasks/{self.task_id}', json={"estado": "Progreso"})
+
+        # Act
+        estado = self.client.post(f'/tasks/{self.task_id}', json={"estado": "Finalizada"},
+                                  headers={"If-Match": etag})
+        usuarios = self.client.post(f'/tasks/{self.task_id}/users',
+                                    json={"usuario": "beto", "rol": "analisis", "accion": "adicionar"},
+                                    headers={"If-Match": etag})
+        dependencias = self.client.post(f'/tasks/{self.task_id}/dependencies',
+                                        json={"dependencytaskid": otra_id, "accion": "adicionar"},
+                                        headers={"If-Match": etag})
+
+        # Assert
+        self.assertEqual([estado.status_code, usuarios.status_code, dependencias.status_code], [409, 409, 409])
+        tarea = self.client.get(f'/tasks/{self.task_id}').get_json()
+        self.assertEqual(tarea["estado"], "Progreso")
+        self.assertEqual(len(tarea["usuarios_asignados"]), 1)
+        self.assertEqual(tarea["dependencias"], [])
+
+    def test_if_match_asterisco(self):
+        """
+        Prueba que If-Match: * no condicione el cambio
+        """
+        # Act
+        respuesta = self.client.post(f'/tasks/{self.task_id}', json={"estado": "Progreso"},
+                                     headers={"If-Match": "*"})
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 200)
+
+
+class TestConcurrencia(ControllerTestCase):
+    """Pruebas de carga con varios hilos sobre el mismo DataHandler"""
+
+    HILOS = 8
+    ITERACIONES = 15
+
+    def test_hilos_concurrentes(self):
+        """
+        Prueba que escrituras y lecturas concurrentes no fallen, no pierdan cambios con
+        reintentos por If-Match y dejen los índices consistentes
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        compartida = self.crear_tarea("ana")
+        for i in range(self.HILOS):
+            self.crear_usuario(f"usuario{i}")
+        codigos = []
+        conflictos = []
+
+        def trabajar(numero):
+            client = self.app.test_client()
+            alias = f"usuario{numero}"
+            anterior = None
+            for i in range(self.ITERACIONES):
+                respuestas = [
+                    client.post('/tasks', json={"nombre": f"T{i}", "descripcion": "D", "usuario": alias,
+                                                "rol": "programacion"}),
+                    client.get('/usuarios/mialias=ana'),
+                    client.get(f'/usuarios/mialias={alias}?limit=5&fields=id,estado'),
+                    client.get('/tasks/topological-order')
+                ]
+                task_id = respuestas[0].get_json()["id"]
+                respuestas.append(client.post(f'/tasks/{task_id}', json={"estado": "Progreso"}))
+                if anterior:
+                    respuestas.append(client.post(f'/tasks/{task_id}/dependencies',
+                                                  json={"dependencytaskid": anterior, "accion": "adicionar"}))
+                    respuestas.append(client.post(f'/tasks/{anterior}/users',
+                                                  json={"usuario": "ana", "rol": "analisis", "accion": "adicionar"}))
+                anterior = task_id
+                codigos.extend(respuesta.status_code for respuesta in respuestas)
+
+            # Actualizacion optimista: leer, modificar con If-Match y reintentar si hubo conflicto
+            while True:
+                etag = client.get(f'/tasks/{compartida}').headers['ETag']
+                respuesta = client.post(f'/tasks/{compartida}/users',
+                                        json={"usuario": alias, "rol": "analisis", "accion": "adicionar"},
+                                        headers={"If-Match": etag})
+                codigos.append(respuesta.status_code)
+                if respuesta.status_code != 409:
+                    break
+                conflictos.append(alias)
+
+        hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(self.HILOS)]
+
+        # Act
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        # Assert
+        self.assertEqual(set(codigos) - {409}, {200, 201})
+        self.assertEqual(len(conflictos), codigos.count(409))
+        self.assertEqual(self.data_handler.verificar_indices(), [])
+        self.assertEqual(len(self.data_handler.tareas), 1 + self.HILOS * self.ITERACIONES)
+        asignados = self.client.get(f'/tasks/{compartida}').get_json()["usuarios_asignados"]
+        self.assertEqual(len(asignados), 1 + self.HILOS)
+        ana = self.client.get('/usuarios/mialias=ana').get_json()
+        self.assertEqual(len(ana["tareas_asignadas"]), 1 + self.HILOS * (self.ITERACIONES - 1))
+        self.assertEqual(len(self.data_handler.get_orden_topologico()), len(self.data_handler.tareas))
+
+
+class TestEsperarCommit(ControllerTestCase):
+    """Pruebas para la cabecera X-Esperar-Commit"""
+
+    def test_cabecera_espera_commit(self):
+        """
+        Prueba que una petición con X-Esperar-Commit espere a que su cambio esté persistido
+        """
+        # Arrange
+        with patch.object(self.data_handler, 'esperar_commit') as esperar_commit:
+            # Act
+            self.client.post('/usuarios', json={"contacto": "ana", "nombre": "Ana"},
+                             headers={"X-Esperar-Commit": "1"})
+            self.crear_usuario("beto")
+
+        # Assert
+        esperar_commit.assert_called_once_with()
+
+
+class TestMetricas(ControllerTestCase):
+    """Pruebas para el endpoint /metrics"""
+
+    def test_metricas_por_ruta_y_almacenamiento(self):
+        """
+        Prueba que /metrics exponga la latencia por ruta (sin el id concreto) y los bytes escritos
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        task_id = self.crear_tarea("ana")
+        self.client.get(f'/tasks/{task_id}')
+
+        # Act
+        respuesta = self.client.get('/metrics')
+        texto = respuesta.get_data(as_text=True)
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.content_type.startswith('text/plain'))
+        self.assertIn('tareas_peticion_segundos_bucket{metodo="GET",ruta="/tasks/<task_id>",codigo="200"', texto)
+        self.assertNotIn(task_id, texto)
+        self.assertRegex(texto, r'tareas_bytes_escritos_total\{destino="\w+"\} [1-9]')
+        self.assertIn('tareas_operacion_segundos_count{operacion="get_tarea_json"}', texto)
+
+
+class TestReportes(ControllerTestCase):
+    """Pruebas para los endpoints /reports"""
+
+    def test_reportes_con_etag(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que los reportes respondan con ETag y 304 mientras no haya cambios
+        """
+        # Arrange
+        self.crear_usuario("ana")
+        self.crear_tarea("ana", rol="infra")
+        rutas = ['/reports/workload?fecha=2030-01-01', '/reports/breakdown', '/reports/overdue?fecha=2030-01-01',
+                 '/reports/throughput?periodo=mes']
+
+        # Act
+        respuestas = [self.client.get(ruta) for ruta in rutas]
+        condicionales = [self.client.get(ruta, headers={"If-None-Match": respuesta.headers['ETag']})
+                         for ruta, respuesta in zip(rutas, respuestas)]
+
+        # Assert
+        self.assertEqual([respuesta.status_code for respuesta in respuestas], [200] * 4)
+        self.assertEqual([respuesta.status_code for respuesta in condicionales], [304] * 4)
+        carga, desglose, atrasos, rendimiento = [respuesta.get_json() for respuesta in respuestas]
+        self.assertEqual(carga["usuarios"][0]["usuario"], "ana")
+        self.assertEqual(carga["usuarios"][0]["atrasadas"], 1)
+        self.assertEqual(desglose["asignaciones_por_rol"]["infra"]["Nueva"], 1)
+        self.assertEqual(atrasos["total"], 1)
+        self.assertEqual(sum(fila["vencen"] for fila in rendimiento["periodos"]), 1)
+
+    def test_parametros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba que límites, fechas y periodos inválidos devuelvan 422
+        """
+        # Act
+        respuestas = [self.client.get(ruta) for ruta in ('/reports/workload?limit=dos', '/reports/workload?limit=0',
+                                                         '/reports/overdue?fecha=ayer',
+                                                         '/reports/throughput?periodo=anio',
+                                                         '/reports/throughput?desde=2026-02-30')]
+
+        # Assert
+        self.assertEqual([respuesta.status_code for respuesta in respuestas], [422] * 5)
+
+
+
+class TestPrecarga(unittest.TestCase):
+    """Pruebas para la app sin datos cargados y la carga en segundo plano"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, 'data.json')
+        handler = DataHandler(self.ruta)
+        handler.crear_usuario("ana", "Ana")
+        _, self.tarea = handler.crear_tarea("T", "Descripción", "ana", "programacion")
+        handler.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_importar_no_lee_datos(self):
+        """
+        Prueba que importar el controlador no cree el DataHandler ni lea data.json
+        """
+        # Arrange
+        codigo = ("import sys; sys.path.insert(0, sys.argv[1]); import controller; "
+                  "print(controller.app.extensions['tareas']._data_handler)")
+        src = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+        # Act
+        salida = subprocess.run([sys.executable, '-c', codigo, src], cwd=self.directorio,
+                                capture_output=True, text=True, check=True).stdout
+        os.remove(self.ruta)
+        subprocess.run([sys.executable, '-c', codigo, src], cwd=self.directorio, check=True, capture_output=True)
+
+        # Assert
+        self.assertEqual(salida.strip(), "None")
+        self.assertFalse(os.path.exists(self.ruta))
+
+    def test_consultas_durante_la_precarga(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que mientras se cargan los datos /ready responda 503, las tareas ya cargadas se
+        consulten y lo que necesita los datos completos responda 503 hasta que termine la carga
+        """
+        # Arrange
+        handler = DataHandler(self.ruta, cargar=False)
+        cargar = handler.almacenamiento.cargar
+        cargados = threading.Event()
+        continuar = threading.Event()
+
+        def cargar_y_esperar(data_handler):
+            cargar(data_handler)
+            cargados.set()
+            continuar.wait(10)
+
+        client = controller.crear_app(data_handler=handler).test_client()
+
+        # Act
+        with patch.object(handler.almacenamiento, 'cargar', cargar_y_esperar):
+            hilo = handler.precargar()
+            cargados.wait(10)
+            durante = {
+                'ready': client.get('/ready'),
+                'tarea': client.get(f'/tasks/{self.tarea.id}'),
+                'otra tarea': client.get('/tasks/no-existe'),
+                'usuario': client.get('/usuarios/mialias=ana'),
+                'crear': client.post('/usuarios', json={"contacto": "beto", "nombre": "Beto"}),
+                'metrics': client.get('/metrics'),
+            }
+            continuar.set()
+            hilo.join(10)
+        despues = client.get('/ready')
+
+        # Assert
+        self.assertEqual(durante['ready'].status_code, 503)
+        self.assertEqual(durante['ready'].get_json()["estado"], "cargando")
+        self.assertEqual(durante['tarea'].status_code, 200)
+        self.assertEqual(durante['tarea'].get_json()["nombre"], "T")
+        for nombre in ('otra tarea', 'usuario', 'crear'):
+            self.assertEqual(durante[nombre].status_code, 503, nombre)
+        self.assertEqual(durante['metrics'].status_code, 200)
+        self.assertEqual(despues.status_code, 200)
+        self.assertEqual(despues.get_json(), {"estado": "listo", "usuarios": 1, "tareas": 1})
+        self.assertEqual(client.get('/usuarios/mialias=ana').status_code, 200)
+        handler.cerrar()
+
+    def test_error_en_la_precarga(self):
+        """
+        CASO DE ERROR:
+        Prueba que si la carga falla /ready lo informe y las demás rutas sigan respondiendo 503
+        """
+        # Arrange
+        handler = DataHandler(self.ruta, cargar=False)
+        client = controller.crear_app(data_handler=handler).test_client()
+
+        # Act
+        with patch.object(handler.almacenamiento, 'cargar', side_effect=OSError("disco no disponible")), \
+                self.assertLogs('data_handler', level='ERROR'):
+            handler.precargar().join(10)
+        respuesta = client.get('/ready')
+
+        # Assert
+        self.assertEqual(respuesta.status_code, 500)
+        self.assertEqual(respuesta.get_json()["estado"], "error")
+        self.assertIn("disco no disponible", respuesta.get_json()["error"])
+        self.assertEqual(client.get('/usuarios/mialias=ana').status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,686 @@
+import datetime
+import json
+import random
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# Directorio src al path, igual que app.py, para importar data_handler y sus dependencias
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_handler import DataHandler
+from foto import FotoEstado
+from storage.json_storage import AlmacenamientoJSON
+
+
+class TestDataHandlerJournal(unittest.TestCase):
+    """Pruebas para la persistencia en modo journal"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        self.handlers = []
+
+    def tearDown(self):
+        for handler in self.handlers:
+            handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _nuevo_handler(self, **kwargs):
+        handler = DataHandler(self.filename, modo_persistencia='journal', **kwargs)
+        self.handlers.append(handler)
+        return handler
+
+    def _poblar(self, handler):
+        handler.crear_usuario("ana", "Ana")
+        handler.crear_usuario("beto", "Beto")
+        _, tarea = handler.crear_tarea("T1", "Primera", "ana", "programacion")
+        _, otra = handler.crear_tarea("T2", "Segunda", "beto", "diseño")
+        handler.cambiar_estado_tarea(tarea.id, "Progreso")
+        handler.gestionar_usuario_en_tarea(tarea.id, "beto", "infra", "adicionar")
+        handler.gestionar_usuario_en_tarea(tarea.id, "ana", "programacion", "remover")
+        handler.gestionar_dependencia(otra.id, tarea.id, "adicionar")
+        return tarea, otra
+
+    def test_cambios_se_agregan_al_journal_sin_reescribir_snapshot(self):
+        """
+        CASO DE ÉXITO:
+        Cada cambio agrega una línea al journal y no crea data.json
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+
+        # Act
+        self._poblar(handler)
+
+        # Assert
+        self.assertFalse(os.path.exists(self.filename))
+        with open(self.filename + '.log') as f:
+            self.assertEqual(len(f.readlines()), 8)
+        self.assertEqual(handler.seq, 8)
+
+    def test_load_data_reproduce_journal(self):
+        """
+        Prueba que al recargar se reconstruya el mismo estado a partir del journal
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        tarea, otra = self._poblar(handler)
+        esperado = handler._serializar()
+        handler.cerrar()
+
+        # Act
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(recargado._serializar(), esperado)
+        self.assertEqual(recargado.get_tarea_por_id(tarea.id).estado, "Progreso")
+        self.assertEqual(recargado.get_tarea_por_id(otra.id).dependencias, [tarea.id])
+        self.assertEqual(recargado.get_usuario_por_alias("ana").tareasAsociadas, [])
+
+    def test_compactacion_al_superar_umbral(self):
+        """
+        Prueba que al superar el umbral se escriba un snapshot y el journal se vacíe
+        """
+        # Arrange
+        handler = self._nuevo_handler(umbral_compactacion=200)
+
+        # Act
+        self._poblar(handler)
+        handler.cerrar()
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertTrue(os.path.exists(self.filename))
+        self.assertFalse(os.path.exists(self.filename + '.log.1'))
+        with open(self.filename + '.log') as f:
+            self.assertLess(len(f.readlines()), 8)
+        self.assertEqual(recargado._serializar(), handler._serializar())
+
+    def test_compactacion_serializa_en_segundo_plano(self):
+        """
+        Prueba que compactar no serialice en el hilo que la pide y que el snapshot sea el estado
+        del momento de la compactación aunque las tareas cambien mientras se escribe
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        tarea, otra = self._poblar(handler)
+        esperado = handler._serializar()
+        continuar = threading.Event()
+        serializar = FotoEstado.serializar
+
+        def serializar_despues(foto):
+            continuar.wait(10)
+            return serializar(foto)
+
+        # Act
+        with patch.object(FotoEstado, 'serializar', serializar_despues):
+            handler.almacenamiento.compactar(handler)
+            handler.cambiar_estado_tarea(tarea.id, "Finalizada")
+            handler.gestionar_dependencia(otra.id, tarea.id, "remover")
+            continuar.set()
+            handler.cerrar()
+        with open(self.filename) as f:
+            snapshot = json.load(f)
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(snapshot, esperado)
+        self.assertEqual(handler._exportaciones, [])
+        self.assertEqual(recargado._serializar(), handler._serializar())
+        self.assertEqual(recargado.get_tarea_por_id(tarea.id).estado, "Finalizada")
+
+    def test_linea_incompleta_se_ignora(self):
+        """
+        CASO DE ERROR:
+        Una última línea a medio escribir (caída del proceso) no impide la carga
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        handler.crear_usuario("ana", "Ana")
+        handler.cerrar()
+        with open(self.filename + '.log', 'a') as f:
+            f.write('{"seq":2,"op":"crear_usu')
+
+        # Act
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(recargado.seq, 1)
+        self.assertIsNotNone(recargado.get_usuario_por_alias("ana"))
+
+        # Los cambios posteriores no quedan pegados a la línea descartada
+        recargado.crear_usuario("beto", "Beto")
+        recargado.cerrar()
+        self.assertIsNotNone(self._nuevo_handler().get_usuario_por_alias("beto"))
+
+    def test_modo_snapshot_conserva_formato(self):
+        """
+        Prueba que el modo por defecto siga reescribiendo data.json en cada cambio
+        """
+        # Arrange
+        handler = DataHandler(self.filename)
+
+        # Act
+        handler.crear_usuario("ana", "Ana")
+        recargado = DataHandler(self.filename)
+
+        # Assert
+        self.assertFalse(os.path.exists(self.filename + '.log'))
+        self.assertIsNotNone(recargado.get_usuario_por_alias("ana"))
+        self.assertEqual(recargado.seq, 1)
+
+
+class TestDataHandlerIndices(unittest.TestCase):
+    """Pruebas para los índices primarios de DataHandler"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_busquedas_por_indice(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que las búsquedas por alias e id devuelvan los objetos creados
+        """
+        # Arrange
+        handler = DataHandler(self.filename)
+        _, usuario = handler.crear_usuario("ana", "Ana")
+        _, tarea = handler.crear_tarea("T1", "Primera", "ana", "programacion")
+
+        # Act & Assert
+        self.assertIs(handler.get_usuario_por_alias("ana"), usuario)
+        self.assertIs(handler.get_tarea_por_id(tarea.id), tarea)
+        self.assertIsNone(handler.get_usuario_por_alias("nadie"))
+        self.assertIsNone(handler.get_tarea_por_id("no-existe"))
+        self.assertEqual(handler.verificar_indices(), [])
+
+    def test_indices_reconstruidos_al_cargar(self):
+        """
+        Prueba que load_data reconstruya los índices y las referencias entre objetos
+        """
+        # Arrange
+        handler = DataHandler(self.filename)
+        handler.crear_usuario("ana", "Ana")
+        _, tarea = handler.crear_tarea("T1", "Primera", "ana", "programacion")
+
+        # Act
+        recargado = DataHandler(self.filename)
+
+        # Assert
+        self.assertEqual(recargado.verificar_indices(), [])
+        self.assertIs(
+            recargado.get_usuario_por_alias("ana").tareasAsociadas[0],
+            recargado.get_tarea_por_id(tarea.id)
+        )
+
+    def test_verificar_indices_detecta_inconsistencia(self):
+        """
+        CASO DE ERROR:
+        Prueba que la verificación detecte un objeto que no está en el índice
+        """
+        # Arrange
+        handler = DataHandler(self.filename)
+        handler.crear_usuario("ana", "Ana")
+        del handler._usuarios_por_alias["ana"]
+
+        # Act
+        errores = handler.verificar_indices()
+
+        # Assert
+        self.assertEqual(len(errores), 2)
+
+
+class TestDataHandlerPaginacion(unittest.TestCase):
+    """Pruebas para la vista paginada de las tareas de un usuario"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        self.handler = DataHandler(self.filename)
+        self.handler.crear_usuario("ana", "Ana")
+        self.tareas = [self.handler.crear_tarea(f"T{i}", "Descripción", "ana", "programacion")[1] for i in range(7)]
+        for tarea in self.tareas[::2]:
+            self.handler.cambiar_estado_tarea(tarea.id, "Progreso")
+
+    def tearDown(self):
+        self.handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _recorrer(self, limite, **kwargs):
+        paginas = []
+        cursor = None
+        while True:
+            resultado, pagina = self.handler.get_tareas_de_usuario("ana", limite, cursor=cursor, **kwargs)
+            self.assertTrue(resultado)
+            paginas.append([tarea["id"] for tarea in pagina["tareas_asignadas"]])
+            cursor = pagina["siguiente"]
+            if cursor is None:
+                return paginas
+
+    def test_recorrer_todas_las_paginas(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que recorrer el cursor devuelva todas las tareas una sola vez y en orden
+        """
+        # Act
+        paginas = self._recorrer(3)
+
+        # Assert
+        self.assertEqual([len(pagina) for pagina in paginas], [3, 3, 1])
+        self.assertEqual(sum(paginas, []), [tarea.id for tarea in self.tareas])
+
+    def test_filtro_por_estado_y_campos(self):
+        """
+        Prueba el filtro por estado y la proyección de campos
+        """
+        # Act
+        paginas = self._recorrer(2, estado="Progreso")
+        _, pagina = self.handler.get_tareas_de_usuario("ana", 2, campos=["id", "fecha_esperada_fin"])
+
+        # Assert
+        self.assertEqual(sum(paginas, []), [tarea.id for tarea in self.tareas[::2]])
+        self.assertEqual(set(pagina["tareas_asignadas"][0]), {"id", "fecha_esperada_fin"})
+        self.assertEqual(pagina["tareas_asignadas"][0]["fecha_esperada_fin"],
+                         self.tareas[0].fechaEsperadaFin.strftime("%Y-%m-%d %H:%M:%S"))
+
+    def test_cursor_tras_remover_tareas_anteriores(self):
+        """
+        Prueba que el cursor siga siendo válido si se remueven tareas anteriores a él
+        """
+        # Arrange
+        _, pagina = self.handler.get_tareas_de_usuario("ana", 3)
+        self.handler.crear_usuario("beto", "Beto")
+        for tarea in self.tareas[:2]:
+            self.handler.gestionar_usuario_en_tarea(tarea.id, "beto", "infra", "adicionar")
+            self.handler.gestionar_usuario_en_tarea(tarea.id, "ana", "programacion", "remover")
+
+        # Act
+        resultado, siguiente = self.handler.get_tareas_de_usuario("ana", 3, cursor=pagina["siguiente"])
+
+        # Assert
+        self.assertTrue(resultado)
+        self.assertEqual([tarea["id"] for tarea in siguiente["tareas_asignadas"]],
+                         [tarea.id for tarea in self.tareas[3:6]])
+
+    def test_cursor_tras_compactar_las_tareas_del_usuario(self):
+        """
+        Prueba que el cursor siga siendo válido cuando las remociones compactan las tareas del usuario
+        """
+        # Arrange
+        _, pagina = self.handler.get_tareas_de_usuario("ana", 3)
+        antes = self.handler.get_usuario_por_alias("ana").tareasAsociadas._elementos
+        for tarea in self.tareas[:2] + self.tareas[3:5]:
+            self.handler.gestionar_usuario_en_tarea(tarea.id, "ana", "programacion", "remover")
+
+        # Act
+        resultado, siguiente = self.handler.get_tareas_de_usuario("ana", 3, cursor=pagina["siguiente"])
+
+        # Assert
+        self.assertTrue(resultado)
+        self.assertIsNot(self.handler.get_usuario_por_alias("ana").tareasAsociadas._elementos, antes)
+        self.assertEqual([tarea["id"] for tarea in siguiente["tareas_asignadas"]],
+                         [tarea.id for tarea in self.tareas[5:]])
+        self.assertIsNone(siguiente["siguiente"])
+
+    def test_parametros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba que se rechacen cursores, límites, estados y campos inválidos
+        """
+        # Act & Assert
+        self.assertEqual(self.handler.get_tareas_de_usuario("ana", 2, cursor="3:no-existe"), (False, "Cursor inválido"))
+        self.assertEqual(self.handler.get_tareas_de_usuario("ana", 2, cursor="basura"), (False, "Cursor inválido"))
+        self.assertFalse(self.handler.get_tareas_de_usuario("ana", 0)[0])
+        self.assertFalse(self.handler.get_tareas_de_usuario("ana", 2, estado="Cerrada")[0])
+        self.assertIn("Campos inválidos: clave", self.handler.get_tareas_de_usuario("ana", 2, campos=["clave"])[1])
+        self.assertEqual(self.handler.get_tareas_de_usuario("nadie", 2), (False, "Usuario no encontrado"))
+
+    def test_proyeccion_no_hidrata_tareas_diferidas(self):
+        """
+        Prueba que pedir solo id, nombre y estado no hidrate las tareas cargadas en diferido
+        """
+        # Arrange
+        handler = DataHandler(self.filename, almacenamiento=AlmacenamientoJSON(self.filename, carga_diferida=True))
+
+        # Act
+        _, pagina = handler.get_tareas_de_usuario("ana", 5, campos=["id", "nombre", "estado"])
+
+        # Assert
+        self.assertEqual(len(pagina["tareas_asignadas"]), 5)
+        self.assertFalse(any(tarea.hidratada for tarea in handler.get_usuario_por_alias("ana").tareasAsociadas))
+        handler.cerrar()
+
+
+class TestDataHandlerConsultaTareas(unittest.TestCase):
+    """Pruebas para la consulta de tareas con filtros e índices"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        aleatorio = random.Random(3)
+        usuarios = ["ana", "beto", "carla"]
+        tareas = []
+        for i in range(60):
+            asignados = aleatorio.sample(usuarios, aleatorio.randint(1, 2))
+            tareas.append({
+                "id": f"t{i:02d}",
+                "nombre": f"T{i}",
+                "descripcion": "Descripción",
+                "estado": aleatorio.choice(["Nueva", "Progreso", "Finalizada"]),
+                # Varias tareas comparten fecha: el id desempata
+                "fecha_esperada_fin": f"2025-01-{aleatorio.randint(1, 20):02d} 12:00:00",
+                "usuarios_asignados": [
+                    {"usuario": alias, "rol": aleatorio.choice(["analisis", "infra"]),
+                     "fecha_asignacion": "2025-01-01 00:00:00"} for alias in asignados
+                ],
+                "dependencias": []
+            })
+        with open(self.filename, 'w') as f:
+            json.dump({"usuarios": [{"alias": alias, "nombre": alias.title()} for alias in usuarios],
+                       "tareas": tareas}, f)
+        self.handler = DataHandler(self.filename)
+
+    def tearDown(self):
+        self.handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _recorrer(self, limite, **kwargs):
+        ids = []
+        cursor = None
+        while True:
+            resultado, pagina = self.handler.consultar_tareas(limite, cursor=cursor, **kwargs)
+            self.assertTrue(resultado, pagina)
+            self.assertLessEqual(len(pagina["tareas"]), limite)
+            ids.extend(tarea["id"] for tarea in pagina["tareas"])
+            cursor = pagina["siguiente"]
+            if cursor is None:
+                return ids
+
+    def _esperadas(self, filtro, descendente=False):
+        tareas = [tarea for tarea in self.handler.tareas if filtro(tarea)]
+        tareas.sort(key=lambda tarea: (tarea.fechaEsperadaFin, tarea.id), reverse=descendente)
+        return [tarea.id for tarea in tareas]
+
+    @staticmethod
+    def _tiene(tarea, alias=None, rol=None):
+        return any((alias is None or a.usuarioAsignado.alias == alias) and (rol is None or a.rol == rol)
+                   for a in tarea.usuariosAsignados)
+
+    def test_filtros_y_orden(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que cada combinación de filtros devuelva, paginando, lo mismo que recorrer todas las tareas
+        """
+        # Arrange
+        desde, hasta = datetime.datetime(2025, 1, 5), datetime.datetime(2025, 1, 12, 12)
+        casos = [
+            ({}, lambda t: True),
+            ({"estado": "Progreso"}, lambda t: t.estado == "Progreso"),
+            ({"rol": "infra"}, lambda t: self._tiene(t, rol="infra")),
+            ({"alias": "beto"}, lambda t: self._tiene(t, alias="beto")),
+            ({"alias": "ana", "rol": "analisis", "estado": "Nueva"},
+             lambda t: t.estado == "Nueva" and self._tiene(t, "ana", "analisis")),
+            ({"desde": "2025-01-05", "hasta": "2025-01-12 12:00:00", "estado": "Finalizada"},
+             lambda t: t.estado == "Finalizada" and desde <= t.fechaEsperadaFin <= hasta),
+        ]
+
+        for filtros, filtro in casos:
+            for orden in ("fecha_esperada_fin", "-fecha_esperada_fin"):
+                with self.subTest(filtros=filtros, orden=orden):
+                    # Act
+                    ids = self._recorrer(4, orden=orden, **filtros)
+
+                    # Assert
+                    self.assertEqual(ids, self._esperadas(filtro, descendente=orden.startswith('-')))
+
+    def test_indices_se_mantienen_con_los_cambios(self):
+        """
+        Prueba que los cambios de estado y de asignaciones se reflejen en consultas posteriores
+        """
+        # Arrange
+        self._recorrer(10, estado="Nueva")
+        nueva = next(tarea for tarea in self.handler.tareas if tarea.estado == "Nueva")
+        sin_carla = next(tarea for tarea in self.handler.tareas if not self._tiene(tarea, alias="carla"))
+
+        # Act
+        self.handler.cambiar_estado_tarea(nueva.id, "Progreso")
+        self.handler.gestionar_usuario_en_tarea(sin_carla.id, "carla", "diseño", "adicionar")
+        _, creada = self.handler.crear_tarea("Nueva", "Descripción", "beto", "diseño")
+        alias_quitado = sin_carla.usuariosAsignados[0].usuarioAsignado.alias
+        self.handler.gestionar_usuario_en_tarea(sin_carla.id, alias_quitado, "", "remover")
+
+        # Assert
+        self.assertNotIn(nueva.id, self._recorrer(50, estado="Nueva"))
+        self.assertIn(nueva.id, self._recorrer(50, estado="Progreso"))
+        self.assertEqual(self._recorrer(50, rol="diseño"), self._esperadas(lambda t: self._tiene(t, rol="diseño")))
+        self.assertIn(creada.id, self._recorrer(50, rol="diseño", alias="beto"))
+        self.assertNotIn(sin_carla.id, self._recorrer(50, alias=alias_quitado))
+
+    def test_no_hidrata_tareas_diferidas(self):
+        """
+        Prueba que filtrar por estado y rol sobre tareas cargadas en diferido no las hidrate
+        """
+        # Arrange
+        handler = DataHandler(self.filename, almacenamiento=AlmacenamientoJSON(self.filename, carga_diferida=True))
+
+        # Act
+        _, por_estado = handler.consultar_tareas(10, estado="Nueva", campos=["id", "nombre", "estado"])
+        _, por_rol = handler.consultar_tareas(10, rol="infra", campos=["id"], desde="2025-01-10")
+
+        # Assert
+        self.assertEqual(len(por_estado["tareas"]), 10)
+        self.assertEqual(len(por_rol["tareas"]), 10)
+        self.assertFalse(any(tarea.hidratada for tarea in handler.tareas))
+        handler.cerrar()
+
+    def test_parametros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba que se rechacen límites, estados, roles, órdenes, fechas y cursores inválidos
+        """
+        # Act & Assert
+        self.assertFalse(self.handler.consultar_tareas(0)[0])
+        self.assertFalse(self.handler.consultar_tareas(5, estado="Cerrada")[0])
+        self.assertFalse(self.handler.consultar_tareas(5, rol="gerencia")[0])
+        self.assertFalse(self.handler.consultar_tareas(5, orden="nombre")[0])
+        self.assertFalse(self.handler.consultar_tareas(5, desde="ayer")[0])
+        self.assertEqual(self.handler.consultar_tareas(5, cursor="basura"), (False, "Cursor inválido"))
+        self.assertEqual(self.handler.consultar_tareas(5, alias="nadie"), (True, {"tareas": [], "siguiente": None}))
+
+
+class TestDataHandlerCache(unittest.TestCase):
+    """Pruebas para la vista JSON cacheada de un usuario"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.handler = DataHandler(os.path.join(self.directorio, 'data.json'))
+        self.handler.crear_usuario("ana", "Ana")
+        self.handler.crear_usuario("beto", "Beto")
+        _, self.tarea = self.handler.crear_tarea("T1", "Primera", "ana", "programacion")
+        _, self.otra = self.handler.crear_tarea("T2", "Segunda", "ana", "diseño")
+
+    def tearDown(self):
+        self.handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _vista(self, alias="ana"):
+        datos, etag = self.handler.get_usuario_json(alias)
+        return json.loads(datos), etag
+
+    def test_vista_igual_a_to_dict_y_cacheada(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que la vista cacheada coincida con to_dict y que la segunda lectura sea un acierto
+        """
+        # Act
+        vista, etag = self._vista()
+        aciertos = self.handler.cache.aciertos
+        _, etag_repetido = self._vista()
+
+        # Assert
+        self.assertEqual(vista, self.handler.get_usuario_por_alias("ana").to_dict())
+        self.assertEqual(etag, etag_repetido)
+        self.assertEqual(self.handler.cache.aciertos, aciertos + 1)
+        self.assertIsNone(self.handler.get_usuario_json("nadie"))
+
+    def test_cambios_invalidan_la_vista(self):
+        """
+        Prueba que cambiar el estado o las asignaciones de una tarea invalide la vista de sus usuarios
+        """
+        # Arrange
+        _, etag_inicial = self._vista()
+
+        # Act
+        self.handler.cambiar_estado_tarea(self.tarea.id, "Progreso")
+        vista_estado, etag_estado = self._vista()
+        self.handler.gestionar_usuario_en_tarea(self.otra.id, "beto", "infra", "adicionar")
+        self.handler.gestionar_usuario_en_tarea(self.otra.id, "ana", "diseño", "remover")
+        vista_remover, _ = self._vista()
+        vista_beto, _ = self._vista("beto")
+
+        # Assert
+        self.assertNotEqual(etag_inicial, etag_estado)
+        self.assertEqual(vista_estado["tareas_asignadas"][0]["estado"], "Progreso")
+        self.assertEqual([t["id"] for t in vista_remover["tareas_asignadas"]], [self.tarea.id])
+        self.assertEqual([t["id"] for t in vista_beto["tareas_asignadas"]], [self.otra.id])
+
+    def test_solo_se_recodifica_la_tarea_modificada(self):
+        """
+        Prueba que al invalidarse la vista se reutilice el JSON de las tareas que no cambiaron
+        """
+        # Arrange
+        self._vista()
+        self.handler.cambiar_estado_tarea(self.tarea.id, "Progreso")
+        aciertos = self.handler.cache.aciertos
+
+        # Act
+        self._vista()
+
+        # Assert
+        self.assertEqual(self.handler.cache.aciertos, aciertos + 1)  # Solo la tarea T2
+
+    def test_recarga_vacia_la_cache(self):
+        """
+        Prueba que al recargar los datos no se sirvan vistas de las entidades anteriores
+        """
+        # Arrange
+        self._vista()
+
+        # Act
+        self.handler.load_data()
+
+        # Assert
+        self.assertEqual(len(self.handler.cache), 0)
+        self.assertEqual(self._vista()[0], self.handler.get_usuario_por_alias("ana").to_dict())
+
+
+class TestDataHandlerTransiciones(unittest.TestCase):
+    """Pruebas para las transiciones que respetan dependencias y la planificacion"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.handler = DataHandler(os.path.join(self.directorio, 'data.json'), exigir_dependencias=True)
+        self.handler.crear_usuario("ana", "Ana")
+        # c depende de b y b depende de a
+        self.a, self.b, self.c = [self.handler.crear_tarea(nombre, nombre, "ana", "programacion")[1]
+                                  for nombre in ("A", "B", "C")]
+        self.handler.gestionar_dependencia(self.b.id, self.a.id, "adicionar")
+        self.handler.gestionar_dependencia(self.c.id, self.b.id, "adicionar")
+
+    def tearDown(self):
+        self.handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_exigir_dependencias_finalizadas(self):
+        """
+        CASO DE ERROR:
+        Prueba que no se finalice una tarea con dependencias abiertas ni se reabra una con dependientes finalizados
+        """
+        # Act
+        resultado, mensaje = self.handler.cambiar_estado_tarea(self.b.id, "Finalizada")
+        self.handler.cambiar_estado_tarea(self.a.id, "Finalizada")
+        self.handler.cambiar_estado_tarea(self.b.id, "Finalizada")
+        reabierta, mensaje_reabrir = self.handler.cambiar_estado_tarea(self.a.id, "Progreso")
+
+        # Assert
+        self.assertFalse(resultado)
+        self.assertEqual(mensaje, f"Dependencias sin finalizar: {self.a.id}")
+        self.assertEqual(self.b.estado, "Finalizada")
+        self.assertFalse(reabierta)
+        self.assertEqual(mensaje_reabrir, f"Tareas dependientes finalizadas: {self.b.id}")
+
+    def test_transicionar_dependencias_en_orden(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que finalizar el subárbol de c cambie primero a, luego b y por último c, en una sola escritura
+        """
+        # Arrange
+        self.handler.cambiar_estado_tarea(self.a.id, "Finalizada")
+        seq = self.handler.seq
+
+        # Act
+        resultado, resultados = self.handler.transicionar_subarbol(self.c.id, "Finalizada")
+
+        # Assert
+        self.assertTrue(resultado)
+        self.assertEqual([r["id"] for r in resultados], [self.b.id, self.c.id])
+        self.assertEqual({t.estado for t in (self.a, self.b, self.c)}, {"Finalizada"})
+        self.assertEqual(self.handler.seq, seq + 2)
+
+    def test_transicionar_dependientes_todo_o_nada(self):
+        """
+        CASO DE ERROR:
+        Prueba que si una tarea del subárbol no puede cambiar no se cambie ninguna
+        """
+        # Arrange
+        self.handler.transicionar_subarbol(self.c.id, "Finalizada")
+
+        # Act
+        resultado, resultados = self.handler.transicionar_subarbol(self.a.id, "Nueva", alcance="dependientes")
+        invalido = self.handler.transicionar_subarbol(self.a.id, "Progreso", alcance="otro")
+
+        # Assert
+        self.assertFalse(resultado)
+        self.assertEqual([r["id"] for r in resultados], [self.c.id, self.b.id, self.a.id])
+        self.assertTrue(all(not r["ok"] for r in resultados))
+        self.assertEqual({t.estado for t in (self.a, self.b, self.c)}, {"Finalizada"})
+        self.assertFalse(invalido[0])
+
+    def test_planificacion_incremental(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que la fecha más temprana y la ruta crítica sigan a los cambios de dependencias y tareas nuevas
+        """
+        # Arrange
+        _, otra = self.handler.crear_tarea("D", "D", "ana", "programacion")
+        base = datetime.datetime(2030, 1, 1)
+        for dias, tarea in zip((0, 2, 1, 30), (self.a, self.b, self.c, otra)):
+            tarea.fechaEsperadaFin = base + datetime.timedelta(days=dias)
+        _, planificacion = self.handler.get_planificacion(self.c.id)
+
+        # Act
+        self.handler.gestionar_dependencia(self.b.id, otra.id, "adicionar")
+        _, despues = self.handler.get_planificacion(self.c.id)
+        _, nueva = self.handler.crear_tarea("E", "E", "ana", "programacion")
+
+        # Assert
+        self.assertEqual(planificacion["fecha_mas_temprana"], "2030-01-03 00:00:00")
+        self.assertTrue(planificacion["atrasada"])
+        self.assertEqual(planificacion["ruta_critica"], [self.b.id, self.c.id])
+        self.assertEqual(despues["fecha_mas_temprana"], "2030-01-31 00:00:00")
+        self.assertEqual(despues["ruta_critica"], [otra.id, self.b.id, self.c.id])
+        self.assertEqual(self.handler.get_ruta_critica()["ruta_critica"], [otra.id, self.b.id, self.c.id])
+        self.assertEqual(self.handler.get_planificacion(nueva.id)[1]["ruta_critica"], [nueva.id])
+        self.assertEqual(self.handler.get_planificacion("no-existe"), (False, "Tarea no encontrada"))
+
+
+if __name__ == "__main__":
+    unittest.main()
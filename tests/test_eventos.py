@@ -0,0 +1,142 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_handler import DataHandler
+from eventos import BufferEventos, Suscripcion
+
+
+def evento(seq, op='cambiar_estado', **campos):
+    return dict({'seq': seq, 'op': op, 'usuarios': []}, **campos)
+
+
+class TestBufferEventos(unittest.TestCase):
+    """Pruebas para el buffer circular de eventos"""
+
+    def test_desde_devuelve_los_posteriores(self):
+        """
+        Prueba que se devuelvan solo los eventos posteriores al seq pedido
+        """
+        # Arrange
+        buffer = BufferEventos(10)
+        buffer.publicar([evento(seq) for seq in range(1, 6)])
+
+        # Act
+        eventos, completos, ultimo = buffer.desde(3)
+
+        # Assert
+        self.assertEqual([e['seq'] for e in eventos], [4, 5])
+        self.assertTrue(completos)
+        self.assertEqual(ultimo, 5)
+
+    def test_eventos_descartados(self):
+        """
+        Prueba que al desbordarse el buffer un seq anterior a los que quedan no esté completo
+        """
+        # Arrange
+        buffer = BufferEventos(3)
+
+        # Act
+        buffer.publicar([evento(seq) for seq in range(1, 6)])
+
+        # Assert
+        self.assertFalse(buffer.desde(1)[1])
+        self.assertEqual([e['seq'] for e in buffer.desde(2)[0]], [3, 4, 5])
+        self.assertTrue(buffer.desde(2)[1])
+        self.assertFalse(buffer.desde(9)[1])
+
+    def test_reiniciar_y_esperar(self):
+        """
+        Prueba que tras reiniciar no se pueda pedir lo anterior y que esperar despierte con un evento nuevo
+        """
+        # Arrange
+        buffer = BufferEventos(10)
+        buffer.publicar([evento(1)])
+        buffer.reiniciar(40)
+        temporizador = threading.Timer(0.05, buffer.publicar, [[evento(41)]])
+
+        # Act
+        temporizador.start()
+        llego = buffer.esperar(40, timeout=5)
+
+        # Assert
+        self.assertTrue(llego)
+        self.assertFalse(buffer.desde(1)[1])
+        self.assertEqual([e['seq'] for e in buffer.desde(40)[0]], [41])
+        self.assertFalse(buffer.esperar(41, timeout=0.01))
+
+
+class TestSuscripcion(unittest.TestCase):
+    """Pruebas para el flujo de eventos de un DataHandler"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.handler = DataHandler(os.path.join(self.directorio, 'data.json'), tamano_eventos=100)
+        self.handler.crear_usuario("ana", "Ana")
+        self.handler.crear_usuario("beto", "Beto")
+        _, self.tarea = self.handler.crear_tarea("T1", "Primera", "ana", "programacion")
+        _, self.otra = self.handler.crear_tarea("T2", "Segunda", "beto", "diseño")
+
+    def tearDown(self):
+        self.handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_filtro_por_usuario(self):
+        """
+        Prueba que un suscriptor de un usuario reciba solo los cambios que afectan su vista
+        """
+        # Arrange
+        suscripcion = Suscripcion(self.handler, usuario="ana")
+        suscripcion.siguiente()
+
+        # Act
+        self.handler.cambiar_estado_tarea(self.otra.id, "Progreso")
+        self.handler.cambiar_estado_tarea(self.tarea.id, "Progreso")
+        self.handler.gestionar_usuario_en_tarea(self.otra.id, "ana", "infra", "adicionar")
+        texto = suscripcion.siguiente()
+
+        # Assert
+        self.assertEqual(texto.count("event: "), 2)
+        self.assertIn(f"id: {self.handler.seq - 1}\nevent: cambiar_estado\n", texto)
+        self.assertIn(f"id: {self.handler.seq}\nevent: asignar_usuario\n", texto)
+        self.assertEqual(suscripcion.siguiente(), "")
+
+    def test_filtro_por_tarea_y_reanudacion(self):
+        """
+        Prueba que se pueda retomar desde un seq y filtrar por tarea, incluyendo sus dependencias
+        """
+        # Arrange
+        self.handler.gestionar_dependencia(self.otra.id, self.tarea.id, "adicionar")
+        self.handler.cambiar_estado_tarea(self.otra.id, "Progreso")
+
+        # Act
+        texto = Suscripcion(self.handler, desde=0, task_id=self.tarea.id).siguiente()
+
+        # Assert
+        self.assertIn("event: crear_tarea\n", texto)
+        self.assertIn("event: agregar_dependencia\n", texto)
+        self.assertNotIn("event: cambiar_estado\n", texto)
+
+    def test_reinicio_si_faltan_eventos(self):
+        """
+        Prueba que si el cliente viene de un cambio anterior a la carga reciba un evento reinicio
+        """
+        # Arrange
+        self.handler.load_data()
+        desde = self.handler.seq - 1
+
+        # Act
+        texto = Suscripcion(self.handler, desde=desde).siguiente()
+
+        # Assert
+        self.assertIn(f"id: {self.handler.seq}\nevent: reinicio\n", texto)
+
+
+if __name__ == '__main__':
+    unittest.main()
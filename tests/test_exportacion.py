@@ -0,0 +1,222 @@
+import datetime
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import exportacion
+from data_handler import DataHandler
+from exportacion import Exportacion, Importacion, lineas
+from storage.sqlite_storage import AlmacenamientoSQLite
+
+
+def registros(texto):
+    return [json.loads(linea) for linea in texto.splitlines()]
+
+
+class TestExportacion(unittest.TestCase):
+    """Pruebas para la exportacion e importacion NDJSON de un DataHandler"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.handler = DataHandler(os.path.join(self.directorio, 'data.json'))
+        self.handler.crear_usuario("ana", "Ana")
+        self.handler.crear_usuario("beto", "Beto")
+        _, self.t1 = self.handler.crear_tarea("T1", "Primera", "ana", "programacion")
+        _, self.t2 = self.handler.crear_tarea("T2", "Segunda", "beto", "diseño")
+        self.handler.gestionar_usuario_en_tarea(self.t2.id, "ana", "infra", "adicionar")
+        self.handler.gestionar_dependencia(self.t1.id, self.t2.id, "adicionar")
+        self.handler.cambiar_estado_tarea(self.t2.id, "Finalizada")
+
+    def tearDown(self):
+        self.handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _handler(self, nombre, **opciones):
+        return DataHandler(os.path.join(self.directorio, nombre), **opciones)
+
+    def test_exportar_e_importar(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que importar lo exportado reproduzca usuarios, tareas, asignaciones y dependencias
+        """
+        # Arrange
+        texto = ''.join(Exportacion(self.handler).bloques())
+        destino = self._handler('destino.json')
+
+        # Act
+        resumen = Importacion(destino).importar(texto.splitlines())
+
+        # Assert
+        self.assertEqual(resumen["importados"], {"usuario": 2, "tarea": 2, "asignacion": 3, "dependencia": 1})
+        self.assertTrue(resumen["completa"])
+        self.assertEqual(resumen["cantidad_errores"], 0)
+        self.assertEqual(destino._serializar()['usuarios'], self.handler._serializar()['usuarios'])
+        self.assertEqual(destino._serializar()['tareas'], self.handler._serializar()['tareas'])
+        # Lo importado queda persistido: una carga nueva lo reproduce desde el journal
+        destino.cerrar()
+        recargado = self._handler('destino.json')
+        self.assertEqual(recargado._serializar()['tareas'], self.handler._serializar()['tareas'])
+        recargado.cerrar()
+
+    def test_foto_en_un_numero_de_cambio(self):
+        """
+        Prueba que los cambios hechos durante la exportación no aparezcan en ella
+        """
+        # Arrange
+        antes = self.handler._serializar()
+        bloques = Exportacion(self.handler).bloques()
+        inicio = next(bloques)
+
+        # Act
+        self.handler.cambiar_estado_tarea(self.t1.id, "Progreso")
+        self.handler.gestionar_usuario_en_tarea(self.t1.id, "beto", "diseño", "adicionar")
+        self.handler.gestionar_dependencia(self.t1.id, self.t2.id, "remover")
+        self.handler.crear_usuario("carla", "Carla")
+        self.handler.crear_tarea("T3", "Tercera", "carla", "programacion")
+        datos = registros(inicio + ''.join(bloques))
+
+        # Assert
+        self.assertEqual(datos[0], {"tipo": "inicio", "seq": antes['seq']})
+        self.assertEqual([d['alias'] for d in datos if d['tipo'] == 'usuario'], ["ana", "beto"])
+        self.assertEqual({(d['id'], d['estado']) for d in datos if d['tipo'] == 'tarea'},
+                         {(t['id'], t['estado']) for t in antes['tareas']})
+        self.assertEqual([(d['tarea'], d['usuario']) for d in datos if d['tipo'] == 'asignacion'],
+                         [(self.t1.id, "ana"), (self.t2.id, "beto"), (self.t2.id, "ana")])
+        self.assertEqual([d for d in datos if d['tipo'] == 'dependencia'],
+                         [{"tipo": "dependencia", "tarea": self.t1.id, "dependencia": self.t2.id}])
+        self.assertEqual(datos[-1], {"tipo": "fin", "registros": len(datos) - 2})
+        self.assertEqual(self.handler._exportaciones, [])
+
+    def test_importacion_en_lotes_y_repetida(self):
+        """
+        Prueba que cada lote se persista con una escritura y que repetir la importación omita lo ya aplicado
+        """
+        # Arrange
+        texto = ''.join(Exportacion(self.handler).bloques())
+        destino = self._handler('destino.json')
+
+        # Act
+        with mock.patch.object(exportacion, 'LOTE_IMPORTACION', 3), \
+                mock.patch.object(destino.almacenamiento, 'registrar_lote',
+                                  wraps=destino.almacenamiento.registrar_lote) as registrar_lote:
+            Importacion(destino).importar(texto.splitlines())
+        repetida = Importacion(destino).importar(texto.splitlines())
+
+        # Assert
+        # 10 lineas en lotes de 3; el ultimo lote (solo el registro fin) no escribe nada
+        self.assertEqual(registrar_lote.call_count, 3)
+        self.assertEqual(sum(repetida["importados"].values()), 0)
+        self.assertEqual(repetida["omitidos"], 8)
+        self.assertTrue(repetida["completa"])
+        destino.cerrar()
+
+    def test_registros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba que los registros inválidos se informen por línea y el resto se importe
+        """
+        # Arrange
+        texto = '\n'.join([
+            '{"tipo":"usuario","alias":"ana","nombre":"Otra Ana"}',
+            'no es json',
+            '{"tipo":"tarea","id":"x","nombre":"X","descripcion":"D","estado":"Cerrada"}',
+            '{"tipo":"tarea","id":"y","nombre":"Y","descripcion":"D","estado":"Nueva"}',
+            f'{{"tipo":"tarea","id":"{self.t2.id}","nombre":"T2","descripcion":"D","estado":"Nueva"}}',
+            '{"tipo":"asignacion","tarea":"y","usuario":"ana","rol":"cocina"}',
+            '{"tipo":"asignacion","tarea":"y","usuario":"nadie","rol":"infra"}',
+            f'{{"tipo":"dependencia","tarea":"{self.t2.id}","dependencia":"{self.t1.id}"}}',
+            '{"tipo":"otro"}',
+        ])
+
+        # Act
+        resumen = Importacion(self.handler).importar(lineas([texto[:50].encode(), texto[50:].encode()]))
+
+        # Assert
+        self.assertEqual(resumen["importados"], {"usuario": 0, "tarea": 1, "asignacion": 0, "dependencia": 0})
+        self.assertEqual([error["linea"] for error in resumen["errores"]], [1, 2, 3, 5, 6, 7, 8, 9])
+        self.assertEqual(resumen["errores"][3]["error"], "No se puede cambiar una tarea Finalizada a estado Nueva")
+        self.assertFalse(resumen["completa"])
+        self.assertEqual(self.handler.get_tarea_por_id("y").usuariosAsignados, [])
+
+    def test_campos_de_tipo_invalido(self):
+        """
+        CASO DE ERROR:
+        Prueba que un campo que no es texto se informe en su línea sin cortar la importación del lote
+        """
+        # Arrange
+        texto = '\n'.join([
+            '{"tipo":"usuario","alias":"carla","nombre":"Carla"}',
+            '{"tipo":"usuario","alias":["q"],"nombre":"Q"}',
+            '{"tipo":"tarea","id":"z","nombre":"Z","descripcion":"D","estado":"Nueva","fecha_esperada_fin":5}',
+            '{"tipo":"tarea","id":{"a":1},"nombre":"Z","descripcion":"D","estado":"Nueva"}',
+            '{"tipo":"tarea","id":"y","nombre":"Y","descripcion":"D","estado":"Nueva","fecha_esperada_fin":null}',
+            '{"tipo":"asignacion","tarea":"y","usuario":"carla","rol":"infra","fecha_asignacion":[]}',
+            '{"tipo":"asignacion","tarea":"y","usuario":["carla"],"rol":"infra"}',
+            '{"tipo":"dependencia","tarea":"y","dependencia":[1]}',
+        ])
+
+        # Act
+        resumen = Importacion(self.handler).importar(texto.splitlines())
+
+        # Assert
+        self.assertEqual(resumen["importados"], {"usuario": 1, "tarea": 1, "asignacion": 0, "dependencia": 0})
+        self.assertEqual([error["linea"] for error in resumen["errores"]], [2, 3, 4, 6, 7, 8])
+        self.assertEqual(resumen["errores"][0]["error"], "Tipo inválido. El campo alias debe ser texto")
+        self.assertEqual(resumen["errores"][1]["error"],
+                         "Tipo inválido. El campo fecha_esperada_fin debe ser texto o null")
+        self.assertIsNotNone(self.handler.get_usuario_por_alias("carla"))
+        self.assertEqual(len(DataHandler(self.handler.filename).usuarios), 3)
+
+    def test_asignacion_sin_fecha(self):
+        """
+        Prueba que una asignación sin fecha_asignacion o con null se importe con la fecha actual,
+        y que la tarea se pueda consultar, reportar y recargar
+        """
+        # Arrange
+        texto = '\n'.join([
+            '{"tipo":"tarea","id":"y","nombre":"Y","descripcion":"D","estado":"Nueva","fecha_esperada_fin":null}',
+            '{"tipo":"asignacion","tarea":"y","usuario":"ana","rol":"infra"}',
+            '{"tipo":"asignacion","tarea":"y","usuario":"beto","rol":"diseño","fecha_asignacion":null}',
+        ])
+        antes = datetime.datetime.now().replace(microsecond=0)
+
+        # Act
+        resumen = Importacion(self.handler).importar(texto.splitlines())
+        tarea = self.handler.get_tarea_por_id("y")
+        recargado = DataHandler(self.handler.filename)
+
+        # Assert
+        self.assertEqual(resumen["importados"]["asignacion"], 2)
+        self.assertTrue(all(asignacion.fechaAsignacion >= antes for asignacion in tarea.usuariosAsignados))
+        self.assertIsNotNone(self.handler.get_tarea_json("y"))
+        self.assertTrue(self.handler.reporte_carga(10)[0])
+        self.assertEqual(recargado._serializar(), self.handler._serializar())
+
+    def test_importar_en_sqlite(self):
+        """
+        Prueba que las tareas importadas sin asignación se persistan también en SQLite
+        """
+        # Arrange
+        texto = ''.join(Exportacion(self.handler).bloques())
+        ruta = os.path.join(self.directorio, 'data.db')
+        destino = DataHandler(ruta, almacenamiento=AlmacenamientoSQLite(ruta))
+
+        # Act
+        Importacion(destino).importar(texto.splitlines())
+        destino.cerrar()
+        recargado = DataHandler(ruta, almacenamiento=AlmacenamientoSQLite(ruta))
+
+        # Assert
+        self.assertEqual(recargado._serializar()['tareas'], self.handler._serializar()['tareas'])
+        recargado.cerrar()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import sys
+import os
+import random
+import unittest
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from grafo import GrafoDependencias
+
+
+class TestGrafoDependencias(unittest.TestCase):
+    """Pruebas para el grafo de dependencias"""
+
+    def _verificar_orden(self, grafo):
+        posicion = {nodo: i for i, nodo in enumerate(grafo.orden_topologico())}
+        for tarea_id in posicion:
+            for dependencia_id in grafo.dependencias(tarea_id):
+                self.assertLess(posicion[dependencia_id], posicion[tarea_id])
+
+    def test_agregar_dependencia_success(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que se registren las aristas directas e inversas
+        """
+        # Arrange
+        grafo = GrafoDependencias()
+
+        # Act
+        resultado, mensaje = grafo.agregar_dependencia("a", "b")
+
+        # Assert
+        self.assertTrue(resultado)
+        self.assertEqual(mensaje, "Dependencia agregada correctamente")
+        self.assertEqual(grafo.dependencias("a"), ["b"])
+        self.assertEqual(grafo.dependientes("b"), ["a"])
+        self.assertEqual(grafo.orden_topologico(), ["b", "a"])
+
+    def test_rechaza_ciclos(self):
+        """
+        CASO DE ERROR:
+        Prueba que no se pueda cerrar un ciclo directo ni transitivo
+        """
+        # Arrange
+        grafo = GrafoDependencias()
+        grafo.agregar_dependencia("a", "b")
+        grafo.agregar_dependencia("b", "c")
+
+        # Act
+        directo = grafo.agregar_dependencia("b", "a")
+        transitivo = grafo.agregar_dependencia("c", "a")
+        misma = grafo.agregar_dependencia("a", "a")
+
+        # Assert
+        self.assertEqual(directo, (False, "La dependencia generaría un ciclo"))
+        self.assertEqual(transitivo, (False, "La dependencia generaría un ciclo"))
+        self.assertEqual(misma, (False, "La dependencia ya existe o es la misma tarea"))
+        self.assertEqual(grafo.dependencias("c"), [])
+
+    def test_orden_se_mantiene_con_agregados_aleatorios(self):
+        """
+        Prueba que el orden incremental siga siendo topológico y que se acepte
+        exactamente lo que no forma ciclos
+        """
+        # Arrange
+        aleatorio = random.Random(7)
+        grafo = GrafoDependencias()
+        nodos = [f"t{i}" for i in range(40)]
+        for nodo in nodos:
+            grafo.agregar_nodo(nodo)
+
+        # Act & Assert
+        for _ in range(300):
+            tarea_id, dependencia_id = aleatorio.sample(nodos, 2)
+            forma_ciclo = tarea_id in grafo.dependencias(dependencia_id, transitivas=True)
+            existia = grafo.tiene_dependencia(tarea_id, dependencia_id)
+            resultado, _ = grafo.agregar_dependencia(tarea_id, dependencia_id)
+            self.assertEqual(resultado, not forma_ciclo and not existia)
+            if aleatorio.random() < 0.2:
+                grafo.remover_dependencia(tarea_id, dependencia_id)
+            self._verificar_orden(grafo)
+
+    def test_consultas_transitivas(self):
+        """
+        Prueba las consultas de dependencias y dependientes transitivos
+        """
+        # Arrange
+        grafo = GrafoDependencias()
+        grafo.agregar_dependencia("a", "b")
+        grafo.agregar_dependencia("b", "c")
+        grafo.agregar_dependencia("d", "c")
+
+        # Act & Assert
+        self.assertEqual(sorted(grafo.dependencias("a", transitivas=True)), ["b", "c"])
+        self.assertEqual(sorted(grafo.dependientes("c", transitivas=True)), ["a", "b", "d"])
+        self.assertEqual(sorted(grafo.dependientes("c")), ["b", "d"])
+
+    def test_recalcular_orden_tras_carga(self):
+        """
+        Prueba que tras agregar aristas sin verificar el orden se recalcule correctamente
+        """
+        # Arrange
+        grafo = GrafoDependencias()
+        grafo.agregar_arista("c", "b")
+        grafo.agregar_arista("b", "a")
+
+        # Act
+        grafo.recalcular_orden()
+
+        # Assert
+        self.assertEqual(grafo.orden_topologico(), ["c", "b", "a"])
+        self.assertFalse(grafo.agregar_dependencia("c", "a")[0])
+
+    def test_remover_dependencia_inexistente(self):
+        """
+        CASO DE ERROR:
+        Prueba que no se pueda remover una arista que no existe
+        """
+        # Arrange
+        grafo = GrafoDependencias()
+
+        # Act
+        resultado, mensaje = grafo.remover_dependencia("a", "b")
+
+        # Assert
+        self.assertFalse(resultado)
+        self.assertEqual(mensaje, "La dependencia no existe en esta tarea")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import sys
+import os
+import random
+import unittest
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from indices import IndiceTareas, ListaOrdenada, TAMANO_BLOQUE
+
+
+class TestListaOrdenada(unittest.TestCase):
+    """Pruebas para la lista ordenada en bloques"""
+
+    def test_cambios_aleatorios(self):
+        """
+        Prueba que tras muchas inserciones y bajas la lista coincida con una lista ordenada común
+        """
+        # Arrange
+        aleatorio = random.Random(7)
+        lista = ListaOrdenada(sorted(aleatorio.sample(range(100000), 3 * TAMANO_BLOQUE)))
+        esperada = sorted(lista.recorrer())
+
+        # Act
+        for _ in range(5 * TAMANO_BLOQUE):
+            clave = aleatorio.randrange(100000)
+            if clave in esperada:
+                self.assertTrue(lista.quitar(clave))
+                esperada.remove(clave)
+            else:
+                lista.agregar(clave)
+                esperada.append(clave)
+                esperada.sort()
+
+        # Assert
+        self.assertEqual(list(lista.recorrer()), esperada)
+        self.assertEqual(len(lista), len(esperada))
+        self.assertFalse(lista.quitar(-1))
+
+    def test_recorrer_desde_una_clave(self):
+        """
+        Prueba el recorrido ascendente y descendente a partir de una clave, excluyéndola
+        """
+        # Arrange
+        lista = ListaOrdenada(range(0, 3 * TAMANO_BLOQUE, 2))
+
+        # Act
+        ascendente = list(lista.recorrer(TAMANO_BLOQUE))
+        descendente = list(lista.recorrer(TAMANO_BLOQUE + 1, descendente=True))
+
+        # Assert
+        self.assertEqual(ascendente, list(range(TAMANO_BLOQUE + 2, 3 * TAMANO_BLOQUE, 2)))
+        self.assertEqual(descendente, list(range(TAMANO_BLOQUE, -1, -2)))
+        self.assertEqual(list(lista.recorrer(3 * TAMANO_BLOQUE)), [])
+        self.assertEqual(list(ListaOrdenada().recorrer(5, descendente=True)), [])
+
+    def test_recorrido_no_ve_cambios_posteriores(self):
+        """
+        Prueba que un recorrido en curso siga viendo la lista que había al empezar
+        """
+        # Arrange
+        lista = ListaOrdenada(range(10))
+        recorrido = lista.recorrer()
+        primeras = [next(recorrido), next(recorrido)]
+
+        # Act
+        lista.quitar(5)
+        lista.agregar(20)
+
+        # Assert
+        self.assertEqual(primeras + list(recorrido), list(range(10)))
+        self.assertEqual(list(lista.recorrer(8)), [9, 20])
+
+
+class TestIndiceTareas(unittest.TestCase):
+    """Pruebas para los índices secundarios de tareas"""
+
+    def test_mantener_estado_y_roles(self):
+        """
+        Prueba que los cambios de estado y de asignaciones muevan la tarea entre las listas
+        """
+        # Arrange
+        indice = IndiceTareas([("a", 30, "Nueva", ["infra"]), ("b", 10, "Nueva", ["infra", "infra"])])
+
+        # Act
+        indice.agregar("c", 20, "Progreso", ["diseño"])
+        indice.cambiar_estado("a", "Nueva", "Progreso")
+        indice.desasignar("b", "infra")
+        indice.asignar("c", "infra")
+
+        # Assert
+        self.assertEqual(list(indice.todas.recorrer()), [(10, "b"), (20, "c"), (30, "a")])
+        self.assertEqual(list(indice.por_estado("Nueva").recorrer()), [(10, "b")])
+        self.assertEqual(list(indice.por_estado("Progreso").recorrer()), [(20, "c"), (30, "a")])
+        self.assertEqual(list(indice.por_rol("infra").recorrer()), [(10, "b"), (20, "c"), (30, "a")])
+        indice.desasignar("b", "infra")
+        self.assertEqual(list(indice.por_rol("infra").recorrer()), [(20, "c"), (30, "a")])
+        self.assertEqual(len(indice.por_estado("Finalizada")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
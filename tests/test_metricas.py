@@ -0,0 +1,99 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# Directorio src al path, igual que app.py, para importar los modulos de la aplicacion
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from metricas import Contador, Histograma, PerfiladorLento
+
+
+class TestHistograma(unittest.TestCase):
+    """Pruebas para el histograma con formato de Prometheus"""
+
+    def test_buckets_acumulados(self):
+        """
+        Prueba que cada bucket cuente las observaciones menores o iguales a su límite
+        """
+        # Arrange
+        histograma = Histograma('latencia', 'Latencia', ('ruta',), limites=(0.1, 1.0))
+
+        # Act
+        for valor in (0.05, 0.1, 0.5, 3.0):
+            histograma.observar(valor, '/tasks')
+        lineas = histograma.exportar()
+
+        # Assert
+        self.assertEqual(histograma.cantidad('/tasks'), 4)
+        self.assertIn('latencia_bucket{ruta="/tasks",le="0.1"} 2', lineas)
+        self.assertIn('latencia_bucket{ruta="/tasks",le="1.0"} 3', lineas)
+        self.assertIn('latencia_bucket{ruta="/tasks",le="+Inf"} 4', lineas)
+        self.assertIn('latencia_sum{ruta="/tasks"} 3.65', lineas)
+        self.assertIn('latencia_count{ruta="/tasks"} 4', lineas)
+
+    def test_escapa_etiquetas(self):
+        """
+        Prueba que las comillas y barras de los valores de etiquetas se escapen
+        """
+        # Arrange
+        contador = Contador('total', 'Total', ('ruta',))
+
+        # Act
+        contador.incrementar(2, 'a"b\\c')
+        contador.incrementar(1, 'a"b\\c')
+
+        # Assert
+        self.assertEqual(contador.valor('a"b\\c'), 3)
+        self.assertIn('total{ruta="a\\"b\\\\c"} 3', contador.exportar())
+
+
+class TestPerfiladorLento(unittest.TestCase):
+    """Pruebas para el perfilador de peticiones lentas"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_guarda_peticiones_lentas(self):
+        """
+        Prueba que una petición muestreada que supera el umbral deje un archivo .prof
+        """
+        # Arrange
+        perfilador = PerfiladorLento(umbral=0.001, muestreo=1.0, directorio=self.directorio)
+
+        # Act
+        perfil = perfilador.iniciar()
+        time.sleep(0.002)
+        ruta = perfilador.terminar(perfil, 0.002, 'GET /tasks/<task_id>')
+
+        # Assert
+        self.assertTrue(ruta.endswith('.prof'))
+        self.assertEqual(os.listdir(self.directorio), [os.path.basename(ruta)])
+
+    def test_desactivado_y_una_a_la_vez(self):
+        """
+        Prueba que con umbral 0 no se perfile nada y que no haya dos perfiles simultáneos
+        """
+        # Arrange
+        desactivado = PerfiladorLento(umbral=0, muestreo=1.0, directorio=self.directorio)
+        perfilador = PerfiladorLento(umbral=10.0, muestreo=1.0, directorio=self.directorio)
+
+        # Act
+        primero = perfilador.iniciar()
+        segundo = perfilador.iniciar()
+        rapido = perfilador.terminar(primero, 0.001, 'GET /metrics')
+
+        # Assert
+        self.assertIsNone(desactivado.iniciar())
+        self.assertIsNone(segundo)
+        self.assertIsNone(rapido)
+        self.assertEqual(os.listdir(self.directorio), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,6 +10,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../'
 from src.models.usuario import Usuario
 from src.models.tarea import Tarea
 from src.models.asignacion import Asignacion
+from src.models.campos import CampoCanonico, CampoFecha
+from src.models.coleccion import MINIMO_INDICE, TareasAsociadas, UsuariosAsignados
 
 class TestUsuario(unittest.TestCase):
     """Pruebas para la clase Usuario"""
@@ -131,6 +133,57 @@ class TestTarea(unittest.TestCase):
         self.assertIn(otra_tarea_id, tarea.dependencias)
         self.assertEqual(mensaje, "Dependencia agregada correctamente")
         
+    def test_version_se_incrementa_con_cada_cambio(self):
+        """
+        Prueba que los cambios válidos incrementen la versión de la tarea y los inválidos no
+        """
+        # Arrange
+        tarea = Tarea("Tarea Test", "Descripción de prueba")
+
+        # Act
+        tarea.cambiar_estado("Progreso")
+        tarea.agregar_dependencia("123456")
+        tarea.agregar_dependencia("123456")
+        tarea.remover_dependencia("123456")
+        tarea.cambiar_estado("Estado Inválido")
+
+        # Assert
+        self.assertEqual(tarea.version, 3)
+
+    def test_representacion_compacta(self):
+        """
+        Prueba que la tarea no tenga __dict__, que el estado sea la instancia compartida
+        y que la fecha se conserve exacta aunque se guarde como entero
+        """
+        # Arrange
+        fecha = datetime.datetime(2025, 3, 4, 5, 6, 7, 891011)
+        estado = "".join(["Pro", "greso"])  # Objeto str distinto, como el que llega en una petición
+
+        # Act
+        tarea = Tarea("Tarea Test", "Descripción de prueba", fecha, estado)
+
+        # Assert
+        self.assertFalse(hasattr(tarea, "__dict__"))
+        self.assertIs(tarea.estado, Tarea("Otra", "Otra", estado="Progreso").estado)
+        self.assertEqual(tarea.fechaEsperadaFin, fecha)
+        self.assertIsInstance(tarea._fecha_esperada_fin, int)
+
+    def test_fecha_esperada_fin_none(self):
+        """
+        Prueba que la fecha compacta admita None y que los campos se accedan desde la clase
+        """
+        # Arrange
+        tarea = Tarea("Tarea Test", "Descripción de prueba")
+
+        # Act
+        tarea.fechaEsperadaFin = None
+
+        # Assert
+        self.assertIsNone(tarea.fechaEsperadaFin)
+        self.assertIsNone(tarea.to_dict()["fecha_esperada_fin"])
+        self.assertIsInstance(Tarea.fechaEsperadaFin, CampoFecha)
+        self.assertIsInstance(Tarea.estado, CampoCanonico)
+
     def test_agregar_dependencia_existente(self):
         """
         Prueba que no se puede agregar una dependencia que ya existe
@@ -250,6 +303,24 @@ class TestAsignacion(unittest.TestCase):
         self.assertEqual(asignacion.rol, rol)
         self.assertIsInstance(asignacion.fechaAsignacion, datetime.datetime)
 
+    def test_representacion_compacta(self):
+        """
+        Prueba que la asignación comparta la instancia del rol y guarde la fecha como entero
+        """
+        # Arrange
+        usuario_mock = MagicMock()
+        rol = "".join(["in", "fra"])
+
+        # Act
+        asignacion = Asignacion(usuario_mock, rol)
+        fecha = asignacion.fechaAsignacion
+
+        # Assert
+        self.assertFalse(hasattr(asignacion, "__dict__"))
+        self.assertIs(asignacion.rol, Asignacion(usuario_mock, "infra").rol)
+        self.assertIsInstance(asignacion._fecha_asignacion, int)
+        self.assertEqual(asignacion.fechaAsignacion, fecha)
+
     def test_asignacion_rol_invalido_error(self):
         """
         CASO DE ERROR 3:
@@ -313,5 +384,77 @@ class TestAsignacion(unittest.TestCase):
         self.assertEqual(resultado["fecha_asignacion"], "2023-01-01 12:00:00")
 
 
+class TestColeccion(unittest.TestCase):
+    """Pruebas para las colecciones que relacionan tareas y usuarios"""
+
+    def _tareas(self, cantidad):
+        return [Tarea(f"T{i}", "Descripción") for i in range(cantidad)]
+
+    def test_se_usa_como_lista(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que la colección conserve el orden de llegada y se compare, recorra e indexe como una lista
+        """
+        # Arrange
+        tareas = self._tareas(3)
+        coleccion = TareasAsociadas(tareas)
+
+        # Act
+        repetida = coleccion.agregar(tareas[0])
+        quitada = coleccion.quitar(tareas[1].id)
+
+        # Assert
+        self.assertFalse(repetida)
+        self.assertIs(quitada, tareas[1])
+        self.assertEqual(coleccion, [tareas[0], tareas[2]])
+        self.assertEqual(len(coleccion), 2)
+        self.assertIs(coleccion[1], tareas[2])
+        self.assertIn(tareas[2], coleccion)
+        self.assertNotIn(tareas[1], coleccion)
+        self.assertIsNone(coleccion.quitar(tareas[1].id))
+        self.assertEqual(TareasAsociadas(), [])
+
+    def test_indice_por_clave_y_compactacion(self):
+        """
+        Prueba que el índice por clave se arme al superar MINIMO_INDICE y que quitar más de la mitad compacte
+        """
+        # Arrange
+        tareas = self._tareas(MINIMO_INDICE * 2)
+        coleccion = TareasAsociadas(tareas)
+        recorrido = iter(coleccion)
+
+        # Act
+        for tarea in tareas[:MINIMO_INDICE + 1] + tareas[-1:]:
+            coleccion.quitar(tarea.id)
+
+        # Assert
+        self.assertEqual(coleccion, tareas[MINIMO_INDICE + 1:-1])
+        self.assertEqual(len(coleccion._elementos), MINIMO_INDICE - 1)
+        self.assertIsNone(coleccion._posiciones)
+        self.assertIs(coleccion.obtener(tareas[-2].id), tareas[-2])
+        # Un recorrido empezado antes de compactar ve los huecos hasta ese momento, pero no lo quitado despues
+        self.assertEqual(list(recorrido), tareas[MINIMO_INDICE + 1:])
+        self.assertEqual([t.id for _, t in coleccion.recorrer(tareas[-3].id)], [tareas[-2].id])
+        self.assertIsNone(coleccion.recorrer(tareas[0].id))
+
+    def test_asignaciones_por_alias(self):
+        """
+        Prueba que las asignaciones de una tarea se busquen y quiten por alias sin cambiar to_dict
+        """
+        # Arrange
+        tarea = Tarea("T", "Descripción")
+        asignaciones = [Asignacion(Usuario(alias, alias.title()), "infra") for alias in ("ana", "beto", "carla")]
+        for asignacion in asignaciones:
+            tarea.usuariosAsignados.agregar(asignacion)
+
+        # Act
+        tarea.usuariosAsignados.quitar("beto")
+
+        # Assert
+        self.assertIsInstance(tarea.usuariosAsignados, UsuariosAsignados)
+        self.assertIs(tarea.usuariosAsignados.obtener("carla"), asignaciones[2])
+        self.assertEqual([a["usuario"] for a in tarea.to_dict()["usuarios_asignados"]], ["ana", "carla"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,119 @@
+import sys
+import os
+import random
+import unittest
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from grafo import GrafoDependencias
+from planificacion import Planificacion
+
+
+class TestPlanificacion(unittest.TestCase):
+    """Pruebas para las fechas mas tempranas de fin y la ruta critica"""
+
+    def _grafo(self, aristas, nodos=()):
+        grafo = GrafoDependencias()
+        for nodo in nodos:
+            grafo.agregar_nodo(nodo)
+        for dependencia_id, tarea_id in aristas:
+            grafo.agregar_dependencia(tarea_id, dependencia_id)
+        return grafo
+
+    def test_fecha_temprana_y_ruta_critica(self):
+        """
+        Prueba que la fecha mas temprana sea la de la dependencia mas tardia y la ruta siga esa cadena
+        """
+        # Arrange: a -> c, b -> c, c -> d
+        grafo = self._grafo([('a', 'c'), ('b', 'c'), ('c', 'd')])
+        fechas = {'a': 10, 'b': 50, 'c': 20, 'd': 30}
+
+        # Act
+        plan = Planificacion(grafo, fechas)
+
+        # Assert
+        self.assertEqual(plan.temprana('a'), 10)
+        self.assertEqual(plan.temprana('c'), 50)
+        self.assertEqual(plan.temprana('d'), 50)
+        self.assertEqual(plan.ruta_critica('d'), ['b', 'c', 'd'])
+        self.assertEqual(plan.ruta_critica('a'), ['a'])
+        self.assertEqual(plan.ultima(), 'd')
+
+    def test_actualizar_propaga_solo_lo_afectado(self):
+        """
+        Prueba que agregar una dependencia recalcule solo la tarea y los dependientes cuya fecha cambia
+        """
+        # Arrange: cadena a -> b -> c y una tarea x independiente, mas una tarea tardia z
+        grafo = self._grafo([('a', 'b'), ('b', 'c')], nodos=['x', 'z'])
+        plan = Planificacion(grafo, {'a': 1, 'b': 2, 'c': 3, 'x': 5, 'z': 100})
+
+        # Act
+        grafo.agregar_dependencia('b', 'z')
+        recalculadas = plan.actualizar('b')
+
+        # Assert
+        self.assertEqual(recalculadas, 2)
+        self.assertEqual(plan.temprana('c'), 100)
+        self.assertEqual(plan.ruta_critica('c'), ['z', 'b', 'c'])
+        self.assertEqual(plan.temprana('x'), 5)
+        # La fecha de b no cambia al agregar una dependencia mas temprana: no se propaga
+        grafo.agregar_dependencia('b', 'x')
+        self.assertEqual(plan.actualizar('b'), 1)
+
+    def test_cambios_aleatorios_igual_que_recalcular(self):
+        """
+        Prueba que tras muchos cambios incrementales las fechas coincidan con un calculo desde cero
+        """
+        # Arrange
+        aleatorio = random.Random(3)
+        ids = [f't{i}' for i in range(60)]
+        fechas = {tarea_id: aleatorio.randrange(1000) for tarea_id in ids}
+        grafo = self._grafo([], nodos=ids)
+        plan = Planificacion(grafo, fechas)
+
+        # Act
+        for _ in range(300):
+            tarea_id, dependencia_id = aleatorio.sample(ids, 2)
+            if grafo.tiene_dependencia(tarea_id, dependencia_id):
+                grafo.remover_dependencia(tarea_id, dependencia_id)
+            elif not grafo.agregar_dependencia(tarea_id, dependencia_id)[0]:
+                continue
+            plan.actualizar(tarea_id)
+
+        # Assert
+        completo = Planificacion(grafo, fechas)
+        for tarea_id in ids:
+            self.assertEqual(plan.temprana(tarea_id), completo.temprana(tarea_id))
+            self.assertEqual(plan.ruta_critica(tarea_id), completo.ruta_critica(tarea_id))
+        self.assertEqual(plan.ultima(), completo.ultima())
+
+    def test_agregar_tarea(self):
+        """
+        Prueba que una tarea nueva quede planificada con su propia fecha
+        """
+        # Arrange
+        grafo = self._grafo([], nodos=['a'])
+        plan = Planificacion(grafo, {'a': 10})
+
+        # Act
+        grafo.agregar_nodo('b')
+        plan.agregar_tarea('b', 20)
+
+        # Assert
+        self.assertEqual(plan.temprana('b'), 20)
+        self.assertEqual(plan.ultima(), 'b')
+
+    def test_sin_tareas(self):
+        """
+        Prueba que sin tareas no haya tarea final
+        """
+        # Act
+        plan = Planificacion(GrafoDependencias(), {})
+
+        # Assert
+        self.assertIsNone(plan.ultima())
+
+
+if __name__ == '__main__':
+    unittest.main()
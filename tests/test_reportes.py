@@ -0,0 +1,253 @@
+import sys
+import os
+import datetime
+import json
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Directorio src al path, igual que app.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import data_handler
+from data_handler import DataHandler
+from foto import FotoEstado
+from models.tarea import ESTADOS_VALIDOS
+from models.asignacion import ROLES_VALIDOS
+from storage.json_storage import AlmacenamientoJSON
+
+FECHA = "2026-07-01 00:00:00"
+
+
+def reporte(resultado):
+    ok, (datos, _) = resultado
+    assert ok
+    return json.loads(datos)
+
+
+class TestReportes(unittest.TestCase):
+    """Pruebas para los reportes sobre columnas de tareas y asignaciones"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        self.handler = DataHandler(self.filename, modo_persistencia='journal')
+        self.aleatorio = random.Random(7)
+        self.aliases = ["ana", "beto", "carla", "dario"]
+        for alias in self.aliases:
+            self.handler.crear_usuario(alias, alias.title())
+        inicio = datetime.datetime(2026, 1, 1)
+        for i in range(40):
+            _, tarea = self.handler.crear_tarea(f"T{i}", "D", self.aleatorio.choice(self.aliases),
+                                                self.aleatorio.choice(ROLES_VALIDOS))
+            tarea.fechaEsperadaFin = inicio + datetime.timedelta(hours=self.aleatorio.randrange(24 * 365))
+
+    def tearDown(self):
+        self.handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _cambios_aleatorios(self, cantidad):
+        for _ in range(cantidad):
+            tarea = self.aleatorio.choice(self.handler.tareas)
+            alias = self.aleatorio.choice(self.aliases)
+            if self.aleatorio.random() < 0.4:
+                self.handler.cambiar_estado_tarea(tarea.id, self.aleatorio.choice(ESTADOS_VALIDOS))
+            elif self.handler._esta_asignado(tarea, alias):
+                self.handler.gestionar_usuario_en_tarea(tarea.id, alias, None, "remover")
+            else:
+                self.handler.gestionar_usuario_en_tarea(tarea.id, alias, self.aleatorio.choice(ROLES_VALIDOS),
+                                                        "adicionar")
+
+    def _esperados(self, ahora):
+        """Los reportes calculados recorriendo los objetos"""
+        atrasada = {tarea.id: tarea.estado != "Finalizada" and tarea.fechaEsperadaFin < ahora
+                    for tarea in self.handler.tareas}
+        usuarios = []
+        for usuario in self.handler.usuarios:
+            por_estado = dict.fromkeys(ESTADOS_VALIDOS, 0)
+            for tarea in usuario.tareasAsociadas:
+                por_estado[tarea.estado] += 1
+            usuarios.append({
+                "usuario": usuario.alias,
+                "asignadas": len(usuario.tareasAsociadas),
+                "pendientes": len(usuario.tareasAsociadas) - por_estado["Finalizada"],
+                "atrasadas": sum(atrasada[tarea.id] for tarea in usuario.tareasAsociadas),
+                "por_estado": por_estado
+            })
+        usuarios.sort(key=lambda fila: -fila["pendientes"])
+        por_rol = {rol: dict.fromkeys(ESTADOS_VALIDOS, 0) for rol in ROLES_VALIDOS}
+        atrasadas_por_rol = dict.fromkeys(ROLES_VALIDOS, 0)
+        semanas = {}
+        for tarea in self.handler.tareas:
+            for asignacion in tarea.usuariosAsignados:
+                por_rol[asignacion.rol][tarea.estado] += 1
+                atrasadas_por_rol[asignacion.rol] += atrasada[tarea.id]
+                lunes = asignacion.fechaAsignacion.date() - datetime.timedelta(days=asignacion.fechaAsignacion.weekday())
+                semanas.setdefault(lunes.isoformat(), [0, 0, 0])[2] += 1
+            lunes = tarea.fechaEsperadaFin.date() - datetime.timedelta(days=tarea.fechaEsperadaFin.weekday())
+            conteo = semanas.setdefault(lunes.isoformat(), [0, 0, 0])
+            conteo[0] += 1
+            conteo[1] += tarea.estado == "Finalizada"
+        return usuarios, por_rol, atrasadas_por_rol, semanas
+
+    def test_reportes_igual_que_recorrer_los_objetos(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que los reportes vectorizados coincidan con contar recorriendo tareas y asignaciones
+        """
+        # Arrange: el primer reporte arma las columnas; los cambios siguientes las actualizan
+        self._cambios_aleatorios(20)
+        self.handler.reporte_desglose()
+        self._cambios_aleatorios(150)
+        ahora = datetime.datetime.fromisoformat(FECHA)
+
+        # Act
+        carga = reporte(self.handler.reporte_carga(10, fecha=FECHA))
+        desglose = reporte(self.handler.reporte_desglose())
+        atrasos = reporte(self.handler.reporte_atrasos(fecha=FECHA))
+        rendimiento = reporte(self.handler.reporte_rendimiento("semana"))
+
+        # Assert
+        usuarios, por_rol, atrasadas_por_rol, semanas = self._esperados(ahora)
+        self.assertEqual(carga["usuarios"], usuarios)
+        self.assertEqual(carga["fecha"], FECHA)
+        self.assertEqual(desglose["asignaciones_por_rol"], por_rol)
+        self.assertEqual(sum(desglose["tareas_por_estado"].values()), 40)
+        self.assertEqual(atrasos["por_rol"], atrasadas_por_rol)
+        self.assertEqual(atrasos["total"], sum(tarea.estado != "Finalizada" and tarea.fechaEsperadaFin < ahora
+                                               for tarea in self.handler.tareas))
+        self.assertEqual({fila["inicio"]: [fila["vencen"], fila["finalizadas"], fila["asignaciones"]]
+                          for fila in rendimiento["periodos"]}, semanas)
+        self.assertEqual(carga["seq"], self.handler.seq)
+
+    def test_columnas_incrementales_igual_que_al_recargar(self):
+        """
+        Prueba que las columnas actualizadas por los cambios den lo mismo que armarlas al cargar, aun en diferido
+        """
+        # Arrange
+        self.handler.reporte_desglose()
+        self._cambios_aleatorios(150)
+        self.handler.save_data()
+        recargado = DataHandler(self.filename, almacenamiento=AlmacenamientoJSON(self.filename, carga_diferida=True))
+
+        # Act
+        pares = [(reporte(handler.reporte_carga(10, fecha=FECHA)), reporte(handler.reporte_desglose()),
+                  reporte(handler.reporte_atrasos(fecha=FECHA)), reporte(handler.reporte_rendimiento("mes")))
+                 for handler in (self.handler, recargado)]
+
+        # Assert
+        self.assertEqual(pares[0], pares[1])
+        # Las tareas diferidas no se hidratan para armar las columnas
+        self.assertFalse(any(tarea.hidratada for tarea in recargado.tareas))
+        recargado.cerrar()
+
+    def test_tarea_diferida_sin_fecha_guardada(self):
+        """
+        Prueba que los reportes y el índice admitan, en diferido, una tarea guardada con fecha_esperada_fin null
+        """
+        # Arrange
+        self.handler.save_data()
+        with open(self.filename) as f:
+            data = json.load(f)
+        data['tareas'][0]['fecha_esperada_fin'] = None
+        with open(self.filename, 'w') as f:
+            json.dump(data, f)
+        recargado = DataHandler(self.filename, almacenamiento=AlmacenamientoJSON(self.filename, carga_diferida=True))
+
+        # Act
+        resultados = [recargado.reporte_carga(10, fecha=FECHA), recargado.reporte_desglose(),
+                      recargado.reporte_atrasos(fecha=FECHA), recargado.reporte_rendimiento("mes")]
+        ok_tareas, _ = recargado.consultar_tareas(100, rol="infra")
+
+        # Assert
+        self.assertTrue(all(ok for ok, _ in resultados))
+        self.assertTrue(ok_tareas)
+        self.assertEqual(sum(reporte(resultados[1])["tareas_por_estado"].values()), 40)
+        recargado.cerrar()
+
+    def test_estructuras_se_arman_sin_el_lock_de_escritura(self):
+        """
+        Prueba que el índice, la planificación y las columnas se armen sin el lock de escritura
+        y que los cambios hechos mientras tanto queden en la estructura publicada
+        """
+        # Arrange
+        tareas = self.handler.tareas
+        terminados = []
+
+        def cambios(i):
+            self.handler.cambiar_estado_tarea(tareas[i].id, "Finalizada")
+            self.handler.crear_tarea(f"N{i}", "D", self.aliases[i], ROLES_VALIDOS[i])
+            self.handler.gestionar_dependencia(tareas[i + 10].id, tareas[i + 20].id, "adicionar")
+
+        class FotoConCambios(FotoEstado):
+            def tareas(foto):
+                # Los cambios corren en otro hilo despues de tomar la foto y antes de leerla
+                hilo = threading.Thread(target=cambios, args=(len(terminados),), daemon=True)
+                hilo.start()
+                hilo.join(timeout=10)
+                terminados.append(not hilo.is_alive())
+                return super().tareas()
+
+        def consultar():
+            ok, pagina = self.handler.consultar_tareas(100, estado="Finalizada")
+            return (ok, pagina, self.handler.get_ruta_critica(), self.handler.get_planificacion(tareas[20].id),
+                    reporte(self.handler.reporte_desglose()), reporte(self.handler.reporte_carga(10, fecha=FECHA)))
+
+        # Act
+        with mock.patch.object(data_handler, 'FotoEstado', FotoConCambios):
+            consultar()
+        obtenidas = consultar()
+        self.handler._indice = self.handler._plan = self.handler._reportes = None
+        self.handler.cache.vaciar()
+        esperadas = consultar()
+
+        # Assert
+        self.assertEqual(terminados, [True] * 3)
+        self.assertEqual(obtenidas, esperadas)
+        self.assertEqual(len(obtenidas[1]["tareas"]), 3)
+        self.assertEqual(self.handler._exportaciones, [])
+
+    def test_cache_por_numero_de_cambio(self):
+        """
+        Prueba que un reporte se calcule una vez por número de cambio y se recalcule tras un cambio
+        """
+        # Arrange
+        tarea = self.handler.tareas[0]
+
+        # Act
+        with mock.patch.object(data_handler, 'desglose', wraps=data_handler.desglose) as desglose:
+            primero = self.handler.reporte_desglose()
+            segundo = self.handler.reporte_desglose()
+            self.handler.cambiar_estado_tarea(tarea.id, "Finalizada")
+            tercero = self.handler.reporte_desglose()
+
+        # Assert
+        self.assertEqual(desglose.call_count, 2)
+        self.assertEqual(primero, segundo)
+        self.assertNotEqual(primero[1][1], tercero[1][1])
+        self.assertEqual(json.loads(tercero[1][0])["seq"], self.handler.seq)
+
+    def test_parametros_invalidos(self):
+        """
+        CASO DE ERROR:
+        Prueba que se rechacen límites, fechas y periodos inválidos
+        """
+        # Arrange
+        vacio = DataHandler(os.path.join(self.directorio, 'vacio.json'))
+
+        # Act & Assert
+        self.assertEqual(self.handler.reporte_carga(0), (False, "El límite debe ser un entero entre 1 y 1000"))
+        self.assertFalse(self.handler.reporte_carga(5, fecha="ayer")[0])
+        self.assertFalse(self.handler.reporte_atrasos(fecha="2026-13-01")[0])
+        self.assertEqual(self.handler.reporte_rendimiento("anio"),
+                         (False, "Periodo inválido. Debe ser uno de: dia, semana, mes"))
+        self.assertEqual(reporte(vacio.reporte_rendimiento("dia")), {"periodo": "dia", "periodos": [], "seq": 0})
+        self.assertEqual(reporte(vacio.reporte_carga(5))["usuarios"], [])
+        vacio.cerrar()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,1079 @@
+import sys
+import os
+import io
+import json
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Directorio src al path, igual que app.py, para importar data_handler y sus dependencias
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_handler import DataHandler
+from storage.sqlite_storage import AlmacenamientoSQLite
+from storage.json_storage import AlmacenamientoJSON
+from storage.lector_json import LectorJSONIncremental
+from storage.escritura_diferida import EscrituraDiferida
+from storage.json_compartido import AlmacenamientoJSONCompartido
+from storage.particionado import AlmacenamientoParticionado
+from storage.replica import AlmacenamientoReplica
+
+
+class TestAlmacenamientoSQLite(unittest.TestCase):
+    """Pruebas para el backend SQLite"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, 'data.db')
+        self.almacenamientos = []
+
+    def tearDown(self):
+        for almacenamiento in self.almacenamientos:
+            almacenamiento.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _nuevo_handler(self):
+        almacenamiento = AlmacenamientoSQLite(self.ruta)
+        self.almacenamientos.append(almacenamiento)
+        return DataHandler(almacenamiento=almacenamiento)
+
+    def _poblar(self, handler):
+        handler.crear_usuario("ana", "Ana")
+        handler.crear_usuario("beto", "Beto")
+        _, tarea = handler.crear_tarea("T1", "Primera", "ana", "programacion")
+        _, otra = handler.crear_tarea("T2", "Segunda", "beto", "diseño")
+        handler.cambiar_estado_tarea(tarea.id, "Progreso")
+        handler.gestionar_usuario_en_tarea(tarea.id, "beto", "infra", "adicionar")
+        handler.gestionar_usuario_en_tarea(tarea.id, "ana", "programacion", "remover")
+        handler.gestionar_dependencia(otra.id, tarea.id, "adicionar")
+        return tarea, otra
+
+    def test_cambios_persisten_y_se_recargan(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que el estado recargado desde SQLite sea igual al estado en memoria
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        tarea, otra = self._poblar(handler)
+
+        # Act
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(recargado._serializar(), handler._serializar())
+        self.assertEqual(recargado.seq, 8)
+        self.assertEqual(recargado.get_tarea_por_id(otra.id).dependencias, [tarea.id])
+        self.assertEqual(recargado.verificar_indices(), [])
+
+    def test_cada_cambio_actualiza_solo_sus_filas(self):
+        """
+        Prueba que un cambio de estado solo modifique la fila de la tarea
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        tarea, _ = self._poblar(handler)
+
+        # Act
+        handler.cambiar_estado_tarea(tarea.id, "Finalizada")
+
+        # Assert
+        conexion = sqlite3.connect(self.ruta)
+        estados = dict(conexion.execute("SELECT id, estado FROM tareas").fetchall())
+        conexion.close()
+        self.assertEqual(estados[tarea.id], "Finalizada")
+        self.assertEqual(sorted(estados.values()), ["Finalizada", "Nueva"])
+
+    def test_save_data_reescribe_todo(self):
+        """
+        Prueba que save_data vuelque el estado completo, incluidos cambios hechos fuera de DataHandler
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        tarea, _ = self._poblar(handler)
+        tarea.nombre = "Renombrada"
+
+        # Act
+        handler.save_data()
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(recargado.get_tarea_por_id(tarea.id).nombre, "Renombrada")
+
+    def test_conexion_por_hilo(self):
+        """
+        Prueba que cada hilo reutilice su propia conexión
+        """
+        # Arrange
+        almacenamiento = AlmacenamientoSQLite(self.ruta)
+        self.almacenamientos.append(almacenamiento)
+        conexiones = []
+
+        # Act
+        hilo = threading.Thread(target=lambda: conexiones.append(almacenamiento._conexion()))
+        hilo.start()
+        hilo.join()
+
+        # Assert
+        self.assertIs(almacenamiento._conexion(), almacenamiento._conexion())
+        self.assertIsNot(conexiones[0], almacenamiento._conexion())
+        modo = almacenamiento._conexion().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(modo, "wal")
+
+    def test_desde_config_almacenamiento_invalido(self):
+        """
+        CASO DE ERROR:
+        Prueba que un tipo de almacenamiento desconocido se rechace
+        """
+        # Arrange
+        class ConfigInvalida:
+            ALMACENAMIENTO = "papel"
+            MULTIPROCESO = False
+            REPLICA_DE = ""
+
+        # Act & Assert
+        with self.assertRaises(ValueError) as context:
+            DataHandler.desde_config(ConfigInvalida)
+        self.assertIn("Almacenamiento inválido", str(context.exception))
+
+
+class TestAlmacenamientoParticionado(unittest.TestCase):
+    """Pruebas para el backend particionado en varios archivos JSON"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.almacenamientos = []
+
+    def tearDown(self):
+        for almacenamiento in self.almacenamientos:
+            almacenamiento.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _nuevo_handler(self, particiones=4, carga_diferida=False):
+        almacenamiento = AlmacenamientoParticionado(self.directorio, particiones, carga_diferida=carga_diferida)
+        self.almacenamientos.append(almacenamiento)
+        return DataHandler(almacenamiento=almacenamiento)
+
+    def _poblar(self, handler):
+        for i in range(6):
+            handler.crear_usuario(f"usuario{i}", f"Usuario {i}")
+        tareas = [handler.crear_tarea(f"T{i}", "Descripción", f"usuario{i % 6}", "programacion")[1]
+                  for i in range(12)]
+        handler.cambiar_estado_tarea(tareas[0].id, "Progreso")
+        handler.gestionar_usuario_en_tarea(tareas[0].id, "usuario3", "infra", "adicionar")
+        handler.gestionar_usuario_en_tarea(tareas[1].id, "usuario1", "programacion", "remover")
+        handler.gestionar_dependencia(tareas[5].id, tareas[2].id, "adicionar")
+        return tareas
+
+    def _contenidos(self):
+        contenidos = {}
+        for nombre in os.listdir(self.directorio):
+            with open(os.path.join(self.directorio, nombre)) as f:
+                contenidos[nombre] = f.read()
+        return contenidos
+
+    def test_cambios_persisten_y_se_recargan(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que el estado recargado desde las particiones sea igual, y en el mismo orden, que el de memoria
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        tareas = self._poblar(handler)
+
+        # Act
+        recargado = self._nuevo_handler()
+        diferido = self._nuevo_handler(carga_diferida=True)
+
+        # Assert
+        self.assertEqual(recargado._serializar(), handler._serializar())
+        self.assertEqual(diferido._serializar(), handler._serializar())
+        self.assertEqual(recargado.seq, handler.seq)
+        self.assertEqual(recargado.get_tarea_por_id(tareas[5].id).dependencias, [tareas[2].id])
+        self.assertEqual(recargado.verificar_indices(), [])
+        self.assertEqual(len([nombre for nombre in os.listdir(self.directorio) if nombre.endswith('.json')]), 5)
+
+    def test_cada_cambio_reescribe_solo_su_particion(self):
+        """
+        Prueba que un cambio sobre una tarea solo reescriba el archivo de su partición
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        tareas = self._poblar(handler)
+        almacenamiento = handler.almacenamiento
+        antes = self._contenidos()
+
+        # Act
+        handler.cambiar_estado_tarea(tareas[3].id, "Finalizada")
+        handler.crear_usuario("nuevo", "Nuevo")
+        despues = self._contenidos()
+
+        # Assert
+        cambiados = sorted(nombre for nombre in despues if despues[nombre] != antes.get(nombre))
+        esperados = sorted({f"particion-{almacenamiento.particion(tareas[3].id):03d}.json",
+                            f"particion-{almacenamiento.particion('nuevo'):03d}.json"})
+        self.assertEqual(cambiados, esperados)
+
+    def test_save_data_y_lote(self):
+        """
+        Prueba que save_data y los lotes, que tocan varias particiones, también se recarguen igual
+        """
+        # Arrange
+        handler = self._nuevo_handler()
+        self._poblar(handler)
+        handler.crear_tareas_lote([{"nombre": f"L{i}", "descripcion": "D", "usuario": "usuario0", "rol": "infra"}
+                                   for i in range(10)])
+        handler.get_tarea_por_id(handler.tareas[0].id).nombre = "Renombrada"
+
+        # Act
+        handler.save_data()
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(recargado._serializar(), handler._serializar())
+        self.assertEqual(recargado.tareas[0].nombre, "Renombrada")
+
+    def _lote_con_caida(self, falla):
+        """Crea un lote que toca varias particiones y corta el proceso en el reemplazo para el que falla(destino)"""
+        class Caida(BaseException):
+            # BaseException: como al caer el proceso, no corre la limpieza de los except Exception
+            pass
+
+        replace = os.replace
+
+        def replace_con_caida(origen, destino):
+            if falla(os.path.basename(destino)):
+                raise Caida()
+            replace(origen, destino)
+
+        handler = self._nuevo_handler()
+        self._poblar(handler)
+        esperado = handler._serializar()
+        with patch.object(os, 'replace', replace_con_caida):
+            with self.assertRaises(Caida):
+                handler.crear_tareas_lote([{"nombre": f"L{i}", "descripcion": "D", "usuario": "usuario0",
+                                            "rol": "infra"} for i in range(10)])
+        return esperado, handler._serializar()
+
+    def test_lote_confirmado_se_termina_al_cargar(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que si el proceso cae después de anotar la intención, la carga termine de aplicar el lote entero
+        """
+        # Arrange
+        reemplazadas = []
+
+        def falla(nombre):
+            if nombre.startswith('particion-'):
+                reemplazadas.append(nombre)
+            return len(reemplazadas) == 2
+
+        _, con_lote = self._lote_con_caida(falla)
+
+        # Act
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(recargado._serializar(), con_lote)
+        self.assertEqual(sorted(os.listdir(self.directorio)),
+                         ['meta.json'] + [f'particion-{i:03d}.json' for i in range(4)])
+
+    def test_lote_sin_confirmar_se_descarta_al_cargar(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que si el proceso cae antes de anotar la intención, la carga no vea ninguna tarea del lote
+        """
+        # Arrange
+        sin_lote, _ = self._lote_con_caida(lambda nombre: nombre == 'intencion.json')
+
+        # Act
+        recargado = self._nuevo_handler()
+
+        # Assert
+        self.assertEqual(recargado._serializar(), sin_lote)
+        self.assertEqual(sorted(os.listdir(self.directorio)),
+                         ['meta.json'] + [f'particion-{i:03d}.json' for i in range(4)])
+
+    def test_cantidad_de_particiones_distinta(self):
+        """
+        CASO DE ERROR:
+        Prueba que no se pueda abrir un directorio con otra cantidad de particiones
+        """
+        # Arrange
+        self._poblar(self._nuevo_handler(particiones=4))
+
+        # Act & Assert
+        with self.assertRaises(ValueError) as context:
+            self._nuevo_handler(particiones=8)
+        self.assertIn("tiene 4 particiones", str(context.exception))
+
+
+class TestLectorJSONIncremental(unittest.TestCase):
+    """Pruebas para el lector de JSON en streaming"""
+
+    def test_secciones_con_bloques_pequenos(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que los elementos se lean igual aunque queden cortados entre bloques
+        """
+        # Arrange
+        data = {"seq": 12345, "usuarios": [{"alias": "ana", "nombre": "Añá"}], "vacia": [],
+                "tareas": [{"id": "1", "n": [1, 2.5, None, True]}, {"id": "2", "d": "a, b ] }"}]}
+        texto = json.dumps(data, indent=1)
+
+        # Act
+        secciones = list(LectorJSONIncremental(io.StringIO(texto), tamano_bloque=3).secciones())
+
+        # Assert
+        self.assertEqual([(clave, valor) for clave, valor, _ in secciones], [
+            ("seq", 12345), ("usuarios", data["usuarios"][0]),
+            ("tareas", data["tareas"][0]), ("tareas", data["tareas"][1])
+        ])
+        self.assertEqual(json.loads(secciones[3][2]), data["tareas"][1])
+
+    def test_json_invalido(self):
+        """
+        CASO DE ERROR:
+        Prueba que un archivo truncado produzca JSONDecodeError
+        """
+        # Arrange
+        lector = LectorJSONIncremental(io.StringIO('{"usuarios": [{"alias": "ana"}, {"ali'), tamano_bloque=4)
+
+        # Act & Assert
+        with self.assertRaises(json.JSONDecodeError):
+            list(lector.secciones())
+
+
+class TestCargaDiferida(unittest.TestCase):
+    """Pruebas para la carga en streaming con hidratación diferida de tareas"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        handler = DataHandler(self.filename)
+        handler.crear_usuario("ana", "Ana")
+        handler.crear_usuario("beto", "Beto")
+        _, self.tarea = handler.crear_tarea("T1", "Primera", "ana", "programacion")
+        _, self.otra = handler.crear_tarea("T2", "Segunda", "beto", "diseño")
+        handler.gestionar_usuario_en_tarea(self.tarea.id, "beto", "infra", "adicionar")
+        handler.gestionar_dependencia(self.otra.id, self.tarea.id, "adicionar")
+        self.esperado = handler._serializar()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def _cargar_diferido(self):
+        return DataHandler(self.filename, almacenamiento=AlmacenamientoJSON(self.filename, carga_diferida=True))
+
+    def test_tareas_se_hidratan_al_primer_acceso(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que las tareas se carguen sin hidratar y se hidraten al leer su cuerpo
+        """
+        # Act
+        handler = self._cargar_diferido()
+        tarea = handler.get_tarea_por_id(self.tarea.id)
+
+        # Assert
+        self.assertFalse(tarea.hidratada)
+        self.assertEqual(tarea.nombre, "T1")
+        self.assertIn(tarea, handler.get_usuario_por_alias("beto").tareasAsociadas)
+        self.assertFalse(tarea.hidratada)
+        self.assertEqual([a.usuarioAsignado.alias for a in tarea.usuariosAsignados], ["ana", "beto"])
+        self.assertTrue(tarea.hidratada)
+        self.assertEqual(handler._serialize_tarea(tarea), self.esperado['tareas'][0])
+
+    def test_serializar_sin_hidratar(self):
+        """
+        Prueba que volcar el estado no hidrate las tareas y produzca el mismo snapshot
+        """
+        # Arrange
+        handler = self._cargar_diferido()
+        handler.cambiar_estado_tarea(self.otra.id, "Progreso")
+        self.esperado['tareas'][1]['estado'] = "Progreso"
+        self.esperado['seq'] += 1
+
+        # Act
+        data = handler._serializar()
+
+        # Assert
+        self.assertEqual(data, self.esperado)
+        self.assertFalse(handler.get_tarea_por_id(self.tarea.id).hidratada)
+
+    def test_hidratar_no_espera_a_las_escrituras(self):
+        """
+        Prueba que leer el cuerpo de una tarea sin hidratar no espere al lock de escritura del handler
+        """
+        # Arrange
+        handler = self._cargar_diferido()
+        tarea = handler.get_tarea_por_id(self.tarea.id)
+        leido = []
+        hilo = threading.Thread(target=lambda: leido.append(tarea.descripcion), daemon=True)
+
+        # Act
+        with handler._lock:
+            hilo.start()
+            hilo.join(timeout=10)
+            bloqueado = hilo.is_alive()
+
+        # Assert
+        self.assertFalse(bloqueado, "La hidratación quedó esperando al lock de escritura")
+        self.assertEqual(leido, ["Primera"])
+        self.assertTrue(tarea.hidratada)
+        self.assertEqual(handler._serialize_tarea(tarea), self.esperado['tareas'][0])
+
+    def test_snapshot_antiguo_con_tareas_antes_que_usuarios(self):
+        """
+        Prueba que un data.json con 'tareas' antes de 'usuarios' reconstruya las asignaciones
+        """
+        # Arrange
+        with open(self.filename, 'w') as f:
+            json.dump({'tareas': self.esperado['tareas'], 'usuarios': self.esperado['usuarios']}, f)
+
+        # Act
+        diferido = self._cargar_diferido()
+        completo = DataHandler(self.filename)
+
+        # Assert
+        for handler in (diferido, completo):
+            self.assertEqual(
+                [t.id for t in handler.get_usuario_por_alias("beto").tareasAsociadas],
+                [self.tarea.id, self.otra.id]
+            )
+            self.assertEqual(handler._serializar()['tareas'], self.esperado['tareas'])
+
+
+class TestSnapshotBinario(unittest.TestCase):
+    """Pruebas para el snapshot binario (data.bin) mapeado en memoria"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        self.binario = os.path.join(self.directorio, 'data.bin')
+        self.almacenamientos = []
+        handler = DataHandler(self.filename)
+        handler.crear_usuario("ana", "Ana")
+        handler.crear_usuario("beto", "Beto Núñez")
+        self.tareas = [handler.crear_tarea(f"T{i}", f"Descripción {i} ✓", "ana", "programacion")[1]
+                       for i in range(4)]
+        handler.gestionar_usuario_en_tarea(self.tareas[0].id, "beto", "infra", "adicionar")
+        handler.gestionar_dependencia(self.tareas[1].id, self.tareas[0].id, "adicionar")
+        handler.cambiar_estado_tarea(self.tareas[2].id, "Progreso")
+        self.esperado = handler._serializar()
+
+    def tearDown(self):
+        for almacenamiento in self.almacenamientos:
+            almacenamiento.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _cargar(self, carga_diferida=True, modo_persistencia='snapshot'):
+        almacenamiento = AlmacenamientoJSON(self.filename, modo_persistencia, carga_diferida=carga_diferida,
+                                            formato_snapshot='binario')
+        self.almacenamientos.append(almacenamiento)
+        return DataHandler(self.filename, almacenamiento=almacenamiento)
+
+    def test_migracion_y_recarga(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que sin data.bin se cargue data.json, que guardar escriba data.bin y que al recargarlo
+        el estado sea el mismo, con las tareas sin hidratar hasta el primer acceso a su cuerpo
+        """
+        # Arrange
+        self._cargar().save_data()
+
+        # Act
+        os.remove(self.filename)
+        diferido = self._cargar()
+        completo = self._cargar(carga_diferida=False)
+        tarea = diferido.get_tarea_por_id(self.tareas[0].id)
+
+        # Assert
+        self.assertTrue(os.path.exists(self.binario))
+        self.assertEqual(diferido._serializar(), self.esperado)
+        self.assertEqual(completo._serializar(), self.esperado)
+        self.assertEqual(completo.verificar_indices(), [])
+        self.assertFalse(tarea.hidratada)
+        self.assertIn(tarea, diferido.get_usuario_por_alias("beto").tareasAsociadas)
+        self.assertEqual(diferido.get_tarea_por_id(self.tareas[1].id).dependencias, [self.tareas[0].id])
+        self.assertEqual(tarea.descripcion, "Descripción 0 ✓")
+        self.assertTrue(tarea.hidratada)
+        self.assertEqual(diferido._serialize_tarea(tarea), self.esperado['tareas'][0])
+
+    def test_cambios_sin_hidratar_se_conservan(self):
+        """
+        Prueba que los cambios de estado y dependencias sobre tareas sin hidratar se escriban en data.bin
+        """
+        # Arrange
+        handler = self._cargar()
+        handler.save_data()
+        handler = self._cargar()
+
+        # Act
+        handler.gestionar_dependencia(self.tareas[3].id, self.tareas[2].id, "adicionar")
+        hidratada = handler.get_tarea_por_id(self.tareas[3].id).hidratada
+        handler.cambiar_estado_tarea(self.tareas[1].id, "Finalizada")
+        recargado = self._cargar()
+
+        # Assert
+        self.assertFalse(hidratada)
+        self.assertEqual(recargado._serializar(), handler._serializar())
+        self.assertEqual(recargado.get_tarea_por_id(self.tareas[1].id).estado, "Finalizada")
+        self.assertEqual(recargado.get_tarea_por_id(self.tareas[3].id).dependencias, [self.tareas[2].id])
+
+    def test_journal_sobre_snapshot_binario(self):
+        """
+        Prueba que en modo journal se reproduzcan los cambios posteriores al último data.bin
+        """
+        # Arrange
+        handler = self._cargar(modo_persistencia='journal')
+        handler.save_data()
+        handler.crear_tarea("T4", "Después del snapshot", "beto", "diseño")
+        handler.cambiar_estado_tarea(self.tareas[0].id, "Finalizada")
+        handler.cerrar()
+
+        # Act
+        recargado = self._cargar(modo_persistencia='journal')
+
+        # Assert
+        self.assertEqual(recargado._serializar(), handler._serializar())
+        self.assertEqual(recargado.seq, self.esperado['seq'] + 2)
+
+    def test_convertidor(self):
+        """
+        Prueba que convertir_snapshot.py genere un data.bin equivalente a data.json
+        """
+        # Arrange
+        raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+        # Act
+        salida = subprocess.run([sys.executable, os.path.join(raiz, 'convertir_snapshot.py'), self.filename],
+                                capture_output=True, text=True, check=True).stdout
+        handler = self._cargar()
+
+        # Assert
+        self.assertIn("2 usuarios, 4 tareas", salida)
+        os.remove(self.filename)
+        self.assertEqual(handler._serializar(), self.esperado)
+
+    def test_archivo_invalido(self):
+        """
+        CASO DE ERROR:
+        Prueba que un data.bin que no es un snapshot binario no se cargue como vacío
+        """
+        # Arrange
+        with open(self.binario, 'wb') as f:
+            f.write(b'{"seq": 0}')
+
+        # Act & Assert
+        with self.assertRaises(ValueError) as context:
+            self._cargar()
+        self.assertIn("no es un snapshot binario", str(context.exception))
+
+    def test_formato_invalido(self):
+        """
+        CASO DE ERROR:
+        Prueba que no se acepte un formato de snapshot desconocido
+        """
+        # Act & Assert
+        with self.assertRaises(ValueError) as context:
+            AlmacenamientoJSON(self.filename, formato_snapshot='xml')
+        self.assertIn("Formato de snapshot inválido", str(context.exception))
+
+
+class TestEscrituraDiferida(unittest.TestCase):
+    """Pruebas para la persistencia en segundo plano con escritura agrupada"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def _nuevo_handler(self, **kwargs):
+        interno = AlmacenamientoJSON(self.filename)
+        return DataHandler(self.filename, almacenamiento=EscrituraDiferida(interno, **kwargs))
+
+    def test_cambios_se_agrupan_en_una_escritura(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que muchos cambios seguidos se persistan con una sola escritura y se vacíen al cerrar
+        """
+        # Arrange
+        handler = self._nuevo_handler(intervalo=60)
+
+        # Act
+        with patch.object(handler.almacenamiento.interno, 'registrar_lote',
+                          wraps=handler.almacenamiento.interno.registrar_lote) as registrar_lote:
+            for i in range(50):
+                handler.crear_usuario(f"usuario{i}", "Usuario")
+            self.assertFalse(os.path.exists(self.filename))
+            handler.cerrar()
+
+        # Assert
+        self.assertEqual(registrar_lote.call_count, 1)
+        self.assertEqual(len(DataHandler(self.filename).usuarios), 50)
+
+    def test_escritura_al_completar_lote(self):
+        """
+        Prueba que al juntar tamano_lote cambios se escriban sin esperar el intervalo
+        """
+        # Arrange
+        handler = self._nuevo_handler(intervalo=60, tamano_lote=5)
+
+        # Act
+        for i in range(5):
+            handler.crear_usuario(f"usuario{i}", "Usuario")
+        confirmado = handler.almacenamiento._condicion
+        with confirmado:
+            confirmado.wait_for(lambda: handler.almacenamiento.seq_confirmado == 5, timeout=5)
+
+        # Assert
+        self.assertEqual(len(DataHandler(self.filename).usuarios), 5)
+        handler.cerrar()
+
+    def test_fsync_per_commit_espera_la_escritura(self):
+        """
+        Prueba que en modo fsync-per-commit cada cambio esté en disco al devolver
+        """
+        # Arrange
+        handler = self._nuevo_handler(intervalo=60, durabilidad='fsync-per-commit')
+
+        # Act
+        handler.crear_usuario("ana", "Ana")
+
+        # Assert
+        self.assertTrue(handler.almacenamiento.interno.fsync)
+        self.assertIsNotNone(DataHandler(self.filename).get_usuario_por_alias("ana"))
+        handler.cerrar()
+
+    def test_esperar_commit_con_timeout(self):
+        """
+        CASO DE ERROR:
+        Prueba que esperar un cambio que nunca se escribe devuelva False al vencer el timeout
+        """
+        # Arrange
+        handler = self._nuevo_handler(durabilidad='none')
+
+        # Act
+        with patch.object(handler.almacenamiento.interno, 'registrar_lote', side_effect=OSError("disco lleno")):
+            handler.crear_usuario("ana", "Ana")
+            resultado = handler.esperar_commit(timeout=0.2)
+
+        # Assert
+        self.assertFalse(resultado)
+        self.assertTrue(handler.esperar_commit(timeout=5))
+        handler.cerrar()
+
+    def _sin_bloquearse(self, funcion, antes_de_esperar=None):
+        """Ejecuta funcion en otro hilo y falla si no termina (en lugar de colgar las pruebas)"""
+        hilo = threading.Thread(target=funcion, daemon=True)
+        hilo.start()
+        if antes_de_esperar:
+            antes_de_esperar()
+        hilo.join(timeout=10)
+        self.assertFalse(hilo.is_alive(), "La llamada quedó bloqueada")
+
+    def test_save_data_y_load_data_con_cambios_pendientes(self):
+        """
+        Prueba que guardar y recargar con cambios todavía sin escribir los persista sin bloquearse
+        """
+        # Arrange
+        handler = self._nuevo_handler(intervalo=60)
+        handler.crear_usuario("ana", "Ana")
+
+        # Act
+        self._sin_bloquearse(handler.save_data)
+        guardado = DataHandler(self.filename).get_usuario_por_alias("ana")
+        handler.crear_usuario("beto", "Beto")
+        self._sin_bloquearse(handler.load_data)
+
+        # Assert
+        self.assertIsNotNone(guardado)
+        self.assertIsNotNone(handler.get_usuario_por_alias("beto"))
+        self.assertEqual(handler.almacenamiento.seq_confirmado, 2)
+        handler.cerrar()
+        self.assertEqual(len(DataHandler(self.filename).usuarios), 2)
+
+    def test_save_data_durante_una_escritura_del_hilo(self):
+        """
+        Prueba que save_data espere la escritura en curso del hilo aunque esta necesite el lock del handler
+        """
+        # Arrange
+        handler = self._nuevo_handler(intervalo=60, tamano_lote=1)
+        interno = handler.almacenamiento.interno
+        escribiendo, seguir = threading.Event(), threading.Event()
+
+        def registrar_lote_lento(handler_, registros):
+            escribiendo.set()
+            seguir.wait(5)
+            interno.__class__.registrar_lote(interno, handler_, registros)
+
+        def soltar_escritura():
+            # save_data ya tiene el lock cuando la escritura del hilo va a serializar
+            time.sleep(0.2)
+            seguir.set()
+
+        # Act
+        with patch.object(interno, 'registrar_lote', side_effect=registrar_lote_lento):
+            handler.crear_usuario("ana", "Ana")
+            escribiendo.wait(5)
+            handler.crear_usuario("beto", "Beto")
+            self._sin_bloquearse(handler.save_data, soltar_escritura)
+
+        # Assert
+        self.assertEqual(len(DataHandler(self.filename).usuarios), 2)
+        handler.cerrar()
+
+    def test_durabilidad_invalida(self):
+        """
+        CASO DE ERROR:
+        Prueba que se rechace un modo de durabilidad desconocido
+        """
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            EscrituraDiferida(AlmacenamientoJSON(self.filename), durabilidad='siempre')
+
+
+# Worker independiente para la prueba con varios procesos: crea tareas para "ana"
+SCRIPT_WORKER = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from data_handler import DataHandler
+from storage.json_compartido import AlmacenamientoJSONCompartido
+handler = DataHandler(almacenamiento=AlmacenamientoJSONCompartido(sys.argv[2], umbral_compactacion=4096))
+for i in range(int(sys.argv[3])):
+    resultado, _ = handler.crear_tarea(f"{sys.argv[4]}-{i}", "D", "ana", "infra")
+    assert resultado
+handler.cerrar()
+"""
+
+# Importa por NDJSON, en lotes, usuarios "<prefijo>-<i>" mientras otros procesos escriben
+SCRIPT_IMPORTACION = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from data_handler import DataHandler
+from exportacion import Importacion
+from storage.json_compartido import AlmacenamientoJSONCompartido
+handler = DataHandler(almacenamiento=AlmacenamientoJSONCompartido(sys.argv[2], umbral_compactacion=4096))
+lineas = (json.dumps({"tipo": "usuario", "alias": f"{sys.argv[4]}-{i}", "nombre": "U"}) for i in range(int(sys.argv[3])))
+resumen = Importacion(handler).importar(lineas)
+assert resumen["importados"]["usuario"] == int(sys.argv[3]), resumen
+handler.cerrar()
+"""
+
+
+class TestAlmacenamientoCompartido(unittest.TestCase):
+    """Pruebas para el modo multiproceso (journal compartido con lock de archivo)"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        self.handlers = []
+
+    def tearDown(self):
+        for handler in self.handlers:
+            handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _worker(self, **kwargs):
+        # Cada handler abre sus propios descriptores, como un worker en otro proceso
+        handler = DataHandler(almacenamiento=AlmacenamientoJSONCompartido(self.filename, **kwargs))
+        self.handlers.append(handler)
+        return handler
+
+    def test_escrituras_de_otro_worker_se_ven_al_refrescar(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que cada worker vea los cambios del otro y que los números de secuencia sean globales
+        """
+        # Arrange
+        a = self._worker()
+        b = self._worker()
+
+        # Act
+        a.crear_usuario("ana", "Ana")
+        resultado, tarea = b.crear_tarea("T1", "D", "ana", "infra")  # b se pone al día antes de validar
+        a.refrescar()
+
+        # Assert
+        self.assertTrue(resultado)
+        self.assertEqual(a.get_tarea_por_id(tarea.id).nombre, "T1")
+        self.assertEqual(a.seq, b.seq)
+        self.assertEqual(a._serializar(), b._serializar())
+        self.assertEqual(a.get_orden_topologico(), [tarea.id])
+
+    def test_validacion_con_estado_de_otro_worker(self):
+        """
+        CASO DE ERROR:
+        Prueba que un worker desactualizado no pueda repetir un alias creado por otro
+        """
+        # Arrange
+        a = self._worker()
+        b = self._worker()
+        a.crear_usuario("ana", "Ana")
+
+        # Act
+        resultado, mensaje = b.crear_usuario("ana", "Otra Ana")
+
+        # Assert
+        self.assertFalse(resultado)
+        self.assertEqual(mensaje, "El alias ya está en uso")
+
+    def test_worker_atrasado_tras_varias_compactaciones(self):
+        """
+        Prueba que un worker que no leyó el log durante varias compactaciones recargue el estado completo
+        """
+        # Arrange
+        a = self._worker(umbral_compactacion=300)
+        b = self._worker(umbral_compactacion=300)
+        a.crear_usuario("ana", "Ana")
+        b.refrescar()
+
+        # Act
+        for i in range(20):
+            a.crear_tarea(f"T{i}", "D", "ana", "infra")
+        b.refrescar()
+        _, tarea = b.crear_tarea("Final", "D", "ana", "infra")
+        a.refrescar()
+
+        # Assert
+        self.assertEqual(len(b.tareas), 21)
+        self.assertEqual(a._serializar(), b._serializar())
+        self.assertEqual(self._worker()._serializar(), a._serializar())
+
+    def test_registro_a_medias_se_descarta(self):
+        """
+        Prueba que la línea incompleta de un worker caído no corrompa los registros siguientes
+        """
+        # Arrange
+        a = self._worker()
+        b = self._worker()
+        a.crear_usuario("ana", "Ana")
+        with open(self.filename + '.log', 'ab') as f:
+            f.write(b'{"seq": 2, "op": "crear_us')
+
+        # Act
+        resultado, _ = b.crear_usuario("beto", "Beto")
+        a.refrescar()
+
+        # Assert
+        self.assertTrue(resultado)
+        self.assertIsNotNone(a.get_usuario_por_alias("beto"))
+        self.assertEqual(self._worker()._serializar(), b._serializar())
+
+    def test_varios_procesos_no_pierden_escrituras(self):
+        """
+        Prueba que varios procesos escribiendo a la vez no pierdan cambios ni repitan números de secuencia
+        """
+        # Arrange
+        self._worker().crear_usuario("ana", "Ana")
+        src = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+        # Act
+        procesos = [
+            subprocess.Popen([sys.executable, '-c', SCRIPT_WORKER, src, self.filename, '40', f"p{n}"])
+            for n in range(4)
+        ]
+        codigos = [proceso.wait(timeout=60) for proceso in procesos]
+        handler = self._worker()
+
+        # Assert
+        self.assertEqual(codigos, [0, 0, 0, 0])
+        self.assertEqual(len(handler.tareas), 160)
+        self.assertEqual(handler.seq, 161)
+        self.assertEqual(len(handler.get_usuario_por_alias("ana").tareasAsociadas), 160)
+
+    def test_importacion_con_otros_procesos_escribiendo(self):
+        """
+        Prueba que los lotes de una importación tomen el lock del journal compartido como cualquier cambio
+        """
+        # Arrange
+        self._worker().crear_usuario("ana", "Ana")
+        src = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+        # Act
+        procesos = [subprocess.Popen([sys.executable, '-c', SCRIPT_IMPORTACION, src, self.filename, '2500', 'imp'])]
+        procesos += [
+            subprocess.Popen([sys.executable, '-c', SCRIPT_WORKER, src, self.filename, '40', f"p{n}"])
+            for n in range(2)
+        ]
+        codigos = [proceso.wait(timeout=60) for proceso in procesos]
+        handler = self._worker()
+
+        # Assert
+        self.assertEqual(codigos, [0, 0, 0])
+        self.assertEqual(len(handler.usuarios), 2501)
+        self.assertEqual(len(handler.tareas), 80)
+        self.assertEqual(handler.seq, 2581)
+
+    def test_desde_config_multiproceso_requiere_json(self):
+        """
+        CASO DE ERROR:
+        Prueba que el modo multiproceso rechace backends que no comparten el journal
+        """
+        # Arrange
+        class ConfigSQLite:
+            MULTIPROCESO = True
+            ALMACENAMIENTO = "sqlite"
+            ESCRITURA_DIFERIDA = False
+
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            DataHandler.desde_config(ConfigSQLite)
+
+
+SCRIPT_PRIMARIO = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from data_handler import DataHandler
+handler = DataHandler(sys.argv[2], modo_persistencia='journal', umbral_compactacion=2048)
+for i in range(int(sys.argv[3])):
+    resultado, _ = handler.crear_tarea(f"T{i}", "D", "ana", "infra")
+    assert resultado
+handler.cerrar()
+"""
+
+
+class TestAlmacenamientoReplica(unittest.TestCase):
+    """Pruebas para las réplicas de solo lectura que siguen el journal de un primario"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directorio, 'data.json')
+        self.handlers = []
+
+    def tearDown(self):
+        for handler in self.handlers:
+            handler.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def _primario(self, **kwargs):
+        handler = DataHandler(self.filename, modo_persistencia='journal', **kwargs)
+        self.handlers.append(handler)
+        return handler
+
+    def _replica(self, intervalo=0.01):
+        handler = DataHandler(almacenamiento=AlmacenamientoReplica(self.filename, intervalo=intervalo))
+        self.handlers.append(handler)
+        return handler
+
+    def test_replica_aplica_los_cambios_del_primario(self):
+        """
+        CASO DE ÉXITO:
+        Prueba que el hilo de la réplica aplique los cambios del primario, incluso tras varias compactaciones
+        """
+        # Arrange
+        primario = self._primario(umbral_compactacion=300)
+        primario.crear_usuario("ana", "Ana")
+        replica = self._replica()
+
+        # Act
+        for i in range(20):
+            primario.crear_tarea(f"T{i}", "D", "ana", "infra")
+        primario.cambiar_estado_tarea(primario.tareas[0].id, "Progreso")
+        alcanzado = replica.alcanzar(primario.seq, timeout=5)
+
+        # Assert
+        self.assertTrue(alcanzado)
+        self.assertEqual(replica._serializar(), primario._serializar())
+        self.assertEqual(replica.almacenamiento.atraso(), (0.0, 0))
+
+    def test_atraso_y_alcanzar(self):
+        """
+        Prueba que la réplica informe lo que le falta aplicar y se ponga al día al pedir un cambio
+        """
+        # Arrange
+        primario = self._primario()
+        primario.crear_usuario("ana", "Ana")
+        replica = self._replica(intervalo=60)
+
+        # Act
+        primario.crear_usuario("beto", "Beto")
+        segundos, pendientes = replica.almacenamiento.atraso()
+        alcanzado = replica.alcanzar(primario.seq, timeout=0)
+
+        # Assert
+        self.assertGreater(pendientes, 0)
+        self.assertGreaterEqual(segundos, 0)
+        self.assertTrue(alcanzado)
+        self.assertIsNotNone(replica.get_usuario_por_alias("beto"))
+        self.assertFalse(replica.alcanzar(primario.seq + 1, timeout=0))
+
+    def test_recarga_no_muestra_datos_a_medias(self):
+        """
+        Prueba que mientras la réplica recarga todo, las consultas sigan viendo los datos anteriores completos
+        """
+        # Arrange
+        primario = self._primario()
+        primario.crear_usuario("ana", "Ana")
+        _, tarea = primario.crear_tarea("T1", "D", "ana", "infra")
+        replica = self._replica(intervalo=60)
+        primario.crear_tarea("T2", "D", "ana", "infra")
+        vistas = []
+        reproducir = AlmacenamientoReplica._reproducir_journal
+
+        def observar(almacenamiento, handler):
+            # A mitad de la carga: el snapshot ya se leyo y falta el journal
+            vistas.append((len(replica.tareas), replica.get_tarea_por_id(tarea.id) is not None,
+                           replica.get_usuario_por_alias("ana") is not None))
+            reproducir(almacenamiento, handler)
+
+        # Act
+        with patch.object(AlmacenamientoReplica, '_reproducir_journal', observar), replica._lock:
+            replica.almacenamiento._recargar(replica)
+
+        # Assert
+        self.assertEqual(vistas, [(1, True, True)])
+        self.assertEqual(replica._serializar(), primario._serializar())
+        self.assertEqual(replica.verificar_indices(), [])
+        self.assertEqual(replica.get_tarea_por_id(tarea.id).nombre, "T1")
+
+    def test_replica_no_acepta_cambios(self):
+        """
+        CASO DE ERROR:
+        Prueba que la réplica no escriba en los archivos del primario
+        """
+        # Arrange
+        self._primario().crear_usuario("ana", "Ana")
+        replica = self._replica()
+        tamano = os.path.getsize(self.filename + '.log')
+
+        # Act & Assert
+        with self.assertRaises(PermissionError):
+            replica.crear_usuario("beto", "Beto")
+        with self.assertRaises(PermissionError):
+            replica.save_data()
+        self.assertEqual(os.path.getsize(self.filename + '.log'), tamano)
+
+    def test_primario_en_otro_proceso(self):
+        """
+        Prueba que la réplica siga a un primario que escribe desde otro proceso mientras ella lee
+        """
+        # Arrange
+        primario = self._primario()
+        primario.crear_usuario("ana", "Ana")
+        primario.cerrar()
+        replica = self._replica()
+        src = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+
+        # Act
+        proceso = subprocess.Popen([sys.executable, '-c', SCRIPT_PRIMARIO, src, self.filename, '100'])
+        codigo = proceso.wait(timeout=60)
+        alcanzado = replica.alcanzar(101, timeout=5)
+
+        # Assert
+        self.assertEqual(codigo, 0)
+        self.assertTrue(alcanzado)
+        self.assertEqual(len(replica.tareas), 100)
+        self.assertEqual(len(replica.get_usuario_por_alias("ana").tareasAsociadas), 100)
+        self.assertEqual(replica._serializar(), self._primario()._serializar())
+
+
+if __name__ == "__main__":
+    unittest.main()